@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 import logging
 
 from api.dependencies import get_current_user, get_admin_user
 from core.dataloaders import api_key_loader, user_loader
+from core.llm_provider import combined_hedge_stats, combined_rate_limit_stats
 from core.llm_provider.registry import MODELS
 
 logger = logging.getLogger(__name__)
@@ -17,16 +18,26 @@ class CreateKeyRequest(BaseModel):
     key_name: str
     model_name: str
     api_key: str
+    # Optional rate limits; 0 or unset means no static limit
+    rpm_limit: Optional[int] = Field(default=None, ge=0)
+    tpm_limit: Optional[int] = Field(default=None, ge=0)
+    max_concurrency: Optional[int] = Field(default=None, ge=0)
 
 class UpdateKeyRequest(BaseModel):
     key_name: Optional[str] = None
     api_key: Optional[str] = None
+    rpm_limit: Optional[int] = Field(default=None, ge=0)
+    tpm_limit: Optional[int] = Field(default=None, ge=0)
+    max_concurrency: Optional[int] = Field(default=None, ge=0)
 
 class AssignKeyRequest(BaseModel):
     username: str
     key_id: str
 
 
+RATE_LIMIT_FIELDS = ("rpm_limit", "tpm_limit", "max_concurrency")
+
+
 # ── Helpers ──
 
 def mask_api_key(api_key: str) -> str:
@@ -64,6 +75,7 @@ async def create_key(req: CreateKeyRequest, admin: str = Depends(get_admin_user)
         "provider": provider,
         "api_key": req.api_key,
         "created_by": admin,
+        **{field: getattr(req, field) for field in RATE_LIMIT_FIELDS if getattr(req, field) is not None},
     })
     return {"key": {**key, "api_key": mask_api_key(key["api_key"])}}
 
@@ -82,6 +94,9 @@ async def update_key(key_id: str, req: UpdateKeyRequest, admin: str = Depends(ge
         update_data["key_name"] = req.key_name
     if req.api_key is not None:
         update_data["api_key"] = req.api_key
+    for field in RATE_LIMIT_FIELDS:
+        if getattr(req, field) is not None:
+            update_data[field] = getattr(req, field)
 
     updated = api_key_loader.save_key(update_data)
     return {"key": {**updated, "api_key": mask_api_key(updated["api_key"])}}
@@ -94,6 +109,18 @@ async def delete_key(key_id: str, admin: str = Depends(get_admin_user)):
     return {"status": "deleted"}
 
 
+@router.get("/rate-limits")
+async def get_rate_limits(admin: str = Depends(get_admin_user)):
+    """Live rate-limiter state per process and key/model (API and experiment workers): limits, in-flight calls, throttles, retries, waits."""
+    return {"limiters": combined_rate_limit_stats()}
+
+
+@router.get("/hedging")
+async def get_hedging(admin: str = Depends(get_admin_user)):
+    """Hedged-call stats per primary key, over the API and experiment workers: hedge rate, failovers, backup wins, wasted cost."""
+    return {"keys": combined_hedge_stats()}
+
+
 # ── Admin: Assignments ──
 
 @router.get("/assignments")
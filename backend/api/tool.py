@@ -3,7 +3,7 @@ from typing import Dict, Any
 import logging
 
 from core.workflow.tools.resolver import get_catalog_for_user
-from core.workflow.tools.runner import run_tool as run_tool_service
+from core.workflow.tools.runner import run_tool as run_tool_service, cancel_run
 
 from .dependencies import get_current_user
 
@@ -29,17 +29,34 @@ def tools_run(data: Dict[str, Any] = Body(...), current_user: str = Depends(get_
         tool_name = data.get("tool_name")
         inputs = data.get("inputs", {})
         allow_side_effects = bool(data.get("allow_side_effects", False))
+        timeout = data.get("timeout_seconds")
+        run_id = data.get("run_id")
 
         if not tool_name:
             raise HTTPException(status_code=400, detail="Field 'tool_name' is required")
+        if timeout is not None:
+            try:
+                timeout = float(timeout)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Field 'timeout_seconds' must be a number")
 
-        result = run_tool_service(tool_name, inputs, allow_side_effects, current_user=current_user)
+        # Scope run ids per user so one user cannot cancel another's run
+        scoped_run_id = f"{current_user}:{run_id}" if run_id else None
+
+        result = run_tool_service(
+            tool_name, inputs, allow_side_effects, current_user=current_user,
+            timeout=timeout, run_id=scoped_run_id,
+        )
 
         # Map error cases to HTTP codes for transport semantics
         if not result.get("ok", False):
             code = result.get("error", {}).get("code")
             if code in {"unknown_tool", "validation_error", "side_effects_not_allowed", "no_input_model"}:
                 raise HTTPException(status_code=400, detail=result["error"])
+            elif code == "timeout":
+                raise HTTPException(status_code=504, detail=result["error"])
+            elif code == "cancelled":
+                raise HTTPException(status_code=409, detail=result["error"])
             else:
                 raise HTTPException(status_code=500, detail=result.get("error", {"message": "Unknown error"}))
 
@@ -50,3 +67,16 @@ def tools_run(data: Dict[str, Any] = Body(...), current_user: str = Depends(get_
     except Exception as e:
         logger.error(f"Error in tools_run: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post("/cancel")
+def tools_cancel(data: Dict[str, Any] = Body(...), current_user: str = Depends(get_current_user)) -> Dict[str, Any]:
+    """Cancel an in-flight /run call that was started with the given run_id."""
+    run_id = data.get("run_id")
+    if not run_id:
+        raise HTTPException(status_code=400, detail="Field 'run_id' is required")
+
+    if not cancel_run(f"{current_user}:{run_id}"):
+        raise HTTPException(status_code=404, detail=f"No active run with id '{run_id}'")
+
+    return {"status": "success", "run_id": run_id, "cancelled": True}
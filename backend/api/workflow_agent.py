@@ -2,6 +2,7 @@
 
 from fastapi import APIRouter, HTTPException, Body, Depends
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from typing import Dict, Any, List, Optional
 import logging
 import datetime
@@ -167,10 +168,15 @@ async def process_message_stream(data: Dict[str, Any] = Body(...), current_user:
 
     async def event_generator():
         trace = []  # Collect trace events for persistence (lightweight)
-        orchestrator = WorkflowOrchestrator(dataset=dataset, key_name=key_name)
 
         try:
-            for event in orchestrator.process_message_streaming(user_message, state, trace_recorder=trace_recorder):
+            # The orchestrator makes blocking LLM calls; drive it from the
+            # threadpool so this generator never stalls the event loop.
+            orchestrator = await run_in_threadpool(
+                WorkflowOrchestrator, dataset=dataset, key_name=key_name
+            )
+            events = orchestrator.process_message_streaming(user_message, state, trace_recorder=trace_recorder)
+            async for event in iterate_in_threadpool(events):
                 # Convert event to stream format
                 if event.type == "decision":
                     event_data = {
@@ -198,6 +204,18 @@ async def process_message_stream(data: Dict[str, Any] = Body(...), current_user:
                     trace.append(event_data)
                     yield json.dumps(event_data) + "\n"
 
+                elif event.type == "partial":
+                    # Live UI feedback only; not persisted in the trace
+                    event_data = {
+                        "event": "partial",
+                        "source": event.source,
+                        "field": event.field,
+                        "delta": event.delta,
+                        "value": event.value,
+                        "timestamp": event.timestamp.isoformat()
+                    }
+                    yield json.dumps(event_data, default=str) + "\n"
+
                 elif event.type == "final":
                     result = event.result
 
@@ -219,7 +237,9 @@ async def process_message_stream(data: Dict[str, Any] = Body(...), current_user:
                     }
 
                     if conversation_id:
-                        save_result = save_conversation(conversation_id, updated_messages, current_user)
+                        save_result = await run_in_threadpool(
+                            save_conversation, conversation_id, updated_messages, current_user
+                        )
                         if save_result.get("success"):
                             cumulative_totals = {
                                 "total_cost": save_result["total_cost"],
@@ -256,7 +276,7 @@ async def process_message_stream(data: Dict[str, Any] = Body(...), current_user:
                 error_messages = state_to_stored_messages_with_trace(
                     state, trace, error_message=str(e), cost_info=None
                 )
-                save_conversation(conversation_id, error_messages, current_user)
+                await run_in_threadpool(save_conversation, conversation_id, error_messages, current_user)
 
             yield json.dumps(error_data) + "\n"
 
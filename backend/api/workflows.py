@@ -1,14 +1,19 @@
-from fastapi import APIRouter, HTTPException, Body, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Body, Depends
 from fastapi.responses import JSONResponse, Response
 from typing import Dict, Any, Optional
 import logging
 import os
 import json
 import datetime
+import time
 import shutil
 import copy
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Lock
 
-from core.dataloaders.projects_loader import get_project, project_exists
+from core.dataloaders.projects_loader import get_project, invalidate_project_cache, project_exists
 from core.dataloaders.datasets_loader import get_patient_dataset_summary, get_patient_details
 from core.dataloaders.workflow_def_loader import (
     get_workflow_def, save_workflow_def, list_workflow_defs,
@@ -21,12 +26,33 @@ from core.dataloaders.experiment_loader import (
     get_experiment_details,
     get_experiments_for_project,
     get_patient_experiments_for_project,
-    invalidate_experiment_cache
 )
 from core.workflow_service.run_workflow_delirium import run_workflow as run_workflow_delirium
-from core.workflow_service.run_workflow_sdoh import run_workflow as run_workflow_sdoh
+from core.workflow_service.run_workflow_sdoh import NOTE_FLAG_CRITERIA, complete_batch_workflow, prepare_batch_workflow
+from core.workflow_service.workflow_executor import (
+    CompiledWorkflow, ConcurrencyBudget, WorkflowCompileError, compile_workflow, concurrency_scope
+)
+from core.workflow_service.derivation import Derivation, definition_fingerprints, patient_fingerprint, prune_workflow
 from core.workflow_service.utils import CostTracker
+from core.workflow_service.forecast import forecast_experiment
+from core.dataloaders.api_key_loader import get_key_by_name, invalidate_cache as invalidate_key_cache
+from core.dataloaders.user_loader import invalidate_user_cache
+from core.dataloaders.custom_tool_loader import invalidate_cache as invalidate_custom_tool_cache
+from core.dataloaders.run_stats_loader import append_run_observation
+from core.dataloaders.experiment_results_loader import (
+    append_patient_values, compact_results, create_results, forget_results, read_results
+)
+from core.dataloaders.job_queue_loader import (
+    ACTIVE_STATES, LOST_REASON, PAUSE_REASON, REQUEUE_REASON,
+    delete_job, enqueue_job, get_job, get_patient_runs, record_patient_run,
+    request_job_action, update_job_status
+)
+from core.llm_provider.batch import run_batch
+from core.llm_provider.registry import MODELS
+from core.llm_provider.deadline import CallCancelled, CancellationToken, DeadlineExceeded, deadline_scope
+from core.llm_provider.hedge import HedgePolicy, hedge_scope
 from core.workflow.schemas.tool_inputs import PromptInput
+from core.workflow.tools.base import meta_from_llm_result
 from .dependencies import get_current_user
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
@@ -34,9 +60,35 @@ logger = logging.getLogger(__name__)
 
 EXPERIMENTS_DIR = "experiments"
 
+# Default wall-clock budget (seconds) for one patient's workflow run (0 disables)
+EXPERIMENT_PATIENT_TIMEOUT_SECONDS = float(os.getenv("EXPERIMENT_PATIENT_TIMEOUT_SECONDS", "900"))
+
+# Patients an online experiment runs at once; requests may override with patient_concurrency
+EXPERIMENT_PATIENT_CONCURRENCY = int(os.getenv("EXPERIMENT_PATIENT_CONCURRENCY", "4"))
+EXPERIMENT_MAX_PATIENT_CONCURRENCY = int(os.getenv("EXPERIMENT_MAX_PATIENT_CONCURRENCY", "32"))
+# Threads an online experiment runs at once, patients, concurrent steps and loop iterations together
+EXPERIMENT_MAX_IN_FLIGHT = int(os.getenv("EXPERIMENT_MAX_IN_FLIGHT", "32"))
+
+# Maximum forecast cost (USD) of an experiment run; larger runs are rejected (0 disables)
+EXPERIMENT_MAX_COST_USD = float(os.getenv("EXPERIMENT_MAX_COST_USD", "0"))
+
+# Attempts a failing patient gets, across resumes, before it stays failed (requests may override)
+EXPERIMENT_PATIENT_MAX_ATTEMPTS = int(os.getenv("EXPERIMENT_PATIENT_MAX_ATTEMPTS", "3"))
+
+# Wall-clock budget (seconds) for a batch-mode experiment's provider jobs (0 disables)
+EXPERIMENT_BATCH_TIMEOUT_SECONDS = float(os.getenv("EXPERIMENT_BATCH_TIMEOUT_SECONDS", str(26 * 3600)))
 
-def create_experiment_folder(experiment_name: str, project_name: str, workflow_name: str, dataset_name: str):
-    """Create experiment directory structure with metadata."""
+# Cancellation tokens for queued/running experiments, keyed by experiment name
+_experiment_tokens: Dict[str, CancellationToken] = {}
+_experiment_tokens_lock = Lock()
+
+# Worker running each experiment in this process; its status writes only apply while it owns the job
+_experiment_workers: Dict[str, str] = {}
+
+
+def create_experiment_folder(experiment_name: str, project_name: str, workflow_name: str, dataset_name: str,
+                             derived_from: Optional[Dict[str, Any]] = None):
+    """Create experiment directory structure with metadata (and provenance, for a derived experiment)."""
     experiment_dir = os.path.join(EXPERIMENTS_DIR, experiment_name)
     os.makedirs(experiment_dir, exist_ok=True)
 
@@ -52,104 +104,73 @@ def create_experiment_folder(experiment_name: str, project_name: str, workflow_n
         "total_patients": 0,
         "total_encounters": 0
     }
+    if derived_from:
+        metadata["derived_from"] = derived_from
 
     metadata_path = os.path.join(experiment_dir, "metadata.json")
     with open(metadata_path, 'w') as f:
         json.dump(metadata, f, indent=2)
 
-    # Initialize empty results file with new structure
-    results_path = os.path.join(experiment_dir, "results.json")
-    with open(results_path, 'w') as f:
-        json.dump({"output_definitions": [], "output_values": []}, f, indent=2)
+    # Start an empty results log
+    create_results(experiment_name)
 
     logger.info(f"Created experiment folder: {experiment_name}")
     return experiment_dir
 
 
+def _write_json_atomic(path: str, data: Any):
+    """Write JSON to a temp file and rename it over path, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
 def append_patient_result(experiment_name: str, patient_result: Dict[str, Any]):
     """
-    Append a patient's results to the experiment and update metadata.
+    Append a patient's results to the experiment's values log and update metadata counts.
+    Values the patient already has (from an attempt that was written but not
+    logged in the ledger before a crash) are replaced, so a retry can't duplicate them.
 
     Args:
         experiment_name: Name of the experiment
         patient_result: Dict containing {mrn, csn, output_definitions, output_values}
     """
-    experiment_dir = os.path.join(EXPERIMENTS_DIR, experiment_name)
-    results_path = os.path.join(experiment_dir, "results.json")
-    metadata_path = os.path.join(experiment_dir, "metadata.json")
-
-    # Read current results
-    with open(results_path, 'r') as f:
-        data = json.load(f)
-
-    # Merge definitions (dedupe by id)
-    new_definitions = patient_result.get("output_definitions", [])
-    existing_def_ids = {d["id"] for d in data.get("output_definitions", [])}
-    for new_def in new_definitions:
-        if new_def["id"] not in existing_def_ids:
-            data.setdefault("output_definitions", []).append(new_def)
-            existing_def_ids.add(new_def["id"])
-
-    # Append output values
     new_values = patient_result.get("output_values", [])
-    data.setdefault("output_values", []).extend(new_values)
-
-    # Write updated results
-    with open(results_path, 'w') as f:
-        json.dump(data, f, indent=2)
-
-    # Update metadata counts
+    total_patients, total_encounters = append_patient_values(
+        experiment_name,
+        patient_result.get("mrn"),
+        patient_result.get("output_definitions", []),
+        new_values,
+    )
+
+    metadata_path = os.path.join(EXPERIMENTS_DIR, experiment_name, "metadata.json")
     with open(metadata_path, 'r') as f:
         metadata = json.load(f)
 
-    # Count unique patients and encounters from output values metadata
-    patients_seen = set()
-    encounters_seen = set()
-    for v in data.get("output_values", []):
-        patient_id = v.get("metadata", {}).get("patient_id", "")
-        encounter_id = v.get("metadata", {}).get("encounter_id", "")
-        if patient_id:
-            patients_seen.add(str(patient_id))
-        if patient_id and encounter_id:
-            encounters_seen.add((str(patient_id), str(encounter_id)))
-
-    metadata["total_patients"] = len(patients_seen)
-    metadata["total_encounters"] = len(encounters_seen)
+    metadata["total_patients"] = total_patients
+    metadata["total_encounters"] = total_encounters
     metadata["last_modified_date"] = datetime.datetime.now().isoformat()
 
-    with open(metadata_path, 'w') as f:
-        json.dump(metadata, f, indent=2)
+    _write_json_atomic(metadata_path, metadata)
 
     logger.info(f"Appended {len(new_values)} values for patient {patient_result.get('mrn')} to experiment {experiment_name}")
 
 
-def create_status_file(experiment_name: str, total_patients: int):
-    """Create status.json file for tracking experiment progress."""
-    experiment_dir = os.path.join(EXPERIMENTS_DIR, experiment_name)
-    status_path = os.path.join(experiment_dir, "status.json")
-
-    status = {
-        "status": "pending",
-        "progress": {
-            "total_patients": total_patients,
-            "processed_count": 0,
-            "failed_count": 0,
-            "current_patient_mrn": None
-        },
-        "started_at": None,
-        "completed_at": None,
-        "total_flags_detected": 0,
-        "errors": []
-    }
-
-    with open(status_path, 'w') as f:
-        json.dump(status, f, indent=2)
-
-    logger.info(f"Created status file for experiment: {experiment_name}")
-
-
 def update_status_file(experiment_name: str, updates: Dict[str, Any]):
-    """Update status.json file with new data."""
+    """
+    Update an experiment's status with new data.
+    Queued experiments keep their status in the job queue; older ones in status.json.
+    """
+    try:
+        with _experiment_tokens_lock:
+            worker_id = _experiment_workers.get(experiment_name)
+        if update_job_status(experiment_name, updates, worker_id):
+            return
+    except Exception as e:
+        logger.error(f"Error updating job status for {experiment_name}: {e}")
+        return
+
     experiment_dir = os.path.join(EXPERIMENTS_DIR, experiment_name)
     status_path = os.path.join(experiment_dir, "status.json")
 
@@ -179,7 +200,27 @@ def update_status_file(experiment_name: str, updates: Dict[str, Any]):
 
 
 def read_status_file(experiment_name: str) -> Optional[Dict[str, Any]]:
-    """Read status.json file and return status data."""
+    """Read an experiment's status: from the job queue, else its status.json."""
+    try:
+        job = get_job(experiment_name)
+    except Exception as e:
+        logger.error(f"Error reading job status for {experiment_name}: {e}")
+        job = None
+    if job:
+        return {
+            "status": job["state"],
+            **job["status"],
+            "job": {
+                "mode": job["kind"],
+                "attempts": job["attempts"],
+                "worker_id": job["worker_id"],
+                "heartbeat_at": datetime.datetime.fromtimestamp(job["heartbeat_at"]).isoformat()
+                if job["heartbeat_at"] else None,
+                "requested": job["control"],
+                "queued_at": datetime.datetime.fromtimestamp(job["created_at"]).isoformat(),
+            }
+        }
+
     experiment_dir = os.path.join(EXPERIMENTS_DIR, experiment_name)
     status_path = os.path.join(experiment_dir, "status.json")
 
@@ -238,7 +279,7 @@ def get_experiment(experiment_name: str, current_user: str = Depends(get_current
 
 @router.get("/experiments/{experiment_name}/status")
 def get_experiment_status(experiment_name: str, current_user: str = Depends(get_current_user)) -> Dict[str, Any]:
-    """Get execution status and progress of an experiment."""
+    """Get execution status and progress of an experiment (from the job queue for queued runs)."""
     try:
         experiment_dir = os.path.join(EXPERIMENTS_DIR, experiment_name)
 
@@ -327,11 +368,18 @@ def delete_experiment(experiment_name: str, current_user: str = Depends(get_curr
                     detail="Access denied to this experiment's project"
                 )
 
+        job = get_job(experiment_name)
+        if job and job["state"] in ACTIVE_STATES:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Experiment '{experiment_name}' is {job['state']}; cancel it before deleting"
+            )
+
         # Delete experiment directory
         shutil.rmtree(experiment_dir)
-
-        # Invalidate cache
-        invalidate_experiment_cache()
+        forget_results(experiment_name)
+        if job:
+            delete_job(experiment_name)
 
         logger.info(f"Deleted experiment: {experiment_name}")
 
@@ -344,6 +392,102 @@ def delete_experiment(experiment_name: str, current_user: str = Depends(get_curr
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+def _request_job_action(experiment_name: str, action: str, current_user: str,
+                        request_updates: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Check access to an experiment and pass a cancel/pause/resume request to its queue job."""
+    experiment_dir = os.path.join(EXPERIMENTS_DIR, experiment_name)
+
+    if not os.path.exists(experiment_dir):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Experiment '{experiment_name}' not found"
+        )
+
+    # Check permissions: must be able to access the experiment's project
+    metadata_path = os.path.join(experiment_dir, "metadata.json")
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+
+    project_name = metadata.get("project_name")
+    if project_name:
+        project = get_project(project_name, current_user)
+        if not project:
+            raise HTTPException(
+                status_code=403,
+                detail="Access denied to this experiment's project"
+            )
+
+    try:
+        state = request_job_action(experiment_name, action, request_updates)
+    except KeyError:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Experiment '{experiment_name}' was not run from the job queue"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    logger.info(f"{action.capitalize()} requested for experiment {experiment_name} by {current_user}")
+    return {"status": "success", "experiment_name": experiment_name, "experiment_status": state}
+
+
+@router.post("/experiments/{experiment_name}/cancel")
+def cancel_experiment(experiment_name: str, current_user: str = Depends(get_current_user)) -> Dict[str, Any]:
+    """
+    Cancel a queued, paused or running experiment. A running one stops at its
+    worker's next heartbeat; in-flight LLM calls are aborted cooperatively.
+    """
+    try:
+        return {**_request_job_action(experiment_name, "cancel", current_user), "cancelled": True}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error cancelling experiment: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post("/experiments/{experiment_name}/pause")
+def pause_experiment(experiment_name: str, current_user: str = Depends(get_current_user)) -> Dict[str, Any]:
+    """
+    Pause a queued or running online experiment. A running one stops at its
+    worker's next heartbeat; patients it interrupts run again on POST .../resume.
+    Batch experiments can't be paused (409): their provider jobs keep running and billing.
+    """
+    try:
+        return _request_job_action(experiment_name, "pause", current_user)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error pausing experiment: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post("/experiments/{experiment_name}/resume")
+def resume_experiment(
+    experiment_name: str,
+    data: Dict[str, Any] = Body(default={}),
+    current_user: str = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Queue a paused, failed, partially complete or cancelled experiment again.
+    It skips the patients it already completed and retries failed ones per
+    the retry policy (body: retry_failed, max_patient_attempts; defaults to
+    the experiment's own).
+    """
+    try:
+        request_updates = {k: data[k] for k in ("retry_failed", "max_patient_attempts") if k in data}
+        _retry_policy(request_updates)
+        return _request_job_action(experiment_name, "resume", current_user, request_updates)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error resuming experiment: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @router.get("/projects/{project_name}/experiments")
 def get_project_experiments(project_name: str, current_user: str = Depends(get_current_user)) -> Dict[str, Any]:
     """Get all workflow runs (experiments) for a specific project."""
@@ -409,6 +553,268 @@ def _extract_analyze_steps(steps):
     return analyze_steps
 
 
+def _finish_experiment(
+    experiment_name: str,
+    aggregate_tracker: CostTracker,
+    per_patient_costs: Dict[str, Any],
+    token: CancellationToken,
+    processed_count: int,
+    error_count: int,
+    project_name: str = None,
+    workflow_name: str = None,
+    key_name: str = None,
+    mode: str = "online",
+    wall_seconds: float = 0.0,
+    resumed: bool = False,
+    ledger: bool = False,
+):
+    """
+    Write the cost summary, billing entry and run stats, then set the final status.
+    A run its worker paused or handed back to the queue is billed when it finally ends.
+    With a completion ledger, only spend logged since the last billing entry is billed,
+    so an experiment resumed after it ended isn't billed twice.
+    """
+    interrupted = _interrupted_status(token, mode)
+    if interrupted == "lost":
+        # Another worker owns the job now and writes its outcome
+        return
+
+    cost_summary = aggregate_tracker.summary()
+    cost_summary["per_patient"] = per_patient_costs
+
+    # Fold the values log into results.json, with the cost summary
+    try:
+        compact_results(experiment_name, cost_summary)
+    except Exception as e:
+        logger.error(f"Error compacting results for {experiment_name}: {e}")
+
+    if interrupted is not None:
+        update_status_file(experiment_name, {"status": interrupted})
+        return
+
+    # Append billing entry to project ledger
+    if project_name:
+        try:
+            from core.dataloaders.billing_loader import append_billing_entry
+            billed_summary, billed_through = cost_summary, None
+            if ledger:
+                billed_summary, billed_through = _unbilled_costs(experiment_name)
+            append_billing_entry(
+                project_name=project_name,
+                experiment_name=experiment_name,
+                workflow_name=workflow_name or "",
+                cost_summary=billed_summary,
+            )
+            if billed_through is not None:
+                update_status_file(experiment_name, {"billed_through_run": billed_through})
+        except Exception as e:
+            logger.error(f"Error appending billing for {experiment_name}: {e}")
+
+    # Record observed throughput for future forecasts (complete, uninterrupted runs only)
+    key_costs = cost_summary.get("api_key_costs", {}).get(key_name) if key_name else None
+    if key_costs and key_costs.get("calls") and processed_count and not token.cancelled and not resumed:
+        try:
+            key_record = get_key_by_name(key_name)
+            append_run_observation(
+                experiment_name=experiment_name,
+                model_name=key_record["model_name"],
+                mode=mode,
+                patients=processed_count,
+                llm_calls=key_costs["calls"],
+                input_tokens=key_costs["input_tokens"],
+                output_tokens=key_costs["output_tokens"],
+                cost=key_costs["cost"],
+                wall_seconds=round(wall_seconds, 3),
+            )
+        except Exception as e:
+            logger.error(f"Error recording run stats for {experiment_name}: {e}")
+
+    # Determine final status
+    if token.cancelled:
+        final_status = "cancelled"
+    elif error_count > 0 and processed_count == 0:
+        final_status = "failed"
+    elif error_count > 0:
+        final_status = "partial_complete"
+    else:
+        final_status = "completed"
+
+    # Update final status
+    update_status_file(experiment_name, {
+        "status": final_status,
+        "completed_at": datetime.datetime.now().isoformat()
+    })
+
+
+def _unbilled_costs(experiment_name: str):
+    """Cost summary of the ledger entries not billed yet, and the id of the last one."""
+    billed_through = (read_status_file(experiment_name) or {}).get("billed_through_run", 0)
+    tracker = CostTracker()
+    for entry in get_patient_runs(experiment_name):
+        if entry["id"] > billed_through:
+            tracker.merge_dict(entry["costs"])
+            billed_through = entry["id"]
+    return tracker.summary(), billed_through
+
+
+def _interrupted_status(token: CancellationToken, mode: str) -> Optional[str]:
+    """Status of a run its worker stopped without a cancel: paused, back to pending, or lost."""
+    if not token.cancelled:
+        return None
+    if token.reason == LOST_REASON:
+        return "lost"
+    # Batch runs can't be paused; one handed back to the queue re-attaches to its provider jobs
+    if mode == "online" and token.reason == PAUSE_REASON:
+        return "paused"
+    if token.reason == REQUEUE_REASON:
+        return "pending"
+    return None
+
+
+def _record_patient_error(experiment_name: str, mrn, error: str, error_count: int):
+    """Append a patient error to status.json and update the failed count."""
+    current_status = read_status_file(experiment_name)
+    if current_status:
+        errors = current_status.get("errors", [])
+        errors.append({
+            "mrn": str(mrn),
+            "error": error
+        })
+        update_status_file(experiment_name, {
+            "progress.failed_count": error_count,
+            "errors": errors
+        })
+
+
+@dataclass
+class _PatientRun:
+    """Outcome of one patient's workflow run, handed back to the experiment's writer."""
+    mrn: Any
+    csn: Any = None
+    tracker: CostTracker = field(default_factory=CostTracker)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancelled: bool = False
+    fingerprint: Optional[str] = None    # Patient data fingerprint, when every definition's values are complete
+
+
+@dataclass
+class RetryPolicy:
+    """Which failed patients a resumed experiment runs again."""
+    retry_failed: bool = True
+    max_attempts: int = EXPERIMENT_PATIENT_MAX_ATTEMPTS   # Failed attempts a patient may have, then it stays failed
+
+
+@dataclass
+class _LedgerState:
+    """An experiment's progress rebuilt from its completion ledger."""
+    tracker: CostTracker = field(default_factory=CostTracker)
+    per_patient_costs: Dict[str, Any] = field(default_factory=dict)
+    processed_count: int = 0
+    error_count: int = 0
+    total_flags: int = 0
+    errors: list = field(default_factory=list)
+    finished: set = field(default_factory=set)    # MRNs not to run again
+    retrying: set = field(default_factory=set)    # Failed MRNs the retry policy runs again
+    entries: int = 0
+
+
+def _restore_from_ledger(experiment_name: str, retry_policy: RetryPolicy) -> _LedgerState:
+    """
+    Rebuild costs, counts and errors from the ledger. All logged spend counts,
+    interrupted and retried attempts included; a patient's latest outcome
+    decides whether it is done, failed, or runs again.
+    """
+    state = _LedgerState()
+    latest: Dict[str, Dict[str, Any]] = {}
+    failures: Dict[str, int] = {}
+    patient_costs: Dict[str, CostTracker] = {}
+    for entry in get_patient_runs(experiment_name):
+        state.entries += 1
+        state.tracker.merge_dict(entry["costs"])
+        patient_costs.setdefault(entry["mrn"], CostTracker()).merge_dict(entry["costs"])
+        if entry["outcome"] == "failed":
+            failures[entry["mrn"]] = failures.get(entry["mrn"], 0) + 1
+        if entry["outcome"] != "interrupted":
+            latest[entry["mrn"]] = entry
+
+    for mrn, entry in latest.items():
+        if entry["outcome"] == "completed":
+            state.processed_count += 1
+            state.total_flags += entry["flags"]
+            state.per_patient_costs[mrn] = patient_costs[mrn].summary()
+            state.finished.add(mrn)
+        elif retry_policy.retry_failed and failures[mrn] < retry_policy.max_attempts:
+            state.retrying.add(mrn)
+        else:
+            state.error_count += 1
+            state.errors.append({"mrn": mrn, "error": entry["error"]})
+            state.finished.add(mrn)
+    return state
+
+
+def _record_hedge_waste(tracker: CostTracker, result) -> None:
+    """Bill a losing hedged request that completed after its call returned."""
+    tracker.record("hedge_waste", meta_from_llm_result(result), 0)
+
+
+def _run_patient(
+    mrn,
+    plan: CompiledWorkflow,
+    dataset_name: str,
+    current_user: str,
+    patient_timeout: Optional[float],
+    token: CancellationToken,
+    hedge_policy: Optional[HedgePolicy],
+    derivation: Optional[Derivation] = None,
+    budget: Optional[ConcurrencyBudget] = None,
+) -> _PatientRun:
+    """
+    Run the plan on one patient's first encounter. Writes nothing and never raises.
+    With a derivation, a patient whose source values can be reused gets copies
+    of them and runs only the definitions that changed. Concurrent steps and
+    loop iterations draw their threads from the experiment's budget.
+    """
+    outcome = _PatientRun(mrn=mrn)
+    if token.cancelled:
+        outcome.cancelled = True
+        return outcome
+
+    try:
+        # Get full patient details to access encounters
+        patient_details = get_patient_details(str(mrn), dataset_name, current_user)
+        if not patient_details or not patient_details.get("encounters"):
+            logger.warning(f"Patient {mrn} has no encounters, skipping")
+            outcome.error = "No encounters found"
+            return outcome
+
+        outcome.csn = patient_details["encounters"][0].get("csn")
+        fingerprint = patient_fingerprint(patient_details)
+        copied = derivation.copied_values(mrn, fingerprint) if derivation else None
+        # Spend lands in outcome.tracker even for cancelled / timed-out patients
+        # Hedged requests that lost but still completed are billed to the patient too
+        with deadline_scope(patient_timeout, token=token), \
+                hedge_scope(hedge_policy, on_waste=functools.partial(_record_hedge_waste, outcome.tracker)), \
+                concurrency_scope(budget):
+            if copied is None:
+                outcome.result = plan.run(mrn, outcome.csn, outcome.tracker)
+            elif derivation.plan is not None:
+                outcome.result = derivation.plan.run(mrn, outcome.csn, outcome.tracker)
+            else:
+                outcome.result = {"mrn": mrn, "csn": outcome.csn, "output_values": [], "step_errors": []}
+        if copied is not None:
+            outcome.result["output_definitions"] = [dict(d) for d in derivation.definitions]
+            outcome.result["output_values"] = copied + outcome.result["output_values"]
+        if not outcome.result.get("step_errors"):
+            outcome.fingerprint = fingerprint
+    except CallCancelled:
+        outcome.cancelled = True
+    except Exception as e:
+        logger.error(f"Error processing patient {mrn}: {e}")
+        outcome.error = str(e)
+    return outcome
+
+
 def _process_experiment_in_background(
     experiment_name: str,
     patients: list,
@@ -418,60 +824,105 @@ def _process_experiment_in_background(
     key_name: str,
     project_name: str = None,
     workflow_name: str = None,
+    patient_timeout: Optional[float] = None,
+    hedge_policy: Optional[HedgePolicy] = None,
+    plan: Optional[CompiledWorkflow] = None,
+    patient_concurrency: Optional[int] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    derivation: Optional[Derivation] = None,
 ):
     """
     Background task to process experiment patients.
-    Updates status file after each patient and handles errors.
+    Runs the compiled workflow plan on each patient's first encounter, up to
+    patient_concurrency (EXPERIMENT_PATIENT_CONCURRENCY) patients at a time.
+    Patients, concurrent steps and loop iterations share EXPERIMENT_MAX_IN_FLIGHT
+    threads: what the patients leave over is the budget their fan-outs draw from.
+    Results, status updates and cost merges are made by this thread alone, in
+    dataset order, so the output doesn't depend on which patient finishes first.
+    Stops between (or during) patients when the experiment is cancelled.
+    With a hedge_policy, slow or failing analysis calls are hedged to its fallback keys.
+    Each patient attempt is logged to the completion ledger right after its
+    results are written. A resumed run rebuilds its counts, costs and errors
+    from the ledger, skips finished patients and runs failed ones again as
+    retry_policy allows. A derived experiment (derivation) copies the source's
+    values of unchanged definitions instead of recomputing them.
     """
+    with _experiment_tokens_lock:
+        token = _experiment_tokens.setdefault(experiment_name, CancellationToken())
+    if patient_timeout is None:
+        patient_timeout = EXPERIMENT_PATIENT_TIMEOUT_SECONDS or None
+
     try:
-        # Mark as running
-        update_status_file(experiment_name, {
-            "status": "running",
-            "started_at": datetime.datetime.now().isoformat()
-        })
+        started = time.monotonic()
 
-        processed_count = 0
-        error_count = 0
-        total_flags = 0
-        aggregate_tracker = CostTracker()
-        per_patient_costs = {}
+        # Pick up where a paused, interrupted or ended run of this experiment stopped
+        ledger = _restore_from_ledger(experiment_name, retry_policy or RetryPolicy())
+        processed_count = ledger.processed_count
+        error_count = ledger.error_count
+        total_flags = ledger.total_flags
+        aggregate_tracker = ledger.tracker
+        per_patient_costs = ledger.per_patient_costs
+        resumed = ledger.entries > 0
 
-        for patient_summary in patients:
-            mrn = patient_summary.get("mrn")
+        # Mark as running
+        status_updates = {"status": "running"}
+        if resumed:
+            patients = [p for p in patients if str(p.get("mrn")) not in ledger.finished]
+            logger.info(f"Resuming experiment {experiment_name}: {len(ledger.finished)} patients done, "
+                        f"{len(patients)} to go ({len(ledger.retrying)} retried)")
+            status_updates.update({
+                "progress.processed_count": processed_count,
+                "progress.failed_count": error_count,
+                "total_flags_detected": total_flags,
+                "errors": ledger.errors,
+            })
+        else:
+            status_updates["started_at"] = datetime.datetime.now().isoformat()
+        update_status_file(experiment_name, status_updates)
+
+        in_flight = max(1, EXPERIMENT_MAX_IN_FLIGHT)
+        workers = max(1, min(patient_concurrency or EXPERIMENT_PATIENT_CONCURRENCY, len(patients), in_flight))
+        run_patient = functools.partial(
+            _run_patient, plan=plan, dataset_name=dataset_name, current_user=current_user,
+            patient_timeout=patient_timeout, token=token, hedge_policy=hedge_policy,
+            derivation=derivation, budget=ConcurrencyBudget(in_flight - workers),
+        )
+        stopped = False
 
-            try:
-                # Get full patient details to access encounters
-                patient_details = get_patient_details(str(mrn), dataset_name, current_user)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="experiment-patient") as pool:
+            futures = [pool.submit(run_patient, patient_summary.get("mrn")) for patient_summary in patients]
 
-                if not patient_details or not patient_details.get("encounters"):
-                    logger.warning(f"Patient {mrn} has no encounters, skipping")
+            for future in futures:
+                if future.cancelled():
+                    continue
+                outcome = future.result()
+                aggregate_tracker.merge(outcome.tracker)
+                mrn = outcome.mrn
+
+                if stopped or outcome.cancelled:
+                    # Keep any spend; the patient runs again if the experiment resumes
+                    if outcome.tracker.entries:
+                        record_patient_run(experiment_name, str(mrn), "interrupted", outcome.tracker.to_dict())
+                    if not stopped:
+                        logger.info(f"Experiment {experiment_name} stopped while processing patient {mrn}")
+                        # Drop queued patients; running ones see the token and stop
+                        stopped = True
+                        pool.shutdown(wait=False, cancel_futures=True)
+                    continue
+                if outcome.error is not None:
                     error_count += 1
-
-                    # Record error in status
-                    update_status_file(experiment_name, {
-                        "progress.failed_count": error_count,
-                        "errors": read_status_file(experiment_name).get("errors", []) + [{
-                            "mrn": str(mrn),
-                            "error": "No encounters found"
-                        }]
-                    })
+                    _record_patient_error(experiment_name, mrn, outcome.error, error_count)
+                    record_patient_run(experiment_name, str(mrn), "failed", outcome.tracker.to_dict(),
+                                       error=outcome.error)
                     continue
 
-                # Get first encounter
-                first_encounter = patient_details["encounters"][0]
-                csn = first_encounter.get("csn")
-
-                # Run workflow on this patient's first encounter
-                patient_tracker = CostTracker()
-                result = run_workflow_sdoh(mrn, csn, prompts, key_name, patient_tracker)
-                aggregate_tracker.merge(patient_tracker)
-                per_patient_costs[str(mrn)] = patient_tracker.summary()
+                per_patient_costs[str(mrn)] = outcome.tracker.summary()
 
-                # Result now contains: {mrn, csn, output_definitions, output_values}
-                patient_result = result
+                # Result contains: {mrn, csn, output_definitions, output_values, step_errors}
+                patient_result = outcome.result
 
                 # Count detected flags from output values
-                output_values = result.get("output_values", [])
+                output_values = patient_result.get("output_values", [])
                 flags_detected = sum(
                     1 for v in output_values
                     if v.get("values", {}).get("detected") is True
@@ -480,6 +931,8 @@ def _process_experiment_in_background(
 
                 # Save incrementally
                 append_patient_result(experiment_name, patient_result)
+                record_patient_run(experiment_name, str(mrn), "completed", outcome.tracker.to_dict(),
+                                   flags=flags_detected, fingerprint=outcome.fingerprint)
                 processed_count += 1
 
                 # Update progress
@@ -489,67 +942,167 @@ def _process_experiment_in_background(
                     "total_flags_detected": total_flags
                 })
 
-                logger.info(f"Processed patient {mrn}, encounter {csn} - {flags_detected} flags detected")
+                logger.info(f"Processed patient {mrn}, encounter {outcome.csn} - {flags_detected} flags detected")
 
+        _finish_experiment(
+            experiment_name, aggregate_tracker, per_patient_costs, token,
+            processed_count, error_count, project_name, workflow_name,
+            key_name=key_name, mode="online", wall_seconds=time.monotonic() - started,
+            resumed=resumed, ledger=True,
+        )
+
+        logger.info(f"Experiment {experiment_name} ended: {processed_count} processed, {error_count} failed")
+
+    except Exception as e:
+        logger.error(f"Critical error in experiment {experiment_name}: {e}")
+        update_status_file(experiment_name, {
+            "status": "failed",
+            "completed_at": datetime.datetime.now().isoformat(),
+            "errors": [{
+                "error": f"Critical error: {str(e)}"
+            }]
+        })
+
+    finally:
+        with _experiment_tokens_lock:
+            _experiment_tokens.pop(experiment_name, None)
+
+
+def _process_experiment_batch_in_background(
+    experiment_name: str,
+    patients: list,
+    prompts: list,
+    dataset_name: str,
+    current_user: str,
+    key_name: str,
+    project_name: str = None,
+    workflow_name: str = None,
+    batch_timeout: Optional[float] = None,
+):
+    """
+    Background task running an experiment through provider batch jobs.
+    Builds every patient's analysis requests, submits them together, waits
+    for the jobs to end and then saves each patient's results. Costs are
+    billed at the model's batch prices.
+
+    A run its worker hands back to the queue leaves the provider jobs
+    running; the next run re-attaches to the jobs recorded in the status
+    instead of submitting (and paying for) the requests again.
+    """
+    with _experiment_tokens_lock:
+        token = _experiment_tokens.setdefault(experiment_name, CancellationToken())
+    if batch_timeout is None:
+        batch_timeout = EXPERIMENT_BATCH_TIMEOUT_SECONDS or None
+
+    try:
+        started = time.monotonic()
+        submitted = (read_status_file(experiment_name) or {}).get("batch") or {}
+        # A re-run rebuilds every patient's progress and errors from scratch
+        update_status_file(experiment_name, {
+            "status": "running",
+            "started_at": datetime.datetime.now().isoformat(),
+            "progress.processed_count": 0,
+            "progress.failed_count": 0,
+            "errors": [],
+        })
+
+        processed_count = 0
+        error_count = 0
+        total_flags = 0
+        aggregate_tracker = CostTracker()
+        per_patient_costs = {}
+
+        # Read notes and build the pending requests for every patient
+        plans = []
+        for patient_summary in patients:
+            if token.cancelled:
+                break
+
+            mrn = patient_summary.get("mrn")
+            try:
+                patient_details = get_patient_details(str(mrn), dataset_name, current_user)
+                if not patient_details or not patient_details.get("encounters"):
+                    logger.warning(f"Patient {mrn} has no encounters, skipping")
+                    error_count += 1
+                    _record_patient_error(experiment_name, mrn, "No encounters found", error_count)
+                    continue
+
+                csn = patient_details["encounters"][0].get("csn")
+                patient_tracker = CostTracker()
+                plan = prepare_batch_workflow(mrn, csn, prompts, key_name, patient_tracker)
+                plans.append((plan, patient_tracker))
             except Exception as e:
-                logger.error(f"Error processing patient {mrn}: {e}")
+                logger.error(f"Error preparing patient {mrn}: {e}")
                 error_count += 1
+                _record_patient_error(experiment_name, mrn, str(e), error_count)
+
+        requests = [entry["request"] for plan, _ in plans for entry in plan["pending"]]
+        # Jobs of an earlier run only match if it built the same requests
+        attach = submitted.get("jobs") if submitted.get("request_count") == len(requests) else None
+
+        def on_submit(jobs):
+            update_status_file(experiment_name, {"batch": {
+                "job_ids": [job["id"] for job in jobs],
+                "jobs": jobs,
+                "request_count": len(requests),
+                "submitted_at": submitted.get("submitted_at") if attach else datetime.datetime.now().isoformat()
+            }})
+
+        if requests and not token.cancelled:
+            logger.info(f"Submitting {len(requests)} requests for experiment {experiment_name} as batch jobs")
+            with deadline_scope(batch_timeout, token=token):
+                items = run_batch(
+                    requests, on_submit=on_submit, attach=attach,
+                    leave_running=lambda: token.reason == REQUEUE_REASON,
+                ).items
+        else:
+            items = []
 
-                # Record error in status
-                current_status = read_status_file(experiment_name)
-                if current_status:
-                    errors = current_status.get("errors", [])
-                    errors.append({
-                        "mrn": str(mrn),
-                        "error": str(e)
-                    })
-                    update_status_file(experiment_name, {
-                        "progress.failed_count": error_count,
-                        "errors": errors
-                    })
-                continue
+        # Map results back to each patient in submission order
+        offset = 0
+        for plan, patient_tracker in plans:
+            mrn = plan["mrn"]
+            patient_items = items[offset:offset + len(plan["pending"])]
+            offset += len(plan["pending"])
 
-        # Write cost summary to results.json
-        try:
-            results_path = os.path.join(EXPERIMENTS_DIR, experiment_name, "results.json")
-            with open(results_path, 'r') as f:
-                data = json.load(f)
-            cost_summary = aggregate_tracker.summary()
-            cost_summary["per_patient"] = per_patient_costs
-            data["cost_summary"] = cost_summary
-            with open(results_path, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error writing cost summary for {experiment_name}: {e}")
+            if token.cancelled:
+                break
+            interrupted = next((i.error for i in patient_items if isinstance(i.error, DeadlineExceeded)), None)
 
-        # Append billing entry to project ledger
-        if project_name:
             try:
-                from core.dataloaders.billing_loader import append_billing_entry
-                append_billing_entry(
-                    project_name=project_name,
-                    experiment_name=experiment_name,
-                    workflow_name=workflow_name or "",
-                    cost_summary=cost_summary,
-                )
-            except Exception as e:
-                logger.error(f"Error appending billing for {experiment_name}: {e}")
+                result = complete_batch_workflow(plan, patient_items, patient_tracker)
+            finally:
+                aggregate_tracker.merge(patient_tracker)
+            per_patient_costs[str(mrn)] = patient_tracker.summary()
 
-        # Determine final status
-        if error_count > 0 and processed_count == 0:
-            final_status = "failed"
-        elif error_count > 0:
-            final_status = "partial_complete"
-        else:
-            final_status = "completed"
+            if interrupted is not None:
+                error_count += 1
+                _record_patient_error(experiment_name, mrn, f"Batch did not finish: {interrupted}", error_count)
+                continue
 
-        # Update final status
-        update_status_file(experiment_name, {
-            "status": final_status,
-            "completed_at": datetime.datetime.now().isoformat()
-        })
+            output_values = result.get("output_values", [])
+            flags_detected = sum(
+                1 for v in output_values
+                if v.get("values", {}).get("detected") is True
+            )
+            total_flags += flags_detected
+
+            append_patient_result(experiment_name, result)
+            processed_count += 1
+
+            update_status_file(experiment_name, {
+                "progress.processed_count": processed_count,
+                "progress.current_patient_mrn": str(mrn),
+                "total_flags_detected": total_flags
+            })
+
+        _finish_experiment(
+            experiment_name, aggregate_tracker, per_patient_costs, token,
+            processed_count, error_count, project_name, workflow_name,
+            key_name=key_name, mode="batch", wall_seconds=time.monotonic() - started,
+        )
 
-        logger.info(f"Experiment {experiment_name} completed: {processed_count} processed, {error_count} failed")
+        logger.info(f"Batch experiment {experiment_name} completed: {processed_count} processed, {error_count} failed")
 
     except Exception as e:
         logger.error(f"Critical error in experiment {experiment_name}: {e}")
@@ -562,97 +1115,186 @@ def _process_experiment_in_background(
         })
 
     finally:
-        # Invalidate cache so new results are picked up
-        invalidate_experiment_cache()
+        with _experiment_tokens_lock:
+            _experiment_tokens.pop(experiment_name, None)
 
 
-@router.post("/experiments")
-def create_experiment(
-    data: Dict[str, Any] = Body(...),
-    current_user: str = Depends(get_current_user),
-    background_tasks: BackgroundTasks = BackgroundTasks()
-):
+def _build_derivation(
+    source_name: str,
+    raw_workflow: Dict[str, Any],
+    plan: CompiledWorkflow,
+    dataset_name: str,
+    current_user: str,
+    compile_plan,
+) -> Derivation:
     """
-    Create and execute a new experiment asynchronously.
-    Queues a background task to run a workflow on a project's dataset.
+    Work out what a new run can reuse from source_name: definitions whose
+    fingerprint matches one of the source's, for the patients the source
+    completed without step errors. Raises HTTPException.
     """
-    try:
-        project_name = data.get("project_name")
-        experiment_name = data.get("experiment_name")
-        workflow_name = data.get("workflow_name", "Delirium_v1")
-        key_name = data.get("key_name")
+    source_dir = os.path.join(EXPERIMENTS_DIR, str(source_name))
+    if not os.path.exists(source_dir):
+        raise HTTPException(status_code=404, detail=f"Experiment '{source_name}' not found")
+
+    with open(os.path.join(source_dir, "metadata.json"), 'r') as f:
+        source_metadata = json.load(f)
+    if source_metadata.get("project_name") and not get_project(source_metadata["project_name"], current_user):
+        raise HTTPException(status_code=403, detail="Access denied to the source experiment's project")
+    if source_metadata.get("dataset_name") != dataset_name:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Experiment '{source_name}' ran on dataset '{source_metadata.get('dataset_name')}', not '{dataset_name}'"
+        )
 
-        if not all([project_name, experiment_name, key_name]):
-            raise HTTPException(
-                status_code=400,
-                detail="Missing required fields: project_name, experiment_name, key_name"
-            )
+    # Latest complete run of each source patient
+    source_patients = {
+        entry["mrn"]: entry["fingerprint"]
+        for entry in get_patient_runs(source_name)
+        if entry["outcome"] == "completed" and entry["fingerprint"]
+    }
+    if not source_patients:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Experiment '{source_name}' has no fingerprinted patient results to derive from"
+        )
 
-        # Validate project exists
-        if not project_exists(project_name):
-            raise HTTPException(
-                status_code=404,
-                detail=f"Project '{project_name}' not found"
-            )
+    source_results = read_results(source_name) or {}
+    source_by_fingerprint = {
+        d["metadata"]["fingerprint"]: d["id"]
+        for d in source_results.get("output_definitions", [])
+        if d.get("metadata", {}).get("fingerprint")
+    }
+    reused = {
+        d["id"]: source_by_fingerprint[d["metadata"]["fingerprint"]]
+        for d in plan.definitions
+        if d["metadata"]["fingerprint"] in source_by_fingerprint
+    }
 
-        # Get project details (with permission check)
-        project = get_project(project_name, current_user)
-        if not project:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Project '{project_name}' not found"
-            )
+    source_values: Dict[str, list] = {}
+    reused_sources = set(reused.values())
+    for value in source_results.get("output_values", []):
+        mrn = str(value.get("metadata", {}).get("patient_id", ""))
+        if value.get("output_definition_id") in reused_sources and mrn in source_patients:
+            source_values.setdefault(mrn, []).append(value)
 
-        dataset_name = project.get("dataset")
+    # Plan for reusing patients: only the definitions that changed
+    reuse_plan = None
+    if reused and len(reused) < len(plan.definitions):
+        try:
+            reuse_plan = compile_plan(prune_workflow(raw_workflow, plan.definitions, set(reused)))
+        except WorkflowCompileError as e:
+            raise HTTPException(status_code=400, detail=f"Cannot derive from experiment '{source_name}': {e}")
+        fingerprints = {d["id"]: d["metadata"]["fingerprint"] for d in plan.definitions}
+        for definition in reuse_plan.definitions:
+            definition["metadata"]["fingerprint"] = fingerprints[definition["id"]]
+    elif not reused:
+        reuse_plan = plan
+
+    logger.info(f"Deriving from experiment {source_name}: reusing {len(reused)} of {len(plan.definitions)} "
+                f"definitions for up to {len(source_patients)} patients")
+    return Derivation(
+        source_experiment=source_name,
+        plan=reuse_plan,
+        definitions=plan.definitions,
+        reused=reused,
+        source_patients=source_patients,
+        source_values=source_values,
+    )
+
+
+def _resolve_experiment_request(data: Dict[str, Any], current_user: str, require_experiment_name: bool = True,
+                                snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Validate an experiment request body and resolve what the run needs.
+    Shared by experiment creation and the dry-run forecast; raises HTTPException.
+    With a queued job's snapshot, the workflow and patients are the ones pinned
+    at submit time rather than the saved workflow and dataset as they are now.
+    """
+    project_name = data.get("project_name")
+    experiment_name = data.get("experiment_name")
+    workflow_name = data.get("workflow_name", "Delirium_v1")
+    key_name = data.get("key_name")
+
+    if not all([project_name, key_name]) or (require_experiment_name and not experiment_name):
+        raise HTTPException(
+            status_code=400,
+            detail="Missing required fields: project_name, experiment_name, key_name"
+            if require_experiment_name else "Missing required fields: project_name, key_name"
+        )
 
-        if not dataset_name:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Project '{project_name}' has no dataset assigned"
-            )
+    # "batch" runs the LLM analyses as provider batch jobs (slower, cheaper)
+    mode = data.get("mode", "online")
+    if mode not in ("online", "batch"):
+        raise HTTPException(status_code=400, detail="Field 'mode' must be 'online' or 'batch'")
+
+    key_record = get_key_by_name(key_name)
+    if not key_record:
+        raise HTTPException(status_code=400, detail=f"API key '{key_name}' not found")
+    model_name = key_record.get("model_name")
+    if mode == "batch" and (model_name not in MODELS or not MODELS[model_name].supports_batch):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model '{model_name}' does not support batch mode"
+        )
 
-        # Check if experiment name already exists
-        experiment_dir = os.path.join(EXPERIMENTS_DIR, experiment_name)
-        if os.path.exists(experiment_dir):
-            raise HTTPException(
-                status_code=409,
-                detail=f"Experiment '{experiment_name}' already exists"
-            )
+    # Validate project exists
+    if not project_exists(project_name):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Project '{project_name}' not found"
+        )
 
-        # Load dataset (with permission check)
-        dataset_summary = get_patient_dataset_summary(dataset_name, current_user)
-        if not dataset_summary:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Dataset '{dataset_name}' not found or access denied"
-            )
+    # Get project details (with permission check)
+    project = get_project(project_name, current_user)
+    if not project:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Project '{project_name}' not found"
+        )
+
+    dataset_name = project.get("dataset")
+
+    if not dataset_name:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Project '{project_name}' has no dataset assigned"
+        )
+
+    # Load dataset (with permission check)
+    dataset_summary = get_patient_dataset_summary(dataset_name, current_user)
+    if not dataset_summary:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Dataset '{dataset_name}' not found or access denied"
+        )
+
+    patients = dataset_summary.get("patients", [])
+    if not patients:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dataset '{dataset_name}' has no patients"
+        )
+
+    # Filter patients if specific MRNs provided (a snapshot pins the patients queued)
+    mrns = snapshot["mrns"] if snapshot else data.get("mrns")
+    if mrns:
+        original_count = len(patients)
+        # Convert MRNs to strings for comparison
+        mrn_set = set(str(mrn) for mrn in mrns)
+        patients = [p for p in patients if str(p.get("mrn")) in mrn_set]
 
-        patients = dataset_summary.get("patients", [])
         if not patients:
             raise HTTPException(
                 status_code=400,
-                detail=f"Dataset '{dataset_name}' has no patients"
+                detail="None of the provided MRNs found in dataset"
             )
 
-        # Filter patients if specific MRNs provided
-        mrns = data.get("mrns")
-        if mrns:
-            original_count = len(patients)
-            # Convert MRNs to strings for comparison
-            mrn_set = set(str(mrn) for mrn in mrns)
-            patients = [p for p in patients if str(p.get("mrn")) in mrn_set]
-
-            if not patients:
-                raise HTTPException(
-                    status_code=400,
-                    detail="None of the provided MRNs found in dataset"
-                )
-
-            logger.info(f"Filtered to {len(patients)} of {original_count} patients based on provided MRNs")
-
-        # Create experiment folder
-        create_experiment_folder(experiment_name, project_name, workflow_name, dataset_name)
+        logger.info(f"Filtered to {len(patients)} of {original_count} patients based on provided MRNs")
 
+    if snapshot:
+        # The workflow as it was when the experiment was queued
+        raw_workflow = snapshot["raw_workflow"]
+    else:
         # Load workflow definition and extract prompts (with permission check)
         workflow_data = get_workflow_def(workflow_name, current_user)
         if not workflow_data:
@@ -662,54 +1304,366 @@ def create_experiment(
             )
 
         raw_workflow = workflow_data.get("raw_workflow", {})
-        steps = raw_workflow.get("steps", [])
+    steps = raw_workflow.get("steps", [])
+
+    # Extract all analyze_note_with_span_and_reason steps (recursively searches nested structures)
+    analyze_steps = _extract_analyze_steps(steps)
+
+    # Convert prompt dicts to PromptInput objects. The forecast and batch mode
+    # still walk the SDOH note analysis, so they need its 9 criteria prompts.
+    prompts = [
+        PromptInput(**step["inputs"]["prompt"])
+        for step in analyze_steps
+        if isinstance(step.get("inputs", {}).get("prompt"), dict)
+    ]
+    sdoh_shaped = len(prompts) == len(NOTE_FLAG_CRITERIA)
+    if mode == "batch" and not sdoh_shaped:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch mode needs exactly {len(NOTE_FLAG_CRITERIA)} 'analyze_note_with_span_and_reason' "
+                   f"steps with prompts, found {len(prompts)}"
+        )
+
+    # Hedge slow analysis calls / fail over to these keys (online mode only)
+    hedge_keys = data.get("hedge_keys") or []
+    if not isinstance(hedge_keys, list) or not all(isinstance(k, str) for k in hedge_keys):
+        raise HTTPException(status_code=400, detail="Field 'hedge_keys' must be a list of key names")
+    hedge_policy = None
+    if hedge_keys or data.get("hedge"):
+        if mode != "online":
+            raise HTTPException(status_code=400, detail="Hedging is only available in online mode")
+        for hedge_key in hedge_keys:
+            hedge_record = get_key_by_name(hedge_key)
+            if not hedge_record:
+                raise HTTPException(status_code=400, detail=f"API key '{hedge_key}' not found")
+            hedge_model = hedge_record.get("model_name")
+            if hedge_model not in MODELS or not MODELS[hedge_model].supports_structured:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Hedge key '{hedge_key}' uses model '{hedge_model}' without structured output"
+                )
+        hedge_policy = HedgePolicy(fallback_keys=hedge_keys)
 
-        # Extract all analyze_note_with_span_and_reason steps (recursively searches nested structures)
-        analyze_steps = _extract_analyze_steps(steps)
+    # Compile the workflow once for the whole run (online mode). LLM steps use
+    # key_name, and a step without a cheap-first cascade (inputs.model.cascade)
+    # takes the request's "cascade" if given.
+    plan = None
+    if mode == "online":
+        try:
+            plan = compile_workflow(
+                raw_workflow, dataset=dataset_name, key_name=key_name,
+                current_user=current_user, default_cascade=data.get("cascade"),
+            )
+        except WorkflowCompileError as e:
+            raise HTTPException(status_code=400, detail=f"Workflow '{workflow_name}' cannot run: {e}")
+        for cascade in plan.cascades:
+            cheap_record = get_key_by_name(cascade.cheap_key_name)
+            if not cheap_record:
+                raise HTTPException(status_code=400, detail=f"API key '{cascade.cheap_key_name}' not found")
+            cheap_model = cheap_record.get("model_name")
+            if cheap_model not in MODELS or not MODELS[cheap_model].supports_structured:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Cascade key '{cascade.cheap_key_name}' uses model '{cheap_model}' without structured output"
+                )
+    elif data.get("cascade") or any((step["inputs"].get("model") or {}).get("cascade") for step in analyze_steps):
+        raise HTTPException(status_code=400, detail="Model cascades are only available in online mode")
+
+    # Fingerprint each output definition so a later experiment can reuse its values
+    derivation = None
+    if plan is not None:
+        fingerprints = definition_fingerprints(steps, plan, model_name, data.get("cascade"), dataset_name)
+        for definition in plan.definitions:
+            definition["metadata"]["fingerprint"] = fingerprints[definition["id"]]
+
+    # Copy unchanged definitions' values from an earlier experiment (online mode)
+    derive_from = data.get("derive_from")
+    if derive_from:
+        if plan is None:
+            raise HTTPException(status_code=400, detail="Deriving from an experiment is only available in online mode")
+        derivation = _build_derivation(
+            derive_from, raw_workflow, plan, dataset_name, current_user,
+            lambda workflow: compile_workflow(
+                workflow, dataset=dataset_name, key_name=key_name,
+                current_user=current_user, default_cascade=data.get("cascade"),
+            ),
+        )
 
-        # Validate exactly 9 analyze steps
-        if len(analyze_steps) != 9:
+    patient_timeout = data.get("patient_timeout_seconds")
+    if patient_timeout is not None:
+        try:
+            patient_timeout = float(patient_timeout)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Field 'patient_timeout_seconds' must be a number")
+
+    # Patients run at once (online mode); EXPERIMENT_PATIENT_CONCURRENCY when omitted
+    patient_concurrency = data.get("patient_concurrency")
+    if patient_concurrency is not None:
+        if mode != "online":
+            raise HTTPException(status_code=400, detail="Field 'patient_concurrency' is only available in online mode")
+        if (not isinstance(patient_concurrency, int) or isinstance(patient_concurrency, bool)
+                or not 1 <= patient_concurrency <= EXPERIMENT_MAX_PATIENT_CONCURRENCY):
             raise HTTPException(
                 status_code=400,
-                detail=f"Workflow must contain exactly 9 'analyze_note_with_span_and_reason' steps, found {len(analyze_steps)}"
+                detail=f"Field 'patient_concurrency' must be an integer from 1 to {EXPERIMENT_MAX_PATIENT_CONCURRENCY}"
             )
 
-        # Convert prompt dicts to PromptInput objects
-        prompts = [
-            PromptInput(**step["inputs"]["prompt"])
-            for step in analyze_steps
-        ]
+    # Failed patients a resumed run retries
+    retry_policy = _retry_policy(data)
 
-        # Create status file for progress tracking
-        create_status_file(experiment_name, len(patients))
+    return {
+        "project_name": project_name,
+        "experiment_name": experiment_name,
+        "workflow_name": workflow_name,
+        "key_name": key_name,
+        "model_name": model_name,
+        "mode": mode,
+        "dataset_name": dataset_name,
+        "patients": patients,
+        "prompts": prompts,
+        "patient_timeout": patient_timeout,
+        "patient_concurrency": patient_concurrency,
+        "retry_policy": retry_policy,
+        "derivation": derivation,
+        "hedge_policy": hedge_policy,
+        "plan": plan,
+        "sdoh_shaped": sdoh_shaped,
+        # What the queued job runs and resumes from
+        "snapshot": {
+            "raw_workflow": raw_workflow,
+            "mrns": [str(p.get("mrn")) for p in patients],
+            "fingerprints": {d["id"]: d["metadata"]["fingerprint"] for d in plan.definitions} if plan else {},
+            "reused": dict(derivation.reused) if derivation else {},
+        },
+    }
+
+
+def _check_snapshot(experiment_name: str, queued: Dict[str, Any], resolved: Dict[str, Any]) -> None:
+    """
+    Refuse to resume an experiment whose definitions no longer fingerprint as queued.
+    The workflow itself is pinned, but a tool or the key's model can change
+    underneath it; values from before and after can't share one experiment.
+    """
+    changed = sorted(
+        definition_id
+        for definition_id in set(queued["fingerprints"]) | set(resolved["fingerprints"])
+        if queued["fingerprints"].get(definition_id) != resolved["fingerprints"].get(definition_id)
+    )
+    if queued["reused"] != resolved["reused"]:
+        changed.append("derived definitions")
+    if not changed:
+        return
+    if any(entry["outcome"] == "completed" for entry in get_patient_runs(experiment_name)):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Workflow changed since the experiment was queued ({', '.join(changed)}); "
+                   f"start a new experiment to run the new version"
+        )
+    logger.warning(f"Experiment {experiment_name}: {', '.join(changed)} changed since it was queued; "
+                   f"no patient has finished yet, so it runs as it is now")
 
-        # Invalidate cache so new experiment appears immediately in queries
-        invalidate_experiment_cache()
 
-        # Queue background task to process patients
-        background_tasks.add_task(
-            _process_experiment_in_background,
+def _experiment_budget(data: Dict[str, Any]) -> Optional[float]:
+    """Budget for a run: the request's budget_usd, capped by EXPERIMENT_MAX_COST_USD."""
+    budget = data.get("budget_usd")
+    if budget is not None:
+        try:
+            budget = float(budget)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Field 'budget_usd' must be a number")
+    if EXPERIMENT_MAX_COST_USD > 0:
+        budget = EXPERIMENT_MAX_COST_USD if budget is None else min(budget, EXPERIMENT_MAX_COST_USD)
+    return budget
+
+
+def _retry_policy(data: Dict[str, Any]) -> RetryPolicy:
+    """Retry policy from a request's retry_failed / max_patient_attempts fields."""
+    retry_failed = data.get("retry_failed", True)
+    if not isinstance(retry_failed, bool):
+        raise HTTPException(status_code=400, detail="Field 'retry_failed' must be true or false")
+    max_attempts = data.get("max_patient_attempts", EXPERIMENT_PATIENT_MAX_ATTEMPTS)
+    if not isinstance(max_attempts, int) or isinstance(max_attempts, bool) or max_attempts < 1:
+        raise HTTPException(status_code=400, detail="Field 'max_patient_attempts' must be a positive integer")
+    return RetryPolicy(retry_failed=retry_failed, max_attempts=max_attempts)
+
+
+def _forecast(run: Dict[str, Any], current_user: str, budget: Optional[float]) -> Dict[str, Any]:
+    if not run["sdoh_shaped"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Forecasts need exactly {len(NOTE_FLAG_CRITERIA)} "
+                   f"'analyze_note_with_span_and_reason' steps with prompts"
+        )
+    return forecast_experiment(
+        patients=run["patients"],
+        prompts=run["prompts"],
+        key_name=run["key_name"],
+        dataset_name=run["dataset_name"],
+        current_user=current_user,
+        mode=run["mode"],
+        budget_usd=budget,
+    )
+
+
+@router.post("/experiments/forecast")
+def forecast_experiment_run(
+    data: Dict[str, Any] = Body(...),
+    current_user: str = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Dry run: forecast tokens, cost and duration of an experiment without running it.
+    Takes the same body as POST /experiments (experiment_name optional).
+    """
+    try:
+        run = _resolve_experiment_request(data, current_user, require_experiment_name=False)
+        return _forecast(run, current_user, _experiment_budget(data))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in forecast_experiment_run: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+def _reload_shared_records():
+    """
+    Drop this process's cached API keys, projects, users and custom tools.
+    The API's invalidations don't reach the worker process, so without this
+    it would resolve jobs against the records as they were when it started.
+    """
+    invalidate_key_cache()  # also clears the LLM client's resolved keys
+    invalidate_project_cache()
+    invalidate_user_cache()
+    invalidate_custom_tool_cache()
+
+
+def run_experiment_job(job: Dict[str, Any], token: CancellationToken) -> None:
+    """
+    Run a job claimed from the experiment queue (called by worker.py).
+    The request is resolved again as its submitter, so keys and the dataset are
+    checked as they are now, but the workflow and patients come from the job's
+    snapshot; token is cancelled by the worker on a cancel, pause or shutdown.
+    """
+    experiment_name = job["experiment_name"]
+    current_user = job["submitted_by"]
+    snapshot = job.get("snapshot")
+    _reload_shared_records()
+    with _experiment_tokens_lock:
+        _experiment_workers[experiment_name] = job["worker_id"]
+    try:
+        try:
+            run = _resolve_experiment_request(job["request"], current_user, snapshot=snapshot)
+            if snapshot:
+                _check_snapshot(experiment_name, snapshot, run["snapshot"])
+        except HTTPException as e:
+            logger.error(f"Experiment {experiment_name} cannot run: {e.detail}")
+            errors = (read_status_file(experiment_name) or {}).get("errors", [])
+            update_status_file(experiment_name, {
+                "status": "failed",
+                "completed_at": datetime.datetime.now().isoformat(),
+                "errors": errors + [{"error": f"Cannot run: {e.detail}"}]
+            })
+            return
+
+        with _experiment_tokens_lock:
+            _experiment_tokens[experiment_name] = token
+
+        task_kwargs = dict(
             experiment_name=experiment_name,
-            patients=patients,
-            prompts=prompts,
-            dataset_name=dataset_name,
+            patients=run["patients"],
+            prompts=run["prompts"],
+            dataset_name=run["dataset_name"],
             current_user=current_user,
-            key_name=key_name,
-            project_name=project_name,
-            workflow_name=workflow_name,
+            key_name=run["key_name"],
+            project_name=run["project_name"],
+            workflow_name=run["workflow_name"],
+        )
+        if run["mode"] == "batch":
+            _process_experiment_batch_in_background(**task_kwargs)
+        else:
+            _process_experiment_in_background(
+                **task_kwargs,
+                patient_timeout=run["patient_timeout"], hedge_policy=run["hedge_policy"],
+                plan=run["plan"], patient_concurrency=run["patient_concurrency"],
+                retry_policy=run["retry_policy"], derivation=run["derivation"],
+            )
+    finally:
+        with _experiment_tokens_lock:
+            _experiment_workers.pop(experiment_name, None)
+
+
+@router.post("/experiments")
+def create_experiment(
+    data: Dict[str, Any] = Body(...),
+    current_user: str = Depends(get_current_user),
+):
+    """
+    Create a new experiment and queue it for a worker (worker.py) to run.
+    Rejected with 402 when a budget applies and the forecast cost exceeds it.
+    Only SDOH-shaped workflows can be forecast, so while a budget applies
+    (budget_usd or EXPERIMENT_MAX_COST_USD) other workflows are rejected with 400.
+    """
+    try:
+        run = _resolve_experiment_request(data, current_user)
+        experiment_name = run["experiment_name"]
+        project_name = run["project_name"]
+        patients = run["patients"]
+
+        # Check if experiment name already exists
+        experiment_dir = os.path.join(EXPERIMENTS_DIR, experiment_name)
+        if os.path.exists(experiment_dir) or get_job(experiment_name):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Experiment '{experiment_name}' already exists"
+            )
+
+        budget = _experiment_budget(data)
+        forecast = None
+        if budget is not None and not run["sdoh_shaped"]:
+            # A spending cap that can't be checked must not be skipped
+            raise HTTPException(
+                status_code=400,
+                detail=f"A budget of ${budget:.2f} applies, but cost forecasts only cover workflows with "
+                       f"{len(NOTE_FLAG_CRITERIA)} 'analyze_note_with_span_and_reason' steps; "
+                       f"this workflow can't be checked against it"
+            )
+        if budget is not None:
+            forecast = _forecast(run, current_user, budget)
+            if not forecast["within_budget"]:
+                raise HTTPException(
+                    status_code=402,
+                    detail={
+                        "message": f"Forecast cost ${forecast['cost_usd']['estimate']:.2f} exceeds the budget of ${budget:.2f}",
+                        "forecast": forecast,
+                    }
+                )
+
+        # Create experiment folder
+        derivation = run["derivation"]
+        create_experiment_folder(
+            experiment_name, project_name, run["workflow_name"], run["dataset_name"],
+            derived_from=derivation.provenance() if derivation else None,
         )
 
+        # Queue the run; the job also tracks the experiment's status
+        enqueue_job(experiment_name, run["mode"], data, current_user, len(patients), snapshot=run["snapshot"])
+
         logger.info(f"Queued experiment {experiment_name} for processing with {len(patients)} patients")
 
+        content = {
+            "status": "accepted",
+            "message": "Experiment queued; a worker will process it",
+            "experiment_name": experiment_name,
+            "project_name": project_name,
+            "total_patients": len(patients),
+            "mode": run["mode"]
+        }
+        if forecast is not None:
+            content["forecast"] = forecast
+
         return JSONResponse(
             status_code=202,
-            content={
-                "status": "accepted",
-                "message": "Experiment started and is processing in the background",
-                "experiment_name": experiment_name,
-                "project_name": project_name,
-                "total_patients": len(patients)
-            },
+            content=content,
             headers={"Location": f"/api/workflow/experiments/{experiment_name}/status"}
         )
 
@@ -794,6 +1748,62 @@ def get_saved_workflow_definition(workflow_name: str, current_user: str = Depend
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+def _step_durations(experiment_name: str, current_user: str, graph) -> Dict[str, float]:
+    """Average seconds per patient of each top-level step (nested steps included) in a past run."""
+    experiment = get_experiment_details(experiment_name, current_user)
+    if not experiment:
+        raise HTTPException(status_code=404, detail=f"Experiment '{experiment_name}' not found")
+    cost_summary = (experiment.get("results") or {}).get("cost_summary") or {}
+    step_costs = cost_summary.get("step_costs") or {}
+    if not step_costs:
+        raise HTTPException(status_code=400, detail=f"Experiment '{experiment_name}' has no per-step timings")
+    patients = max(1, len(cost_summary.get("per_patient") or {}))
+
+    durations = {}
+    for step in graph.steps:
+        total_ms = sum(step_costs.get(step_id, {}).get("duration_ms", 0) for step_id in [step.id, *step.substeps])
+        durations[step.id] = round(total_ms / patients / 1000.0, 3)
+    return durations
+
+
+@router.get("/workflow-definitions/{workflow_name}/dag")
+def get_workflow_dag(
+    workflow_name: str,
+    experiment_name: Optional[str] = None,
+    current_user: str = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Step dependency graph of a saved workflow, as the executor schedules it.
+
+    Steps in the same level can run concurrently. The critical path is the
+    longest chain of dependent steps: by step count, or by average seconds
+    per patient when experiment_name names a past run of the workflow.
+    """
+    try:
+        workflow_data = get_workflow_def(workflow_name, current_user)
+        if not workflow_data:
+            raise HTTPException(status_code=404, detail=f"Workflow '{workflow_name}' not found")
+
+        try:
+            plan = compile_workflow(workflow_data.get("raw_workflow") or {}, current_user=current_user)
+        except WorkflowCompileError as e:
+            raise HTTPException(status_code=400, detail=f"Workflow cannot be compiled: {e}")
+
+        weights = _step_durations(experiment_name, current_user, plan.graph) if experiment_name else None
+        return {
+            "status": "success",
+            "workflow_name": workflow_name,
+            "weight_unit": "seconds" if weights else "steps",
+            **plan.graph.to_dict(weights),
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_workflow_dag: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @router.post("/workflow-definitions/{workflow_name}")
 def save_workflow_definition(workflow_name: str, data: Dict[str, Any] = Body(...), current_user: str = Depends(get_current_user)) -> Dict[str, Any]:
     """Save or update a workflow definition."""
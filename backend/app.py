@@ -1,13 +1,14 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from api import (auth_router, tool_router,
                  projects_router, datasets_router, workflow_router, users_router,
                  caboodle_router, annotations_router, workflow_agent_router,
                  custom_tools_router, api_keys_router)
+from core.llm_provider.metrics import render_metrics
 
 import logging
 
@@ -39,3 +40,10 @@ app.include_router(annotations_router, prefix="/api/projects", tags=["annotation
 app.include_router(workflow_agent_router, prefix="/api/workflow-agent")
 app.include_router(custom_tools_router, prefix="/api/custom-tools")
 app.include_router(api_keys_router, prefix="/api/api-keys")
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (LLM call latency, TTFT, throughput, errors) of the API process; experiment workers serve their own (worker.py --metrics-port)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
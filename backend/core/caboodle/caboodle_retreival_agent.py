@@ -5,6 +5,7 @@ from typing import List, Dict, Any
 import json
 
 from core.caboodle.caboodle_service import get_full_dictionary
+from core.llm_provider import call_many
 
 api_key = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=api_key)
@@ -62,23 +63,18 @@ Return candidate tables that could be relevant, so they can be investigated furt
 Note that due to prompt length, you do not have visibility into all the tables. It is possible that none of the tables you are looking at are relevant.
 """
 
-    # Query each chunk
+    # Query all chunks concurrently
+    batch = call_many(
+        [{"system_prompt": system_prompt, "user_query": user_query, "chunk": chunk} for chunk in chunks],
+        call_fn=_query_table_chunk,
+    )
+    if batch.errors:
+        raise batch.errors[0].error
+
     all_candidates = []
-    for idx, chunk in enumerate(chunks):
-        user_prompt = json.dumps({
-            "user_query": user_query,
-            "available_tables": chunk
-        }, indent=2)
-
-        response = client.responses.parse(
-            model=model_name,
-            instructions=system_prompt,
-            input=user_prompt,
-            text_format=CandidateTables,
-        )
-
-        all_candidates.extend(response.output_parsed.tables)
-        print(f"Part {idx + 1}: {len(response.output_parsed.tables)} tables")
+    for idx, tables in enumerate(batch.results):
+        all_candidates.extend(tables)
+        print(f"Part {idx + 1}: {len(tables)} tables")
 
     print(f"\n=== LLM Selected Candidate Tables ===")
     print(f"Total: {len(all_candidates)} tables")
@@ -89,6 +85,23 @@ Note that due to prompt length, you do not have visibility into all the tables.
     return all_candidates
 
 
+def _query_table_chunk(system_prompt: str, user_query: str, chunk: Dict[str, str]) -> List[str]:
+    """Ask the LLM for candidate tables within one chunk of the table index."""
+    user_prompt = json.dumps({
+        "user_query": user_query,
+        "available_tables": chunk
+    }, indent=2)
+
+    response = client.responses.parse(
+        model=model_name,
+        instructions=system_prompt,
+        input=user_prompt,
+        text_format=CandidateTables,
+    )
+
+    return response.output_parsed.tables
+
+
 def evaluate_candidate_table(table_name: str, user_query: str) -> List[str]:
     """
     Stage 2: Evaluate a single table's variables based on user query.
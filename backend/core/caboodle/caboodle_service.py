@@ -2,10 +2,14 @@ from pathlib import Path
 from typing import Dict, Any
 import pickle
 import logging
+import os
 from threading import Lock
 
 logger = logging.getLogger(__name__)
 
+# Candidate tables evaluated in parallel per query
+CABOODLE_EVAL_CONCURRENCY = int(os.getenv("CABOODLE_EVAL_CONCURRENCY", "8"))
+
 
 class CaboodleCache:
     """Thread-safe singleton cache for Caboodle dictionary."""
@@ -96,6 +100,7 @@ def process_llm_query(query: str) -> Dict[str, Any]:
         Response dictionary with status and message
     """
     from core.caboodle.caboodle_retreival_agent import get_candidate_tables, evaluate_candidate_table
+    from core.llm_provider import call_many
 
     print(f"[Caboodle LLM Query]: {query}")
 
@@ -103,18 +108,30 @@ def process_llm_query(query: str) -> Dict[str, Any]:
         # Stage 1: Get candidate tables
         candidate_tables = get_candidate_tables(query)
 
-        # Stage 2: Evaluate each candidate table
+        # Stage 2: Evaluate candidate tables concurrently; a failed table
+        # is reported instead of failing the whole query
+        batch = call_many(
+            [{"table_name": table_name, "user_query": query} for table_name in candidate_tables],
+            max_concurrency=CABOODLE_EVAL_CONCURRENCY,
+            call_fn=evaluate_candidate_table,
+        )
         results = {}
-        for table_name in candidate_tables:
-            selected_variables = evaluate_candidate_table(table_name, query)
-            if selected_variables:
-                results[table_name] = selected_variables
-
-        return {
+        errors = {}
+        for table_name, item in zip(candidate_tables, batch.items):
+            if item.error is not None:
+                logger.error(f"Error evaluating table {table_name}: {item.error}")
+                errors[table_name] = str(item.error)
+            elif item.result:
+                results[table_name] = item.result
+
+        response = {
             "status": "success",
             "results": results,
             "query": query
         }
+        if errors:
+            response["errors"] = errors
+        return response
     except Exception as e:
         logger.error(f"Error processing LLM query: {e}")
         return {
@@ -5,6 +5,9 @@ from transformers import pipeline
 import torch
 from random_names import generate_random_name
 
+# Notes per pipeline forward pass
+BATCH_SIZE = int(os.getenv("ANONYMIZE_BATCH_SIZE", "8"))
+
 
 def randomize_id(original_id):
     """Randomize an ID by multiplying by a random factor between 1.05-1.20"""
@@ -82,22 +85,20 @@ for patient_idx, patient in enumerate(data):
         else:
             print(f"    Encounter {encounter_idx + 1}: {len(notes)} notes (no reduction needed)")
         
-        # Process each note
-        for note_idx, note in enumerate(notes):
-            # Replace author names with random names
+        # Replace author names with random names
+        for note in notes:
             if 'author' in note and note['author']:
                 first_name, last_name = generate_random_name()
                 note['author'] = f"{last_name}, {first_name}"
-            
-            # Run AI deidentification on note text
-            note_text = note.get('note_text', '')
-            print('note_text: ', note_text)
-            if note_text:
-                prompt = build_prompt(note_text)
-                output = pipe(prompt, max_new_tokens=3000)
-                deidentified_text = output[0]['generated_text'][-1]["content"]
-                note['note_text'] = deidentified_text
-                print(f"      Note {note_idx + 1}/{len(notes)} processed")
+
+        # Run AI deidentification on all of the encounter's notes in one batched pipeline call
+        text_notes = [note for note in notes if note.get('note_text', '')]
+        if text_notes:
+            prompts = [build_prompt(note['note_text']) for note in text_notes]
+            outputs = pipe(prompts, max_new_tokens=3000, batch_size=BATCH_SIZE)
+            for note, output in zip(text_notes, outputs):
+                note['note_text'] = output[0]['generated_text'][-1]["content"]
+            print(f"      {len(text_notes)}/{len(notes)} notes processed")
 
 # Save anonymized dataset
 output_path = "../../dataset/patient_mock_anonymized.json"
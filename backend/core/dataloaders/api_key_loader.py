@@ -2,7 +2,7 @@ import json
 import logging
 import uuid
 import datetime
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from threading import Lock
 from pathlib import Path
 
@@ -29,6 +29,7 @@ class ApiKeyCache:
         with self._lock:
             if not self._initialized:
                 self._cache = None
+                self._listeners: List[Callable[[], None]] = []
                 self._initialized = True
 
     def _get_cache(self) -> Dict[str, Any]:
@@ -41,6 +42,23 @@ class ApiKeyCache:
     def invalidate(self):
         with self._lock:
             self._cache = None
+        self._notify()
+
+    def add_invalidation_listener(self, listener: Callable[[], None]):
+        """Register a callback invoked whenever key records are reloaded or modified."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def _notify(self):
+        with self._lock:
+            listeners = list(self._listeners)
+        # Notify outside the lock so listeners may read the cache again
+        for listener in listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"API key invalidation listener failed: {e}")
 
     def _load_all(self) -> Dict[str, Any]:
         if not KEYS_FILE.exists():
@@ -92,6 +110,7 @@ class ApiKeyCache:
                     self._save_to_disk(cache)
                     with self._lock:
                         self._cache = cache
+                    self._notify()
                     return cache["keys"][i]
 
         # New key
@@ -101,6 +120,7 @@ class ApiKeyCache:
         self._save_to_disk(cache)
         with self._lock:
             self._cache = cache
+        self._notify()
         return data
 
     def delete_key(self, key_id: str) -> bool:
@@ -114,6 +134,7 @@ class ApiKeyCache:
         self._save_to_disk(cache)
         with self._lock:
             self._cache = cache
+        self._notify()
         return True
 
     # ── Assignments ──
@@ -191,3 +212,7 @@ def unassign_key(username: str, key_id: str) -> bool:
 
 def invalidate_cache():
     _cache.invalidate()
+
+def add_invalidation_listener(listener: Callable[[], None]):
+    """Register a callback to run whenever key records are reloaded or modified."""
+    _cache.add_invalidation_listener(listener)
@@ -9,7 +9,7 @@ import logging
 import os
 import shutil
 from threading import Lock
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -35,18 +35,48 @@ class CustomToolCache:
         with self._lock:
             if not self._initialized:
                 self._cache: Optional[Dict[str, Dict[str, Any]]] = None
+                # (created_by, tool_name) -> tool_id, and created_by -> [tool_id]
+                self._by_name: Dict[Tuple[str, str], str] = {}
+                self._by_owner: Dict[str, List[str]] = {}
                 self._initialized = True
 
     def _get_cache(self) -> Dict[str, Dict[str, Any]]:
         if self._cache is None:
             with self._lock:
                 if self._cache is None:
-                    self._cache = self._load_all()
+                    tools = self._load_all()
+                    self._rebuild_index(tools)
+                    self._cache = tools
         return self._cache
 
+    def _rebuild_index(self, tools: Dict[str, Dict[str, Any]]):
+        """Rebuild owner/name indexes. Caller must hold the lock."""
+        self._by_name = {}
+        self._by_owner = {}
+        for tool_id, data in tools.items():
+            self._index_add(tool_id, data)
+
+    def _index_add(self, tool_id: str, data: Dict[str, Any]):
+        owner = data.get("created_by")
+        self._by_name[(owner, data.get("tool_name"))] = tool_id
+        ids = self._by_owner.setdefault(owner, [])
+        if tool_id not in ids:
+            ids.append(tool_id)
+
+    def _index_remove(self, tool_id: str, data: Dict[str, Any]):
+        owner = data.get("created_by")
+        key = (owner, data.get("tool_name"))
+        if self._by_name.get(key) == tool_id:
+            del self._by_name[key]
+        ids = self._by_owner.get(owner)
+        if ids and tool_id in ids:
+            ids.remove(tool_id)
+
     def invalidate(self):
         with self._lock:
             self._cache = None
+            self._by_name = {}
+            self._by_owner = {}
 
     def _load_all(self) -> Dict[str, Dict[str, Any]]:
         logger.info("Loading custom tools from disk...")
@@ -80,7 +110,14 @@ class CustomToolCache:
             json.dump(data, f, indent=2)
         with self._lock:
             if self._cache is not None:
+                previous = self._cache.get(tool_id)
+                if previous is not None and (
+                    (previous.get("created_by"), previous.get("tool_name"))
+                    != (data.get("created_by"), data.get("tool_name"))
+                ):
+                    self._index_remove(tool_id, previous)
                 self._cache[tool_id] = data
+                self._index_add(tool_id, data)
 
     def get(self, tool_id: str) -> Optional[Dict[str, Any]]:
         return self._get_cache().get(tool_id)
@@ -95,17 +132,20 @@ class CustomToolCache:
                 shutil.rmtree(folder)
             with self._lock:
                 if self._cache is not None and tool_id in self._cache:
-                    del self._cache[tool_id]
+                    self._index_remove(tool_id, self._cache.pop(tool_id))
             return True
         except Exception as e:
             logger.error(f"Error deleting custom tool {tool_id}: {e}")
             return False
 
     def find_by_name_and_user(self, tool_name: str, username: str) -> Optional[Dict[str, Any]]:
-        for tool in self._get_cache().values():
-            if tool.get("tool_name") == tool_name and tool.get("created_by") == username:
-                return tool
-        return None
+        cache = self._get_cache()
+        tool_id = self._by_name.get((username, tool_name))
+        return cache.get(tool_id) if tool_id else None
+
+    def list_by_owner(self, username: str) -> List[Dict[str, Any]]:
+        cache = self._get_cache()
+        return [cache[tid] for tid in list(self._by_owner.get(username, [])) if tid in cache]
 
 
 # Global instance
@@ -134,12 +174,12 @@ def list_custom_tools_for_user(username: str, current_user: str) -> List[Dict[st
     from core.auth import permissions
     if current_user != username and not permissions.is_admin(current_user):
         return []
-    return [t for t in _cache.list_all() if t.get("created_by") == username]
+    return _cache.list_by_owner(username)
 
 
 def list_own_custom_tools(current_user: str) -> List[Dict[str, Any]]:
     """List tools created by current_user."""
-    return [t for t in _cache.list_all() if t.get("created_by") == current_user]
+    return _cache.list_by_owner(current_user)
 
 
 def delete_custom_tool(tool_id: str, current_user: str) -> bool:
@@ -1,7 +1,8 @@
+import hashlib
 import json
 import logging
 import os
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from threading import Lock
 from core.dataloaders import user_loader
 
@@ -34,6 +35,8 @@ class DatasetCache:
             if not self._initialized:
                 self._metadata_cache = None
                 self._patients_cache = {}  # Store patient data separately
+                self._versions = {}  # dataset_name -> sha256 of dataset.json contents
+                self._listeners: List[Callable[[Optional[str]], None]] = []
                 self._initialized = True
 
     def get_metadata_cache(self) -> Dict[str, Any]:
@@ -50,6 +53,7 @@ class DatasetCache:
             if dataset_name:
                 # Clear specific dataset
                 self._patients_cache.pop(dataset_name, None)
+                self._versions.pop(dataset_name, None)
                 if self._metadata_cache is not None and dataset_name in self._metadata_cache:
                     # Reload all metadata to be safe
                     self._metadata_cache = None
@@ -57,6 +61,21 @@ class DatasetCache:
                 # Clear everything
                 self._metadata_cache = None
                 self._patients_cache = {}
+                self._versions = {}
+            listeners = list(self._listeners)
+
+        # Notify outside the lock so listeners may read the cache again
+        for listener in listeners:
+            try:
+                listener(dataset_name)
+            except Exception as e:
+                logger.error(f"Dataset invalidation listener failed: {e}")
+
+    def add_invalidation_listener(self, listener: Callable[[Optional[str]], None]):
+        """Register a callback invoked with the dataset name (or None for all) on invalidate."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
 
     @staticmethod
     def _load_json_file(file_path: str) -> Any:
@@ -157,16 +176,40 @@ class DatasetCache:
         with self._lock:
             if dataset_name not in self._patients_cache:  # Double-check lock pattern
                 dataset_path = os.path.join(DATASETS_DIR, dataset_name, "dataset.json")
-                patient_data = self._load_json_file(dataset_path)
+                patient_data, version = self._load_json_file_with_hash(dataset_path)
 
                 if patient_data is None or not isinstance(patient_data, list):
                     logger.error(f"Invalid or missing patient data for dataset: {dataset_name}")
                     return None
 
                 self._patients_cache[dataset_name] = patient_data
+                self._versions[dataset_name] = version
 
         return self._patients_cache[dataset_name]
 
+    def get_dataset_version(self, dataset_name: str) -> Optional[str]:
+        """Return the content hash of a dataset's patient data, loading it if necessary."""
+        if self.get_dataset_patients(dataset_name) is None:
+            return None
+        return self._versions.get(dataset_name)
+
+    @staticmethod
+    def _load_json_file_with_hash(file_path: str):
+        """Load a JSON file and return (data, sha256 hex digest of its bytes)."""
+        try:
+            with open(file_path, 'rb') as fp:
+                raw = fp.read()
+            return json.loads(raw), hashlib.sha256(raw).hexdigest()
+        except FileNotFoundError:
+            logger.warning(f"File not found: {file_path}")
+            return None, None
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON decode error in {file_path}: {e}")
+            return None, None
+        except Exception as e:
+            logger.error(f"Error loading {file_path}: {e}")
+            return None, None
+
     def list_datasets(self) -> List[Dict[str, Any]]:
         """Get all datasets with summary information."""
         metadata = self.get_metadata_cache()
@@ -246,11 +289,21 @@ def dataset_exists(dataset_name: str) -> bool:
     return _cache.dataset_exists(dataset_name)
 
 
+def get_dataset_version(dataset_name: str) -> Optional[str]:
+    """Get the content hash of a dataset's patient data (None if unavailable)."""
+    return _cache.get_dataset_version(dataset_name)
+
+
 def invalidate_dataset_cache(dataset_name: str = None):
     """Force reload of dataset cache."""
     _cache.invalidate(dataset_name)
 
 
+def add_invalidation_listener(listener: Callable[[Optional[str]], None]):
+    """Register a callback to run whenever a dataset (or all datasets) is reloaded."""
+    _cache.add_invalidation_listener(listener)
+
+
 # Patient-level helper functions (for compatibility with existing API)
 
 def create_encounter_summary(encounter: Dict[str, Any]) -> Dict[str, Any]:
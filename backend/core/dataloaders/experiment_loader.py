@@ -5,6 +5,8 @@ from typing import List, Dict, Any, Optional
 from threading import Lock
 import datetime
 
+from core.dataloaders.experiment_results_loader import VALUES_LOG_FILE, read_results
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -30,109 +32,141 @@ class ExperimentCache:
         with self._lock:
             if not self._initialized:
                 self._index = None
+                self._signatures = None
+                self._entries = {}  # experiment_name -> (signature, experiment_info, encounters_seen)
                 self._initialized = True
 
     def get_index(self) -> Optional[Dict[str, Any]]:
-        """Get cached experiment index, loading it if necessary."""
-        if self._index is None:
-            with self._lock:
-                if self._index is None:  # Double-check lock pattern
-                    self._index = self._build_index()
-        return self._index
+        """
+        Get the experiment index, re-reading experiments whose files changed.
+        Experiments are written by the worker process, so a change is detected
+        from file sizes and mtimes rather than from an invalidation here.
+        """
+        with self._lock:
+            signatures = self._scan()
+            if self._index is None or signatures != self._signatures:
+                self._index = self._build_index(signatures)
+                self._signatures = signatures
+            return self._index
 
     def invalidate(self):
         """Clear the cached index."""
         with self._lock:
             self._index = None
+            self._entries = {}
 
-    def _build_index(self) -> Dict[str, Any]:
-        """Build experiment index by scanning all experiment folders."""
-        logger.info("Building experiment index...")
-
-        patient_index = {}  # mrn -> list of experiment info
-        experiment_index = {}  # experiment_name -> metadata + summary
-
+    @staticmethod
+    def _scan() -> Dict[str, tuple]:
+        """Size and mtime of each experiment's metadata, results and values log."""
+        signatures = {}
         if not os.path.exists(EXPERIMENTS_DIR):
-            return {
-                "patient_index": patient_index,
-                "experiment_index": experiment_index,
-                "built_at": datetime.datetime.now().isoformat()
-            }
-
+            return signatures
         for experiment_name in os.listdir(EXPERIMENTS_DIR):
             experiment_path = os.path.join(EXPERIMENTS_DIR, experiment_name)
             if not os.path.isdir(experiment_path):
                 continue
+            signature = []
+            for filename in ("metadata.json", "results.json", VALUES_LOG_FILE):
+                try:
+                    stat = os.stat(os.path.join(experiment_path, filename))
+                    signature.append((stat.st_size, stat.st_mtime_ns))
+                except FileNotFoundError:
+                    signature.append(None)
+            signatures[experiment_name] = tuple(signature)
+        return signatures
+
+    def _load_experiment(self, experiment_name: str):
+        """Summary of one experiment and its flags per (mrn, csn), or None if it can't be read."""
+        experiment_path = os.path.join(EXPERIMENTS_DIR, experiment_name)
+        try:
+            # Load metadata
+            metadata_path = os.path.join(experiment_path, "metadata.json")
+            results_path = os.path.join(experiment_path, "results.json")
 
-            try:
-                # Load metadata
-                metadata_path = os.path.join(experiment_path, "metadata.json")
-                results_path = os.path.join(experiment_path, "results.json")
-
-                if not (os.path.exists(metadata_path) and os.path.exists(results_path)):
-                    continue
+            if not (os.path.exists(metadata_path) and os.path.exists(results_path)):
+                return None
 
-                with open(metadata_path, 'r') as f:
-                    metadata = json.load(f)
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
 
-                with open(results_path, 'r') as f:
-                    results = json.load(f)
+            results = read_results(experiment_name)
 
-                # Process experiment data
-                experiment_info = {
-                    "experiment_name": experiment_name,
-                    "metadata": metadata,
-                    "patient_count": 0,
-                    "total_encounters": 0,
-                    "total_flags_detected": 0,
-                    "total_cost": results.get("cost_summary", {}).get("totals", {}).get("total_cost", 0)
-                }
+            # Process experiment data
+            experiment_info = {
+                "experiment_name": experiment_name,
+                "metadata": metadata,
+                "patient_count": 0,
+                "total_encounters": 0,
+                "total_flags_detected": 0,
+                "total_cost": results.get("cost_summary", {}).get("totals", {}).get("total_cost", 0)
+            }
 
-                output_values = results.get("output_values", [])
+            output_values = results.get("output_values", [])
 
-                # Track unique patients and encounters
-                patients_seen = set()
-                encounters_seen = {}  # (mrn, csn) -> flags_detected count
+            # Track unique patients and encounters
+            patients_seen = set()
+            encounters_seen = {}  # (mrn, csn) -> flags_detected count
 
-                for v in output_values:
-                    patient_id = v.get("metadata", {}).get("patient_id", "")
-                    encounter_id = v.get("metadata", {}).get("encounter_id", "")
+            for v in output_values:
+                patient_id = v.get("metadata", {}).get("patient_id", "")
+                encounter_id = v.get("metadata", {}).get("encounter_id", "")
 
-                    if not patient_id:
-                        continue
+                if not patient_id:
+                    continue
 
-                    patients_seen.add(str(patient_id))
-                    enc_key = (str(patient_id), str(encounter_id))
+                patients_seen.add(str(patient_id))
+                enc_key = (str(patient_id), str(encounter_id))
 
-                    if enc_key not in encounters_seen:
-                        encounters_seen[enc_key] = 0
+                if enc_key not in encounters_seen:
+                    encounters_seen[enc_key] = 0
 
-                    # Count detected flags
-                    if v.get("values", {}).get("detected") is True:
-                        encounters_seen[enc_key] += 1
-                        experiment_info["total_flags_detected"] += 1
+                # Count detected flags
+                if v.get("values", {}).get("detected") is True:
+                    encounters_seen[enc_key] += 1
+                    experiment_info["total_flags_detected"] += 1
 
-                experiment_info["patient_count"] = len(patients_seen)
-                experiment_info["total_encounters"] = len(encounters_seen)
+            experiment_info["patient_count"] = len(patients_seen)
+            experiment_info["total_encounters"] = len(encounters_seen)
+            return experiment_info, encounters_seen
 
-                # Add to patient index
-                for (mrn, csn), flags_detected in encounters_seen.items():
-                    if mrn not in patient_index:
-                        patient_index[mrn] = []
+        except Exception as e:
+            logger.error(f"Error processing experiment {experiment_name}: {e}")
+            return None
 
-                    patient_index[mrn].append({
-                        "experiment_name": experiment_name,
-                        "csn": csn,
-                        "run_date": metadata.get("created_date"),
-                        "flags_detected": flags_detected
-                    })
+    def _build_index(self, signatures: Dict[str, tuple]) -> Dict[str, Any]:
+        """Build the experiment index, reloading only experiments whose signature changed."""
+        logger.info("Building experiment index...")
 
-                experiment_index[experiment_name] = experiment_info
+        patient_index = {}  # mrn -> list of experiment info
+        experiment_index = {}  # experiment_name -> metadata + summary
 
-            except Exception as e:
-                logger.error(f"Error processing experiment {experiment_name}: {e}")
+        entries = {}
+        for experiment_name, signature in signatures.items():
+            entry = self._entries.get(experiment_name)
+            if entry is None or entry[0] != signature:
+                loaded = self._load_experiment(experiment_name)
+                entry = (signature, *loaded) if loaded else (signature, None, None)
+            entries[experiment_name] = entry
+        self._entries = entries
+
+        for experiment_name, (_, experiment_info, encounters_seen) in entries.items():
+            if experiment_info is None:
                 continue
 
+            # Add to patient index
+            for (mrn, csn), flags_detected in encounters_seen.items():
+                if mrn not in patient_index:
+                    patient_index[mrn] = []
+
+                patient_index[mrn].append({
+                    "experiment_name": experiment_name,
+                    "csn": csn,
+                    "run_date": experiment_info["metadata"].get("created_date"),
+                    "flags_detected": flags_detected
+                })
+
+            experiment_index[experiment_name] = experiment_info
+
         logger.info(f"Built index with {len(experiment_index)} experiments and {len(patient_index)} patients")
 
         return {
@@ -211,8 +245,7 @@ class ExperimentCache:
             with open(metadata_path, 'r') as f:
                 metadata = json.load(f)
 
-            with open(results_path, 'r') as f:
-                results = json.load(f)
+            results = read_results(experiment_name)
 
             return {
                 "experiment_name": experiment_name,
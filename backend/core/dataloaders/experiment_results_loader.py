@@ -0,0 +1,260 @@
+"""
+Experiment results storage: an append-only values log, compacted into results.json.
+
+While an experiment runs, each patient's values are appended as one line to
+values.jsonl and new output definitions go to definitions.json, so writing a
+patient costs the same however many patients came before it. A later line for
+the same patient replaces that patient's earlier values (a retried patient
+can't duplicate them). Patient and encounter counts are kept incrementally.
+
+When a run ends, compact_results() folds the log into results.json (with the
+cost summary) and removes it. Readers go through read_results(), which
+overlays any log on results.json, so a running experiment reads the same as
+a finished one.
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+EXPERIMENTS_DIR = "experiments"
+RESULTS_FILE = "results.json"
+VALUES_LOG_FILE = "values.jsonl"
+DEFINITIONS_FILE = "definitions.json"
+
+
+def _path(experiment_name: str, filename: str) -> str:
+    return os.path.join(EXPERIMENTS_DIR, experiment_name, filename)
+
+
+def _write_json_atomic(path: str, data: Any):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str, default: Any) -> Any:
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _log_records(experiment_name: str) -> List[Dict[str, Any]]:
+    """Records of the values log; a torn last line (crash mid-write) is skipped."""
+    path = _path(experiment_name, VALUES_LOG_FILE)
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping unreadable line {line_number} of {experiment_name}/{VALUES_LOG_FILE}")
+    return records
+
+
+def _truncate_torn_tail(experiment_name: str):
+    """Cut a line left unfinished by a crash off the end of the values log, so the next append starts on its own line."""
+    path = _path(experiment_name, VALUES_LOG_FILE)
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Scan back for the end of the last complete line
+        end = size - 1
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        f.truncate(end)
+        f.flush()
+        os.fsync(f.fileno())
+    logger.warning(f"Dropped a torn line ({size - end} bytes) at the end of {experiment_name}/{VALUES_LOG_FILE}")
+
+
+def _patient_id(value: Dict[str, Any]) -> str:
+    return str(value.get("metadata", {}).get("patient_id", ""))
+
+
+def _merge(experiment_name: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, List[dict]]]:
+    """results.json with the log's definitions merged in, and output values grouped by patient."""
+    base = _read_json(_path(experiment_name, RESULTS_FILE), None)
+    if base is None:
+        return None, {}
+
+    definitions = list(base.get("output_definitions", []))
+    known = {d["id"] for d in definitions}
+    for definition in _read_json(_path(experiment_name, DEFINITIONS_FILE), []):
+        if definition["id"] not in known:
+            definitions.append(definition)
+            known.add(definition["id"])
+    base["output_definitions"] = definitions
+
+    by_patient: Dict[str, List[dict]] = {}
+    for value in base.get("output_values", []):
+        by_patient.setdefault(_patient_id(value), []).append(value)
+    for record in _log_records(experiment_name):
+        mrn = str(record.get("mrn") or "")
+        if mrn:
+            by_patient.pop(mrn, None)
+        for value in record.get("output_values", []):
+            by_patient.setdefault(_patient_id(value), []).append(value)
+    return base, by_patient
+
+
+class _ResultsLog:
+    """Write-side state of one experiment's log: known definitions and counters."""
+
+    def __init__(self, experiment_name: str):
+        self.experiment_name = experiment_name
+        self.lock = Lock()
+        self.signature = None
+        self.definition_ids: Set[str] = set()
+        self.encounters: Dict[str, Set[str]] = {}   # patient_id -> encounter ids
+        self.total_encounters = 0
+
+    def _signature(self):
+        """Sizes and mtimes of the files; a change not made here (deleted, recreated) forces a reload."""
+        signature = []
+        for filename in (RESULTS_FILE, VALUES_LOG_FILE):
+            try:
+                stat = os.stat(_path(self.experiment_name, filename))
+                signature.append((stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def load(self):
+        if self.signature is not None and self.signature == self._signature():
+            return
+        base, by_patient = _merge(self.experiment_name)
+        self.definition_ids = {d["id"] for d in (base or {}).get("output_definitions", [])}
+        self.encounters, self.total_encounters = {}, 0
+        for values in by_patient.values():
+            self._count(values)
+        self.signature = self._signature()
+
+    def _count(self, values: List[dict]):
+        for value in values:
+            patient_id = _patient_id(value)
+            if not patient_id:
+                continue
+            seen = self.encounters.setdefault(patient_id, set())
+            encounter_id = str(value.get("metadata", {}).get("encounter_id", ""))
+            if encounter_id and encounter_id not in seen:
+                seen.add(encounter_id)
+                self.total_encounters += 1
+
+    def append(self, mrn: str, definitions: List[dict], values: List[dict]) -> Tuple[int, int]:
+        _truncate_torn_tail(self.experiment_name)
+        self.load()
+
+        new_definitions = [d for d in definitions if d["id"] not in self.definition_ids]
+        if new_definitions:
+            path = _path(self.experiment_name, DEFINITIONS_FILE)
+            _write_json_atomic(path, _read_json(path, []) + new_definitions)
+            self.definition_ids.update(d["id"] for d in new_definitions)
+
+        with open(_path(self.experiment_name, VALUES_LOG_FILE), 'a') as f:
+            f.write(json.dumps({"mrn": mrn, "output_values": values}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        if mrn:
+            self.total_encounters -= len(self.encounters.pop(mrn, ()))
+        self._count(values)
+        self.signature = self._signature()
+        return len(self.encounters), self.total_encounters
+
+
+_logs: Dict[str, _ResultsLog] = {}
+_logs_lock = Lock()
+
+
+def _results_log(experiment_name: str) -> _ResultsLog:
+    with _logs_lock:
+        if experiment_name not in _logs:
+            _logs[experiment_name] = _ResultsLog(experiment_name)
+        return _logs[experiment_name]
+
+
+def create_results(experiment_name: str):
+    """Start an experiment's results empty (a leftover log from a same-named experiment is removed)."""
+    results_log = _results_log(experiment_name)
+    with results_log.lock:
+        for filename in (VALUES_LOG_FILE, DEFINITIONS_FILE):
+            if os.path.exists(_path(experiment_name, filename)):
+                os.remove(_path(experiment_name, filename))
+        _write_json_atomic(_path(experiment_name, RESULTS_FILE), {"output_definitions": [], "output_values": []})
+        results_log.signature = None
+
+
+def append_patient_values(
+    experiment_name: str,
+    mrn: Any,
+    output_definitions: List[dict],
+    output_values: List[dict],
+) -> Tuple[int, int]:
+    """
+    Append one patient's values to the experiment's log, replacing any the patient already has.
+
+    Returns:
+        (total_patients, total_encounters) of the experiment after the append
+    """
+    results_log = _results_log(experiment_name)
+    with results_log.lock:
+        return results_log.append(str(mrn or ""), output_definitions, output_values)
+
+
+def read_results(experiment_name: str) -> Optional[Dict[str, Any]]:
+    """An experiment's results in results.json form (log included), or None if it has none."""
+    base, by_patient = _merge(experiment_name)
+    if base is None:
+        return None
+    base["output_values"] = [value for values in by_patient.values() for value in values]
+    return base
+
+
+def compact_results(experiment_name: str, cost_summary: Optional[Dict[str, Any]] = None):
+    """
+    Fold the values log into results.json, optionally setting its cost summary.
+
+    results.json is replaced atomically before the log is removed, so a crash in
+    between leaves both, which read the same (the log replays onto its own values).
+    """
+    results_log = _results_log(experiment_name)
+    with results_log.lock:
+        results = read_results(experiment_name)
+        if results is None:
+            return
+        if cost_summary is not None:
+            results["cost_summary"] = cost_summary
+        _write_json_atomic(_path(experiment_name, RESULTS_FILE), results)
+        for filename in (VALUES_LOG_FILE, DEFINITIONS_FILE):
+            if os.path.exists(_path(experiment_name, filename)):
+                os.remove(_path(experiment_name, filename))
+        results_log.signature = None
+    logger.info(f"Compacted results of experiment {experiment_name}")
+
+
+def forget_results(experiment_name: str):
+    """Drop the write-side state of a deleted experiment."""
+    with _logs_lock:
+        _logs.pop(experiment_name, None)
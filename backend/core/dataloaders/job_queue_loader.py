@@ -0,0 +1,489 @@
+"""
+Persistent queue of experiment jobs, shared by the API and the worker processes.
+
+The API enqueues a job per experiment and records cancel/pause/resume
+requests; workers (worker.py) claim jobs, heartbeat while they run and read
+those requests back from the heartbeat. The job row is also the
+experiment's live status: the same document status.json used to hold
+(progress, errors, timestamps), with the job state as its "status".
+
+Each finished patient attempt is logged in patient_runs with its costs
+once its results are written: the experiment's completion ledger. A paused
+job, one whose worker died, or an ended one that is resumed picks up from
+the patients it had already finished instead of starting over. Ledger rows
+are single-statement inserts, so a crash leaves each attempt either fully
+logged or not logged at all.
+
+States: pending -> running -> completed | partial_complete | failed | cancelled,
+with running -> pausing -> paused -> pending on pause/resume,
+running -> cancelling -> cancelled on cancel, and partial_complete | failed |
+cancelled -> pending when an online experiment is resumed.
+"""
+
+import copy
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EXPERIMENT_QUEUE_PATH = os.getenv("EXPERIMENT_QUEUE_PATH", os.path.join("job_queue", "experiments.sqlite"))
+# Seconds without a heartbeat after which a running job's worker is presumed dead
+EXPERIMENT_JOB_STALE_SECONDS = float(os.getenv("EXPERIMENT_JOB_STALE_SECONDS", "60"))
+# Claims of one job before a job that keeps losing its worker is failed
+EXPERIMENT_JOB_MAX_ATTEMPTS = int(os.getenv("EXPERIMENT_JOB_MAX_ATTEMPTS", "3"))
+
+ACTIVE_STATES = ("running", "pausing", "cancelling")
+FINAL_STATES = ("completed", "partial_complete", "failed", "cancelled")
+# Ended states an online job can be resumed from
+RESUMABLE_STATES = ("partial_complete", "failed", "cancelled")
+
+# Cancellation token reasons for a job stopped by its worker rather than by a cancel
+PAUSE_REASON = "Experiment paused"
+REQUEUE_REASON = "Worker shutting down"
+LOST_REASON = "Worker lost the job to another worker"
+
+
+def initial_status(total_patients: int) -> Dict[str, Any]:
+    """Status document of a job that has not started."""
+    return {
+        "progress": {
+            "total_patients": total_patients,
+            "processed_count": 0,
+            "failed_count": 0,
+            "current_patient_mrn": None
+        },
+        "started_at": None,
+        "completed_at": None,
+        "total_flags_detected": 0,
+        "errors": []
+    }
+
+
+class JobQueue:
+    """Thread-safe singleton over the SQLite job queue (safe across processes)."""
+
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                self._conn: Optional[sqlite3.Connection] = None
+                self._initialized = True
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Open the database on first use. Caller must hold the lock."""
+        if self._conn is None:
+            directory = os.path.dirname(EXPERIMENT_QUEUE_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit; writes that must be atomic open their own transaction
+            conn = sqlite3.connect(EXPERIMENT_QUEUE_PATH, check_same_thread=False,
+                                   timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " experiment_name TEXT PRIMARY KEY, kind TEXT NOT NULL, request TEXT NOT NULL,"
+                " submitted_by TEXT NOT NULL, state TEXT NOT NULL, control TEXT,"
+                " worker_id TEXT, heartbeat_at REAL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL, updated_at REAL NOT NULL, status TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS patient_runs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, experiment_name TEXT NOT NULL,"
+                " mrn TEXT NOT NULL, outcome TEXT NOT NULL, costs TEXT NOT NULL,"
+                " flags INTEGER NOT NULL DEFAULT 0, error TEXT, finished_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS patient_runs_experiment ON patient_runs(experiment_name)")
+            # Patient data fingerprint of complete runs (added after the table first shipped)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(patient_runs)")}
+            if "fingerprint" not in columns:
+                conn.execute("ALTER TABLE patient_runs ADD COLUMN fingerprint TEXT")
+            # Workflow snapshot a job runs from (added after the table first shipped)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "snapshot" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN snapshot TEXT")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["request"] = json.loads(job["request"])
+        job["status"] = json.loads(job["status"])
+        job["snapshot"] = json.loads(job["snapshot"]) if job.get("snapshot") else None
+        return job
+
+    def enqueue(self, experiment_name: str, kind: str, request: Dict[str, Any],
+                submitted_by: str, total_patients: int, snapshot: Optional[Dict[str, Any]] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._get_conn().execute(
+                "INSERT INTO jobs (experiment_name, kind, request, submitted_by, state,"
+                " created_at, updated_at, status, snapshot) VALUES (?, ?, ?, ?, 'pending', ?, ?, ?, ?)",
+                (experiment_name, kind, json.dumps(request), submitted_by, now, now,
+                 json.dumps(initial_status(total_patients)),
+                 json.dumps(snapshot) if snapshot is not None else None),
+            )
+        logger.info(f"Queued experiment job: {experiment_name}")
+
+    def get(self, experiment_name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._get_conn().execute(
+                "SELECT * FROM jobs WHERE experiment_name = ?", (experiment_name,)
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def list(self, states: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        query, params = "SELECT * FROM jobs", ()
+        if states:
+            query += f" WHERE state IN ({', '.join('?' * len(states))})"
+            params = tuple(states)
+        with self._lock:
+            rows = self._get_conn().execute(query + " ORDER BY created_at", params).fetchall()
+        return [self._job(row) for row in rows]
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Take the oldest pending job for worker_id, or None if there is none."""
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            # IMMEDIATE takes the write lock up front, so two workers can't claim one job
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT experiment_name FROM jobs WHERE state = 'pending' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET state = 'running', control = NULL, worker_id = ?,"
+                        " heartbeat_at = ?, attempts = attempts + 1, updated_at = ?"
+                        " WHERE experiment_name = ?",
+                        (worker_id, now, now, row["experiment_name"]),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        logger.info(f"Worker {worker_id} claimed experiment job: {row['experiment_name']}")
+        return self.get(row["experiment_name"])
+
+    def heartbeat(self, experiment_name: str, worker_id: str) -> Optional[str]:
+        """
+        Record that worker_id is still running the job.
+
+        Returns the pending control request ("cancel" or "pause"), or "lost"
+        when the job is gone or no longer belongs to this worker.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE experiment_name = ? AND worker_id = ?",
+                (now, experiment_name, worker_id),
+            )
+            row = conn.execute(
+                "SELECT control, worker_id FROM jobs WHERE experiment_name = ?", (experiment_name,)
+            ).fetchone()
+        if row is None or row["worker_id"] != worker_id:
+            return "lost"
+        return row["control"]
+
+    def request(self, experiment_name: str, action: str,
+                request_updates: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Apply a cancel, pause or resume request and return the job's new state.
+
+        Jobs nobody is running change state directly; running ones get a
+        control flag their worker picks up on its next heartbeat. A resume
+        merges request_updates (e.g. a retry policy) into the job's request.
+        Raises KeyError for an unknown job and ValueError when the job's
+        state doesn't allow the action.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT state, kind, request FROM jobs WHERE experiment_name = ?", (experiment_name,)
+                ).fetchone()
+                if row is None:
+                    raise KeyError(experiment_name)
+                state, kind = row["state"], row["kind"]
+                restart = False
+
+                if action == "cancel" and state in ("pending", "paused"):
+                    updates = {"state": "cancelled", "control": None}
+                elif action == "cancel" and state in ("running", "pausing"):
+                    updates = {"state": "cancelling", "control": "cancel"}
+                elif action == "pause" and kind != "online":
+                    raise ValueError("Only online experiments can be paused")
+                elif action == "pause" and state == "pending":
+                    updates = {"state": "paused", "control": None}
+                elif action == "pause" and state == "running":
+                    updates = {"state": "pausing", "control": "pause"}
+                elif action == "resume" and state == "paused":
+                    updates = {"state": "pending", "control": None}
+                elif action == "resume" and state in RESUMABLE_STATES and kind == "online":
+                    updates = {"state": "pending", "control": None}
+                    restart = True
+                elif action == "resume" and state in RESUMABLE_STATES:
+                    raise ValueError("Only online experiments can be resumed")
+                else:
+                    raise ValueError(f"Cannot {action} an experiment that is {state}")
+
+                conn.execute(
+                    "UPDATE jobs SET state = ?, control = ?, updated_at = ? WHERE experiment_name = ?",
+                    (updates["state"], updates["control"], now, experiment_name),
+                )
+                if updates["state"] == "cancelled":
+                    self._set_status(conn, experiment_name, {"completed_at": _now_iso()})
+                if restart:
+                    # An ended job gets a fresh allowance of worker crashes
+                    conn.execute("UPDATE jobs SET attempts = 0 WHERE experiment_name = ?", (experiment_name,))
+                    self._set_status(conn, experiment_name, {"completed_at": None})
+                if action == "resume" and request_updates:
+                    conn.execute(
+                        "UPDATE jobs SET request = ? WHERE experiment_name = ?",
+                        (json.dumps({**json.loads(row["request"]), **request_updates}), experiment_name),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Experiment job {experiment_name}: {action} -> {updates['state']}")
+        return updates["state"]
+
+    def update_status(self, experiment_name: str, updates: Dict[str, Any],
+                      worker_id: Optional[str] = None) -> bool:
+        """
+        Apply status.json-style updates (dotted keys for nested fields).
+        A "status" key sets the job state; final and paused states also
+        release the job from its worker. Updates from a worker (worker_id)
+        are dropped once the job no longer belongs to it, so a worker that
+        lost its job can't overwrite the new owner's status before it
+        notices. Returns False when there is no job.
+        """
+        updates = dict(updates)
+        state = updates.pop("status", None)
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if worker_id is not None:
+                    row = conn.execute(
+                        "SELECT worker_id FROM jobs WHERE experiment_name = ?", (experiment_name,)
+                    ).fetchone()
+                    if row is not None and row["worker_id"] != worker_id:
+                        logger.warning(f"Dropped a status update from worker {worker_id} for experiment "
+                                       f"job {experiment_name}, which it no longer runs")
+                        conn.execute("COMMIT")
+                        return True
+                found = self._set_status(conn, experiment_name, updates)
+                if found and state is not None:
+                    if state in FINAL_STATES or state in ("paused", "pending"):
+                        conn.execute(
+                            "UPDATE jobs SET state = ?, control = NULL, worker_id = NULL, updated_at = ?"
+                            " WHERE experiment_name = ?",
+                            (state, now, experiment_name),
+                        )
+                    else:
+                        conn.execute(
+                            "UPDATE jobs SET state = ?, updated_at = ? WHERE experiment_name = ?",
+                            (state, now, experiment_name),
+                        )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return found
+
+    @staticmethod
+    def _set_status(conn: sqlite3.Connection, experiment_name: str, updates: Dict[str, Any]) -> bool:
+        """Merge updates into a job's status document. Caller holds the lock and a transaction."""
+        row = conn.execute("SELECT status FROM jobs WHERE experiment_name = ?", (experiment_name,)).fetchone()
+        if row is None:
+            return False
+        status = json.loads(row["status"])
+        for key, value in updates.items():
+            # Support nested updates like "progress.processed_count"
+            parts = key.split('.')
+            current = status
+            for part in parts[:-1]:
+                current = current.setdefault(part, {})
+            current[parts[-1]] = copy.deepcopy(value)
+        conn.execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE experiment_name = ?",
+            (json.dumps(status), time.time(), experiment_name),
+        )
+        return True
+
+    def requeue_stale(self, timeout: float = EXPERIMENT_JOB_STALE_SECONDS) -> List[str]:
+        """
+        Recover jobs whose worker stopped heartbeating: running jobs go back
+        to pending (failing after EXPERIMENT_JOB_MAX_ATTEMPTS claims), pausing
+        and cancelling ones finish the request. A batch job's next run
+        re-attaches to the provider jobs it submitted. Returns the recovered job names.
+        """
+        now = time.time()
+        recovered = []
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    f"SELECT experiment_name, state, attempts, worker_id FROM jobs"
+                    f" WHERE state IN ({', '.join('?' * len(ACTIVE_STATES))}) AND heartbeat_at < ?",
+                    (*ACTIVE_STATES, now - timeout),
+                ).fetchall()
+                for row in rows:
+                    name = row["experiment_name"]
+                    error = None
+                    if row["state"] == "cancelling":
+                        state = "cancelled"
+                    elif row["state"] == "pausing":
+                        state = "paused"
+                    elif row["attempts"] >= EXPERIMENT_JOB_MAX_ATTEMPTS:
+                        state = "failed"
+                        error = f"Worker stopped {row['attempts']} times while running this experiment"
+                    else:
+                        state = "pending"
+
+                    conn.execute(
+                        "UPDATE jobs SET state = ?, control = NULL, worker_id = NULL, updated_at = ?"
+                        " WHERE experiment_name = ?",
+                        (state, now, name),
+                    )
+                    if error:
+                        status = json.loads(conn.execute(
+                            "SELECT status FROM jobs WHERE experiment_name = ?", (name,)
+                        ).fetchone()["status"])
+                        self._set_status(conn, name, {
+                            "completed_at": _now_iso(),
+                            "errors": status.get("errors", []) + [{"error": error}],
+                        })
+                    elif state in ("cancelled", "failed"):
+                        self._set_status(conn, name, {"completed_at": _now_iso()})
+                    logger.warning(f"Worker {row['worker_id']} stopped heartbeating; experiment job {name} -> {state}")
+                    recovered.append(name)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return recovered
+
+    def record_patient_run(self, experiment_name: str, mrn: str, outcome: str, costs: Dict[str, Any],
+                           flags: int = 0, error: Optional[str] = None, fingerprint: Optional[str] = None) -> None:
+        with self._lock:
+            self._get_conn().execute(
+                "INSERT INTO patient_runs (experiment_name, mrn, outcome, costs, flags, error, finished_at, fingerprint)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (experiment_name, mrn, outcome, json.dumps(costs), flags, error, time.time(), fingerprint),
+            )
+
+    def patient_runs(self, experiment_name: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._get_conn().execute(
+                "SELECT id, mrn, outcome, costs, flags, error, finished_at, fingerprint FROM patient_runs"
+                " WHERE experiment_name = ? ORDER BY id",
+                (experiment_name,),
+            ).fetchall()
+        return [{**dict(row), "costs": json.loads(row["costs"])} for row in rows]
+
+    def delete(self, experiment_name: str) -> None:
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM jobs WHERE experiment_name = ?", (experiment_name,))
+                conn.execute("DELETE FROM patient_runs WHERE experiment_name = ?", (experiment_name,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+
+def _now_iso() -> str:
+    return datetime.datetime.now().isoformat()
+
+
+_queue = JobQueue()
+
+
+def enqueue_job(experiment_name: str, kind: str, request: Dict[str, Any],
+                submitted_by: str, total_patients: int, snapshot: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Queue an experiment run; request is the original POST /experiments body.
+    snapshot pins what was resolved at submit time (workflow, patients, definition
+    fingerprints) so every run and resume of the job executes the same workflow.
+    """
+    _queue.enqueue(experiment_name, kind, request, submitted_by, total_patients, snapshot)
+
+
+def get_job(experiment_name: str) -> Optional[Dict[str, Any]]:
+    return _queue.get(experiment_name)
+
+
+def list_jobs(states: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    return _queue.list(states)
+
+
+def claim_job(worker_id: str) -> Optional[Dict[str, Any]]:
+    return _queue.claim(worker_id)
+
+
+def heartbeat_job(experiment_name: str, worker_id: str) -> Optional[str]:
+    return _queue.heartbeat(experiment_name, worker_id)
+
+
+def request_job_action(experiment_name: str, action: str,
+                       request_updates: Optional[Dict[str, Any]] = None) -> str:
+    return _queue.request(experiment_name, action, request_updates)
+
+
+def update_job_status(experiment_name: str, updates: Dict[str, Any], worker_id: Optional[str] = None) -> bool:
+    return _queue.update_status(experiment_name, updates, worker_id)
+
+
+def requeue_stale_jobs(timeout: float = EXPERIMENT_JOB_STALE_SECONDS) -> List[str]:
+    return _queue.requeue_stale(timeout)
+
+
+def record_patient_run(experiment_name: str, mrn: str, outcome: str, costs: Dict[str, Any],
+                       flags: int = 0, error: Optional[str] = None, fingerprint: Optional[str] = None) -> None:
+    """
+    Log one finished patient attempt: outcome is completed, failed or interrupted.
+    fingerprint is the patient's data fingerprint, given when every definition's
+    values are complete (no step errors) so a derived experiment may reuse them.
+    """
+    _queue.record_patient_run(experiment_name, mrn, outcome, costs, flags, error, fingerprint)
+
+
+def get_patient_runs(experiment_name: str) -> List[Dict[str, Any]]:
+    """Logged patient attempts of an experiment (the completion ledger), oldest first."""
+    return _queue.patient_runs(experiment_name)
+
+
+def delete_job(experiment_name: str) -> None:
+    _queue.delete(experiment_name)
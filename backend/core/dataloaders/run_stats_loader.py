@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+import datetime
+from typing import List, Dict, Any, Optional
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+RUN_STATS_DIR = "run_stats"
+# Observations kept per (model, mode); older ones are dropped
+MAX_OBSERVATIONS_PER_MODEL = 50
+_file_lock = Lock()
+
+
+def _run_stats_path() -> str:
+    return os.path.join(RUN_STATS_DIR, "experiment_runs.json")
+
+
+def _read_run_stats() -> List[Dict[str, Any]]:
+    path = _run_stats_path()
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, Exception) as e:
+        logger.error(f"Error reading run stats: {e}")
+        return []
+
+
+def _write_run_stats(entries: List[Dict[str, Any]]):
+    """Write to a temp file and rename it over the stats, so a crash or a reader never sees a partial file."""
+    os.makedirs(RUN_STATS_DIR, exist_ok=True)
+    path = _run_stats_path()
+    # The API and the workers both record runs; each writes its own temp file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(entries, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def append_run_observation(
+    experiment_name: str,
+    model_name: str,
+    mode: str,
+    patients: int,
+    llm_calls: int,
+    input_tokens: int,
+    output_tokens: int,
+    cost: float,
+    wall_seconds: float,
+) -> None:
+    """Record the observed throughput of a finished experiment run."""
+    entry = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "experiment_name": experiment_name,
+        "model_name": model_name,
+        "mode": mode,
+        "patients": patients,
+        "llm_calls": llm_calls,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost": cost,
+        "wall_seconds": wall_seconds,
+    }
+    with _file_lock:
+        entries = _read_run_stats()
+        entries.append(entry)
+        same = [e for e in entries if e.get("model_name") == model_name and e.get("mode") == mode]
+        if len(same) > MAX_OBSERVATIONS_PER_MODEL:
+            dropped = set(id(e) for e in same[:-MAX_OBSERVATIONS_PER_MODEL])
+            entries = [e for e in entries if id(e) not in dropped]
+        _write_run_stats(entries)
+    logger.info(f"Recorded run stats for {experiment_name} ({model_name}, {mode})")
+
+
+def get_run_observations(model_name: str, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Past run observations for a model, oldest first."""
+    return [
+        e for e in _read_run_stats()
+        if e.get("model_name") == model_name and (mode is None or e.get("mode") == mode)
+    ]
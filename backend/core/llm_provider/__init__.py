@@ -27,10 +27,32 @@ Example Usage:
     >>> if result.has_tool_calls:
     ...     for tc in result.tool_calls:
     ...         print(tc.name, tc.arguments)
+    >>>
+    >>> # Independent calls in parallel (order preserved, errors per item)
+    >>> batch = call_many([{"messages": [...], "key_name": "my-key"}, ...], max_concurrency=4)
+    >>> print(batch.cost, [r.content for r in batch.results if r])
+    >>>
+    >>> # Hedge slow calls and fail over to a backup key
+    >>> with hedge_scope(HedgePolicy(fallback_keys=["backup-key"])):
+    ...     result = call(messages=[...], key_name="my-key")
+    >>>
+    >>> # Latency-insensitive work via provider batch jobs (batch prices)
+    >>> batch = run_batch([{"messages": [...], "key_name": "my-key"}, ...])
+    >>>
+    >>> # Async (native SDK async clients)
+    >>> result = await acall(messages=[...], key_name="my-key")
+    >>> async for chunk in astream(messages=[...], key_name="my-key"):
+    ...     print(chunk.content, end="")
+    >>>
+    >>> # Structured streaming: validated fields as soon as they complete
+    >>> for chunk in call(messages=[...], key_name="my-key", schema=Person, stream=True):
+    ...     print(chunk.fields, chunk.field_deltas)
 """
 
-from .client import call
-from .result import LLMResult, ToolCall, ToolResult, StreamChunk
+from .client import acall, astream, call, call_many
+from .batch import BatchClient, LocalBatchClient, get_batch_client, run_batch
+from .partial_json import IncrementalJSONParser, PartialUpdate
+from .result import BatchItem, BatchResult, LLMResult, ToolCall, ToolResult, StreamChunk
 from .registry import (
     MODELS,
     ModelConfig,
@@ -41,15 +63,47 @@ from .registry import (
     calculate_cost,
 )
 from .providers.base import ToolDefinition
+from .client_pool import client_pool_stats, clear_client_pool
+from .rate_limit import clear_rate_limiters, rate_limit_stats
+from .hedge import HedgePolicy, clear_hedge_stats, hedge_scope, hedge_stats
+from .process_stats import (
+    combined_hedge_stats,
+    combined_rate_limit_stats,
+    publish_process_stats,
+    remove_process_stats,
+)
+from .cascade import CascadePolicy, cascade_call
+from .metrics import render_metrics, tool_scope
+from .response_cache import clear_response_cache, response_cache_stats
+from .deadline import (
+    CancellationToken,
+    CallCancelled,
+    DeadlineExceeded,
+    deadline_scope,
+    remaining_time,
+)
 
 __all__ = [
-    # Main function
+    # Main functions
     "call",
+    "acall",
+    "astream",
+    "call_many",
+    "run_batch",
+    # Batch jobs
+    "BatchClient",
+    "LocalBatchClient",
+    "get_batch_client",
+    # Structured streaming
+    "IncrementalJSONParser",
+    "PartialUpdate",
     # Result types
     "LLMResult",
     "ToolCall",
     "ToolResult",
     "StreamChunk",
+    "BatchItem",
+    "BatchResult",
     "ToolDefinition",
     # Registry
     "MODELS",
@@ -59,4 +113,35 @@ __all__ = [
     "get_models_by_provider",
     "get_model_names",
     "calculate_cost",
+    # Client pool
+    "client_pool_stats",
+    "clear_client_pool",
+    # Telemetry
+    "render_metrics",
+    "tool_scope",
+    # Rate limiting
+    "rate_limit_stats",
+    "clear_rate_limiters",
+    # Model cascade
+    "CascadePolicy",
+    "cascade_call",
+    # Hedging / failover
+    "HedgePolicy",
+    "hedge_scope",
+    "hedge_stats",
+    "clear_hedge_stats",
+    # Stats across processes (API + workers)
+    "combined_hedge_stats",
+    "combined_rate_limit_stats",
+    "publish_process_stats",
+    "remove_process_stats",
+    # Response cache
+    "response_cache_stats",
+    "clear_response_cache",
+    # Deadlines / cancellation
+    "CancellationToken",
+    "CallCancelled",
+    "DeadlineExceeded",
+    "deadline_scope",
+    "remaining_time",
 ]
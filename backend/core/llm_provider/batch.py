@@ -0,0 +1,490 @@
+"""Provider batch jobs for large, latency-insensitive workloads.
+
+run_batch() takes the same request dicts as call_many(), but instead of one
+synchronous call per request it serializes them into batch jobs in the
+provider's own format (OpenAI Batch API JSONL, Anthropic Message Batches),
+submits them through a BatchClient, polls until the jobs end and maps each
+result back to an LLMResult billed at the model's batch prices
+(ModelConfig.batch_input_price_per_m / batch_output_price_per_m).
+
+BatchClient is the transport and is pluggable:
+
+- OpenAIBatchClient: uploads a JSONL input file and creates a /v1/batches job
+- AnthropicBatchClient: creates a Message Batches job
+- LocalBatchClient: file-based stand-in that writes the same provider-format
+  input/output files under LLM_BATCH_LOCAL_DIR and completes a job on the
+  first poll by sending each request as an ordinary synchronous call (or
+  through a custom responder). For development and tests; it bills batch
+  prices although the provider charged the regular ones.
+
+LLM_BATCH_CLIENT selects "provider" (default) or "local" for get_batch_client().
+
+Jobs can outlive the process waiting on them: on_submit hands out each
+job's id, key and request indices, and a later run_batch() over the same
+requests re-attaches to them (attach=) instead of submitting them again.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from .client import _build_result, _get_provider, _prepare
+from .deadline import CallCancelled, DeadlineExceeded, check_deadline, current_token
+from .result import BatchItem, BatchResult
+from .retry import retrying_request
+
+logger = logging.getLogger(__name__)
+
+LLM_BATCH_CLIENT = os.getenv("LLM_BATCH_CLIENT", "provider").lower()
+LLM_BATCH_LOCAL_DIR = os.getenv("LLM_BATCH_LOCAL_DIR", os.path.join("llm_cache", "batches"))
+LLM_BATCH_POLL_SECONDS = float(os.getenv("LLM_BATCH_POLL_SECONDS", "30"))
+# Requests per submitted job (OpenAI allows 50k per file, Anthropic 100k per batch)
+LLM_BATCH_MAX_REQUESTS = int(os.getenv("LLM_BATCH_MAX_REQUESTS", "10000"))
+
+# Normalized job states returned by BatchClient.status()
+BATCH_IN_PROGRESS = "in_progress"
+BATCH_ENDED = "ended"        # results (possibly partial) can be fetched
+BATCH_FAILED = "failed"      # the job as a whole was rejected; no results
+
+# Keyword arguments of call() that a batch request may carry
+_REQUEST_FIELDS = ("messages", "system", "temperature", "max_tokens", "schema")
+
+
+class BatchClient(ABC):
+    """Transport for one provider's batch jobs.
+
+    Request and result lines are in the provider's own batch formats, as
+    produced by BaseProvider.batch_request() and consumed by
+    BaseProvider.parse_batch_result().
+    """
+
+    provider: str
+
+    @abstractmethod
+    def submit(self, lines: List[Dict[str, Any]], api_key: str) -> str:
+        """Create a job from request lines and return its id."""
+
+    @abstractmethod
+    def status(self, job_id: str, api_key: str) -> str:
+        """BATCH_IN_PROGRESS, BATCH_ENDED or BATCH_FAILED."""
+
+    @abstractmethod
+    def results(self, job_id: str, api_key: str) -> Iterator[Dict[str, Any]]:
+        """Result lines of an ended job, in any order."""
+
+    @abstractmethod
+    def cancel(self, job_id: str, api_key: str) -> None:
+        """Ask the provider to stop the job; ended jobs are left alone."""
+
+
+class OpenAIBatchClient(BatchClient):
+    """OpenAI Batch API: JSONL file upload + /v1/batches."""
+
+    provider = "openai"
+
+    def _client(self, api_key: str):
+        return _get_provider(self.provider)._get_client(api_key)
+
+    def submit(self, lines: List[Dict[str, Any]], api_key: str) -> str:
+        client = self._client(api_key)
+        data = "\n".join(json.dumps(line) for line in lines).encode("utf-8")
+        input_file = client.files.create(file=("batch.jsonl", data), purpose="batch")
+        job = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return job.id
+
+    def status(self, job_id: str, api_key: str) -> str:
+        status = self._client(api_key).batches.retrieve(job_id).status
+        if status == "failed":
+            return BATCH_FAILED
+        # Expired and cancelled jobs still return the requests that finished
+        if status in ("completed", "expired", "cancelled"):
+            return BATCH_ENDED
+        return BATCH_IN_PROGRESS
+
+    def results(self, job_id: str, api_key: str) -> Iterator[Dict[str, Any]]:
+        client = self._client(api_key)
+        job = client.batches.retrieve(job_id)
+        for file_id in (job.output_file_id, job.error_file_id):
+            if not file_id:
+                continue
+            for raw in client.files.content(file_id).text.splitlines():
+                if raw.strip():
+                    yield json.loads(raw)
+
+    def cancel(self, job_id: str, api_key: str) -> None:
+        self._client(api_key).batches.cancel(job_id)
+
+
+class AnthropicBatchClient(BatchClient):
+    """Anthropic Message Batches API."""
+
+    provider = "anthropic"
+
+    def _client(self, api_key: str):
+        return _get_provider(self.provider)._get_client(api_key)
+
+    def submit(self, lines: List[Dict[str, Any]], api_key: str) -> str:
+        return self._client(api_key).messages.batches.create(requests=lines).id
+
+    def status(self, job_id: str, api_key: str) -> str:
+        job = self._client(api_key).messages.batches.retrieve(job_id)
+        return BATCH_ENDED if job.processing_status == "ended" else BATCH_IN_PROGRESS
+
+    def results(self, job_id: str, api_key: str) -> Iterator[Dict[str, Any]]:
+        for entry in self._client(api_key).messages.batches.results(job_id):
+            yield entry.model_dump(mode="json")
+
+    def cancel(self, job_id: str, api_key: str) -> None:
+        self._client(api_key).messages.batches.cancel(job_id)
+
+
+def _send_request(provider: str, line: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+    """Default LocalBatchClient responder: one synchronous provider call."""
+    if provider == "mock":
+        return _get_provider(provider).respond_batch_line(line, api_key)
+    client = _get_provider(provider)._get_client(api_key)
+    if provider == "openai":
+        return client.chat.completions.create(**line["body"]).model_dump(mode="json")
+    return client.messages.create(**line["params"]).model_dump(mode="json")
+
+
+class LocalBatchClient(BatchClient):
+    """File-based stand-in for a provider batch API.
+
+    Each job is a directory holding input.jsonl (provider request format),
+    job.json and, once processed, output.jsonl (provider result format).
+    `responder(provider, request_line, api_key)` returns the response body
+    for one request: a chat completion (OpenAI) or message (Anthropic) dict.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        root: Optional[str] = None,
+        responder: Optional[Callable[[str, Dict[str, Any], str], Dict[str, Any]]] = None,
+    ):
+        self.provider = provider
+        self.root = root or LLM_BATCH_LOCAL_DIR
+        self.responder = responder or _send_request
+
+    def _path(self, job_id: str, name: str) -> str:
+        return os.path.join(self.root, job_id, name)
+
+    def _read_job(self, job_id: str) -> Dict[str, Any]:
+        with open(self._path(job_id, "job.json"), "r") as f:
+            return json.load(f)
+
+    def _write_job(self, job_id: str, job: Dict[str, Any]) -> None:
+        with open(self._path(job_id, "job.json"), "w") as f:
+            json.dump(job, f, indent=2)
+
+    def submit(self, lines: List[Dict[str, Any]], api_key: str) -> str:
+        job_id = f"local_{self.provider}_{uuid.uuid4().hex[:12]}"
+        os.makedirs(os.path.join(self.root, job_id), exist_ok=True)
+        with open(self._path(job_id, "input.jsonl"), "w") as f:
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+        self._write_job(job_id, {
+            "id": job_id,
+            "provider": self.provider,
+            "status": BATCH_IN_PROGRESS,
+            "request_count": len(lines),
+            "created_at": time.time(),
+        })
+        return job_id
+
+    def status(self, job_id: str, api_key: str) -> str:
+        job = self._read_job(job_id)
+        if job["status"] == BATCH_IN_PROGRESS:
+            self._process(job_id, api_key)
+            job["status"] = BATCH_ENDED
+            job["ended_at"] = time.time()
+            self._write_job(job_id, job)
+        return job["status"]
+
+    def _process(self, job_id: str, api_key: str) -> None:
+        with open(self._path(job_id, "input.jsonl"), "r") as f:
+            lines = [json.loads(raw) for raw in f if raw.strip()]
+        with open(self._path(job_id, "output.jsonl"), "w") as out:
+            for line in lines:
+                out.write(json.dumps(self._respond(line, api_key)) + "\n")
+
+    def _respond(self, line: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+        custom_id = line["custom_id"]
+        try:
+            body = self.responder(self.provider, line, api_key)
+        except Exception as e:
+            error = {"type": type(e).__name__, "message": str(e)}
+            if self.provider == "openai":
+                return {"custom_id": custom_id, "response": None, "error": error}
+            return {"custom_id": custom_id, "result": {"type": "errored", "error": error}}
+
+        if self.provider == "openai":
+            return {
+                "custom_id": custom_id,
+                "response": {"status_code": 200, "body": body},
+                "error": None,
+            }
+        return {"custom_id": custom_id, "result": {"type": "succeeded", "message": body}}
+
+    def results(self, job_id: str, api_key: str) -> Iterator[Dict[str, Any]]:
+        path = self._path(job_id, "output.jsonl")
+        if not os.path.exists(path):
+            return
+        with open(path, "r") as f:
+            for raw in f:
+                if raw.strip():
+                    yield json.loads(raw)
+
+    def cancel(self, job_id: str, api_key: str) -> None:
+        job = self._read_job(job_id)
+        if job["status"] == BATCH_IN_PROGRESS:
+            job["status"] = BATCH_ENDED
+            job["cancelled"] = True
+            self._write_job(job_id, job)
+
+
+def get_batch_client(provider: str) -> BatchClient:
+    """BatchClient for a provider, honoring LLM_BATCH_CLIENT."""
+    if LLM_BATCH_CLIENT == "local" or provider == "mock":
+        return LocalBatchClient(provider)
+    if provider == "openai":
+        return OpenAIBatchClient()
+    if provider == "anthropic":
+        return AnthropicBatchClient()
+    raise ValueError(f"Provider '{provider}' has no batch client")
+
+
+@dataclass
+class _Job:
+    """A submitted job and the requests it carries."""
+    id: str
+    client: BatchClient
+    key_record: Dict[str, Any]
+    config: Any
+    provider: Any
+    indices: Dict[str, int] = field(default_factory=dict)  # custom_id -> request index
+
+    def record(self) -> Dict[str, Any]:
+        """What a later run_batch() needs to re-attach to this job."""
+        return {"id": self.id, "key_name": self.key_record["key_name"], "requests": sorted(self.indices.values())}
+
+
+def run_batch(
+    requests: Sequence[Dict[str, Any]],
+    batch_client: Optional[BatchClient] = None,
+    poll_interval: Optional[float] = None,
+    on_submit: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    attach: Optional[Sequence[Dict[str, Any]]] = None,
+    leave_running: Optional[Callable[[], bool]] = None,
+) -> BatchResult:
+    """Run requests as provider batch jobs and wait for their results.
+
+    Each request is a dict of call() keyword arguments (messages, key_name,
+    system, temperature, max_tokens, schema); tools and streaming are not
+    supported. Requests are grouped by managed key into one or more jobs of
+    at most LLM_BATCH_MAX_REQUESTS each.
+
+    As with call_many(), a failing request is recorded on its BatchItem and
+    does not affect the others. Transient errors polling a job or fetching
+    its results are retried with backoff; a job that still can't be polled
+    is cancelled and its requests fail with the error. If the active
+    deadline_scope expires or is cancelled while waiting, unfinished jobs
+    are cancelled (or, when leave_running() is true, left to a later run to
+    re-attach to) and their requests fail with DeadlineExceeded /
+    CallCancelled; results of jobs that already ended are kept.
+
+    Args:
+        requests: Call keyword arguments, one dict per request
+        batch_client: Transport to use for every job (default: get_batch_client(provider))
+        poll_interval: Seconds between status polls (default: LLM_BATCH_POLL_SECONDS)
+        on_submit: Called once all jobs are submitted with each job's
+            {"id", "key_name", "requests": request indices}
+        attach: Such records from an earlier run over the same requests;
+            their jobs are polled instead of submitting the requests again
+        leave_running: Called when waiting stops early; True keeps unfinished jobs running
+
+    Returns:
+        BatchResult with items in input order; costs use batch prices
+    """
+    check_deadline()
+    poll_interval = LLM_BATCH_POLL_SECONDS if poll_interval is None else poll_interval
+    items = [BatchItem(index=i) for i in range(len(requests))]
+
+    jobs: List[_Job] = []
+    attached = set()
+    for record in attach or ():
+        try:
+            job = _attach_job(requests, record, batch_client)
+        except Exception as e:
+            logger.error(f"Cannot re-attach to batch job {record.get('id')}; submitting its requests again: {e}")
+            continue
+        logger.info(f"Re-attached to batch job {job.id} with {len(job.indices)} requests")
+        jobs.append(job)
+        attached.update(job.indices.values())
+
+    groups: Dict[str, List[int]] = {}
+    for index, request in enumerate(requests):
+        if index in attached:
+            continue
+        unsupported = set(request) - set(_REQUEST_FIELDS) - {"key_name"}
+        if unsupported:
+            items[index].error = ValueError(f"Unsupported batch request fields: {sorted(unsupported)}")
+            continue
+        groups.setdefault(request["key_name"], []).append(index)
+
+    for key_name, indices in groups.items():
+        try:
+            jobs.extend(_submit_group(requests, key_name, indices, batch_client))
+        except Exception as e:
+            logger.error(f"Error submitting batch for key '{key_name}': {e}")
+            for index in indices:
+                items[index].error = e
+
+    if on_submit and jobs:
+        on_submit([job.record() for job in jobs])
+
+    try:
+        _wait_for_jobs(jobs, items, requests, poll_interval, leave_running)
+    except Exception as e:
+        if not isinstance(e, (DeadlineExceeded, CallCancelled)):
+            logger.error(f"Error waiting for batch jobs: {e}")
+        for index in _unfinished(items):
+            items[index].error = e
+
+    batch = BatchResult(items=items)
+    if batch.errors:
+        logger.warning(f"run_batch: {len(batch.errors)}/{len(items)} requests failed")
+    return batch
+
+
+def _attach_job(
+    requests: Sequence[Dict[str, Any]],
+    record: Dict[str, Any],
+    batch_client: Optional[BatchClient],
+) -> _Job:
+    """A job submitted by an earlier run_batch() over the same requests, from its record."""
+    key_name, indices = record["key_name"], list(record["requests"])
+    if not indices or any(i >= len(requests) or requests[i].get("key_name") != key_name for i in indices):
+        raise ValueError("its requests don't match these requests")
+    schema = next((requests[i].get("schema") for i in indices if requests[i].get("schema")), None)
+    key_record, config, provider = _prepare(key_name, schema, None)
+    client = batch_client or get_batch_client(config.provider)
+    return _Job(record["id"], client, key_record, config, provider, {str(i): i for i in indices})
+
+
+def _submit_group(
+    requests: Sequence[Dict[str, Any]],
+    key_name: str,
+    indices: List[int],
+    batch_client: Optional[BatchClient],
+) -> List[_Job]:
+    """Submit one managed key's requests as one or more jobs."""
+    schema = next((requests[i].get("schema") for i in indices if requests[i].get("schema")), None)
+    key_record, config, provider = _prepare(key_name, schema, None)
+    if not config.supports_batch:
+        raise ValueError(f"Model '{key_record['model_name']}' does not support batch jobs")
+    client = batch_client or get_batch_client(config.provider)
+
+    jobs = []
+    for start in range(0, len(indices), LLM_BATCH_MAX_REQUESTS):
+        chunk = indices[start:start + LLM_BATCH_MAX_REQUESTS]
+        lines = []
+        for index in chunk:
+            request = {k: v for k, v in requests[index].items() if k in _REQUEST_FIELDS}
+            lines.append(provider.batch_request(custom_id=str(index), model_id=config.id, **request))
+        job_id = client.submit(lines, key_record["api_key"])
+        logger.info(f"Submitted batch job {job_id} with {len(lines)} requests on key '{key_name}'")
+        jobs.append(_Job(job_id, client, key_record, config, provider, {str(i): i for i in chunk}))
+    return jobs
+
+
+def _wait_for_jobs(
+    jobs: List[_Job],
+    items: List[BatchItem],
+    requests: Sequence[Dict[str, Any]],
+    poll_interval: float,
+    leave_running: Optional[Callable[[], bool]] = None,
+) -> None:
+    """Poll jobs until all have ended, collecting results as each one does."""
+    pending = list(jobs)
+    token = current_token()
+    try:
+        while pending:
+            check_deadline()
+            for job in list(pending):
+                try:
+                    status = retrying_request(f"status of batch job {job.id}")(
+                        job.client.status, job.id, job.key_record["api_key"])
+                    if status == BATCH_IN_PROGRESS:
+                        continue
+                    pending.remove(job)
+                    _collect(job, status, items, requests)
+                except (DeadlineExceeded, CallCancelled):
+                    raise
+                except Exception as e:
+                    logger.error(f"Giving up on batch job {job.id}: {e}")
+                    if job in pending:
+                        pending.remove(job)
+                        _cancel(job)
+                    for index in job.indices.values():
+                        if items[index].result is None and items[index].error is None:
+                            items[index].error = e
+            if pending:
+                remaining = check_deadline()
+                wait = poll_interval if remaining is None else min(poll_interval, remaining)
+                if token is not None:
+                    token.wait(wait)
+                else:
+                    time.sleep(wait)
+    finally:
+        if pending and leave_running is not None and leave_running():
+            logger.info(f"Leaving {len(pending)} batch jobs running: {[job.id for job in pending]}")
+        else:
+            for job in pending:
+                _cancel(job)
+
+
+def _cancel(job: _Job) -> None:
+    try:
+        job.client.cancel(job.id, job.key_record["api_key"])
+    except Exception as e:
+        logger.error(f"Error cancelling batch job {job.id}: {e}")
+
+
+def _collect(job: _Job, status: str, items: List[BatchItem], requests: Sequence[Dict[str, Any]]) -> None:
+    """Map an ended job's result lines back onto the batch items."""
+    if status == BATCH_FAILED:
+        for index in job.indices.values():
+            items[index].error = RuntimeError(f"Batch job {job.id} failed")
+        return
+
+    lines = retrying_request(f"results of batch job {job.id}")(
+        lambda: list(job.client.results(job.id, job.key_record["api_key"])))
+    for line in lines:
+        index = job.indices.get(line.get("custom_id"))
+        if index is None:
+            continue
+        try:
+            response = job.provider.parse_batch_result(line, requests[index].get("schema"))
+            items[index].result = _build_result(response, job.key_record, job.config, batch=True)
+        except Exception as e:
+            items[index].error = e
+
+    for index in job.indices.values():
+        if items[index].result is None and items[index].error is None:
+            items[index].error = RuntimeError(f"Batch job {job.id} returned no result for request {index}")
+    logger.info(f"Batch job {job.id} ended")
+
+
+def _unfinished(items: List[BatchItem]) -> List[int]:
+    return [item.index for item in items if item.result is None and item.error is None]
@@ -0,0 +1,173 @@
+"""Cheap-first model cascade for classification-style structured calls.
+
+A cascade sends a structured call to a cheap key first and escalates to the
+strong key (by default the call's own key) only when the cheap answer is
+not trusted:
+
+- "positive": a field of the answer matches policy.escalate_if, e.g.
+  {"flag_state": True} so every detected flag is confirmed by the strong model
+- "low_confidence": the self-reported confidence is below policy.min_confidence
+  (a `confidence` field is added to the cheap call's schema when the
+  schema has none, and stripped from the answer again)
+- "invalid": the output did not validate against the schema
+- "error": the cheap call failed
+
+The returned LLMResult carries the strong (or accepted cheap) answer with
+the cost and tokens of both calls, and a `cascade` dict describing the
+decision: escalated, reason, confidence, per-key calls, and the baseline
+cost of sending the call straight to the strong model (estimated from the
+cheap call's tokens at the strong model's prices when not escalated).
+
+Example:
+    >>> policy = CascadePolicy(cheap_key="mini-key", escalate_if={"flag_state": True})
+    >>> result = cascade_call(policy, messages=[...], key_name="strong-key", schema=Flag)
+    >>> print(result.cascade["escalated"], result.cascade["baseline_cost"] - result.cost)
+"""
+
+import dataclasses
+import logging
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel, Field, create_model
+
+from .client import _resolve_key, call
+from .deadline import CallCancelled, DeadlineExceeded
+from .registry import calculate_cost, get_model
+from .result import LLMResult
+
+logger = logging.getLogger(__name__)
+
+LLM_CASCADE_MIN_CONFIDENCE = float(os.getenv("LLM_CASCADE_MIN_CONFIDENCE", "0.7"))
+
+_CONFIDENCE_FIELD = "confidence"
+_CONFIDENCE_INSTRUCTION = (
+    "\n\nAlso report `confidence`: your probability, from 0 to 1, that this answer is correct."
+)
+
+
+@dataclass
+class CascadePolicy:
+    """When a cheap key's answer is accepted and when the call escalates."""
+    cheap_key: str                                            # Managed key of the cheap model
+    strong_key: Optional[str] = None                          # Escalation key (default: the call's key)
+    escalate_if: Dict[str, Any] = field(default_factory=dict) # Field values that always escalate
+    min_confidence: Optional[float] = LLM_CASCADE_MIN_CONFIDENCE  # None: don't ask for confidence
+
+
+@lru_cache(maxsize=64)
+def _with_confidence(schema: Type[BaseModel]) -> Type[BaseModel]:
+    """The schema plus a self-reported confidence field."""
+    return create_model(
+        f"{schema.__name__}WithConfidence",
+        __base__=schema,
+        confidence=(float, Field(ge=0.0, le=1.0, description="Probability from 0 to 1 that the answer is correct")),
+    )
+
+
+def _call_entries(result: LLMResult) -> List[Dict[str, Any]]:
+    """Per-key entries of one cascade stage (a hedged stage lists each request it sent)."""
+    if result.hedge:
+        return [{k: v for k, v in c.items() if k != "outcome"} for c in result.hedge["calls"]]
+    return [{
+        "api_key_name": result.api_key_name,
+        "api_key_id": result.api_key_id,
+        "model": result.model,
+        "cost": result.cost,
+        "input_tokens": result.input_tokens,
+        "output_tokens": result.output_tokens,
+    }]
+
+
+def _escalation_reason(parsed: Optional[BaseModel], policy: CascadePolicy) -> Optional[str]:
+    if parsed is None:
+        return "invalid"
+    values = parsed.model_dump()
+    if any(name in values and values[name] == value for name, value in policy.escalate_if.items()):
+        return "positive"
+    if policy.min_confidence is not None:
+        confidence = values.get(_CONFIDENCE_FIELD)
+        if confidence is None or confidence < policy.min_confidence:
+            return "low_confidence"
+    return None
+
+
+def cascade_call(
+    policy: CascadePolicy,
+    messages: List[Dict[str, str]],
+    key_name: str,
+    schema: Type[BaseModel],
+    system: Optional[str] = None,
+    **kwargs: Any,
+) -> LLMResult:
+    """
+    Structured call() through a cheap-then-strong cascade.
+
+    Args:
+        policy: Cheap key, escalation rules and confidence threshold
+        messages: As for call()
+        key_name: The call's own (strong) key, used unless policy.strong_key is set
+        schema: Pydantic model of the answer (required)
+        system: As for call()
+        **kwargs: Other call() arguments (temperature, max_tokens, cache, ...)
+
+    Returns:
+        LLMResult of the accepted answer with the combined cost and tokens,
+        and a `cascade` dict describing the decision
+
+    Raises:
+        ValueError: If no schema is given or a key is unknown
+    """
+    if schema is None:
+        raise ValueError("cascade_call requires a schema")
+    if kwargs.get("stream") or kwargs.get("tools"):
+        raise ValueError("cascade_call does not support streaming or tools")
+    strong_key = policy.strong_key or key_name
+
+    ask_confidence = policy.min_confidence is not None and _CONFIDENCE_FIELD not in schema.model_fields
+    cheap_schema = _with_confidence(schema) if ask_confidence else schema
+    cheap_system = (system or "") + _CONFIDENCE_INSTRUCTION if ask_confidence else system
+
+    cheap = None
+    confidence = None
+    try:
+        cheap = call(messages=messages, key_name=policy.cheap_key, system=cheap_system, schema=cheap_schema, **kwargs)
+        reason = _escalation_reason(cheap.parsed, policy)
+        if cheap.parsed is not None:
+            confidence = getattr(cheap.parsed, _CONFIDENCE_FIELD, None)
+    except (DeadlineExceeded, CallCancelled):
+        raise
+    except Exception as e:
+        logger.warning(f"Cascade cheap call on key '{policy.cheap_key}' failed, escalating: {type(e).__name__}: {e}")
+        reason = "error"
+
+    calls = [cheap] if cheap is not None else []
+    if reason is None:
+        final = cheap
+        if ask_confidence:
+            parsed = schema.model_validate(cheap.parsed.model_dump(exclude={_CONFIDENCE_FIELD}))
+            final = dataclasses.replace(cheap, parsed=parsed, content=parsed.model_dump_json())
+        strong_config = get_model(_resolve_key(strong_key)["model_name"])
+        baseline_cost = calculate_cost(cheap.input_tokens, cheap.output_tokens, strong_config)
+    else:
+        final = call(messages=messages, key_name=strong_key, system=system, schema=schema, **kwargs)
+        calls.append(final)
+        baseline_cost = final.cost
+
+    return dataclasses.replace(
+        final,
+        cost=round(sum(c.cost for c in calls), 6),
+        input_tokens=sum(c.input_tokens for c in calls),
+        output_tokens=sum(c.output_tokens for c in calls),
+        cascade={
+            "escalated": reason is not None,
+            "reason": reason,
+            "confidence": confidence,
+            "cheap_key": policy.cheap_key,
+            "strong_key": strong_key,
+            "baseline_cost": baseline_cost,
+            "calls": [entry for c in calls for entry in _call_entries(c)],
+        },
+    )
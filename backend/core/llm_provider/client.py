@@ -1,15 +1,39 @@
 """Main client orchestration layer for LLM provider library."""
 
-from typing import Any, Dict, Generator, List, Optional, Type, Union
+import contextvars
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Optional, Sequence, Tuple, Type, Union
 
 from pydantic import BaseModel
 
 from .registry import MODELS, get_model, calculate_cost, ModelConfig
-from .result import LLMResult, ToolCall, ToolResult, StreamChunk
+from .result import BatchItem, BatchResult, LLMResult, ToolCall, ToolResult, StreamChunk
 from .providers.base import BaseProvider, ToolDefinition, ProviderStreamChunk
+from .deadline import check_deadline, current_token
+from .hedge import current_hedge_policy, hedged_call
+from .metrics import call_metrics
+from .partial_json import IncrementalJSONParser
+from .rate_limit import RateLimiter, estimate_tokens, get_rate_limiter
+from .response_cache import (
+    cache_enabled,
+    deserialize_parts,
+    get_cached_response,
+    make_cache_key,
+    put_cached_response,
+)
+from .retry import async_retrying, retrying
 from .providers.openai_provider import OpenAIProvider
 from .providers.anthropic_provider import AnthropicProvider
 from .providers.google_provider import GoogleProvider
+from .providers.mock_provider import MockProvider
+
+logger = logging.getLogger(__name__)
+
+# Default worker count for call_many()
+LLM_CALL_MANY_MAX_CONCURRENCY = int(os.getenv("LLM_CALL_MANY_MAX_CONCURRENCY", "8"))
 
 
 # Singleton provider instances (lazy initialized)
@@ -25,11 +49,150 @@ def _get_provider(name: str) -> BaseProvider:
             _providers[name] = AnthropicProvider()
         elif name == "google":
             _providers[name] = GoogleProvider()
+        elif name == "mock":
+            _providers[name] = MockProvider()
         else:
             raise ValueError(f"Unknown provider: {name}")
     return _providers[name]
 
 
+# Resolved managed keys: key_name -> {model_name, api_key, key_name, key_id}.
+# Cleared whenever ApiKeyCache reloads or modifies key records.
+_resolved_keys: Dict[str, Dict[str, Any]] = {}
+_resolved_keys_lock = Lock()
+_resolved_keys_listening = False
+_resolved_keys_generation = 0
+
+
+def _clear_resolved_keys() -> None:
+    global _resolved_keys_generation
+    with _resolved_keys_lock:
+        _resolved_keys.clear()
+        _resolved_keys_generation += 1
+
+
+def _resolve_key(key_name: str) -> Dict[str, Any]:
+    """Resolve a managed key name to its record, caching the result."""
+    global _resolved_keys_listening
+
+    record = _resolved_keys.get(key_name)
+    if record is not None:
+        return record
+
+    from core.dataloaders.api_key_loader import add_invalidation_listener, get_key_by_name
+
+    with _resolved_keys_lock:
+        if not _resolved_keys_listening:
+            add_invalidation_listener(_clear_resolved_keys)
+            _resolved_keys_listening = True
+        generation = _resolved_keys_generation
+
+    key_record = get_key_by_name(key_name)
+    if not key_record:
+        raise ValueError(f"API key '{key_name}' not found")
+
+    record = {
+        "model_name": key_record["model_name"],
+        "api_key": key_record["api_key"],
+        "key_name": key_record["key_name"],
+        "key_id": key_record["key_id"],
+        # Optional rate limits (see rate_limit.py); 0/None means unlimited
+        "rpm_limit": key_record.get("rpm_limit"),
+        "tpm_limit": key_record.get("tpm_limit"),
+        "max_concurrency": key_record.get("max_concurrency"),
+    }
+    with _resolved_keys_lock:
+        # Skip caching if the key records changed while we were reading them
+        if generation == _resolved_keys_generation:
+            _resolved_keys[key_name] = record
+    return record
+
+
+def _prepare(
+    key_name: str,
+    schema: Optional[Type[BaseModel]],
+    tools: Optional[List[ToolDefinition]],
+) -> Tuple[Dict[str, Any], ModelConfig, BaseProvider]:
+    """Resolve the managed key, check model capabilities and pick the provider."""
+    key_record = _resolve_key(key_name)
+    model = key_record["model_name"]
+    config = get_model(model)
+
+    # Capability checks
+    if schema and not config.supports_structured:
+        raise ValueError(f"Model '{model}' does not support structured output")
+    if tools and not config.supports_tools:
+        raise ValueError(f"Model '{model}' does not support tool calling")
+    if schema and tools and not config.supports_structured_with_tools:
+        raise ValueError(f"Model '{model}' does not support structured output with tools")
+
+    return key_record, config, _get_provider(config.provider)
+
+
+def _build_result(response, key_record: Dict[str, Any], config: ModelConfig, batch: bool = False) -> LLMResult:
+    """Convert a ProviderResponse into an LLMResult with cost and key identity.
+
+    batch=True bills the usage at the model's batch-API prices.
+    """
+    cost = calculate_cost(
+        response.input_tokens, response.output_tokens, config,
+        response.cache_read_tokens, response.cache_write_tokens, batch=batch,
+    )
+
+    return LLMResult(
+        content=response.content,
+        parsed=response.parsed,
+        model=key_record["model_name"],
+        provider=config.provider,
+        input_tokens=response.input_tokens,
+        output_tokens=response.output_tokens,
+        cost=cost,
+        tool_calls=response.tool_calls,
+        raw_response=response.raw_response,
+        api_key_name=key_record["key_name"],
+        api_key_id=key_record["key_id"],
+        cache_read_tokens=response.cache_read_tokens,
+        cache_write_tokens=response.cache_write_tokens,
+    )
+
+
+def _cache_key(config: ModelConfig, provider_kwargs: Dict[str, Any]) -> str:
+    return make_cache_key(
+        provider=config.provider,
+        model_id=config.id,
+        messages=provider_kwargs["messages"],
+        system=provider_kwargs["system"],
+        temperature=provider_kwargs["temperature"],
+        max_tokens=provider_kwargs["max_tokens"],
+        schema=provider_kwargs["schema"],
+        tools=provider_kwargs["tools"],
+        tool_choice=provider_kwargs["tool_choice"],
+    )
+
+
+def _cached_result(
+    entry: Dict[str, Any],
+    key_record: Dict[str, Any],
+    config: ModelConfig,
+    schema: Optional[Type[BaseModel]],
+) -> LLMResult:
+    """LLMResult for a cache hit: nothing was billed, so cost and tokens are zero."""
+    content, parsed, tool_calls = deserialize_parts(entry, schema)
+    return LLMResult(
+        content=content,
+        parsed=parsed,
+        model=key_record["model_name"],
+        provider=config.provider,
+        input_tokens=0,
+        output_tokens=0,
+        cost=0.0,
+        tool_calls=tool_calls,
+        api_key_name=key_record["key_name"],
+        api_key_id=key_record["key_id"],
+        cached=True,
+    )
+
+
 def call(
     messages: List[Dict[str, str]],
     key_name: str,
@@ -40,6 +203,7 @@ def call(
     tools: Optional[List[ToolDefinition]] = None,
     tool_choice: str = "auto",
     stream: bool = False,
+    cache: Optional[bool] = None,
 ) -> Union[LLMResult, Generator[StreamChunk, None, LLMResult]]:
     """Unified LLM call with optional structured output, tools, and streaming.
 
@@ -56,43 +220,31 @@ def call(
         tools: Optional list of ToolDefinition objects for tool calling
         tool_choice: Tool selection mode ("auto", "required", "none", or function name)
         stream: If True, return a generator yielding StreamChunk objects
+        cache: Use the response cache for this call (True), bypass it (False),
+            or follow LLM_RESPONSE_CACHE (None). Streaming calls are never cached.
 
     Returns:
         LLMResult for non-streaming calls, or Generator[StreamChunk] for streaming
 
     Raises:
         ValueError: If key_name not found or model doesn't support requested features
+        DeadlineExceeded: If the active deadline_scope has already expired
+        CallCancelled: If the active deadline_scope's token was cancelled
     """
-    # Resolve managed API key
-    from core.dataloaders.api_key_loader import get_key_by_name
-    key_record = get_key_by_name(key_name)
-    if not key_record:
-        raise ValueError(f"API key '{key_name}' not found")
-    model = key_record["model_name"]
-    api_key = key_record["api_key"]
-    resolved_key_name = key_record["key_name"]
-    resolved_key_id = key_record["key_id"]
-
-    config = get_model(model)
-
-    # Capability checks
-    if schema and not config.supports_structured:
-        raise ValueError(f"Model '{model}' does not support structured output")
-    if tools and not config.supports_tools:
-        raise ValueError(f"Model '{model}' does not support tool calling")
-    if schema and tools and not config.supports_structured_with_tools:
-        raise ValueError(f"Model '{model}' does not support structured output with tools")
+    # Inside a hedge_scope, race the key against its fallbacks (see hedge.py)
+    hedge_policy = current_hedge_policy()
+    if hedge_policy is not None and not stream:
+        return hedged_call(call, hedge_policy, dict(
+            messages=messages, key_name=key_name, system=system, temperature=temperature,
+            max_tokens=max_tokens, schema=schema, tools=tools, tool_choice=tool_choice, cache=cache,
+        ))
 
-    provider = _get_provider(config.provider)
+    key_record, config, provider = _prepare(key_name, schema, tools)
 
-    if stream:
-        return _stream_wrapper(
-            provider, config, model, messages, system, temperature, max_tokens,
-            schema, tools, tool_choice, api_key, resolved_key_name, resolved_key_id
-        )
+    # Remaining time of the enclosing deadline_scope becomes the SDK timeout
+    timeout = check_deadline()
 
-    # Non-streaming call
-    response = provider.call(
+    provider_kwargs = dict(
         model_id=config.id,
         messages=messages,
         system=system,
@@ -101,49 +253,129 @@ def call(
         schema=schema,
         tools=tools,
         tool_choice=tool_choice,
-        stream=False,
-        api_key=api_key,
+        stream=stream,
+        api_key=key_record["api_key"],
+        timeout=timeout,
     )
 
-    cost = calculate_cost(response.input_tokens, response.output_tokens, config)
+    limiter = get_rate_limiter(key_record)
+    tokens = estimate_tokens(messages, system)
 
-    return LLMResult(
-        content=response.content,
-        parsed=response.parsed,
-        model=model,
-        provider=config.provider,
-        input_tokens=response.input_tokens,
-        output_tokens=response.output_tokens,
-        cost=cost,
-        tool_calls=response.tool_calls,
-        raw_response=response.raw_response,
-        api_key_name=resolved_key_name,
-        api_key_id=resolved_key_id,
-    )
+    if stream:
+        return _stream_wrapper(provider, provider_kwargs, key_record, config, schema, limiter, tokens)
 
+    cache_key = _cache_key(config, provider_kwargs) if cache_enabled(cache) else None
+    if cache_key:
+        entry = get_cached_response(cache_key)
+        if entry is not None:
+            return _cached_result(entry, key_record, config, schema)
 
-def _stream_wrapper(
-    provider: BaseProvider,
-    config: ModelConfig,
-    model: str,
+    # Non-streaming call, retried on throttling and transient errors
+    with call_metrics(key_record, config) as metrics:
+        for attempt in retrying(limiter):
+            with attempt:
+                with limiter.slot(tokens) as slot:
+                    # Waiting for capacity may have used part of the deadline
+                    provider_kwargs["timeout"] = check_deadline()
+                    response = provider.call(**provider_kwargs)
+                    slot.actual_tokens = response.input_tokens + response.output_tokens
+        metrics.output_tokens = response.output_tokens
+
+    if cache_key:
+        put_cached_response(cache_key, response)
+    return _build_result(response, key_record, config)
+
+
+def call_many(
+    requests: Sequence[Dict[str, Any]],
+    max_concurrency: Optional[int] = None,
+    call_fn: Optional[Callable[..., Any]] = None,
+) -> BatchResult:
+    """Run independent calls concurrently with bounded parallelism.
+
+    Each request is a dict of keyword arguments for call() (or for call_fn
+    when given, e.g. a helper that wraps call() with pre/post-processing).
+    Requests run on a pool of at most max_concurrency worker threads, each
+    inheriting the caller's deadline_scope.
+
+    A failing request does not abort the batch: its exception is recorded
+    on the corresponding BatchItem and the others still run. Once the
+    active deadline expires or its token is cancelled, requests that have
+    not started fail with DeadlineExceeded / CallCancelled.
+
+    Args:
+        requests: Call keyword arguments, one dict per request
+        max_concurrency: Maximum calls in flight (default: LLM_CALL_MANY_MAX_CONCURRENCY)
+        call_fn: Function invoked per request (default: call)
+
+    Returns:
+        BatchResult with items in input order plus aggregated cost and tokens
+
+    Example:
+        >>> batch = call_many([
+        ...     {"messages": [{"role": "user", "content": q}], "key_name": "my-key"}
+        ...     for q in questions
+        ... ], max_concurrency=4)
+        >>> answers = [r.content if r else None for r in batch.results]
+        >>> print(batch.cost, len(batch.errors))
+    """
+    call_fn = call_fn or call
+    if call_fn is call and any(request.get("stream") for request in requests):
+        raise ValueError("call_many does not support stream=True")
+
+    items = [BatchItem(index=i) for i in range(len(requests))]
+
+    def run(index: int) -> None:
+        try:
+            check_deadline()
+            items[index].result = call_fn(**requests[index])
+        except Exception as e:
+            items[index].error = e
+
+    workers = min(max_concurrency or LLM_CALL_MANY_MAX_CONCURRENCY, len(requests))
+    if workers <= 1:
+        for index in range(len(requests)):
+            run(index)
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-call-many") as pool:
+            # copy_context() carries the caller's deadline scope into each worker
+            futures = [
+                pool.submit(contextvars.copy_context().run, run, index)
+                for index in range(len(requests))
+            ]
+            for future in futures:
+                future.result()
+
+    batch = BatchResult(items=items)
+    if batch.errors:
+        logger.warning(f"call_many: {len(batch.errors)}/{len(items)} requests failed")
+    return batch
+
+
+async def acall(
     messages: List[Dict[str, str]],
-    system: Optional[str],
-    temperature: float,
-    max_tokens: int,
-    schema: Optional[Type[BaseModel]],
-    tools: Optional[List[ToolDefinition]],
-    tool_choice: str,
-    api_key: str,
-    resolved_key_name: str,
-    resolved_key_id: str,
-) -> Generator[StreamChunk, None, LLMResult]:
-    """Wrapper that yields StreamChunks and returns final LLMResult."""
-    accumulated_content = ""
-    final_input_tokens = 0
-    final_output_tokens = 0
-    final_tool_calls = None
+    key_name: str,
+    system: Optional[str] = None,
+    temperature: float = 1.0,
+    max_tokens: int = 8192,
+    schema: Optional[Type[BaseModel]] = None,
+    tools: Optional[List[ToolDefinition]] = None,
+    tool_choice: str = "auto",
+    cache: Optional[bool] = None,
+) -> LLMResult:
+    """Async counterpart of call() for non-streaming requests.
 
-    stream = provider.call(
+    Uses the provider SDK's native async client, so many calls can be in
+    flight on one event loop without a thread each. Deadlines and
+    cancellation from the enclosing deadline_scope and the `cache` override
+    apply as in call(). Use astream() for streaming.
+    """
+    key_record, config, provider = _prepare(key_name, schema, tools)
+    check_deadline()
+    limiter = get_rate_limiter(key_record)
+    tokens = estimate_tokens(messages, system)
+
+    provider_kwargs = dict(
         model_id=config.id,
         messages=messages,
         system=system,
@@ -152,47 +384,178 @@ def _stream_wrapper(
         schema=schema,
         tools=tools,
         tool_choice=tool_choice,
-        stream=True,
-        api_key=api_key,
+        stream=False,
+        api_key=key_record["api_key"],
     )
 
-    for chunk in stream:
-        accumulated_content += chunk.content
+    cache_key = _cache_key(config, provider_kwargs) if cache_enabled(cache) else None
+    if cache_key:
+        entry = get_cached_response(cache_key)
+        if entry is not None:
+            return _cached_result(entry, key_record, config, schema)
+
+    with call_metrics(key_record, config) as metrics:
+        async for attempt in async_retrying(limiter):
+            with attempt:
+                async with limiter.aslot(tokens) as slot:
+                    response = await provider.acall(**provider_kwargs, timeout=check_deadline())
+                    slot.actual_tokens = response.input_tokens + response.output_tokens
+        metrics.output_tokens = response.output_tokens
+
+    if cache_key:
+        put_cached_response(cache_key, response)
+    return _build_result(response, key_record, config)
+
+
+async def astream(
+    messages: List[Dict[str, str]],
+    key_name: str,
+    system: Optional[str] = None,
+    temperature: float = 1.0,
+    max_tokens: int = 8192,
+    schema: Optional[Type[BaseModel]] = None,
+    tools: Optional[List[ToolDefinition]] = None,
+    tool_choice: str = "auto",
+) -> AsyncGenerator[StreamChunk, None]:
+    """Async streaming call yielding StreamChunk objects.
+
+    Async generators cannot return a value, so the final chunk
+    (is_final=True) carries the complete LLMResult in `chunk.result`.
+    """
+    key_record, config, provider = _prepare(key_name, schema, tools)
+    check_deadline()
+    limiter = get_rate_limiter(key_record)
+
+    # Streams hold a rate-limit slot while open but are not retried
+    with call_metrics(key_record, config, stream=True) as metrics:
+        async with limiter.aslot(estimate_tokens(messages, system)) as slot:
+            stream = await provider.acall(
+                model_id=config.id,
+                messages=messages,
+                system=system,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                schema=schema,
+                tools=tools,
+                tool_choice=tool_choice,
+                stream=True,
+                api_key=key_record["api_key"],
+                timeout=check_deadline(),
+            )
+
+            state = _StreamState(key_record, config, schema)
+            token = current_token()
+            async for chunk in stream:
+                if token is not None:
+                    token.raise_if_cancelled()
+                if chunk.content:
+                    metrics.first_token()
+                out = state.feed(chunk)
+                if chunk.is_final:
+                    slot.actual_tokens = state.input_tokens + state.output_tokens
+                    metrics.output_tokens = state.output_tokens
+                    out.result = state.result()
+                yield out
+
+
+class _StreamState:
+    """Accumulates provider stream chunks into StreamChunks and a final LLMResult."""
+
+    def __init__(self, key_record: Dict[str, Any], config: ModelConfig, schema: Optional[Type[BaseModel]]):
+        self.key_record = key_record
+        self.config = config
+        self.schema = schema
+        self.parts: List[str] = []
+        self.parser = IncrementalJSONParser(schema) if schema else None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.tool_calls = None
+
+    def feed(self, chunk: ProviderStreamChunk) -> StreamChunk:
+        self.parts.append(chunk.content)
+        update = self.parser.feed(chunk.content) if self.parser and chunk.content else None
 
         if chunk.is_final:
-            final_input_tokens = chunk.input_tokens or 0
-            final_output_tokens = chunk.output_tokens or 0
-            final_tool_calls = chunk.tool_calls
+            self.input_tokens = chunk.input_tokens or 0
+            self.output_tokens = chunk.output_tokens or 0
+            self.cache_read_tokens = chunk.cache_read_tokens or 0
+            self.cache_write_tokens = chunk.cache_write_tokens or 0
+            self.tool_calls = chunk.tool_calls
 
-        yield StreamChunk(
+        return StreamChunk(
             content=chunk.content,
             is_final=chunk.is_final,
             tool_calls=chunk.tool_calls,
             input_tokens=chunk.input_tokens,
             output_tokens=chunk.output_tokens,
+            cache_read_tokens=chunk.cache_read_tokens,
+            cache_write_tokens=chunk.cache_write_tokens,
+            fields=(update.fields or None) if update else None,
+            field_deltas=(update.text_deltas or None) if update else None,
         )
 
-    # Parse schema at end if provided
-    parsed = None
-    if schema and accumulated_content:
-        try:
-            parsed = schema.model_validate_json(accumulated_content)
-        except Exception:
-            pass  # Parsing failed, leave as None
+    def result(self) -> LLMResult:
+        content = "".join(self.parts)
+
+        # Parse schema at end if provided
+        parsed = None
+        if self.schema and content:
+            try:
+                parsed = self.schema.model_validate_json(content)
+            except Exception:
+                pass  # Parsing failed, leave as None
+
+        cost = calculate_cost(
+            self.input_tokens, self.output_tokens, self.config,
+            self.cache_read_tokens, self.cache_write_tokens,
+        )
+
+        return LLMResult(
+            content=content,
+            parsed=parsed,
+            model=self.key_record["model_name"],
+            provider=self.config.provider,
+            input_tokens=self.input_tokens,
+            output_tokens=self.output_tokens,
+            cost=cost,
+            tool_calls=self.tool_calls,
+            raw_response=None,  # Not available in streaming
+            api_key_name=self.key_record["key_name"],
+            api_key_id=self.key_record["key_id"],
+            cache_read_tokens=self.cache_read_tokens,
+            cache_write_tokens=self.cache_write_tokens,
+        )
+
+
+def _stream_wrapper(
+    provider: BaseProvider,
+    provider_kwargs: Dict[str, Any],
+    key_record: Dict[str, Any],
+    config: ModelConfig,
+    schema: Optional[Type[BaseModel]],
+    limiter: RateLimiter,
+    tokens: int,
+) -> Generator[StreamChunk, None, LLMResult]:
+    """Wrapper that yields StreamChunks and returns final LLMResult.
+
+    The stream holds a rate-limit slot while open but is not retried.
+    """
+    with call_metrics(key_record, config, stream=True) as metrics, limiter.slot(tokens) as slot:
+        provider_kwargs["timeout"] = check_deadline()
+        stream = provider.call(**provider_kwargs)
 
-    cost = calculate_cost(final_input_tokens, final_output_tokens, config)
+        state = _StreamState(key_record, config, schema)
+        token = current_token()
+        for chunk in stream:
+            if token is not None:
+                token.raise_if_cancelled()
+            if chunk.content:
+                metrics.first_token()
+            yield state.feed(chunk)
+        slot.actual_tokens = state.input_tokens + state.output_tokens
+        metrics.output_tokens = state.output_tokens
 
     # Return final result (accessible via generator.value after StopIteration)
-    return LLMResult(
-        content=accumulated_content,
-        parsed=parsed,
-        model=model,
-        provider=config.provider,
-        input_tokens=final_input_tokens,
-        output_tokens=final_output_tokens,
-        cost=cost,
-        tool_calls=final_tool_calls,
-        raw_response=None,  # Not available in streaming
-        api_key_name=resolved_key_name,
-        api_key_id=resolved_key_id,
-    )
+    return state.result()
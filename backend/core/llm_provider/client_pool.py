@@ -0,0 +1,156 @@
+"""Pooled, keep-alive SDK clients per (provider, API key).
+
+Building an SDK client creates a fresh HTTP connection pool, so every call
+made with a managed key used to pay for a new TCP + TLS handshake. The pool
+keeps one client per (provider, sha256(api_key)) with bounded connection
+limits and keep-alive, evicting the least recently used client when full.
+
+Only a hash of the key is kept in the pool key; the raw key lives inside the
+SDK client, exactly as it did before.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Connection limits applied to every pooled client
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20"))
+LLM_POOL_KEEPALIVE_EXPIRY = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "60"))
+
+# Maximum number of distinct (provider, key) clients kept open
+LLM_POOL_MAX_CLIENTS = int(os.getenv("LLM_POOL_MAX_CLIENTS", "64"))
+
+
+def http_limits() -> httpx.Limits:
+    """httpx connection limits shared by all pooled clients."""
+    return httpx.Limits(
+        max_connections=LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def async_pool_name(provider: str) -> str:
+    """Pool namespace for async clients: their connections belong to one event loop."""
+    try:
+        loop_id = id(asyncio.get_running_loop())
+    except RuntimeError:
+        loop_id = 0
+    return f"{provider}:async:{loop_id}"
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Stable, non-reversible identifier for an API key."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class ClientPool:
+    """Thread-safe singleton LRU of SDK clients keyed by (provider, key hash)."""
+
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                self._clients: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+                self._hits = 0
+                self._misses = 0
+                self._initialized = True
+
+    def get(self, provider: str, api_key: str, factory: Callable[[], Any]) -> Any:
+        """Return the pooled client for (provider, api_key), creating it with factory()."""
+        key = (provider, key_fingerprint(api_key))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self._hits += 1
+                return client
+
+            self._misses += 1
+            client = factory()
+            self._clients[key] = client
+            evicted = []
+            while len(self._clients) > LLM_POOL_MAX_CLIENTS:
+                evicted.append(self._clients.popitem(last=False)[1])
+
+        for old in evicted:
+            _close_quietly(old)
+        return client
+
+    def clear(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            _close_quietly(client)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._clients),
+                "max_clients": LLM_POOL_MAX_CLIENTS,
+                "by_provider": _count_by_provider(self._clients),
+            }
+
+
+def _count_by_provider(clients) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for provider, _ in clients:
+        name = provider.split(":", 1)[0]
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def _close_quietly(client: Any) -> None:
+    # Evicted clients may still be finishing a request on another thread;
+    # closing only drops idle keep-alive connections in that case.
+    close = getattr(client, "close", None)
+    if close is None:
+        return
+    try:
+        result = close()
+        if inspect.iscoroutine(result):
+            # Async clients can only be closed on their own event loop, which
+            # may be gone; drop the coroutine and let GC release the sockets.
+            result.close()
+    except Exception as e:
+        logger.debug(f"Error closing pooled client: {e}")
+
+
+# Global instance
+_pool = ClientPool()
+
+
+def get_pooled_client(provider: str, api_key: str, factory: Callable[[], Any]) -> Any:
+    return _pool.get(provider, api_key, factory)
+
+
+def clear_client_pool() -> None:
+    _pool.clear()
+
+
+def client_pool_stats() -> Dict[str, Any]:
+    return _pool.stats()
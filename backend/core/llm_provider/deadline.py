@@ -0,0 +1,108 @@
+"""Deadlines and cooperative cancellation for LLM calls.
+
+A deadline scope sets an absolute deadline (and optionally a cancellation
+token) for everything executed inside it on the current thread or task.
+`client.call` checks both before each attempt (and rate-limiter wait) and
+passes the remaining time to the provider SDK as the request timeout.
+
+What that does not do: a non-streaming request already sent is never
+aborted. A cancelled token is only seen once the request returns or its
+SDK timeout fires, and the deadline only shortens that timeout, so the
+call can run until the deadline (and the response is still billed).
+Streams check the token between chunks and stop early.
+
+Example:
+    >>> token = CancellationToken()
+    >>> with deadline_scope(30, token=token):
+    ...     result = call(messages=[...], key_name="my-key")
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from threading import Event
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the active deadline has passed before or during a call."""
+
+
+class CallCancelled(Exception):
+    """Raised when the active cancellation token has been triggered."""
+
+
+class CancellationToken:
+    """Thread-safe flag that a caller can set to stop work at its next check."""
+
+    def __init__(self):
+        self._event = Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "Cancelled") -> None:
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep until cancelled or `timeout` seconds pass; True if cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise CallCancelled(self.reason or "Cancelled")
+
+
+# (absolute monotonic deadline or None, token or None)
+_scope: contextvars.ContextVar = contextvars.ContextVar("llm_deadline_scope", default=(None, None))
+
+
+@contextmanager
+def deadline_scope(
+    timeout: Optional[float] = None,
+    token: Optional[CancellationToken] = None,
+) -> Iterator[None]:
+    """Apply a timeout (seconds) and/or cancellation token to the enclosed block.
+
+    Nested scopes never extend an outer deadline: the earliest deadline wins.
+    An inner scope without a token inherits the outer token.
+    """
+    outer_deadline, outer_token = _scope.get()
+
+    deadline = outer_deadline
+    if timeout is not None:
+        candidate = time.monotonic() + max(0.0, timeout)
+        deadline = candidate if deadline is None else min(deadline, candidate)
+
+    reset = _scope.set((deadline, token or outer_token))
+    try:
+        yield
+    finally:
+        _scope.reset(reset)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left until the active deadline, or None if no deadline is set."""
+    deadline, _ = _scope.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def current_token() -> Optional[CancellationToken]:
+    """Cancellation token of the active scope, if any."""
+    return _scope.get()[1]
+
+
+def check_deadline() -> Optional[float]:
+    """Raise if the active scope is cancelled or expired; return remaining seconds."""
+    token = current_token()
+    if token is not None:
+        token.raise_if_cancelled()
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Deadline exceeded before the call completed")
+    return remaining
@@ -0,0 +1,397 @@
+"""Hedged requests and failover for tail-latency control.
+
+Inside a hedge_scope, non-streaming call()s race the primary key against
+the policy's fallback keys (the same or an equivalent model on another key
+or provider; the primary key again when none are given):
+
+- Hedge: when the primary has not answered after the key's observed
+  latency percentile (policy.percentile, default p95), a duplicate request
+  is sent to the next candidate. The first valid response wins.
+- Failover: when a candidate fails with a 5xx, 429, connection error or
+  timeout (or returns unparseable structured output), the next candidate
+  is sent at once. Every candidate but the last makes a single attempt
+  (retry.no_retries); the last keeps the normal retry policy.
+
+Losing requests are cancelled through their CancellationToken. A request
+already on the wire cannot be aborted, so when a loser still completes its
+cost is counted as wasted in hedge_stats(). Waste is also billed to the
+caller:
+
+- Responses that completed before the call returned (invalid structured
+  output, a slower valid one) are added to the returned result's cost and
+  tokens, and listed per key in its `hedge` dict.
+- Losers still in flight when the call returns are awaited when the
+  enclosing hedge_scope exits and handed to its on_waste callback.
+
+Example:
+    >>> with hedge_scope(HedgePolicy(fallback_keys=["backup-key"]), on_waste=tracker_charge):
+    ...     result = call(messages=[...], key_name="my-key", schema=Person)
+    >>> print(result.cost, [c["outcome"] for c in result.hedge["calls"]])
+"""
+
+import contextvars
+import dataclasses
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from .deadline import CancellationToken, CallCancelled, DeadlineExceeded, check_deadline, deadline_scope
+from .retry import is_retryable_error, no_retries
+
+logger = logging.getLogger(__name__)
+
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+# Hedge delay until a key has LLM_HEDGE_MIN_SAMPLES observed latencies
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "10"))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+LLM_HEDGE_MAX_WORKERS = int(os.getenv("LLM_HEDGE_MAX_WORKERS", "32"))
+# Longest a hedge_scope waits at exit for losers still in flight, to bill them
+LLM_HEDGE_DRAIN_SECONDS = float(os.getenv("LLM_HEDGE_DRAIN_SECONDS", "120"))
+
+# How often the coordinator re-checks the caller's deadline and token
+_POLL_SECONDS = 0.25
+
+
+@dataclass
+class HedgePolicy:
+    """How a hedged call picks and times its duplicate requests."""
+    fallback_keys: List[str] = field(default_factory=list)  # Tried in order after the primary key
+    percentile: float = LLM_HEDGE_PERCENTILE                 # Latency percentile that triggers a hedge
+    max_hedges: int = 1                                      # Latency-triggered duplicates per call
+    attempt_timeout: Optional[float] = None                  # Per-candidate timeout (seconds) before failover
+
+
+_policy: contextvars.ContextVar = contextvars.ContextVar("llm_hedge_policy", default=None)
+_losers: contextvars.ContextVar = contextvars.ContextVar("llm_hedge_losers", default=None)
+
+
+class _Losers:
+    """Losing requests of a hedge_scope's calls that were still in flight when their call returned."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._futures: List[Future] = []
+
+    def add(self, future: Future) -> None:
+        with self._lock:
+            self._futures.append(future)
+
+    def drain(self, timeout: float) -> List[Any]:
+        """Wait for the losers and return the responses of those that completed."""
+        with self._lock:
+            futures, self._futures = self._futures, []
+        if not futures:
+            return []
+        done, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            logger.warning(f"{len(not_done)} losing hedged request(s) still running after {timeout}s; not billed")
+        return [f.result() for f in done if not f.cancelled() and f.exception() is None]
+
+
+@contextmanager
+def hedge_scope(policy: Optional[HedgePolicy],
+                on_waste: Optional[Callable[[Any], None]] = None) -> Iterator[None]:
+    """
+    Hedge non-streaming calls in the enclosed block (None disables hedging).
+
+    on_waste is called, as the block exits, with each losing response that
+    completed after its call had returned, so the caller can bill it.
+    """
+    reset = _policy.set(policy)
+    losers = _Losers() if policy is not None and on_waste is not None else None
+    reset_losers = _losers.set(losers)
+    try:
+        yield
+    finally:
+        _losers.reset(reset_losers)
+        _policy.reset(reset)
+        if losers is not None:
+            for result in losers.drain(LLM_HEDGE_DRAIN_SECONDS):
+                on_waste(result)
+
+
+def current_hedge_policy() -> Optional[HedgePolicy]:
+    return _policy.get()
+
+
+class HedgeStats:
+    """Thread-safe singleton of per-key latencies and hedging counters."""
+
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                self._latencies: Dict[str, Deque[float]] = {}
+                self._counters: Dict[str, Dict[str, Any]] = {}
+                self._initialized = True
+
+    def _key_counters(self, key_name: str) -> Dict[str, Any]:
+        return self._counters.setdefault(key_name, {
+            "calls": 0,
+            "hedged_calls": 0,
+            "hedges": 0,
+            "failovers": 0,
+            "wins_by_backup": 0,
+            "wasted_calls": 0,
+            "wasted_cost": 0.0,
+        })
+
+    def record_latency(self, key_name: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._latencies.setdefault(key_name, deque(maxlen=LLM_HEDGE_WINDOW))
+            samples.append(seconds)
+
+    def hedge_delay(self, key_name: str, percentile: float) -> float:
+        """Seconds to wait for the key before hedging: its latency percentile, or the default."""
+        with self._lock:
+            samples = sorted(self._latencies.get(key_name, ()))
+        if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_DEFAULT_DELAY_SECONDS
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100.0))
+        return max(LLM_HEDGE_MIN_DELAY_SECONDS, samples[index])
+
+    def record_call(self, key_name: str, hedges: int, failovers: int, won_by_backup: bool) -> None:
+        with self._lock:
+            counters = self._key_counters(key_name)
+            counters["calls"] += 1
+            counters["hedged_calls"] += 1 if hedges else 0
+            counters["hedges"] += hedges
+            counters["failovers"] += failovers
+            counters["wins_by_backup"] += 1 if won_by_backup else 0
+
+    def record_waste(self, key_name: str, cost: float) -> None:
+        """Cost of a response the hedged call on key_name did not use."""
+        with self._lock:
+            counters = self._key_counters(key_name)
+            counters["wasted_calls"] += 1
+            counters["wasted_cost"] += cost
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            keys = sorted(self._counters)
+            counters = {key: dict(self._counters[key]) for key in keys}
+        result = []
+        for key in keys:
+            entry = counters[key]
+            entry["key_name"] = key
+            entry["hedge_rate"] = entry["hedged_calls"] / entry["calls"] if entry["calls"] else 0.0
+            entry["wasted_cost"] = round(entry["wasted_cost"], 6)
+            entry["hedge_delay_seconds"] = round(self.hedge_delay(key, LLM_HEDGE_PERCENTILE), 3)
+            result.append(entry)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+            self._counters.clear()
+
+
+# Global instance
+_stats = HedgeStats()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Shared pool for candidate requests; losers may outlive the call that started them."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=LLM_HEDGE_MAX_WORKERS, thread_name_prefix="llm-hedge")
+        return _executor
+
+
+def _should_fail_over(exc: BaseException) -> bool:
+    """Errors another key or provider may not have: 5xx, 429, connection errors, timeouts."""
+    if isinstance(exc, CallCancelled):
+        return False
+    return isinstance(exc, DeadlineExceeded) or is_retryable_error(exc)
+
+
+def _run_candidate(
+    call_fn: Callable[..., Any],
+    request: Dict[str, Any],
+    key_name: str,
+    token: CancellationToken,
+    attempt_timeout: Optional[float],
+    last: bool,
+) -> Any:
+    """One candidate request, in a copy of the caller's context."""
+    with hedge_scope(None), deadline_scope(attempt_timeout, token=token):
+        if last:
+            return call_fn(**{**request, "key_name": key_name})
+        with no_retries():
+            return call_fn(**{**request, "key_name": key_name})
+
+
+def hedged_call(call_fn: Callable[..., Any], policy: HedgePolicy, request: Dict[str, Any]) -> Any:
+    """
+    Run call_fn(**request) under a hedging policy and return the first valid result.
+
+    A result is valid when the request has no schema or its output parsed.
+    When no candidate returns a valid result, the first invalid one is
+    returned; when every candidate fails, the last error is raised. The
+    returned result's cost and tokens include every other response received
+    before it returned, each listed in result.hedge["calls"].
+
+    Args:
+        call_fn: Non-streaming call function (client.call)
+        policy: Fallback keys and hedge timing
+        request: call_fn keyword arguments, including the primary key_name
+
+    Raises:
+        DeadlineExceeded / CallCancelled: From the caller's deadline_scope
+    """
+    primary = request["key_name"]
+    candidates = [primary] + (list(policy.fallback_keys) or [primary])
+    wants_parsed = request.get("schema") is not None
+
+    in_flight: Dict[Future, tuple] = {}     # future -> (candidate index, key, token, started)
+    launched = 0
+    hedges = 0
+    failovers = 0
+    winner = None
+    winner_index = 0
+    fallback_result = None
+    wasted: List[Any] = []                  # Responses received but not returned
+    errors: List[BaseException] = []
+
+    def launch() -> None:
+        nonlocal launched
+        index = launched
+        key = candidates[index]
+        launched += 1
+        token = CancellationToken()
+        future = _get_executor().submit(
+            contextvars.copy_context().run,
+            _run_candidate, call_fn, request, key, token, policy.attempt_timeout, index == len(candidates) - 1,
+        )
+        in_flight[future] = (index, key, token, time.monotonic())
+
+    hedge_at = time.monotonic() + _stats.hedge_delay(primary, policy.percentile)
+    check_deadline()
+    launch()
+
+    try:
+        while in_flight and winner is None:
+            can_hedge = launched < len(candidates) and hedges < policy.max_hedges
+            timeout = _POLL_SECONDS
+            if can_hedge:
+                timeout = min(timeout, max(0.0, hedge_at - time.monotonic()))
+            remaining = check_deadline()
+            if remaining is not None:
+                timeout = min(timeout, remaining)
+
+            done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, key, token, started = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    logger.warning(f"Hedged call on key '{key}' failed: {type(e).__name__}: {e}")
+                    if _should_fail_over(e) and launched < len(candidates):
+                        failovers += 1
+                        launch()
+                    continue
+
+                _stats.record_latency(key, time.monotonic() - started)
+                if not wants_parsed or getattr(result, "parsed", None) is not None:
+                    winner, winner_index = result, index
+                    break
+                if fallback_result is None:
+                    fallback_result = result
+                else:
+                    wasted.append(result)
+                    _stats.record_waste(primary, getattr(result, "cost", 0.0) or 0.0)
+                if launched < len(candidates):
+                    failovers += 1
+                    launch()
+
+            if winner is None and can_hedge and not done and time.monotonic() >= hedge_at:
+                hedges += 1
+                logger.info(f"Hedging call on key '{primary}' to '{candidates[launched]}'")
+                launch()
+                hedge_at = time.monotonic() + _stats.hedge_delay(candidates[launched - 1], policy.percentile)
+    finally:
+        # Cancel the losers; any that still complete are counted as waste,
+        # and billed through the enclosing hedge_scope's on_waste
+        losers = _losers.get()
+        for future, (_, _, token, _) in in_flight.items():
+            token.cancel("Hedged call settled")
+            future.add_done_callback(_waste_callback(primary))
+            if losers is not None:
+                losers.add(future)
+        _stats.record_call(primary, hedges, failovers, won_by_backup=winner is not None and winner_index > 0)
+
+    if winner is not None:
+        if fallback_result is not None:
+            wasted.insert(0, fallback_result)
+            _stats.record_waste(primary, getattr(fallback_result, "cost", 0.0) or 0.0)
+        return _with_waste(winner, wasted, hedges, failovers)
+    if fallback_result is not None:
+        return _with_waste(fallback_result, wasted, hedges, failovers)
+    raise errors[-1]
+
+
+def _call_entry(result: Any, outcome: str) -> Dict[str, Any]:
+    return {
+        "api_key_name": getattr(result, "api_key_name", None),
+        "api_key_id": getattr(result, "api_key_id", None),
+        "model": getattr(result, "model", None),
+        "cost": getattr(result, "cost", 0.0) or 0.0,
+        "input_tokens": getattr(result, "input_tokens", 0) or 0,
+        "output_tokens": getattr(result, "output_tokens", 0) or 0,
+        "outcome": outcome,
+    }
+
+
+def _with_waste(result: Any, wasted: List[Any], hedges: int, failovers: int) -> Any:
+    """The returned result, billed for the wasted responses too and listing every call per key."""
+    if not dataclasses.is_dataclass(result):
+        return result
+    calls = [_call_entry(result, "returned")] + [_call_entry(w, "wasted") for w in wasted]
+    return dataclasses.replace(
+        result,
+        cost=round(sum(c["cost"] for c in calls), 6),
+        input_tokens=sum(c["input_tokens"] for c in calls),
+        output_tokens=sum(c["output_tokens"] for c in calls),
+        hedge={"hedges": hedges, "failovers": failovers, "calls": calls},
+    )
+
+
+def _waste_callback(key_name: str) -> Callable[[Future], None]:
+    def record(future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        _stats.record_waste(key_name, getattr(future.result(), "cost", 0.0) or 0.0)
+    return record
+
+
+def hedge_stats() -> List[Dict[str, Any]]:
+    """Per primary key: calls, hedge rate, failovers, backup wins and wasted cost."""
+    return _stats.stats()
+
+
+def clear_hedge_stats() -> None:
+    _stats.clear()
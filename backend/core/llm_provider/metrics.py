@@ -0,0 +1,190 @@
+"""Prometheus telemetry for LLM provider calls.
+
+Every provider request made by call(), acall(), astream() and streaming
+call() records, labelled by provider, model, managed key and calling tool:
+
+- llm_request_duration_seconds: latency of the whole request, retries included
+- llm_time_to_first_token_seconds: streams only
+- llm_output_tokens_per_second: output tokens over generation time (after
+  the first token for streams)
+- llm_requests_total / llm_request_errors_total (by exception type)
+- llm_retries_total: retried attempts
+- llm_requests_in_flight
+
+and every rate limiter (rate_limit.py), labelled by provider, model and key:
+
+- llm_rate_limit_throttles_total: calls the provider throttled (429/529)
+- llm_rate_limit_wait_seconds: time each call waited for admission
+- llm_rate_limit_concurrency_limit: the adaptive (AIMD) concurrency limit
+
+Response cache hits make no request and are not recorded. The calling tool
+comes from the enclosing tool_scope() (set by the workflow tool runners),
+"none" outside one. Labelled children are resolved once per label set and
+cached, so a request costs one dict lookup and a handful of metric updates.
+
+Example:
+    >>> with tool_scope("analyze_note_with_span_and_reason"):
+    ...     result = call(messages=[...], key_name="my-key")
+    >>> body, content_type = render_metrics()
+"""
+
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from .registry import MODELS, ModelConfig
+
+logger = logging.getLogger(__name__)
+
+_LABELS = ("provider", "model", "key", "tool")
+
+_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+_TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+_THROUGHPUT_BUCKETS = (1, 5, 10, 20, 40, 80, 160, 320, 640)
+_WAIT_BUCKETS = (0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_LIMITER_LABELS = ("provider", "model", "key")
+
+REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds", "LLM request latency, retries included", _LABELS, buckets=_LATENCY_BUCKETS,
+)
+TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds", "Time to the first streamed token", _LABELS, buckets=_TTFT_BUCKETS,
+)
+OUTPUT_TOKENS_PER_SECOND = Histogram(
+    "llm_output_tokens_per_second", "Output tokens per second of generation", _LABELS, buckets=_THROUGHPUT_BUCKETS,
+)
+REQUESTS = Counter("llm_requests_total", "Completed LLM requests", _LABELS)
+ERRORS = Counter("llm_request_errors_total", "Failed LLM requests", _LABELS + ("error",))
+RETRIES = Counter("llm_retries_total", "Retried LLM request attempts", _LABELS)
+IN_FLIGHT = Gauge("llm_requests_in_flight", "LLM requests in progress", _LABELS)
+
+RATE_LIMIT_THROTTLES = Counter(
+    "llm_rate_limit_throttles_total", "LLM calls throttled by the provider (429/529)", _LIMITER_LABELS,
+)
+RATE_LIMIT_WAIT = Histogram(
+    "llm_rate_limit_wait_seconds", "Time LLM calls waited for rate-limiter admission", _LIMITER_LABELS,
+    buckets=_WAIT_BUCKETS,
+)
+CONCURRENCY_LIMIT = Gauge(
+    "llm_rate_limit_concurrency_limit", "Adaptive concurrency limit of a key's rate limiter", _LIMITER_LABELS,
+)
+
+
+_tool: contextvars.ContextVar = contextvars.ContextVar("llm_metrics_tool", default="none")
+
+
+@contextmanager
+def tool_scope(tool_name: str) -> Iterator[None]:
+    """Label LLM calls made in the enclosed block with the calling tool."""
+    reset = _tool.set(tool_name)
+    try:
+        yield
+    finally:
+        _tool.reset(reset)
+
+
+class _Series:
+    """Pre-resolved children of every metric for one label set."""
+
+    __slots__ = ("labels", "duration", "ttft", "throughput", "requests", "retries", "in_flight")
+
+    def __init__(self, labels: Tuple[str, ...]):
+        self.labels = labels
+        self.duration = REQUEST_DURATION.labels(*labels)
+        self.ttft = TIME_TO_FIRST_TOKEN.labels(*labels)
+        self.throughput = OUTPUT_TOKENS_PER_SECOND.labels(*labels)
+        self.requests = REQUESTS.labels(*labels)
+        self.retries = RETRIES.labels(*labels)
+        self.in_flight = IN_FLIGHT.labels(*labels)
+
+
+_series: Dict[Tuple[str, ...], _Series] = {}
+_series_lock = Lock()
+
+
+def _get_series(provider: str, model: str, key: str) -> _Series:
+    labels = (provider, model, key, _tool.get())
+    series = _series.get(labels)
+    if series is None:
+        with _series_lock:
+            series = _series.setdefault(labels, _Series(labels))
+    return series
+
+
+class CallMetrics:
+    """Measures one provider request; use as a context manager around it.
+
+    Set output_tokens before the block exits and call first_token() when a
+    stream yields its first content.
+    """
+
+    __slots__ = ("series", "stream", "started", "first_token_at", "output_tokens")
+
+    def __init__(self, series: _Series, stream: bool):
+        self.series = series
+        self.stream = stream
+        self.started = 0.0
+        self.first_token_at: Optional[float] = None
+        self.output_tokens = 0
+
+    def first_token(self) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            self.series.ttft.observe(self.first_token_at - self.started)
+
+    def __enter__(self) -> "CallMetrics":
+        self.series.in_flight.inc()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        finished = time.perf_counter()
+        series = self.series
+        series.in_flight.dec()
+        if exc_type is GeneratorExit:
+            # Stream abandoned by its consumer: neither a completion nor an error
+            return False
+        if exc_type is not None:
+            ERRORS.labels(*series.labels, exc_type.__name__).inc()
+            return False
+
+        series.requests.inc()
+        series.duration.observe(finished - self.started)
+        generation_started = self.first_token_at if self.stream and self.first_token_at else self.started
+        generation_seconds = finished - generation_started
+        if self.output_tokens and generation_seconds > 0:
+            series.throughput.observe(self.output_tokens / generation_seconds)
+        return False
+
+
+def call_metrics(key_record: Dict[str, Any], config: ModelConfig, stream: bool = False) -> CallMetrics:
+    """Metrics context for a request on a resolved key."""
+    return CallMetrics(_get_series(config.provider, key_record["model_name"], key_record["key_name"]), stream)
+
+
+class LimiterMetrics:
+    """Pre-resolved rate-limiter metrics for one (key, model)."""
+
+    __slots__ = ("throttles", "wait", "concurrency_limit")
+
+    def __init__(self, key_name: str, model: str):
+        config = MODELS.get(model)
+        labels = (config.provider if config else "unknown", model, key_name)
+        self.throttles = RATE_LIMIT_THROTTLES.labels(*labels)
+        self.wait = RATE_LIMIT_WAIT.labels(*labels)
+        self.concurrency_limit = CONCURRENCY_LIMIT.labels(*labels)
+
+
+def record_retry(model: str, key_name: str) -> None:
+    config = MODELS.get(model)
+    _get_series(config.provider if config else "unknown", model, key_name).retries.inc()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus exposition of the process's metrics: (body, content type)."""
+    return generate_latest(), CONTENT_TYPE_LATEST
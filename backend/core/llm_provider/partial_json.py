@@ -0,0 +1,219 @@
+"""Incremental parsing of streamed structured output.
+
+IncrementalJSONParser consumes a JSON object as it streams in and reports,
+per delta, which top-level fields have completed (each validated against
+the schema field's type) and the text appended to top-level string fields
+that are still being written. Each character is scanned once, so a stream
+of n characters costs O(n) regardless of how it is chunked.
+
+Example:
+    >>> parser = IncrementalJSONParser(SummaryResponse)
+    >>> for delta in ['{"summ', 'ary": "Reads no', 'tes", "steps": 3}']:
+    ...     update = parser.feed(delta)
+    ...     print(update.fields, update.text_deltas)
+    {} {}
+    {} {'summary': 'Reads no'}
+    {'summary': 'Reads notes', 'steps': 3} {'summary': 'tes'}
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+logger = logging.getLogger(__name__)
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_WHITESPACE = " \t\r\n"
+
+
+@dataclass
+class PartialUpdate:
+    """What a feed() call revealed."""
+    fields: Dict[str, Any] = field(default_factory=dict)        # Top-level fields completed in this delta
+    text_deltas: Dict[str, str] = field(default_factory=dict)   # Text added to in-progress top-level strings
+
+    def __bool__(self) -> bool:
+        return bool(self.fields or self.text_deltas)
+
+
+@lru_cache(maxsize=256)
+def _field_adapters(schema: Type[BaseModel]) -> Dict[str, TypeAdapter]:
+    adapters = {}
+    for name, info in schema.model_fields.items():
+        adapter = TypeAdapter(info.annotation)
+        adapters[name] = adapter
+        if info.alias:
+            adapters[info.alias] = adapter
+    return adapters
+
+
+class IncrementalJSONParser:
+    """Streams a JSON object, emitting validated top-level fields as they complete.
+
+    Text before the opening brace (e.g. a ```json fence) is skipped. Fields
+    the schema does not declare, or whose value fails validation, are not
+    emitted; the final response is still validated as a whole by the caller.
+    """
+
+    def __init__(self, schema: Optional[Type[BaseModel]] = None):
+        self.schema = schema
+        self._adapters = _field_adapters(schema) if schema else {}
+        self.fields: Dict[str, Any] = {}    # All fields completed so far
+
+        self._depth = 0             # 0 before the object, 1 inside it, 2+ inside nested values
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._unicode: Optional[List[str]] = None  # hex digits of a \\uXXXX escape being read
+        self._high_surrogate: Optional[int] = None
+
+        self._expect = "key"        # at depth 1: "key", "colon", "value" or "comma"
+        self._key_parts: List[str] = []
+        self._reading_key = False
+        self._key: Optional[str] = None
+
+        self._value_parts: List[str] = []   # raw JSON text of the current top-level value
+        self._value_kind: Optional[str] = None  # "string", "container" or "scalar"
+
+    def feed(self, delta: str) -> PartialUpdate:
+        update = PartialUpdate()
+        self._text_parts: Dict[str, List[str]] = {}
+        for char in delta:
+            if self._done:
+                break
+            self._step(char, update)
+        update.text_deltas = {key: "".join(parts) for key, parts in self._text_parts.items()}
+        return update
+
+    # ── Scanner ──
+
+    def _step(self, char: str, update: PartialUpdate) -> None:
+        if self._depth == 0:
+            if char == "{":
+                self._depth = 1
+                self._expect = "key"
+            return
+
+        if self._in_string:
+            self._string_char(char, update)
+            return
+
+        if self._depth >= 2:
+            self._value_parts.append(char)
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self._complete_value(update)
+            return
+
+        # Depth 1: between keys and values of the top-level object
+        if self._value_kind == "scalar":
+            if char in _WHITESPACE or char in ",}":
+                self._complete_value(update)
+            else:
+                self._value_parts.append(char)
+                return
+
+        if char in _WHITESPACE:
+            return
+        if char == "}":
+            self._done = True
+        elif char == ",":
+            self._expect = "key"
+        elif char == ":":
+            self._expect = "value"
+        elif char == '"':
+            self._in_string = True
+            if self._expect == "key":
+                self._reading_key = True
+                self._key_parts = []
+            else:
+                self._value_kind = "string"
+                self._value_parts = ['"']
+        elif self._expect == "value":
+            self._value_parts = [char]
+            if char in "{[":
+                self._value_kind = "container"
+                self._depth += 1
+            else:
+                self._value_kind = "scalar"
+
+    def _string_char(self, char: str, update: PartialUpdate) -> None:
+        top_level_value = self._depth == 1 and not self._reading_key
+        if not self._reading_key:
+            self._value_parts.append(char)
+
+        if self._unicode is not None:
+            self._unicode.append(char)
+            if len(self._unicode) == 4:
+                decoded = self._decode_unicode("".join(self._unicode))
+                self._unicode = None
+                self._emit_char(decoded, top_level_value, update)
+            return
+
+        if self._escape:
+            self._escape = False
+            if char == "u":
+                self._unicode = []
+            else:
+                self._emit_char(_ESCAPES.get(char, char), top_level_value, update)
+            return
+
+        if char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            if self._reading_key:
+                self._reading_key = False
+                self._key = "".join(self._key_parts)
+                self._expect = "colon"
+            elif top_level_value:
+                self._complete_value(update)
+        else:
+            self._emit_char(char, top_level_value, update)
+
+    def _decode_unicode(self, digits: str) -> str:
+        try:
+            code = int(digits, 16)
+        except ValueError:
+            return ""
+        if 0xD800 <= code <= 0xDBFF:
+            self._high_surrogate = code
+            return ""
+        if 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        return chr(code)
+
+    def _emit_char(self, text: str, top_level_value: bool, update: PartialUpdate) -> None:
+        if not text:
+            return
+        if self._reading_key:
+            self._key_parts.append(text)
+        elif top_level_value and self._key in self._adapters:
+            self._text_parts.setdefault(self._key, []).append(text)
+
+    def _complete_value(self, update: PartialUpdate) -> None:
+        key, raw = self._key, "".join(self._value_parts)
+        self._value_parts = []
+        self._value_kind = None
+        self._expect = "comma"
+
+        adapter = self._adapters.get(key)
+        if adapter is None:
+            return
+        try:
+            value = adapter.validate_python(json.loads(raw))
+        except (ValueError, ValidationError) as e:
+            logger.debug(f"Streamed field '{key}' did not validate: {e}")
+            return
+        self.fields[key] = value
+        update.fields[key] = value
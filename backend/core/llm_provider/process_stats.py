@@ -0,0 +1,113 @@
+"""Hedging and rate-limiter stats shared between processes.
+
+Hedge stats and rate limiters live in the process that makes the calls;
+experiments run in worker.py, not in the API. A worker publishes a
+snapshot of its stats to LLM_PROCESS_STATS_DIR every few seconds, and the
+API combines its own live stats with every snapshot that is still fresh:
+
+- combined_hedge_stats(): counters summed per primary key across processes
+- combined_rate_limit_stats(): every process's limiters, labelled by process
+
+Each process limits its own calls, so limiter state is listed per process
+rather than summed.
+
+Example:
+    >>> publish_process_stats("worker-1")        # in the worker, periodically
+    >>> combined_hedge_stats()                   # in the API
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+from .hedge import hedge_stats
+from .rate_limit import rate_limit_stats
+
+logger = logging.getLogger(__name__)
+
+LLM_PROCESS_STATS_DIR = os.getenv("LLM_PROCESS_STATS_DIR", os.path.join("llm_cache", "process_stats"))
+# Snapshots older than this belong to a process that stopped publishing
+LLM_PROCESS_STATS_STALE_SECONDS = float(os.getenv("LLM_PROCESS_STATS_STALE_SECONDS", "60"))
+
+# Hedge counters that add up across processes
+_SUMMED = ("calls", "hedged_calls", "hedges", "failovers", "wins_by_backup", "wasted_calls", "wasted_cost")
+
+
+def _snapshot_path(process_id: str) -> str:
+    return os.path.join(LLM_PROCESS_STATS_DIR, f"{process_id}.json")
+
+
+def publish_process_stats(process_id: str) -> None:
+    """Write this process's hedge and limiter stats for other processes to read."""
+    os.makedirs(LLM_PROCESS_STATS_DIR, exist_ok=True)
+    path = _snapshot_path(process_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            "process": process_id,
+            "published_at": time.time(),
+            "hedging": hedge_stats(),
+            "rate_limits": rate_limit_stats(),
+        }, f)
+    os.replace(tmp_path, path)
+
+
+def remove_process_stats(process_id: str) -> None:
+    """Withdraw a stopping process's snapshot."""
+    try:
+        os.remove(_snapshot_path(process_id))
+    except FileNotFoundError:
+        pass
+
+
+def published_stats() -> List[Dict[str, Any]]:
+    """Fresh snapshots published by worker processes."""
+    if not os.path.isdir(LLM_PROCESS_STATS_DIR):
+        return []
+    snapshots = []
+    now = time.time()
+    for filename in os.listdir(LLM_PROCESS_STATS_DIR):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(LLM_PROCESS_STATS_DIR, filename), 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Skipping process stats {filename}: {e}")
+            continue
+        if now - snapshot.get("published_at", 0) <= LLM_PROCESS_STATS_STALE_SECONDS:
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def combined_hedge_stats() -> List[Dict[str, Any]]:
+    """hedge_stats() summed over this process and every publishing process."""
+    combined: Dict[str, Dict[str, Any]] = {}
+    sources = [hedge_stats()] + [snapshot.get("hedging", []) for snapshot in published_stats()]
+    for entries in sources:
+        for entry in entries:
+            total = combined.setdefault(entry["key_name"], {
+                "key_name": entry["key_name"], **{k: 0 for k in _SUMMED}, "hedge_delay_seconds": 0.0,
+            })
+            for k in _SUMMED:
+                total[k] += entry.get(k, 0)
+            # Each process learns its own latencies; report the most patient delay
+            total["hedge_delay_seconds"] = max(total["hedge_delay_seconds"], entry.get("hedge_delay_seconds", 0.0))
+    result = []
+    for key in sorted(combined):
+        entry = combined[key]
+        entry["hedge_rate"] = entry["hedged_calls"] / entry["calls"] if entry["calls"] else 0.0
+        entry["wasted_cost"] = round(entry["wasted_cost"], 6)
+        result.append(entry)
+    return result
+
+
+def combined_rate_limit_stats(process_id: str = "api") -> List[Dict[str, Any]]:
+    """rate_limit_stats() of this process and every publishing process, each labelled with its process."""
+    limiters = [{**entry, "process": process_id} for entry in rate_limit_stats()]
+    for snapshot in published_stats():
+        limiters += [{**entry, "process": snapshot["process"]} for entry in snapshot.get("rate_limits", [])]
+    return limiters
+
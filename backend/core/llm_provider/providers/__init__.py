@@ -4,6 +4,7 @@ from .base import BaseProvider, ProviderResponse, ToolDefinition
 from .openai_provider import OpenAIProvider
 from .anthropic_provider import AnthropicProvider
 from .google_provider import GoogleProvider
+from .mock_provider import MockProvider
 
 __all__ = [
     "BaseProvider",
@@ -12,4 +13,5 @@ __all__ = [
     "OpenAIProvider",
     "AnthropicProvider",
     "GoogleProvider",
+    "MockProvider",
 ]
@@ -2,17 +2,28 @@
 
 import json
 import os
-from typing import Any, Dict, Generator, List, Optional, Type, Union
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Type, Union
 
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic, DefaultAsyncHttpxClient, DefaultHttpxClient
+from anthropic.types import Message
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
+from ..client_pool import async_pool_name, get_pooled_client, http_limits
 from .base import BaseProvider, ProviderResponse, ProviderStreamChunk, ToolDefinition
 from ..result import ToolCall
 
 load_dotenv()
 
+# Automatic cache_control breakpoints on long system prompts / message prefixes
+ANTHROPIC_PROMPT_CACHING = os.getenv("ANTHROPIC_PROMPT_CACHING", "1").lower() not in ("0", "false", "no")
+
+# Shortest prefix (in tokens) Anthropic will cache; shorter prefixes are ignored
+_MIN_CACHEABLE_TOKENS = 1024
+_MIN_CACHEABLE_TOKENS_HAIKU = 2048
+
+_EPHEMERAL = {"type": "ephemeral"}
+
 
 class AnthropicProvider(BaseProvider):
     """Anthropic Claude API provider."""
@@ -27,7 +38,7 @@ class AnthropicProvider(BaseProvider):
             api_key = os.getenv("ANTHROPIC_API_KEY")
             if not api_key:
                 raise ValueError("ANTHROPIC_API_KEY environment variable not set")
-            self._client = Anthropic(api_key=api_key)
+            self._client = Anthropic(api_key=api_key, max_retries=0)
         return self._client
 
     def _convert_tools(self, tools: List[ToolDefinition]) -> List[Dict[str, Any]]:
@@ -58,11 +69,32 @@ class AnthropicProvider(BaseProvider):
                 return {"type": "tool", "name": tool_choice}
         return tool_choice
 
-    def _get_client(self, api_key: Optional[str] = None) -> Anthropic:
-        """Get client - use override api_key if provided, otherwise default."""
+    def _get_client(self, api_key: Optional[str] = None, timeout: Optional[float] = None) -> Anthropic:
+        """Get client - pooled per override api_key if provided, otherwise default."""
         if api_key:
-            return Anthropic(api_key=api_key)
-        return self.client
+            client = get_pooled_client(
+                "anthropic", api_key,
+                lambda: Anthropic(api_key=api_key, max_retries=0, http_client=DefaultHttpxClient(limits=http_limits())),
+            )
+        else:
+            client = self.client
+        if timeout is not None:
+            client = client.with_options(timeout=timeout)
+        return client
+
+    def _get_async_client(self, api_key: Optional[str] = None, timeout: Optional[float] = None) -> AsyncAnthropic:
+        """Get a pooled async client for this event loop (env key if no override)."""
+        api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise ValueError("ANTHROPIC_API_KEY environment variable not set")
+        # httpx async connections are bound to the loop that opened them
+        client = get_pooled_client(
+            async_pool_name("anthropic"), api_key,
+            lambda: AsyncAnthropic(api_key=api_key, max_retries=0, http_client=DefaultAsyncHttpxClient(limits=http_limits())),
+        )
+        if timeout is not None:
+            client = client.with_options(timeout=timeout)
+        return client
 
     def call(
         self,
@@ -76,288 +108,337 @@ class AnthropicProvider(BaseProvider):
         tool_choice: Union[str, Dict[str, Any]] = "auto",
         stream: bool = False,
         api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
     ) -> Union[ProviderResponse, Generator[ProviderStreamChunk, None, None]]:
         """Unified call method with optional structured output, tools, and streaming."""
-        client = self._get_client(api_key)
+        client = self._get_client(api_key, timeout)
+        kwargs = self._build_kwargs(model_id, messages, system, temperature, max_tokens, schema, tools, tool_choice)
 
         if stream:
-            return self._call_stream(
-                model_id, messages, system, temperature, max_tokens, schema, tools, tool_choice, client=client
-            )
+            return self._call_stream(kwargs, schema, tools, client=client)
 
-        # Non-streaming calls
-        if schema and not tools:
-            return self._call_structured(model_id, messages, schema, system, temperature, max_tokens, client=client)
-        elif tools:
-            return self._call_with_tools(
-                model_id, messages, tools, tool_choice, system, temperature, max_tokens, client=client
-            )
-        else:
-            return self._call_basic(model_id, messages, system, temperature, max_tokens, client=client)
+        response = client.messages.create(**kwargs)
+        return self._extract_response(response, schema, tools)
 
-    def _call_basic(
+    async def acall(
         self,
         model_id: str,
         messages: List[Dict[str, str]],
-        system: Optional[str],
-        temperature: float,
-        max_tokens: int,
-        client: Optional[Anthropic] = None,
-    ) -> ProviderResponse:
-        """Make a standard completion call."""
-        kwargs: Dict[str, Any] = {
-            "model": model_id,
-            "messages": messages,
-            "max_tokens": max_tokens,
-        }
-
-        if system:
-            kwargs["system"] = system
-        if temperature != 1.0:
-            kwargs["temperature"] = temperature
-
-        client = client or self.client
-        response = client.messages.create(**kwargs)
+        system: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 8192,
+        schema: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[ToolDefinition]] = None,
+        tool_choice: Union[str, Dict[str, Any]] = "auto",
+        stream: bool = False,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Union[ProviderResponse, AsyncGenerator[ProviderStreamChunk, None]]:
+        """Native async call using AsyncAnthropic."""
+        client = self._get_async_client(api_key, timeout)
+        kwargs = self._build_kwargs(model_id, messages, system, temperature, max_tokens, schema, tools, tool_choice)
 
-        # Extract text content
-        content = ""
-        for block in response.content:
-            if block.type == "text":
-                content = block.text
-                break
+        if stream:
+            return self._acall_stream(kwargs, schema, tools, client)
 
-        return ProviderResponse(
-            content=content,
-            input_tokens=response.usage.input_tokens,
-            output_tokens=response.usage.output_tokens,
-            raw_response=response,
-        )
+        response = await client.messages.create(**kwargs)
+        return self._extract_response(response, schema, tools)
 
-    def _call_structured(
+    def _build_kwargs(
         self,
         model_id: str,
         messages: List[Dict[str, str]],
-        schema: Type[BaseModel],
         system: Optional[str],
         temperature: float,
         max_tokens: int,
-        client: Optional[Anthropic] = None,
-    ) -> ProviderResponse:
-        """Make a structured output call using Anthropic's tool_use pattern."""
-        # Define a tool based on the Pydantic schema
-        tool_definition = {
-            "name": "structured_response",
-            "description": "Provide your response in the required structured format",
-            "input_schema": schema.model_json_schema(),
-        }
-
-        # Modify system prompt to encourage tool use
-        structured_system = (system or "") + (
-            "\n\nYou MUST use the structured_response tool to provide your answer. "
-            "Do not respond with plain text."
-        )
-
+        schema: Optional[Type[BaseModel]],
+        tools: Optional[List[ToolDefinition]],
+        tool_choice: Union[str, Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Build messages.create kwargs for basic, structured, or tool calls."""
         kwargs: Dict[str, Any] = {
             "model": model_id,
             "messages": messages,
-            "system": structured_system,
             "max_tokens": max_tokens,
-            "tools": [tool_definition],
-            "tool_choice": {"type": "tool", "name": "structured_response"},
         }
 
+        if system:
+            kwargs["system"] = system
         if temperature != 1.0:
             kwargs["temperature"] = temperature
 
-        client = client or self.client
-        response = client.messages.create(**kwargs)
-
-        # Extract from tool_use block
-        tool_block = next(
-            (b for b in response.content if b.type == "tool_use"),
-            None,
-        )
+        if tools:
+            kwargs["tools"] = self._convert_tools(tools)
+            kwargs["tool_choice"] = self._convert_tool_choice(tool_choice)
+        elif schema:
+            # Structured output via Anthropic's tool_use pattern
+            kwargs["tools"] = [{
+                "name": "structured_response",
+                "description": "Provide your response in the required structured format",
+                "input_schema": schema.model_json_schema(),
+            }]
+            kwargs["tool_choice"] = {"type": "tool", "name": "structured_response"}
+            # Modify system prompt to encourage tool use
+            kwargs["system"] = (system or "") + (
+                "\n\nYou MUST use the structured_response tool to provide your answer. "
+                "Do not respond with plain text."
+            )
 
-        if tool_block:
-            parsed = schema.model_validate(tool_block.input)
-            content = json.dumps(tool_block.input)
-        else:
-            # Fallback to text content if tool wasn't used
-            content = ""
-            for block in response.content:
-                if block.type == "text":
-                    content = block.text
-                    break
-            parsed = None
+        if ANTHROPIC_PROMPT_CACHING:
+            self._add_cache_breakpoints(kwargs)
 
-        return ProviderResponse(
-            content=content,
-            parsed=parsed,
-            input_tokens=response.usage.input_tokens,
-            output_tokens=response.usage.output_tokens,
-            raw_response=response,
-        )
+        return kwargs
 
-    def _call_with_tools(
-        self,
-        model_id: str,
-        messages: List[Dict[str, str]],
-        tools: List[ToolDefinition],
-        tool_choice: Union[str, Dict[str, Any]],
-        system: Optional[str],
-        temperature: float,
-        max_tokens: int,
-        client: Optional[Anthropic] = None,
-    ) -> ProviderResponse:
-        """Make a call with tool/function calling support."""
-        anthropic_tools = self._convert_tools(tools)
-        anthropic_tool_choice = self._convert_tool_choice(tool_choice)
+    def _add_cache_breakpoints(self, kwargs: Dict[str, Any]) -> None:
+        """Mark the static request prefix for Anthropic prompt caching.
 
-        kwargs: Dict[str, Any] = {
-            "model": model_id,
-            "messages": messages,
-            "max_tokens": max_tokens,
-            "tools": anthropic_tools,
-            "tool_choice": anthropic_tool_choice,
-        }
+        Requests are cached by prefix in the order tools -> system ->
+        messages. The system prompt gets a breakpoint when tools + system
+        reach the model's cacheable minimum, and the last message before
+        the final user turn (few-shot examples, prior turns) gets one when
+        the whole prefix does. Token counts are estimated at ~4 chars/token.
+        """
+        minimum = _MIN_CACHEABLE_TOKENS_HAIKU if "haiku" in kwargs["model"] else _MIN_CACHEABLE_TOKENS
 
+        prefix_chars = len(json.dumps(kwargs["tools"])) if kwargs.get("tools") else 0
+        system = kwargs.get("system")
         if system:
-            kwargs["system"] = system
-        if temperature != 1.0:
-            kwargs["temperature"] = temperature
-
-        client = client or self.client
-        response = client.messages.create(**kwargs)
-
-        # Extract content and tool calls
+            prefix_chars += len(system)
+            if prefix_chars // 4 >= minimum:
+                kwargs["system"] = [{"type": "text", "text": system, "cache_control": _EPHEMERAL}]
+
+        messages = kwargs["messages"]
+        if len(messages) < 2:
+            return
+        prefix_chars += sum(_content_chars(m.get("content", "")) for m in messages[:-1])
+        if prefix_chars // 4 >= minimum:
+            # Copy so the caller's messages are left untouched
+            messages = list(messages)
+            marked = dict(messages[-2])
+            marked["content"] = _with_cache_control(marked.get("content", ""))
+            messages[-2] = marked
+            kwargs["messages"] = messages
+
+    def _extract_response(
+        self,
+        response: Any,
+        schema: Optional[Type[BaseModel]],
+        tools: Optional[List[ToolDefinition]],
+    ) -> ProviderResponse:
+        """Extract content, parsed output and tool calls from a Messages response."""
         content = ""
+        parsed = None
         tool_calls = []
 
-        for block in response.content:
-            if block.type == "text":
-                content = block.text
-            elif block.type == "tool_use":
-                tool_calls.append(
-                    ToolCall(
-                        id=block.id,
-                        name=block.name,
-                        arguments=block.input,
+        if schema and not tools:
+            # Extract from tool_use block
+            tool_block = next(
+                (b for b in response.content if b.type == "tool_use"),
+                None,
+            )
+            if tool_block:
+                parsed = schema.model_validate(tool_block.input)
+                content = json.dumps(tool_block.input)
+            else:
+                # Fallback to text content if tool wasn't used
+                content = next((b.text for b in response.content if b.type == "text"), "")
+        else:
+            for block in response.content:
+                if block.type == "text":
+                    content = block.text
+                    if not tools:
+                        break
+                elif block.type == "tool_use" and tools:
+                    tool_calls.append(
+                        ToolCall(
+                            id=block.id,
+                            name=block.name,
+                            arguments=block.input,
+                        )
                     )
-                )
 
         return ProviderResponse(
             content=content,
-            input_tokens=response.usage.input_tokens,
+            parsed=parsed,
             output_tokens=response.usage.output_tokens,
             tool_calls=tool_calls if tool_calls else None,
             raw_response=response,
+            **_usage_tokens(response.usage),
         )
 
-    def _call_stream(
+    def batch_request(
         self,
+        custom_id: str,
         model_id: str,
         messages: List[Dict[str, str]],
-        system: Optional[str],
-        temperature: float,
-        max_tokens: int,
+        system: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 8192,
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> Dict[str, Any]:
+        """One request of a Message Batches job."""
+        params = self._build_kwargs(model_id, messages, system, temperature, max_tokens, schema, None, "auto")
+        return {"custom_id": custom_id, "params": params}
+
+    def parse_batch_result(
+        self,
+        line: Dict[str, Any],
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> ProviderResponse:
+        """ProviderResponse for one Message Batches result."""
+        result = line.get("result") or {}
+        if result.get("type") != "succeeded":
+            detail = result.get("error") or result.get("type")
+            raise RuntimeError(f"Batch request '{line.get('custom_id')}' failed: {detail}")
+        return self._extract_response(Message.model_validate(result["message"]), schema, None)
+
+    def _call_stream(
+        self,
+        kwargs: Dict[str, Any],
         schema: Optional[Type[BaseModel]],
         tools: Optional[List[ToolDefinition]],
-        tool_choice: Union[str, Dict[str, Any]],
         client: Optional[Anthropic] = None,
     ) -> Generator[ProviderStreamChunk, None, None]:
         """Stream a call, yielding chunks as they arrive."""
-        kwargs: Dict[str, Any] = {
-            "model": model_id,
-            "messages": messages,
-            "max_tokens": max_tokens,
-        }
-
-        if system:
-            kwargs["system"] = system
-        if temperature != 1.0:
-            kwargs["temperature"] = temperature
-
-        # Add tools if provided
-        if tools:
-            kwargs["tools"] = self._convert_tools(tools)
-            kwargs["tool_choice"] = self._convert_tool_choice(tool_choice)
-
-        # For structured output, use tool pattern
-        if schema and not tools:
-            tool_definition = {
-                "name": "structured_response",
-                "description": "Provide your response in the required structured format",
-                "input_schema": schema.model_json_schema(),
-            }
-            kwargs["tools"] = [tool_definition]
-            kwargs["tool_choice"] = {"type": "tool", "name": "structured_response"}
-            # Modify system for structured output
-            kwargs["system"] = (system or "") + (
-                "\n\nYou MUST use the structured_response tool to provide your answer."
-            )
-
         # Use the streaming context manager
         client = client or self.client
         with client.messages.stream(**kwargs) as stream:
-            accumulated_content = ""
-            tool_call_accumulators: Dict[str, Dict[str, Any]] = {}  # id -> {name, input_json}
-
+            accumulator = _StreamAccumulator(structured=bool(schema and not tools))
             for event in stream:
-                # Handle different event types
-                if event.type == "content_block_start":
-                    if hasattr(event, "content_block"):
-                        block = event.content_block
-                        if block.type == "tool_use":
-                            tool_call_accumulators[block.id] = {
-                                "name": block.name,
-                                "input_json": ""
-                            }
-
-                elif event.type == "content_block_delta":
-                    if hasattr(event, "delta"):
-                        delta = event.delta
-                        if delta.type == "text_delta":
-                            accumulated_content += delta.text
-                            yield ProviderStreamChunk(content=delta.text)
-                        elif delta.type == "input_json_delta":
-                            # Accumulate tool input JSON
-                            if hasattr(event, "index"):
-                                # Find the tool call by checking current accumulators
-                                for tool_id, tool_data in tool_call_accumulators.items():
-                                    tool_data["input_json"] += delta.partial_json
+                chunk = accumulator.feed(event)
+                if chunk is not None:
+                    yield chunk
 
             # Get final message for token counts
-            final_message = stream.get_final_message()
-
-            # Build final tool calls
-            final_tool_calls = None
-            if tool_call_accumulators:
-                final_tool_calls = []
-                for tool_id, tool_data in tool_call_accumulators.items():
-                    try:
-                        arguments = json.loads(tool_data["input_json"]) if tool_data["input_json"] else {}
-                    except json.JSONDecodeError:
-                        arguments = {}
-                    final_tool_calls.append(
-                        ToolCall(
-                            id=tool_id,
-                            name=tool_data["name"],
-                            arguments=arguments,
-                        )
+            yield accumulator.final_chunk(stream.get_final_message(), schema, tools)
+
+    async def _acall_stream(
+        self,
+        kwargs: Dict[str, Any],
+        schema: Optional[Type[BaseModel]],
+        tools: Optional[List[ToolDefinition]],
+        client: AsyncAnthropic,
+    ) -> AsyncGenerator[ProviderStreamChunk, None]:
+        """Async stream, yielding chunks as they arrive."""
+        async with client.messages.stream(**kwargs) as stream:
+            accumulator = _StreamAccumulator(structured=bool(schema and not tools))
+            async for event in stream:
+                chunk = accumulator.feed(event)
+                if chunk is not None:
+                    yield chunk
+
+            yield accumulator.final_chunk(await stream.get_final_message(), schema, tools)
+
+
+class _StreamAccumulator:
+    """Turns Messages stream events into ProviderStreamChunks (sync and async).
+
+    With structured=True (schema via a forced tool, no caller tools) the
+    tool's input JSON is streamed as content, so the structured response
+    arrives incrementally like the other providers' JSON mode.
+    """
+
+    def __init__(self, structured: bool = False):
+        self.structured = structured
+        self.tool_call_accumulators: Dict[str, Dict[str, Any]] = {}  # id -> {name, input_parts}
+        self.block_tool_ids: Dict[int, str] = {}  # content block index -> tool id
+
+    def feed(self, event: Any) -> Optional[ProviderStreamChunk]:
+        # Handle different event types
+        if event.type == "content_block_start":
+            if hasattr(event, "content_block"):
+                block = event.content_block
+                if block.type == "tool_use":
+                    self.tool_call_accumulators[block.id] = {
+                        "name": block.name,
+                        "input_parts": []
+                    }
+                    self.block_tool_ids[event.index] = block.id
+
+        elif event.type == "content_block_delta":
+            if hasattr(event, "delta"):
+                delta = event.delta
+                if delta.type == "text_delta":
+                    return ProviderStreamChunk(content=delta.text)
+                elif delta.type == "input_json_delta":
+                    # Accumulate tool input JSON on the block's own tool call
+                    tool_id = self.block_tool_ids.get(event.index)
+                    if tool_id is not None:
+                        self.tool_call_accumulators[tool_id]["input_parts"].append(delta.partial_json)
+                        if self.structured and delta.partial_json:
+                            return ProviderStreamChunk(content=delta.partial_json)
+        return None
+
+    def final_chunk(
+        self,
+        final_message: Any,
+        schema: Optional[Type[BaseModel]],
+        tools: Optional[List[ToolDefinition]],
+    ) -> ProviderStreamChunk:
+        # Build final tool calls
+        final_tool_calls = None
+        if self.tool_call_accumulators:
+            final_tool_calls = []
+            for tool_id, tool_data in self.tool_call_accumulators.items():
+                input_json = "".join(tool_data["input_parts"])
+                try:
+                    arguments = json.loads(input_json) if input_json else {}
+                except json.JSONDecodeError:
+                    arguments = {}
+                final_tool_calls.append(
+                    ToolCall(
+                        id=tool_id,
+                        name=tool_data["name"],
+                        arguments=arguments,
                     )
+                )
 
-            # For structured output via tools, the content is the JSON
-            if schema and not tools and final_tool_calls:
-                accumulated_content = json.dumps(final_tool_calls[0].arguments)
-
-            # Yield final chunk with metadata
-            yield ProviderStreamChunk(
-                content="",
-                is_final=True,
-                tool_calls=final_tool_calls,
-                input_tokens=final_message.usage.input_tokens,
-                output_tokens=final_message.usage.output_tokens,
-            )
+        # For structured output via tools, the content is the JSON; streamed
+        # already when the accumulator was built for structured output
+        content = ""
+        if schema and not tools and final_tool_calls and not self.structured:
+            content = json.dumps(final_tool_calls[0].arguments)
+
+        # Final chunk with metadata
+        return ProviderStreamChunk(
+            content=content,
+            is_final=True,
+            tool_calls=final_tool_calls,
+            output_tokens=final_message.usage.output_tokens,
+            **_usage_tokens(final_message.usage),
+        )
+
+
+def _content_chars(content: Any) -> int:
+    if isinstance(content, str):
+        return len(content)
+    return sum(len(block.get("text", "")) for block in content if isinstance(block, dict))
+
+
+def _with_cache_control(content: Any) -> List[Dict[str, Any]]:
+    """Content blocks with a cache breakpoint on the last block."""
+    if isinstance(content, str):
+        return [{"type": "text", "text": content, "cache_control": _EPHEMERAL}]
+    blocks = [dict(block) for block in content]
+    if blocks:
+        blocks[-1]["cache_control"] = _EPHEMERAL
+    return blocks
+
+
+def _usage_tokens(usage: Any) -> Dict[str, int]:
+    """Token counts from Anthropic usage; input_tokens includes cached prompt tokens.
+
+    Anthropic reports cache reads and writes separately from input_tokens,
+    so they are added back to keep input_tokens the full prompt size as for
+    the other providers.
+    """
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return {
+        "input_tokens": usage.input_tokens + cache_read + cache_write,
+        "cache_read_tokens": cache_read,
+        "cache_write_tokens": cache_write,
+    }
 
 
 def main():
@@ -1,8 +1,9 @@
 """Abstract base class for LLM providers."""
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any, Dict, Generator, List, Optional, Type, Union
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Type, Union
 
 from pydantic import BaseModel
 
@@ -33,6 +34,8 @@ class ProviderResponse:
     parsed: Optional[Any] = None
     tool_calls: Optional[List[ToolCall]] = None
     raw_response: Optional[Any] = None
+    cache_read_tokens: int = 0      # Part of input_tokens served from the provider's prompt cache
+    cache_write_tokens: int = 0     # Part of input_tokens written to the provider's prompt cache
 
 
 @dataclass
@@ -43,6 +46,8 @@ class ProviderStreamChunk:
     tool_calls: Optional[List[ToolCall]] = None   # Tool calls (usually in final chunk)
     input_tokens: Optional[int] = None            # Only populated in final chunk
     output_tokens: Optional[int] = None           # Only populated in final chunk
+    cache_read_tokens: Optional[int] = None       # Only populated in final chunk
+    cache_write_tokens: Optional[int] = None      # Only populated in final chunk
 
 
 class BaseProvider(ABC):
@@ -65,6 +70,7 @@ class BaseProvider(ABC):
         tool_choice: Union[str, Dict[str, Any]] = "auto",
         stream: bool = False,
         api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
     ) -> Union[ProviderResponse, Generator[ProviderStreamChunk, None, None]]:
         """Unified call method with optional structured output, tools, and streaming.
 
@@ -78,8 +84,78 @@ class BaseProvider(ABC):
             tools: Optional list of ToolDefinition objects for tool calling
             tool_choice: Tool selection mode ("auto", "required", "none", or specific tool)
             stream: If True, return a generator yielding ProviderStreamChunk
+            api_key: Optional API key overriding the provider's default
+            timeout: Optional request timeout in seconds
 
         Returns:
             ProviderResponse for non-streaming, or Generator[ProviderStreamChunk] for streaming
         """
         pass
+
+    async def acall(
+        self,
+        model_id: str,
+        messages: List[Dict[str, str]],
+        system: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 8192,
+        schema: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[ToolDefinition]] = None,
+        tool_choice: Union[str, Dict[str, Any]] = "auto",
+        stream: bool = False,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Union[ProviderResponse, AsyncGenerator[ProviderStreamChunk, None]]:
+        """Async counterpart of call() with the same arguments and return types.
+
+        Providers with a native async SDK override this. The default runs the
+        blocking call() in a worker thread so every provider supports acall.
+        """
+        kwargs = dict(
+            model_id=model_id, messages=messages, system=system,
+            temperature=temperature, max_tokens=max_tokens, schema=schema,
+            tools=tools, tool_choice=tool_choice, stream=stream,
+            api_key=api_key, timeout=timeout,
+        )
+        if not stream:
+            return await asyncio.to_thread(self.call, **kwargs)
+        return _iterate_in_thread(self.call(**kwargs))
+
+    def batch_request(
+        self,
+        custom_id: str,
+        model_id: str,
+        messages: List[Dict[str, str]],
+        system: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 8192,
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> Dict[str, Any]:
+        """One request in this provider's batch-job input format.
+
+        Providers with an asynchronous batch API override this and
+        parse_batch_result(). Tools are not supported in batch jobs.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch jobs")
+
+    def parse_batch_result(
+        self,
+        line: Dict[str, Any],
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> ProviderResponse:
+        """ProviderResponse for one line of this provider's batch-job output.
+
+        Raises:
+            RuntimeError: If the provider reports that the request failed
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch jobs")
+
+
+async def _iterate_in_thread(iterator) -> AsyncGenerator[Any, None]:
+    """Drive a blocking iterator from a worker thread, one item at a time."""
+    sentinel = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, sentinel)
+        if item is sentinel:
+            return
+        yield item
@@ -1,11 +1,12 @@
 """Google Gemini API provider implementation using google.genai SDK."""
 
 import os
-from typing import Any, Dict, Generator, List, Optional, Type, Union
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Tuple, Type, Union
 
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
+from ..client_pool import async_pool_name, get_pooled_client, http_limits
 from .base import BaseProvider, ProviderResponse, ProviderStreamChunk, ToolDefinition
 from ..result import ToolCall
 
@@ -102,6 +103,7 @@ class GoogleProvider(BaseProvider):
         schema: Optional[Type[BaseModel]] = None,
         tools: Optional[List[Any]] = None,
         tool_config: Optional[Any] = None,
+        timeout: Optional[float] = None,
     ) -> Any:
         """Build unified GenerateContentConfig."""
         config_kwargs = {
@@ -109,6 +111,10 @@ class GoogleProvider(BaseProvider):
             "max_output_tokens": max_tokens,
         }
 
+        if timeout is not None:
+            # google.genai expresses request timeouts in milliseconds
+            config_kwargs["http_options"] = types.HttpOptions(timeout=max(1, int(timeout * 1000)))
+
         if system:
             config_kwargs["system_instruction"] = system
 
@@ -177,11 +183,64 @@ class GoogleProvider(BaseProvider):
         )
 
     def _get_client(self, api_key: Optional[str] = None):
-        """Get client - use override api_key if provided, otherwise default."""
+        """Get client - pooled per override api_key if provided, otherwise default."""
         if api_key:
-            return genai.Client(api_key=api_key)
+            return get_pooled_client(
+                "google", api_key,
+                lambda: genai.Client(
+                    api_key=api_key,
+                    http_options=types.HttpOptions(client_args={"limits": http_limits()}),
+                ),
+            )
         return self.client
 
+    def _get_async_client(self, api_key: Optional[str] = None):
+        """Get the async (client.aio) surface of a pooled client for this event loop."""
+        if not GENAI_AVAILABLE:
+            raise ImportError(
+                "google-genai package not installed. "
+                "Install with: pip install google-genai"
+            )
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY environment variable not set")
+        # The aio client opens its own loop-bound connections
+        client = get_pooled_client(
+            async_pool_name("google"), api_key,
+            lambda: genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(async_client_args={"limits": http_limits()}),
+            ),
+        )
+        return client.aio
+
+    def _prepare(
+        self,
+        messages: List[Dict[str, str]],
+        system: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        schema: Optional[Type[BaseModel]],
+        tools: Optional[List[ToolDefinition]],
+        tool_choice: Union[str, Dict[str, Any]],
+        timeout: Optional[float],
+    ) -> Tuple[List[Any], Any]:
+        """Convert inputs and build the GenerateContentConfig."""
+        contents = self._convert_messages(messages)
+        gemini_tools = self._convert_tools(tools) if tools else None
+        tool_config = self._convert_tool_choice(tool_choice) if tools else None
+
+        config = self._build_config(
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            schema=schema,
+            tools=gemini_tools,
+            tool_config=tool_config,
+            timeout=timeout,
+        )
+        return contents, config
+
     def call(
         self,
         model_id: str,
@@ -194,23 +253,12 @@ class GoogleProvider(BaseProvider):
         tool_choice: Union[str, Dict[str, Any]] = "auto",
         stream: bool = False,
         api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
     ) -> Union[ProviderResponse, Generator[ProviderStreamChunk, None, None]]:
         """Unified call method with optional structured output, tools, and streaming."""
         client = self._get_client(api_key)
-
-        # Convert inputs
-        contents = self._convert_messages(messages)
-        gemini_tools = self._convert_tools(tools) if tools else None
-        tool_config = self._convert_tool_choice(tool_choice) if tools else None
-
-        # Build config
-        config = self._build_config(
-            system=system,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            schema=schema,
-            tools=gemini_tools,
-            tool_config=tool_config,
+        contents, config = self._prepare(
+            messages, system, temperature, max_tokens, schema, tools, tool_choice, timeout
         )
 
         if stream:
@@ -225,6 +273,37 @@ class GoogleProvider(BaseProvider):
 
         return self._extract_response(response, schema)
 
+    async def acall(
+        self,
+        model_id: str,
+        messages: List[Dict[str, str]],
+        system: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 8192,
+        schema: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[ToolDefinition]] = None,
+        tool_choice: Union[str, Dict[str, Any]] = "auto",
+        stream: bool = False,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Union[ProviderResponse, AsyncGenerator[ProviderStreamChunk, None]]:
+        """Native async call using google-genai's client.aio."""
+        aio = self._get_async_client(api_key)
+        contents, config = self._prepare(
+            messages, system, temperature, max_tokens, schema, tools, tool_choice, timeout
+        )
+
+        if stream:
+            return self._acall_stream(model_id, contents, config, aio)
+
+        response = await aio.models.generate_content(
+            model=model_id,
+            contents=contents,
+            config=config,
+        )
+
+        return self._extract_response(response, schema)
+
     def _call_stream(
         self,
         model_id: str,
@@ -241,48 +320,80 @@ class GoogleProvider(BaseProvider):
             config=config,
         )
 
-        accumulated_content = ""
-        final_tool_calls = []
-        final_input_tokens = 0
-        final_output_tokens = 0
-        last_chunk = None
-
+        accumulator = _StreamAccumulator()
         for chunk in response_stream:
-            last_chunk = chunk
-
-            # Extract text from chunk
-            if hasattr(chunk, 'text') and chunk.text:
-                accumulated_content += chunk.text
-                yield ProviderStreamChunk(content=chunk.text)
-
-            # Check for function calls in chunk
-            if hasattr(chunk, 'candidates') and chunk.candidates:
-                for candidate in chunk.candidates:
-                    if hasattr(candidate, 'content') and candidate.content:
-                        for part in candidate.content.parts:
-                            if hasattr(part, 'function_call') and part.function_call:
-                                fc = part.function_call
-                                args = dict(fc.args) if fc.args else {}
-                                final_tool_calls.append(
-                                    ToolCall(
-                                        id=f"call_{fc.name}",
-                                        name=fc.name,
-                                        arguments=args,
-                                    )
+            delta_chunk = accumulator.feed(chunk)
+            if delta_chunk is not None:
+                yield delta_chunk
+
+        # Yield final chunk with metadata
+        yield accumulator.final_chunk()
+
+    async def _acall_stream(
+        self,
+        model_id: str,
+        contents: List[Any],
+        config: Any,
+        aio,
+    ) -> AsyncGenerator[ProviderStreamChunk, None]:
+        """Async stream, yielding chunks as they arrive."""
+        response_stream = await aio.models.generate_content_stream(
+            model=model_id,
+            contents=contents,
+            config=config,
+        )
+
+        accumulator = _StreamAccumulator()
+        async for chunk in response_stream:
+            delta_chunk = accumulator.feed(chunk)
+            if delta_chunk is not None:
+                yield delta_chunk
+
+        yield accumulator.final_chunk()
+
+
+class _StreamAccumulator:
+    """Turns generate_content_stream chunks into ProviderStreamChunks (sync and async)."""
+
+    def __init__(self):
+        self.final_tool_calls: List[ToolCall] = []
+        self.final_input_tokens = 0
+        self.final_output_tokens = 0
+
+    def feed(self, chunk: Any) -> Optional[ProviderStreamChunk]:
+        # Check for function calls in chunk
+        if hasattr(chunk, 'candidates') and chunk.candidates:
+            for candidate in chunk.candidates:
+                if hasattr(candidate, 'content') and candidate.content:
+                    for part in candidate.content.parts:
+                        if hasattr(part, 'function_call') and part.function_call:
+                            fc = part.function_call
+                            args = dict(fc.args) if fc.args else {}
+                            self.final_tool_calls.append(
+                                ToolCall(
+                                    id=f"call_{fc.name}",
+                                    name=fc.name,
+                                    arguments=args,
                                 )
+                            )
 
-            # Check for usage metadata
-            if hasattr(chunk, 'usage_metadata') and chunk.usage_metadata:
-                final_input_tokens = chunk.usage_metadata.prompt_token_count or 0
-                final_output_tokens = chunk.usage_metadata.candidates_token_count or 0
+        # Check for usage metadata
+        if hasattr(chunk, 'usage_metadata') and chunk.usage_metadata:
+            self.final_input_tokens = chunk.usage_metadata.prompt_token_count or 0
+            self.final_output_tokens = chunk.usage_metadata.candidates_token_count or 0
 
-        # Yield final chunk with metadata
-        yield ProviderStreamChunk(
+        # Extract text from chunk
+        if hasattr(chunk, 'text') and chunk.text:
+            return ProviderStreamChunk(content=chunk.text)
+        return None
+
+    def final_chunk(self) -> ProviderStreamChunk:
+        return ProviderStreamChunk(
             content="",
             is_final=True,
-            tool_calls=final_tool_calls if final_tool_calls else None,
-            input_tokens=final_input_tokens,
-            output_tokens=final_output_tokens,
+            tool_calls=self.final_tool_calls if self.final_tool_calls else None,
+            input_tokens=self.final_input_tokens,
+            output_tokens=self.final_output_tokens,
         )
 
 
@@ -0,0 +1,434 @@
+"""Offline mock provider for load and regression testing.
+
+Selected through a managed key whose model is "mock". Nothing leaves the
+process: responses are generated locally and priced at zero, while token
+counting, rate limiting, retries and hedging all behave as with a real
+provider.
+
+- Structured output: a value generated from the Pydantic schema (enums,
+  Literals, nested models, lists, Optional fields), or a scripted fixture.
+- Tools: the first turn calls the requested (or first) tool with generated
+  arguments; once tool results are in the conversation it answers in text.
+- Tokens: prompt and completion are counted with the local tokenizer.
+- Latency: log-normal around a median, capped by the call timeout.
+- Errors: a share of calls fail with 429 (with Retry-After) or 503.
+
+Settings come from the key's api_key value, e.g.
+"mock:latency_ms=200,sigma=0.3,error_rate=0.01,rate_limit_rate=0.05,seed=7",
+falling back to the LLM_MOCK_* environment variables. `fixtures` points at
+a JSON file mapping a schema name (or "text") to a list of responses.
+
+Responses are deterministic: each request is seeded from the seed, the
+request content and how many times the same request was sent before, so a
+rerun of the same workload produces the same outputs, latencies and errors.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from threading import Lock
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+from ..deadline import CallCancelled, current_token
+from ..result import ToolCall
+from ..tokens import count_request_tokens, count_tokens
+from .base import BaseProvider, ProviderResponse, ProviderStreamChunk, ToolDefinition
+
+LLM_MOCK_LATENCY_MS = float(os.getenv("LLM_MOCK_LATENCY_MS", "800"))
+LLM_MOCK_LATENCY_SIGMA = float(os.getenv("LLM_MOCK_LATENCY_SIGMA", "0.4"))
+LLM_MOCK_ERROR_RATE = float(os.getenv("LLM_MOCK_ERROR_RATE", "0"))
+LLM_MOCK_RATE_LIMIT_RATE = float(os.getenv("LLM_MOCK_RATE_LIMIT_RATE", "0"))
+LLM_MOCK_SEED = os.getenv("LLM_MOCK_SEED", "0")
+LLM_MOCK_FIXTURES = os.getenv("LLM_MOCK_FIXTURES", "")
+
+_WORDS = (
+    "patient reports stable mood no acute distress noted follow up with primary care "
+    "housing food transport support family lives alone denies concerns plan discussed"
+).split()
+# Characters per streamed chunk
+_STREAM_CHUNK_CHARS = 16
+# Distinct requests whose repeat count is remembered (for deterministic retries)
+_MAX_TRACKED_REQUESTS = 100_000
+
+
+class MockAPIError(Exception):
+    """Simulated provider error; status_code and headers mirror the real SDKs."""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        headers = {"retry-after": f"{retry_after:g}"} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+class APITimeoutError(TimeoutError):
+    """Simulated request timeout (same class name as the OpenAI/Anthropic SDK error)."""
+
+
+@dataclass(frozen=True)
+class MockSettings:
+    latency_ms: float = LLM_MOCK_LATENCY_MS
+    sigma: float = LLM_MOCK_LATENCY_SIGMA
+    error_rate: float = LLM_MOCK_ERROR_RATE
+    rate_limit_rate: float = LLM_MOCK_RATE_LIMIT_RATE
+    seed: str = LLM_MOCK_SEED
+    fixtures: str = LLM_MOCK_FIXTURES
+
+
+@lru_cache(maxsize=64)
+def parse_settings(api_key: Optional[str]) -> MockSettings:
+    """MockSettings from a "mock:name=value,..." key, defaults for anything unset."""
+    values: Dict[str, Any] = {}
+    spec = (api_key or "").split(":", 1)[1] if ":" in (api_key or "") else ""
+    for item in spec.replace(";", ",").split(","):
+        if "=" not in item:
+            continue
+        name, value = (part.strip() for part in item.split("=", 1))
+        if name in ("latency_ms", "sigma", "error_rate", "rate_limit_rate"):
+            values[name] = float(value)
+        elif name in ("seed", "fixtures"):
+            values[name] = value
+    return MockSettings(**values)
+
+
+@lru_cache(maxsize=8)
+def _load_fixtures(path: str) -> Dict[str, List[Any]]:
+    if not path:
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class _Generator:
+    """Builds JSON values that satisfy a JSON schema, using a seeded RNG."""
+
+    def __init__(self, rng: random.Random, root: Dict[str, Any]):
+        self.rng = rng
+        self.defs = root.get("$defs", {})
+
+    def text(self, min_words: int = 3, max_words: int = 12) -> str:
+        count = self.rng.randint(min_words, max_words)
+        return " ".join(self.rng.choice(_WORDS) for _ in range(count)).capitalize() + "."
+
+    @staticmethod
+    def _bounds(schema: Dict[str, Any]) -> Tuple[Optional[float], bool, Optional[float], bool]:
+        """(low, low exclusive, high, high exclusive): the tighter of each inclusive/exclusive pair."""
+        low, low_exclusive = schema.get("minimum"), False
+        if schema.get("exclusiveMinimum") is not None and (low is None or schema["exclusiveMinimum"] >= low):
+            low, low_exclusive = schema["exclusiveMinimum"], True
+        high, high_exclusive = schema.get("maximum"), False
+        if schema.get("exclusiveMaximum") is not None and (high is None or schema["exclusiveMaximum"] <= high):
+            high, high_exclusive = schema["exclusiveMaximum"], True
+        return low, low_exclusive, high, high_exclusive
+
+    def integer(self, schema: Dict[str, Any]) -> int:
+        """An integer in the schema's range; a missing bound is taken 10 from the other."""
+        low, low_exclusive, high, high_exclusive = self._bounds(schema)
+        if low is not None:
+            low = math.floor(low) + 1 if low_exclusive else math.ceil(low)
+        if high is not None:
+            high = math.ceil(high) - 1 if high_exclusive else math.floor(high)
+        if low is None:
+            low = 0 if high is None or high >= 10 else high - 10
+        if high is None:
+            high = max(low, 0) + 10
+        return self.rng.randint(low, max(low, high))
+
+    def number(self, schema: Dict[str, Any]) -> float:
+        """A number in the schema's range, to 3 decimals where that stays in range; a missing bound is taken 1 from the other."""
+        low, low_exclusive, high, high_exclusive = self._bounds(schema)
+        if low is None:
+            low = 0.0 if high is None or high >= 1.0 else high - 1.0
+        if high is None:
+            high = max(low, 0.0) + 1.0
+
+        def inside(x: float) -> bool:
+            return (x > low if low_exclusive else x >= low) and (x < high if high_exclusive else x <= high)
+
+        value = self.rng.uniform(low, high)
+        if not inside(value):
+            value = (low + high) / 2  # uniform() may return an excluded endpoint
+        rounded = round(value, 3)
+        return rounded if inside(rounded) else value
+
+    def value(self, schema: Dict[str, Any], depth: int = 0) -> Any:
+        if "$ref" in schema:
+            return self.value(self.defs[schema["$ref"].split("/")[-1]], depth)
+        if "const" in schema:
+            return schema["const"]
+        if "enum" in schema:
+            return self.rng.choice(schema["enum"])
+        for combinator in ("anyOf", "oneOf"):
+            if combinator in schema:
+                options = [s for s in schema[combinator] if s.get("type") != "null"] or schema[combinator]
+                return self.value(self.rng.choice(options), depth)
+        if "allOf" in schema:
+            return self.value(schema["allOf"][0], depth)
+
+        kind = schema.get("type", "object" if "properties" in schema else "string")
+        if isinstance(kind, list):
+            kind = next((k for k in kind if k != "null"), "null")
+        if kind == "object":
+            properties = schema.get("properties", {})
+            required = set(schema.get("required", properties))
+            return {
+                name: self.value(prop, depth + 1)
+                for name, prop in properties.items()
+                if name in required or self.rng.random() < 0.5
+            }
+        if kind == "array":
+            low = schema.get("minItems", 1 if depth < 3 else 0)
+            high = max(low, schema.get("maxItems", low + 2))
+            return [self.value(schema.get("items", {}), depth + 1) for _ in range(self.rng.randint(low, high))]
+        if kind == "integer":
+            return self.integer(schema)
+        if kind == "number":
+            return self.number(schema)
+        if kind == "boolean":
+            return self.rng.random() < 0.5
+        if kind == "null":
+            return None
+        if schema.get("format") == "date-time":
+            return f"2024-{self.rng.randint(1, 12):02d}-{self.rng.randint(1, 28):02d}T{self.rng.randint(0, 23):02d}:00:00"
+        if schema.get("format") == "date":
+            return f"2024-{self.rng.randint(1, 12):02d}-{self.rng.randint(1, 28):02d}"
+        text = self.text()
+        if "maxLength" in schema:
+            text = text[:schema["maxLength"]]
+        return text.ljust(schema.get("minLength", 0), ".")
+
+
+class MockProvider(BaseProvider):
+    """Local provider that simulates latency, throttling and errors."""
+
+    def __init__(self):
+        self._seen: Dict[str, int] = {}
+        self._seen_lock = Lock()
+
+    # ── Request planning ──
+
+    def _rng(self, settings: MockSettings, model_id: str, messages: List[Dict[str, Any]],
+             system: Optional[str], schema_name: Optional[str]) -> random.Random:
+        digest = hashlib.sha256(
+            json.dumps([model_id, messages, system, schema_name], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        with self._seen_lock:
+            if len(self._seen) >= _MAX_TRACKED_REQUESTS:
+                self._seen.clear()
+            attempt = self._seen.get(digest, 0)
+            self._seen[digest] = attempt + 1
+        return random.Random(f"{settings.seed}:{digest}:{attempt}")
+
+    def _latency(self, rng: random.Random, settings: MockSettings) -> float:
+        median = settings.latency_ms / 1000.0
+        return median * rng.lognormvariate(0.0, settings.sigma) if settings.sigma > 0 else median
+
+    def _maybe_fail(self, rng: random.Random, settings: MockSettings) -> None:
+        roll = rng.random()
+        if roll < settings.rate_limit_rate:
+            raise MockAPIError(429, "Mock rate limit exceeded", retry_after=round(rng.uniform(0.5, 2.0), 1))
+        if roll < settings.rate_limit_rate + settings.error_rate:
+            raise MockAPIError(503, "Mock service unavailable")
+
+    def _sleep(self, seconds: float, timeout: Optional[float]) -> None:
+        """Wait for simulated latency; time out like an SDK would, stop when cancelled."""
+        wait = seconds if timeout is None else min(seconds, timeout)
+        token = current_token()
+        if token is not None:
+            if token.wait(wait):
+                raise CallCancelled(token.reason or "Cancelled")
+        elif wait > 0:
+            time.sleep(wait)
+        if timeout is not None and seconds > timeout:
+            raise APITimeoutError("Mock request timed out")
+
+    def _respond(
+        self,
+        rng: random.Random,
+        settings: MockSettings,
+        messages: List[Dict[str, Any]],
+        system: Optional[str],
+        schema: Optional[Type[BaseModel]],
+        json_schema: Optional[Dict[str, Any]],
+        tools: Optional[List[ToolDefinition]],
+        tool_choice: Union[str, Dict[str, Any]],
+    ) -> ProviderResponse:
+        content, parsed, tool_calls = "", None, None
+        fixtures = _load_fixtures(settings.fixtures)
+
+        answered_tools = any(m.get("role") == "tool" for m in messages)
+        if tools and tool_choice != "none" and not answered_tools:
+            name = tool_choice if isinstance(tool_choice, str) and tool_choice not in ("auto", "required") else tools[0].name
+            tool = next((t for t in tools if t.name == name), tools[0])
+            arguments = _Generator(rng, tool.parameters).value(tool.parameters)
+            tool_calls = [ToolCall(id=f"call_mock_{rng.getrandbits(48):012x}", name=tool.name, arguments=arguments)]
+        elif json_schema is not None:
+            name = json_schema.get("title", "")
+            value = rng.choice(fixtures[name]) if fixtures.get(name) else _Generator(rng, json_schema).value(json_schema)
+            if schema is not None:
+                try:
+                    parsed = schema.model_validate(value)
+                    value = parsed.model_dump(mode="json", by_alias=True)
+                except ValueError:
+                    parsed = None  # Constraints the generator cannot meet; like a bad model output
+            content = json.dumps(value)
+        else:
+            content = rng.choice(fixtures["text"]) if fixtures.get("text") else _Generator(rng, {}).text(12, 60)
+
+        output_tokens = count_tokens(content) if content else count_tokens(json.dumps([tc.arguments for tc in tool_calls or []]))
+        return ProviderResponse(
+            content=content,
+            input_tokens=count_request_tokens(messages, system, schema),
+            output_tokens=max(1, output_tokens),
+            parsed=parsed,
+            tool_calls=tool_calls,
+        )
+
+    def _plan(self, model_id, messages, system, schema, api_key):
+        settings = parse_settings(api_key)
+        rng = self._rng(settings, model_id, messages, system, schema.__name__ if schema else None)
+        return settings, rng, self._latency(rng, settings)
+
+    # ── BaseProvider ──
+
+    def call(
+        self,
+        model_id: str,
+        messages: List[Dict[str, str]],
+        system: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 8192,
+        schema: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[ToolDefinition]] = None,
+        tool_choice: Union[str, Dict[str, Any]] = "auto",
+        stream: bool = False,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Union[ProviderResponse, Generator[ProviderStreamChunk, None, None]]:
+        settings, rng, latency = self._plan(model_id, messages, system, schema, api_key)
+        json_schema = schema.model_json_schema() if schema else None
+
+        if stream:
+            return self._call_stream(rng, settings, latency, timeout, messages, system, schema, json_schema, tools, tool_choice)
+
+        self._sleep(latency, timeout)
+        self._maybe_fail(rng, settings)
+        return self._respond(rng, settings, messages, system, schema, json_schema, tools, tool_choice)
+
+    async def acall(
+        self,
+        model_id: str,
+        messages: List[Dict[str, str]],
+        system: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 8192,
+        schema: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[ToolDefinition]] = None,
+        tool_choice: Union[str, Dict[str, Any]] = "auto",
+        stream: bool = False,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Union[ProviderResponse, AsyncGenerator[ProviderStreamChunk, None]]:
+        """Non-streaming calls wait on the event loop, so thousands can be in flight without threads."""
+        if stream:
+            return await super().acall(
+                model_id, messages, system, temperature, max_tokens, schema,
+                tools, tool_choice, stream, api_key, timeout,
+            )
+        settings, rng, latency = self._plan(model_id, messages, system, schema, api_key)
+        await asyncio.sleep(latency if timeout is None else min(latency, timeout))
+        token = current_token()
+        if token is not None:
+            token.raise_if_cancelled()
+        if timeout is not None and latency > timeout:
+            raise APITimeoutError("Mock request timed out")
+        self._maybe_fail(rng, settings)
+        json_schema = schema.model_json_schema() if schema else None
+        return self._respond(rng, settings, messages, system, schema, json_schema, tools, tool_choice)
+
+    def _call_stream(self, rng, settings, latency, timeout, messages, system, schema, json_schema,
+                     tools, tool_choice) -> Generator[ProviderStreamChunk, None, None]:
+        """Time to first chunk is a third of the latency; the rest is spread over the chunks."""
+        started = time.monotonic()
+        self._sleep(latency / 3, timeout)
+        self._maybe_fail(rng, settings)
+        response = self._respond(rng, settings, messages, system, schema, json_schema, tools, tool_choice)
+
+        pieces = [response.content[i:i + _STREAM_CHUNK_CHARS] for i in range(0, len(response.content), _STREAM_CHUNK_CHARS)]
+        gap = (latency * 2 / 3) / max(1, len(pieces))
+        for piece in pieces:
+            remaining = None if timeout is None else timeout - (time.monotonic() - started)
+            self._sleep(gap, remaining)
+            yield ProviderStreamChunk(content=piece)
+
+        yield ProviderStreamChunk(
+            content="",
+            is_final=True,
+            tool_calls=response.tool_calls,
+            input_tokens=response.input_tokens,
+            output_tokens=response.output_tokens,
+        )
+
+    # ── Batch jobs (run through LocalBatchClient) ──
+
+    def batch_request(
+        self,
+        custom_id: str,
+        model_id: str,
+        messages: List[Dict[str, str]],
+        system: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 8192,
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "custom_id": custom_id,
+            "body": {
+                "model": model_id,
+                "messages": messages,
+                "system": system,
+                "schema_name": schema.__name__ if schema else None,
+                "json_schema": schema.model_json_schema() if schema else None,
+            },
+        }
+
+    def respond_batch_line(self, line: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+        """Response body for one batch input line (no latency; the job itself is the wait).
+
+        Raises:
+            MockAPIError: For the simulated share of failed requests
+        """
+        body = line["body"]
+        settings = parse_settings(api_key)
+        rng = self._rng(settings, body["model"], body["messages"], body["system"], body["schema_name"])
+        self._maybe_fail(rng, settings)
+        response = self._respond(rng, settings, body["messages"], body["system"], None, body["json_schema"], None, "auto")
+        return {"content": response.content, "input_tokens": response.input_tokens, "output_tokens": response.output_tokens}
+
+    def parse_batch_result(
+        self,
+        line: Dict[str, Any],
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> ProviderResponse:
+        """ProviderResponse for one LocalBatchClient result line."""
+        result = line.get("result") or {}
+        if result.get("type") != "succeeded":
+            detail = result.get("error") or result.get("type")
+            raise RuntimeError(f"Batch request '{line.get('custom_id')}' failed: {detail}")
+        message = result["message"]
+        content = message.get("content", "")
+        return ProviderResponse(
+            content=content,
+            input_tokens=message.get("input_tokens", 0),
+            output_tokens=message.get("output_tokens", 0),
+            parsed=schema.model_validate_json(content) if schema and content else None,
+        )
@@ -2,12 +2,15 @@
 
 import json
 import os
-from typing import Any, Dict, Generator, List, Optional, Type, Union
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Type, Union
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import NOT_GIVEN, AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from openai.lib._parsing._completions import parse_chat_completion, type_to_response_format_param
+from openai.types.chat import ChatCompletion
 from pydantic import BaseModel
 
+from ..client_pool import async_pool_name, get_pooled_client, http_limits
 from .base import BaseProvider, ProviderResponse, ProviderStreamChunk, ToolDefinition
 from ..result import ToolCall
 
@@ -27,7 +30,7 @@ class OpenAIProvider(BaseProvider):
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OPENAI_API_KEY environment variable not set")
-            self._client = OpenAI(api_key=api_key)
+            self._client = OpenAI(api_key=api_key, max_retries=0)
         return self._client
 
     def _build_messages(
@@ -67,11 +70,32 @@ class OpenAIProvider(BaseProvider):
             return {"type": "function", "function": {"name": tool_choice}}
         return tool_choice
 
-    def _get_client(self, api_key: Optional[str] = None) -> OpenAI:
-        """Get client - use override api_key if provided, otherwise default."""
+    def _get_client(self, api_key: Optional[str] = None, timeout: Optional[float] = None) -> OpenAI:
+        """Get client - pooled per override api_key if provided, otherwise default."""
         if api_key:
-            return OpenAI(api_key=api_key)
-        return self.client
+            client = get_pooled_client(
+                "openai", api_key,
+                lambda: OpenAI(api_key=api_key, max_retries=0, http_client=DefaultHttpxClient(limits=http_limits())),
+            )
+        else:
+            client = self.client
+        if timeout is not None:
+            client = client.with_options(timeout=timeout)
+        return client
+
+    def _get_async_client(self, api_key: Optional[str] = None, timeout: Optional[float] = None) -> AsyncOpenAI:
+        """Get a pooled async client for this event loop (env key if no override)."""
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable not set")
+        # httpx async connections are bound to the loop that opened them
+        client = get_pooled_client(
+            async_pool_name("openai"), api_key,
+            lambda: AsyncOpenAI(api_key=api_key, max_retries=0, http_client=DefaultAsyncHttpxClient(limits=http_limits())),
+        )
+        if timeout is not None:
+            client = client.with_options(timeout=timeout)
+        return client
 
     def call(
         self,
@@ -85,109 +109,104 @@ class OpenAIProvider(BaseProvider):
         tool_choice: Union[str, Dict[str, Any]] = "auto",
         stream: bool = False,
         api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
     ) -> Union[ProviderResponse, Generator[ProviderStreamChunk, None, None]]:
         """Unified call method with optional structured output, tools, and streaming."""
         full_messages = self._build_messages(messages, system)
-        client = self._get_client(api_key)
+        client = self._get_client(api_key, timeout)
+        kwargs = self._build_kwargs(model_id, full_messages, temperature, max_tokens, schema, tools, tool_choice, stream)
 
         if stream:
-            return self._call_stream(
-                model_id, full_messages, temperature, max_tokens, schema, tools, tool_choice, client=client
-            )
+            return self._call_stream(kwargs, client=client)
 
-        # Non-streaming calls
         if schema and not tools:
-            return self._call_structured(model_id, full_messages, schema, temperature, max_tokens, client=client)
-        elif tools:
-            return self._call_with_tools(
-                model_id, full_messages, tools, tool_choice, temperature, max_tokens, client=client
-            )
+            # Structured output using OpenAI's native parsing
+            response = client.beta.chat.completions.parse(**kwargs)
         else:
-            return self._call_basic(model_id, full_messages, temperature, max_tokens, client=client)
+            response = client.chat.completions.create(**kwargs)
+        return self._extract_response(response, schema, tools)
 
-    def _call_basic(
+    async def acall(
         self,
         model_id: str,
         messages: List[Dict[str, str]],
-        temperature: float,
-        max_tokens: int,
-        client: Optional[OpenAI] = None,
-    ) -> ProviderResponse:
-        """Make a basic completion call."""
-        client = client or self.client
-        response = client.chat.completions.create(
-            model=model_id,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
+        system: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 8192,
+        schema: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[ToolDefinition]] = None,
+        tool_choice: Union[str, Dict[str, Any]] = "auto",
+        stream: bool = False,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Union[ProviderResponse, AsyncGenerator[ProviderStreamChunk, None]]:
+        """Native async call using AsyncOpenAI."""
+        full_messages = self._build_messages(messages, system)
+        client = self._get_async_client(api_key, timeout)
+        kwargs = self._build_kwargs(model_id, full_messages, temperature, max_tokens, schema, tools, tool_choice, stream)
 
-        return ProviderResponse(
-            content=response.choices[0].message.content or "",
-            input_tokens=response.usage.prompt_tokens,
-            output_tokens=response.usage.completion_tokens,
-            raw_response=response,
-        )
+        if stream:
+            return self._acall_stream(kwargs, client)
+
+        if schema and not tools:
+            response = await client.beta.chat.completions.parse(**kwargs)
+        else:
+            response = await client.chat.completions.create(**kwargs)
+        return self._extract_response(response, schema, tools)
 
-    def _call_structured(
+    def _build_kwargs(
         self,
         model_id: str,
         messages: List[Dict[str, str]],
-        schema: Type[BaseModel],
         temperature: float,
         max_tokens: int,
-        client: Optional[OpenAI] = None,
-    ) -> ProviderResponse:
-        """Make a structured output call using OpenAI's native parsing."""
-        client = client or self.client
-        response = client.beta.chat.completions.parse(
-            model=model_id,
-            messages=messages,
-            response_format=schema,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
+        schema: Optional[Type[BaseModel]],
+        tools: Optional[List[ToolDefinition]],
+        tool_choice: Union[str, Dict[str, Any]],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        """Build chat.completions kwargs for basic, structured, tool, or streaming calls."""
+        kwargs: Dict[str, Any] = {
+            "model": model_id,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
 
-        message = response.choices[0].message
+        # Add tools if provided
+        if tools:
+            kwargs["tools"] = self._convert_tools(tools)
+            kwargs["tool_choice"] = self._convert_tool_choice(tool_choice)
 
-        return ProviderResponse(
-            content=message.content or "",
-            parsed=message.parsed,
-            input_tokens=response.usage.prompt_tokens,
-            output_tokens=response.usage.completion_tokens,
-            raw_response=response,
-        )
+        if not stream:
+            if schema and not tools:
+                kwargs["response_format"] = schema
+            return kwargs
 
-    def _call_with_tools(
+        kwargs["stream"] = True
+        kwargs["stream_options"] = {"include_usage": True}
+
+        # Structured output streams with the same strict JSON schema parse() sends
+        if schema and not tools:
+            kwargs["response_format"] = type_to_response_format_param(schema)
+
+        return kwargs
+
+    def _extract_response(
         self,
-        model_id: str,
-        messages: List[Dict[str, str]],
-        tools: List[ToolDefinition],
-        tool_choice: Union[str, Dict[str, Any]],
-        temperature: float,
-        max_tokens: int,
-        client: Optional[OpenAI] = None,
+        response: Any,
+        schema: Optional[Type[BaseModel]],
+        tools: Optional[List[ToolDefinition]],
     ) -> ProviderResponse:
-        """Make a call with tool/function calling support."""
-        client = client or self.client
-        openai_tools = self._convert_tools(tools)
-        openai_tool_choice = self._convert_tool_choice(tool_choice)
-
-        response = client.chat.completions.create(
-            model=model_id,
-            messages=messages,
-            tools=openai_tools,
-            tool_choice=openai_tool_choice,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
-
+        """Extract content, parsed output and tool calls from a completion."""
         message = response.choices[0].message
         content = message.content or ""
 
+        parsed = message.parsed if (schema and not tools) else None
+
         # Extract tool calls if present
         tool_calls = None
-        if message.tool_calls:
+        if tools and message.tool_calls:
             tool_calls = [
                 ToolCall(
                     id=tc.id,
@@ -199,116 +218,160 @@ class OpenAIProvider(BaseProvider):
 
         return ProviderResponse(
             content=content,
+            parsed=parsed,
             input_tokens=response.usage.prompt_tokens,
             output_tokens=response.usage.completion_tokens,
             tool_calls=tool_calls,
             raw_response=response,
+            cache_read_tokens=_cached_prompt_tokens(response.usage),
         )
 
-    def _call_stream(
+    def batch_request(
         self,
+        custom_id: str,
         model_id: str,
         messages: List[Dict[str, str]],
-        temperature: float,
-        max_tokens: int,
-        schema: Optional[Type[BaseModel]],
-        tools: Optional[List[ToolDefinition]],
-        tool_choice: Union[str, Dict[str, Any]],
+        system: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 8192,
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> Dict[str, Any]:
+        """One line of a Batch API input file (POST /v1/chat/completions)."""
+        full_messages = self._build_messages(messages, system)
+        body = self._build_kwargs(model_id, full_messages, temperature, max_tokens, schema, None, "auto", stream=False)
+        if schema:
+            # The batch file needs the JSON response_format that parse() derives from the class
+            body["response_format"] = type_to_response_format_param(schema)
+        return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def parse_batch_result(
+        self,
+        line: Dict[str, Any],
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> ProviderResponse:
+        """ProviderResponse for one line of a Batch API output or error file."""
+        response = line.get("response") or {}
+        if line.get("error") or response.get("status_code") != 200:
+            detail = line.get("error") or response.get("body")
+            raise RuntimeError(f"Batch request '{line.get('custom_id')}' failed: {detail}")
+
+        completion = ChatCompletion.model_validate(response["body"])
+        if schema:
+            completion = parse_chat_completion(
+                response_format=schema, input_tools=NOT_GIVEN, chat_completion=completion,
+            )
+        return self._extract_response(completion, schema, None)
+
+    def _call_stream(
+        self,
+        kwargs: Dict[str, Any],
         client: Optional[OpenAI] = None,
     ) -> Generator[ProviderStreamChunk, None, None]:
         """Stream a call, yielding chunks as they arrive."""
-        kwargs: Dict[str, Any] = {
-            "model": model_id,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "stream": True,
-            "stream_options": {"include_usage": True},
-        }
+        client = client or self.client
+        response = client.chat.completions.create(**kwargs)
 
-        # Add tools if provided
-        if tools:
-            kwargs["tools"] = self._convert_tools(tools)
-            kwargs["tool_choice"] = self._convert_tool_choice(tool_choice)
+        accumulator = _StreamAccumulator()
+        for chunk in response:
+            delta_chunk = accumulator.feed(chunk)
+            if delta_chunk is not None:
+                yield delta_chunk
 
-        # For structured output with streaming, use JSON mode
-        if schema and not tools:
-            kwargs["response_format"] = {"type": "json_object"}
-            # Add schema hint to help the model
-            schema_json = schema.model_json_schema()
-            schema_hint = f"\n\nYou must respond with valid JSON matching this schema: {json.dumps(schema_json)}"
-            if messages and messages[-1]["role"] == "user":
-                messages = messages.copy()
-                messages[-1] = {
-                    "role": "user",
-                    "content": messages[-1]["content"] + schema_hint
-                }
-                kwargs["messages"] = messages
+        # Yield final chunk with metadata
+        yield accumulator.final_chunk()
 
-        client = client or self.client
-        response = client.chat.completions.create(**kwargs)
+    async def _acall_stream(
+        self,
+        kwargs: Dict[str, Any],
+        client: AsyncOpenAI,
+    ) -> AsyncGenerator[ProviderStreamChunk, None]:
+        """Async stream, yielding chunks as they arrive."""
+        response = await client.chat.completions.create(**kwargs)
 
-        accumulated_content = ""
-        # Track tool calls by index: {index: {"id": str, "name": str, "arguments": str}}
-        tool_call_accumulators: Dict[int, Dict[str, str]] = {}
-        final_input_tokens = 0
-        final_output_tokens = 0
+        accumulator = _StreamAccumulator()
+        async for chunk in response:
+            delta_chunk = accumulator.feed(chunk)
+            if delta_chunk is not None:
+                yield delta_chunk
+
+        yield accumulator.final_chunk()
 
-        for chunk in response:
-            # Handle usage info (comes in final chunk)
-            if chunk.usage:
-                final_input_tokens = chunk.usage.prompt_tokens
-                final_output_tokens = chunk.usage.completion_tokens
-
-            # Handle content delta
-            if chunk.choices:
-                delta = chunk.choices[0].delta
-
-                # Text content
-                if delta and delta.content:
-                    accumulated_content += delta.content
-                    yield ProviderStreamChunk(content=delta.content)
-
-                # Tool calls (streamed incrementally)
-                if delta and delta.tool_calls:
-                    for tc_delta in delta.tool_calls:
-                        idx = tc_delta.index
-                        if idx not in tool_call_accumulators:
-                            tool_call_accumulators[idx] = {
-                                "id": "",
-                                "name": "",
-                                "arguments": ""
-                            }
-                        if tc_delta.id:
-                            tool_call_accumulators[idx]["id"] = tc_delta.id
-                        if tc_delta.function:
-                            if tc_delta.function.name:
-                                tool_call_accumulators[idx]["name"] = tc_delta.function.name
-                            if tc_delta.function.arguments:
-                                tool_call_accumulators[idx]["arguments"] += tc_delta.function.arguments
 
+class _StreamAccumulator:
+    """Turns chat.completions stream chunks into ProviderStreamChunks (sync and async)."""
+
+    def __init__(self):
+        # Track tool calls by index: {index: {"id": str, "name": str, "arguments": [str]}}
+        self.tool_call_accumulators: Dict[int, Dict[str, str]] = {}
+        self.final_input_tokens = 0
+        self.final_output_tokens = 0
+        self.final_cache_read_tokens = 0
+
+    def feed(self, chunk: Any) -> Optional[ProviderStreamChunk]:
+        # Handle usage info (comes in final chunk)
+        if chunk.usage:
+            self.final_input_tokens = chunk.usage.prompt_tokens
+            self.final_output_tokens = chunk.usage.completion_tokens
+            self.final_cache_read_tokens = _cached_prompt_tokens(chunk.usage)
+
+        if not chunk.choices:
+            return None
+
+        # Handle content delta
+        delta = chunk.choices[0].delta
+
+        # Tool calls (streamed incrementally)
+        if delta and delta.tool_calls:
+            for tc_delta in delta.tool_calls:
+                idx = tc_delta.index
+                if idx not in self.tool_call_accumulators:
+                    self.tool_call_accumulators[idx] = {
+                        "id": "",
+                        "name": "",
+                        "arguments": []
+                    }
+                if tc_delta.id:
+                    self.tool_call_accumulators[idx]["id"] = tc_delta.id
+                if tc_delta.function:
+                    if tc_delta.function.name:
+                        self.tool_call_accumulators[idx]["name"] = tc_delta.function.name
+                    if tc_delta.function.arguments:
+                        self.tool_call_accumulators[idx]["arguments"].append(tc_delta.function.arguments)
+
+        # Text content
+        if delta and delta.content:
+            return ProviderStreamChunk(content=delta.content)
+        return None
+
+    def final_chunk(self) -> ProviderStreamChunk:
         # Build final tool calls
         final_tool_calls = None
-        if tool_call_accumulators:
+        if self.tool_call_accumulators:
             final_tool_calls = [
                 ToolCall(
                     id=tc["id"],
                     name=tc["name"],
-                    arguments=json.loads(tc["arguments"]) if tc["arguments"] else {},
+                    arguments=json.loads("".join(tc["arguments"])) if tc["arguments"] else {},
                 )
-                for tc in tool_call_accumulators.values()
+                for tc in self.tool_call_accumulators.values()
             ]
 
-        # Yield final chunk with metadata
-        yield ProviderStreamChunk(
+        return ProviderStreamChunk(
             content="",
             is_final=True,
             tool_calls=final_tool_calls,
-            input_tokens=final_input_tokens,
-            output_tokens=final_output_tokens,
+            input_tokens=self.final_input_tokens,
+            output_tokens=self.final_output_tokens,
+            cache_read_tokens=self.final_cache_read_tokens,
         )
 
 
+def _cached_prompt_tokens(usage: Any) -> int:
+    """Prompt tokens served from OpenAI's automatic prompt cache."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return (getattr(details, "cached_tokens", None) or 0) if details else 0
+
+
 def main():
     """Run OpenAI provider tests."""
     print("=" * 60)
@@ -0,0 +1,386 @@
+"""Per-key, per-model rate limiting with adaptive concurrency.
+
+Every managed key gets one RateLimiter per model. A limiter combines:
+
+- A requests-per-minute token bucket (`rpm_limit` on the key record)
+- A tokens-per-minute token bucket (`tpm_limit` on the key record). The
+  prompt is estimated up front (~4 chars per token) and the bucket is
+  settled with the actual usage once the response arrives, so a large
+  completion puts the key briefly "in debt".
+- An AIMD concurrency controller: the number of in-flight calls starts at
+  `max_concurrency` (or LLM_DEFAULT_MAX_CONCURRENCY), is halved whenever the
+  provider throttles, and grows back by one slot per window of successful
+  calls.
+- A cooldown honoring the provider's Retry-After, shared by every caller
+  of the key, so one 429 pauses the whole key instead of each worker
+  discovering it separately.
+
+All waits respect the active deadline_scope: if the limiter cannot admit a
+call before the deadline, DeadlineExceeded is raised instead of sleeping.
+
+Throttles, admission waits and the concurrency limit are exported as
+Prometheus metrics (metrics.py) as well as in rate_limit_stats().
+
+Set `rpm_limit`, `tpm_limit` or `max_concurrency` to 0 (or leave unset)
+for no static limit.
+
+Limiters live in the process that makes the calls. The API server and each
+experiment worker (worker.py) have their own, and nothing is shared between
+them, so N processes using one key could together send N times its limits.
+Set LLM_RATE_LIMIT_PROCESSES to the number of processes calling the
+providers (the API plus every worker) and each process enforces that share
+of the key's static limits. The provider's throttles and Retry-After still
+reach every process on its own.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from threading import Condition, Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .deadline import DeadlineExceeded, check_deadline, remaining_time
+from .metrics import LimiterMetrics
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for in-flight calls per key/model when the key sets no max_concurrency
+LLM_DEFAULT_MAX_CONCURRENCY = int(os.getenv("LLM_DEFAULT_MAX_CONCURRENCY", "64"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+# Processes (API server + experiment workers) that split each key's static limits
+LLM_RATE_LIMIT_PROCESSES = max(1, int(os.getenv("LLM_RATE_LIMIT_PROCESSES", "1")))
+
+# Longest single sleep while waiting for capacity (re-checks cancellation in between)
+_MAX_POLL_SECONDS = 1.0
+# Poll interval while all concurrency slots are taken (sync waiters are also notified)
+_SLOT_POLL_SECONDS = 0.05
+# Minimum time between two multiplicative decreases of the concurrency limit
+_DECREASE_WINDOW_SECONDS = 2.0
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], system: Optional[str] = None) -> int:
+    """Rough prompt size in tokens (~4 characters per token)."""
+    chars = len(system or "")
+    for message in messages:
+        content = message.get("content", "")
+        chars += len(content) if isinstance(content, str) else len(str(content))
+    return max(1, chars // 4)
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to `per_minute` units."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if available now). Caller holds the lock."""
+        self._refill(now)
+        # Requests larger than the bucket are admitted once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= amount
+
+    def settle(self, amount: float) -> None:
+        """Adjust by actual-minus-estimated usage; may leave the bucket negative."""
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class RateLimiter:
+    """Admission control for one (managed key, model) pair."""
+
+    def __init__(self, key_name: str, model: str, rpm_limit: int = 0,
+                 tpm_limit: int = 0, max_concurrency: int = 0):
+        self.key_name = key_name
+        self.model = model
+        self.rpm_limit = rpm_limit or 0
+        self.tpm_limit = tpm_limit or 0
+        self.max_concurrency = max_concurrency or LLM_DEFAULT_MAX_CONCURRENCY
+
+        self._rpm = TokenBucket(self.rpm_limit) if self.rpm_limit else None
+        self._tpm = TokenBucket(self.tpm_limit) if self.tpm_limit else None
+        self._cond = Condition(Lock())
+        self._limit = float(self.max_concurrency)
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+
+        self._metrics = LimiterMetrics(key_name, model)
+        self._metrics.concurrency_limit.set(int(self._limit))
+
+        self._stats = {
+            "requests": 0,
+            "throttled": 0,
+            "retries": 0,
+            "rate_limited_waits": 0,
+            "wait_seconds": 0.0,
+            "concurrency_decreases": 0,
+        }
+
+    @property
+    def config(self) -> Tuple[int, int, int]:
+        return (self.rpm_limit, self.tpm_limit, self.max_concurrency)
+
+    # ── Admission ──
+
+    def _try_admit(self, tokens: int) -> float:
+        """Admit the call if possible (returns 0), else return seconds to wait.
+
+        Caller holds the lock.
+        """
+        now = time.monotonic()
+        wait = max(0.0, self._blocked_until - now)
+        if self._rpm is not None:
+            wait = max(wait, self._rpm.wait_time(1, now))
+        if self._tpm is not None:
+            wait = max(wait, self._tpm.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+        if self._in_flight >= int(self._limit):
+            return _SLOT_POLL_SECONDS
+
+        if self._rpm is not None:
+            self._rpm.take(1)
+        if self._tpm is not None:
+            self._tpm.take(tokens)
+        self._in_flight += 1
+        self._stats["requests"] += 1
+        return 0.0
+
+    def _bounded_wait(self, wait: float) -> float:
+        """Clamp a wait to the deadline, raising if the deadline is too close."""
+        check_deadline()
+        remaining = remaining_time()
+        if remaining is not None and wait >= remaining:
+            raise DeadlineExceeded(
+                f"Rate limit for key '{self.key_name}' would delay the call past its deadline"
+            )
+        return min(wait, _MAX_POLL_SECONDS)
+
+    def acquire(self, tokens: int) -> None:
+        """Block until the call may start."""
+        waited = 0.0
+        with self._cond:
+            while True:
+                wait = self._try_admit(tokens)
+                if wait == 0:
+                    break
+                wait = self._bounded_wait(wait)
+                start = time.monotonic()
+                self._cond.wait(wait)
+                waited += time.monotonic() - start
+            self._record_wait(waited)
+
+    async def aacquire(self, tokens: int) -> None:
+        """Async acquire: waits with asyncio.sleep instead of blocking the loop."""
+        waited = 0.0
+        while True:
+            with self._cond:
+                wait = self._try_admit(tokens)
+                if wait == 0:
+                    self._record_wait(waited)
+                    return
+            wait = self._bounded_wait(wait)
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def _record_wait(self, waited: float) -> None:
+        self._metrics.wait.observe(waited)
+        if waited > 0:
+            self._stats["rate_limited_waits"] += 1
+            self._stats["wait_seconds"] += waited
+
+    def release(self, throttled: bool = False, token_delta: int = 0) -> None:
+        """Finish a call: free its slot, adjust TPM usage and update the AIMD limit."""
+        with self._cond:
+            self._in_flight -= 1
+            if self._tpm is not None and token_delta:
+                self._tpm.settle(token_delta)
+            if throttled:
+                self._stats["throttled"] += 1
+                self._metrics.throttles.inc()
+                now = time.monotonic()
+                # Calls in flight together are throttled together: decrease
+                # at most once per window instead of once per failed call
+                if now - self._last_decrease >= _DECREASE_WINDOW_SECONDS:
+                    self._last_decrease = now
+                    new_limit = max(float(LLM_MIN_CONCURRENCY), self._limit / 2)
+                    if int(new_limit) < int(self._limit):
+                        self._stats["concurrency_decreases"] += 1
+                        logger.info(
+                            f"Throttled on key '{self.key_name}' ({self.model}): "
+                            f"concurrency {int(self._limit)} -> {int(new_limit)}"
+                        )
+                    self._limit = new_limit
+            else:
+                # Additive increase: about one slot per `limit` successful calls
+                self._limit = min(float(self.max_concurrency), self._limit + 1.0 / max(1.0, self._limit))
+            self._metrics.concurrency_limit.set(int(self._limit))
+            self._cond.notify()
+
+    def cool_down(self, seconds: float) -> None:
+        """Pause new calls on this key for `seconds` (from a Retry-After)."""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def record_retry(self) -> None:
+        with self._cond:
+            self._stats["retries"] += 1
+
+    # ── Call scopes ──
+
+    @contextmanager
+    def slot(self, tokens: int) -> Iterator["CallSlot"]:
+        """Hold an admission slot for the duration of one call attempt."""
+        self.acquire(tokens)
+        call_slot = CallSlot(tokens)
+        try:
+            yield call_slot
+        except Exception as e:
+            call_slot.throttled = is_throttle_error(e)
+            raise
+        finally:
+            self.release(call_slot.throttled, call_slot.token_delta())
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int):
+        await self.aacquire(tokens)
+        call_slot = CallSlot(tokens)
+        try:
+            yield call_slot
+        except Exception as e:
+            call_slot.throttled = is_throttle_error(e)
+            raise
+        finally:
+            self.release(call_slot.throttled, call_slot.token_delta())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "key_name": self.key_name,
+                "model": self.model,
+                "rpm_limit": self.rpm_limit,
+                "tpm_limit": self.tpm_limit,
+                "max_concurrency": self.max_concurrency,
+                "concurrency_limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "cooldown_seconds": round(max(0.0, self._blocked_until - time.monotonic()), 3),
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in self._stats.items()},
+            }
+
+
+class CallSlot:
+    """Bookkeeping for one admitted call attempt."""
+
+    def __init__(self, estimated_tokens: int):
+        self.estimated_tokens = estimated_tokens
+        self.actual_tokens: Optional[int] = None
+        self.throttled = False
+
+    def token_delta(self) -> int:
+        if self.actual_tokens is None:
+            return 0
+        return self.actual_tokens - self.estimated_tokens
+
+
+def _process_share(limit: int) -> int:
+    """This process's share of a key's static limit (0 stays unlimited)."""
+    if not limit:
+        return 0
+    return max(1, limit // LLM_RATE_LIMIT_PROCESSES)
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of a provider SDK error, if it carries one."""
+    for attr in ("status_code", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """True for provider rate-limit / overload responses (429, Anthropic 529)."""
+    return status_code(exc) in (429, 529)
+
+
+class RateLimiterRegistry:
+    """
+    Thread-safe singleton map of (key_name, model) -> RateLimiter.
+    Per process: each limiter enforces 1/LLM_RATE_LIMIT_PROCESSES of the key's limits.
+    """
+
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                self._limiters: Dict[Tuple[str, str], RateLimiter] = {}
+                self._initialized = True
+
+    def get(self, key_record: Dict[str, Any]) -> RateLimiter:
+        """Limiter for a resolved key record, rebuilt if its limits changed."""
+        key = (key_record["key_name"], key_record["model_name"])
+        config = (
+            _process_share(int(key_record.get("rpm_limit") or 0)),
+            _process_share(int(key_record.get("tpm_limit") or 0)),
+            _process_share(int(key_record.get("max_concurrency") or 0)) or LLM_DEFAULT_MAX_CONCURRENCY,
+        )
+        limiter = self._limiters.get(key)
+        if limiter is not None and limiter.config == config:
+            return limiter
+
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None or limiter.config != config:
+                limiter = RateLimiter(key[0], key[1], *config)
+                self._limiters[key] = limiter
+            return limiter
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return [limiter.stats() for limiter in limiters]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._limiters.clear()
+
+
+# Global instance
+_registry = RateLimiterRegistry()
+
+
+def get_rate_limiter(key_record: Dict[str, Any]) -> RateLimiter:
+    return _registry.get(key_record)
+
+
+def rate_limit_stats() -> List[Dict[str, Any]]:
+    return _registry.stats()
+
+
+def clear_rate_limiters() -> None:
+    _registry.clear()
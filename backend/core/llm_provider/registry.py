@@ -1,14 +1,14 @@
 """Model registry with configurations and pricing."""
 
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 @dataclass(frozen=True)
 class ModelConfig:
     """Immutable model configuration."""
     id: str                       # API model ID (e.g., "gpt-4o-2024-11-20")
-    provider: str                 # "openai" | "anthropic" | "google"
+    provider: str                 # "openai" | "anthropic" | "google" | "mock"
     display_name: str             # Human-readable name
     input_price_per_m: float      # USD per 1M input tokens
     output_price_per_m: float     # USD per 1M output tokens
@@ -17,6 +17,15 @@ class ModelConfig:
     supports_vision: bool         # Can process images
     supports_tools: bool          # Can do function/tool calling
     supports_structured_with_tools: bool = False  # Can do structured output + tools together
+    cache_read_price_per_m: Optional[float] = None   # USD per 1M prompt-cache reads (default: input price)
+    cache_write_price_per_m: Optional[float] = None  # USD per 1M prompt-cache writes (default: input price)
+    batch_input_price_per_m: Optional[float] = None  # USD per 1M input tokens via the batch API (None: no batch API)
+    batch_output_price_per_m: Optional[float] = None  # USD per 1M output tokens via the batch API
+
+    @property
+    def supports_batch(self) -> bool:
+        """Whether the provider's asynchronous batch API can be used for this model."""
+        return self.batch_input_price_per_m is not None and self.batch_output_price_per_m is not None
 
 
 # Central registry - single source of truth for all models
@@ -34,6 +43,9 @@ MODELS: Dict[str, ModelConfig] = {
         supports_structured=True,
         supports_vision=True,
         supports_tools=True,
+        cache_read_price_per_m=1.25,
+        batch_input_price_per_m=1.25,
+        batch_output_price_per_m=5.0,
     ),
     "gpt-4o-mini": ModelConfig(
         id="gpt-4o-mini-2024-07-18",
@@ -45,6 +57,9 @@ MODELS: Dict[str, ModelConfig] = {
         supports_structured=True,
         supports_vision=True,
         supports_tools=True,
+        cache_read_price_per_m=0.075,
+        batch_input_price_per_m=0.075,
+        batch_output_price_per_m=0.3,
     ),
     "gpt-4.1": ModelConfig(
         id="gpt-4.1-2025-04-14",
@@ -56,6 +71,9 @@ MODELS: Dict[str, ModelConfig] = {
         supports_structured=True,
         supports_vision=True,
         supports_tools=True,
+        cache_read_price_per_m=0.5,
+        batch_input_price_per_m=1.0,
+        batch_output_price_per_m=4.0,
     ),
     "gpt-4.1-mini": ModelConfig(
         id="gpt-4.1-mini-2025-04-14",
@@ -67,6 +85,9 @@ MODELS: Dict[str, ModelConfig] = {
         supports_structured=True,
         supports_vision=True,
         supports_tools=True,
+        cache_read_price_per_m=0.1,
+        batch_input_price_per_m=0.2,
+        batch_output_price_per_m=0.8,
     ),
     "o3": ModelConfig(
         id="o3-2025-04-16",
@@ -78,6 +99,9 @@ MODELS: Dict[str, ModelConfig] = {
         supports_structured=True,
         supports_vision=True,
         supports_tools=True,
+        cache_read_price_per_m=2.5,
+        batch_input_price_per_m=5.0,
+        batch_output_price_per_m=20.0,
     ),
     "o4-mini": ModelConfig(
         id="o4-mini-2025-04-16",
@@ -89,6 +113,9 @@ MODELS: Dict[str, ModelConfig] = {
         supports_structured=True,
         supports_vision=True,
         supports_tools=True,
+        cache_read_price_per_m=0.275,
+        batch_input_price_per_m=0.55,
+        batch_output_price_per_m=2.2,
     ),
 
     # ===================
@@ -104,6 +131,10 @@ MODELS: Dict[str, ModelConfig] = {
         supports_structured=True,
         supports_vision=True,
         supports_tools=True,
+        cache_read_price_per_m=0.3,
+        cache_write_price_per_m=3.75,
+        batch_input_price_per_m=1.5,
+        batch_output_price_per_m=7.5,
     ),
     "claude-3.5-sonnet": ModelConfig(
         id="claude-3-5-sonnet-20241022",
@@ -115,6 +146,10 @@ MODELS: Dict[str, ModelConfig] = {
         supports_structured=True,
         supports_vision=True,
         supports_tools=True,
+        cache_read_price_per_m=0.3,
+        cache_write_price_per_m=3.75,
+        batch_input_price_per_m=1.5,
+        batch_output_price_per_m=7.5,
     ),
     "claude-haiku": ModelConfig(
         id="claude-3-5-haiku-20241022",
@@ -126,6 +161,10 @@ MODELS: Dict[str, ModelConfig] = {
         supports_structured=True,
         supports_vision=True,
         supports_tools=True,
+        cache_read_price_per_m=0.08,
+        cache_write_price_per_m=1.0,
+        batch_input_price_per_m=0.4,
+        batch_output_price_per_m=2.0,
     ),
 
     # ===================
@@ -164,6 +203,24 @@ MODELS: Dict[str, ModelConfig] = {
         supports_vision=True,
         supports_tools=True,
     ),
+
+    # ===================
+    # Mock (offline load and regression testing; see providers/mock_provider.py)
+    # ===================
+    "mock": ModelConfig(
+        id="mock-1",
+        provider="mock",
+        display_name="Mock (offline)",
+        input_price_per_m=0.0,          # Nothing is sent to a provider, so nothing is billed
+        output_price_per_m=0.0,
+        context_window=128000,
+        supports_structured=True,
+        supports_vision=False,
+        supports_tools=True,
+        supports_structured_with_tools=True,
+        batch_input_price_per_m=0.0,
+        batch_output_price_per_m=0.0,
+    ),
 }
 
 
@@ -194,7 +251,7 @@ def get_models_by_provider(provider: str) -> Dict[str, ModelConfig]:
     """Get all models for a specific provider.
 
     Args:
-        provider: Provider name ("openai", "anthropic", "google")
+        provider: Provider name ("openai", "anthropic", "google", "mock")
 
     Returns:
         Dict of model name -> ModelConfig for the provider
@@ -207,17 +264,47 @@ def get_model_names() -> List[str]:
     return list(MODELS.keys())
 
 
-def calculate_cost(input_tokens: int, output_tokens: int, config: ModelConfig) -> float:
+def calculate_cost(
+    input_tokens: int,
+    output_tokens: int,
+    config: ModelConfig,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+    batch: bool = False,
+) -> float:
     """Calculate cost in USD for a given token usage.
 
     Args:
-        input_tokens: Number of input/prompt tokens
+        input_tokens: Number of input/prompt tokens, including cached ones
         output_tokens: Number of output/completion tokens
         config: ModelConfig with pricing information
+        cache_read_tokens: Part of input_tokens read from the prompt cache
+        cache_write_tokens: Part of input_tokens written to the prompt cache
+        batch: Usage came from the provider's batch API; input and output are
+            billed at the batch prices, and prompt-cache prices get the same
+            discount as input
 
     Returns:
         Cost in USD (rounded to 6 decimal places)
+
+    Raises:
+        ValueError: If batch=True for a model without batch pricing
     """
-    input_cost = (input_tokens / 1_000_000) * config.input_price_per_m
+    read_price = config.cache_read_price_per_m
+    write_price = config.cache_write_price_per_m
+    uncached_tokens = max(0, input_tokens - cache_read_tokens - cache_write_tokens)
+
+    input_cost = (uncached_tokens / 1_000_000) * config.input_price_per_m
+    input_cost += (cache_read_tokens / 1_000_000) * (config.input_price_per_m if read_price is None else read_price)
+    input_cost += (cache_write_tokens / 1_000_000) * (config.input_price_per_m if write_price is None else write_price)
     output_cost = (output_tokens / 1_000_000) * config.output_price_per_m
+
+    if batch:
+        if not config.supports_batch:
+            raise ValueError(f"Model '{config.id}' has no batch pricing")
+        # A free model (mock) has no list price to discount
+        if config.input_price_per_m:
+            input_cost *= config.batch_input_price_per_m / config.input_price_per_m
+        if config.output_price_per_m:
+            output_cost *= config.batch_output_price_per_m / config.output_price_per_m
     return round(input_cost + output_cost, 6)
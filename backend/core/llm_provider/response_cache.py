@@ -0,0 +1,260 @@
+"""Persistent, content-addressed cache of LLM responses.
+
+Opt-in: enable globally with LLM_RESPONSE_CACHE=1, or per call with
+`call(..., cache=True)`. `cache=False` bypasses the cache for one call even
+when it is enabled globally.
+
+Entries are keyed by a sha256 of everything that shapes the response
+(provider, model id, system prompt, messages, schema JSON, tools,
+tool_choice, temperature, max_tokens) and stored in a SQLite file with a
+TTL and a total-size cap; the least recently used entries are evicted
+first. Only successful, non-streaming responses are stored.
+
+A hit is returned as an LLMResult with cached=True, zero cost and zero
+tokens, so CostTracker and key billing only count what was actually paid.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+from .result import ToolCall
+
+logger = logging.getLogger(__name__)
+
+LLM_RESPONSE_CACHE = os.getenv("LLM_RESPONSE_CACHE", "0").lower() in ("1", "true", "yes")
+LLM_RESPONSE_CACHE_PATH = os.getenv("LLM_RESPONSE_CACHE_PATH", os.path.join("llm_cache", "responses.sqlite"))
+LLM_RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("LLM_RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("LLM_RESPONSE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Bump when the key derivation or payload format changes
+_KEY_FORMAT = 1
+
+
+def cache_enabled(override: Optional[bool] = None) -> bool:
+    """Whether a call should use the cache: the per-call override wins."""
+    return LLM_RESPONSE_CACHE if override is None else override
+
+
+@lru_cache(maxsize=256)
+def _schema_json(schema: Type[BaseModel]) -> str:
+    return json.dumps(schema.model_json_schema(), sort_keys=True)
+
+
+def make_cache_key(
+    provider: str,
+    model_id: str,
+    messages: List[Dict[str, Any]],
+    system: Optional[str],
+    temperature: float,
+    max_tokens: int,
+    schema: Optional[Type[BaseModel]],
+    tools: Optional[List[Any]],
+    tool_choice: Any,
+) -> str:
+    """Content hash identifying a request."""
+    payload = {
+        "format": _KEY_FORMAT,
+        "provider": provider,
+        "model_id": model_id,
+        "system": system,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "schema": _schema_json(schema) if schema else None,
+        "tools": [dataclasses.asdict(t) for t in tools] if tools else None,
+        "tool_choice": tool_choice,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe singleton SQLite store of serialized responses."""
+
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                self._conn: Optional[sqlite3.Connection] = None
+                self._total_bytes = 0
+                self._stats = {"hits": 0, "misses": 0, "writes": 0, "expired": 0, "evicted": 0}
+                self._initialized = True
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Open the database on first use. Caller must hold the lock."""
+        if self._conn is None:
+            directory = os.path.dirname(LLM_RESPONSE_CACHE_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(LLM_RESPONSE_CACHE_PATH, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, created REAL NOT NULL, accessed REAL NOT NULL,"
+                " size INTEGER NOT NULL, payload TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            conn.commit()
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute(
+                "SELECT created, size, payload FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            created, size, payload = row
+            if now - created > LLM_RESPONSE_CACHE_TTL_SECONDS:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                self._total_bytes -= size
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self._stats["hits"] += 1
+        return json.loads(payload)
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        payload = json.dumps(entry)
+        size = len(payload)
+        if size > LLM_RESPONSE_CACHE_MAX_BYTES:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            previous = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, created, accessed, size, payload)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, now, now, size, payload),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._stats["writes"] += 1
+            if self._total_bytes > LLM_RESPONSE_CACHE_MAX_BYTES:
+                self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones down to 90% of the cap.
+
+        Caller must hold the lock.
+        """
+        cursor = conn.execute(
+            "DELETE FROM responses WHERE created < ?", (now - LLM_RESPONSE_CACHE_TTL_SECONDS,)
+        )
+        self._stats["expired"] += cursor.rowcount
+        self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        target = int(LLM_RESPONSE_CACHE_MAX_BYTES * 0.9)
+        if self._total_bytes <= target:
+            return
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if self._total_bytes - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self._total_bytes -= freed
+        self._stats["evicted"] += len(victims)
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._get_conn().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "enabled": LLM_RESPONSE_CACHE,
+                "path": LLM_RESPONSE_CACHE_PATH,
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": LLM_RESPONSE_CACHE_MAX_BYTES,
+                "ttl_seconds": LLM_RESPONSE_CACHE_TTL_SECONDS,
+                **self._stats,
+            }
+
+
+def serialize_response(response) -> Dict[str, Any]:
+    """Cache payload for a ProviderResponse."""
+    parsed = response.parsed
+    return {
+        "content": response.content,
+        "parsed": parsed.model_dump_json() if isinstance(parsed, BaseModel) else None,
+        "tool_calls": [dataclasses.asdict(tc) for tc in response.tool_calls] if response.tool_calls else None,
+        "input_tokens": response.input_tokens,
+        "output_tokens": response.output_tokens,
+    }
+
+
+def deserialize_parts(entry: Dict[str, Any], schema: Optional[Type[BaseModel]]):
+    """(content, parsed, tool_calls) restored from a cache payload."""
+    parsed = None
+    if schema and entry.get("parsed"):
+        parsed = schema.model_validate_json(entry["parsed"])
+    tool_calls = [ToolCall(**tc) for tc in entry["tool_calls"]] if entry.get("tool_calls") else None
+    return entry["content"], parsed, tool_calls
+
+
+# Global instance
+_cache = ResponseCache()
+
+
+def get_cached_response(key: str) -> Optional[Dict[str, Any]]:
+    try:
+        return _cache.get(key)
+    except Exception as e:
+        # A broken cache must never fail the call itself
+        logger.error(f"Error reading LLM response cache: {e}")
+        return None
+
+
+def put_cached_response(key: str, response) -> None:
+    try:
+        _cache.put(key, serialize_response(response))
+    except Exception as e:
+        logger.error(f"Error writing LLM response cache: {e}")
+
+
+def clear_response_cache() -> None:
+    _cache.clear()
+
+
+def response_cache_stats() -> Dict[str, Any]:
+    return _cache.stats()
@@ -27,6 +27,11 @@ class StreamChunk:
     tool_calls: Optional[List[ToolCall]] = None   # Tool calls (usually in final chunk)
     input_tokens: Optional[int] = None            # Only populated in final chunk
     output_tokens: Optional[int] = None           # Only populated in final chunk
+    cache_read_tokens: Optional[int] = None       # Only populated in final chunk
+    cache_write_tokens: Optional[int] = None      # Only populated in final chunk
+    result: Optional["LLMResult"] = None          # Final chunk of astream() only
+    fields: Optional[Dict[str, Any]] = None       # Schema fields completed by this chunk (validated)
+    field_deltas: Optional[Dict[str, str]] = None # Text added to schema string fields still streaming
 
 
 @dataclass
@@ -34,8 +39,8 @@ class LLMResult:
     """Unified result from any LLM call."""
     content: str                                              # The text response
     model: str                                                # Friendly model name used
-    provider: str                                             # "openai", "anthropic", "google"
-    input_tokens: int                                         # Tokens in prompt
+    provider: str                                             # "openai", "anthropic", "google", "mock"
+    input_tokens: int                                         # Tokens in prompt (including cached)
     output_tokens: int                                        # Tokens in response
     cost: float                                               # Calculated cost in USD
     parsed: Optional[Any] = None                              # For structured outputs
@@ -43,6 +48,11 @@ class LLMResult:
     raw_response: Optional[Any] = None                        # Original provider response
     api_key_name: Optional[str] = None                        # Managed key name (if used)
     api_key_id: Optional[str] = None                          # Managed key ID (if used)
+    cached: bool = False                                      # Served from the response cache (zero cost)
+    cache_read_tokens: int = 0                                # Prompt tokens read from the provider's prompt cache
+    cache_write_tokens: int = 0                               # Prompt tokens written to the provider's prompt cache
+    cascade: Optional[Dict[str, Any]] = None                  # Cascade decision (cascade_call() only)
+    hedge: Optional[Dict[str, Any]] = None                    # Hedged call's requests, per key (hedge_scope only)
 
     @property
     def total_tokens(self) -> int:
@@ -53,3 +63,46 @@ class LLMResult:
     def has_tool_calls(self) -> bool:
         """Check if the response contains tool calls."""
         return self.tool_calls is not None and len(self.tool_calls) > 0
+
+
+@dataclass
+class BatchItem:
+    """Outcome of one request in a call_many() batch."""
+    index: int                                    # Position in the input requests
+    result: Optional[Any] = None                  # LLMResult (or call_fn return value) on success
+    error: Optional[Exception] = None             # Exception raised by this request, if any
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchResult:
+    """Ordered results of a call_many() batch with aggregated usage."""
+    items: List[BatchItem] = field(default_factory=list)
+
+    @property
+    def results(self) -> List[Optional[Any]]:
+        """Per-request results in input order (None where the request failed)."""
+        return [item.result for item in self.items]
+
+    @property
+    def errors(self) -> List[BatchItem]:
+        return [item for item in self.items if item.error is not None]
+
+    @property
+    def cost(self) -> float:
+        return sum(getattr(item.result, "cost", 0.0) or 0.0 for item in self.items)
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(getattr(item.result, "input_tokens", 0) or 0 for item in self.items)
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(getattr(item.result, "output_tokens", 0) or 0 for item in self.items)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
@@ -0,0 +1,169 @@
+"""Retry policy for provider calls.
+
+Transient provider failures (429 rate limits, 529 overloaded, 5xx, dropped
+connections) are retried with jittered exponential backoff. When the error
+carries a Retry-After (or OpenAI's retry-after-ms) header, the wait is at
+least that long and the key's RateLimiter is paused for the same time so
+concurrent callers back off too. Retries stop early when the next wait
+would overrun the active deadline_scope.
+
+SDK clients are built with max_retries=0 so every attempt goes through the
+key's RateLimiter and throttling feeds its concurrency controller.
+
+Inside a no_retries() block calls make a single attempt, so a caller with
+somewhere else to send the request (see hedge.py) can fail over at once.
+"""
+
+import contextvars
+import datetime
+import email.utils
+import logging
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from .deadline import CallCancelled, DeadlineExceeded, remaining_time
+from .metrics import record_retry
+from .rate_limit import RateLimiter, is_throttle_error, status_code
+
+logger = logging.getLogger(__name__)
+
+LLM_RETRY_MAX_ATTEMPTS = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "5"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "60"))
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+_RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "RemoteProtocolError"}
+
+_retries_disabled: contextvars.ContextVar = contextvars.ContextVar("llm_retries_disabled", default=False)
+
+
+@contextmanager
+def no_retries() -> Iterator[None]:
+    """Make calls in the enclosed block give up after their first attempt."""
+    reset = _retries_disabled.set(True)
+    try:
+        yield
+    finally:
+        _retries_disabled.reset(reset)
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """True for errors worth retrying; never for our own deadline/cancellation."""
+    if isinstance(exc, (DeadlineExceeded, CallCancelled)):
+        return False
+    code = status_code(exc)
+    if code is not None:
+        return code in _RETRYABLE_STATUS
+    return type(exc).__name__ in _RETRYABLE_ERROR_NAMES
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Server-requested wait from the error's Retry-After headers, if present."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Wait:
+    """Jittered exponential backoff, never shorter than the server's Retry-After."""
+
+    def __init__(self):
+        self._backoff = wait_random_exponential(multiplier=LLM_RETRY_BASE_SECONDS, max=LLM_RETRY_MAX_SECONDS)
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        wait = self._backoff(retry_state)
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        retry_after = retry_after_seconds(exc) if exc is not None else None
+        if retry_after is not None:
+            wait = max(wait, retry_after)
+        return wait
+
+
+def _stop_at_deadline(retry_state: RetryCallState) -> bool:
+    """Give up when sleeping before the next attempt would pass the deadline."""
+    remaining = remaining_time()
+    return remaining is not None and retry_state.upcoming_sleep >= remaining
+
+
+def _before_sleep(limiter: RateLimiter):
+    def before_sleep(retry_state: RetryCallState) -> None:
+        exc = retry_state.outcome.exception()
+        limiter.record_retry()
+        record_retry(limiter.model, limiter.key_name)
+        retry_after = retry_after_seconds(exc)
+        if retry_after and is_throttle_error(exc):
+            limiter.cool_down(retry_after)
+        logger.warning(
+            f"Retrying LLM call on key '{limiter.key_name}' ({limiter.model}) in "
+            f"{retry_state.upcoming_sleep:.1f}s after attempt {retry_state.attempt_number}: "
+            f"{type(exc).__name__}: {exc}"
+        )
+    return before_sleep
+
+
+def _policy(limiter: RateLimiter) -> dict:
+    return dict(
+        retry=retry_if_exception(is_retryable_error),
+        wait=_Wait(),
+        stop=stop_after_attempt(1 if _retries_disabled.get() else LLM_RETRY_MAX_ATTEMPTS) | _stop_at_deadline,
+        before_sleep=_before_sleep(limiter),
+        reraise=True,
+    )
+
+
+def retrying(limiter: RateLimiter) -> Retrying:
+    """tenacity Retrying configured for calls on the limiter's key."""
+    return Retrying(**_policy(limiter))
+
+
+def async_retrying(limiter: RateLimiter) -> AsyncRetrying:
+    return AsyncRetrying(**_policy(limiter))
+
+
+def retrying_request(description: str) -> Retrying:
+    """tenacity Retrying for a provider request made outside any key's RateLimiter (batch job polls)."""
+    def before_sleep(retry_state: RetryCallState) -> None:
+        exc = retry_state.outcome.exception()
+        logger.warning(
+            f"Retrying {description} in {retry_state.upcoming_sleep:.1f}s after attempt "
+            f"{retry_state.attempt_number}: {type(exc).__name__}: {exc}"
+        )
+
+    return Retrying(
+        retry=retry_if_exception(is_retryable_error),
+        wait=_Wait(),
+        stop=stop_after_attempt(LLM_RETRY_MAX_ATTEMPTS) | _stop_at_deadline,
+        before_sleep=before_sleep,
+        reraise=True,
+    )
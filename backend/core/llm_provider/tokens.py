@@ -0,0 +1,81 @@
+"""Local token counting for pre-flight estimates.
+
+Counts use a Hugging Face `tokenizers` tokenizer loaded once from
+LLM_TOKENIZER: a path to a tokenizer.json file (default
+llm_cache/tokenizer.json) or a hub id such as "Xenova/gpt-4o", which is
+downloaded on first use. The o200k vocabulary of the GPT-4o / 4.1 /
+o-series models is a good default; other model families tokenize
+differently, so their counts are approximate. When no tokenizer can be
+loaded or LLM_TOKENIZER is empty, counting falls back to ~4 characters
+per token and tokenizer_info() reports exact=False.
+
+The default file is not shipped with the repo: copy a tokenizer.json to
+llm_cache/ or set LLM_TOKENIZER to a hub id for exact counts.
+"""
+
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", os.path.join("llm_cache", "tokenizer.json"))
+
+# Chat formatting overhead: per message, plus the assistant reply priming
+_TOKENS_PER_MESSAGE = 4
+_TOKENS_PER_REPLY = 3
+
+
+@lru_cache(maxsize=1)
+def _load_tokenizer():
+    """The configured tokenizer, or None to count by characters."""
+    if not LLM_TOKENIZER:
+        return None
+    try:
+        from tokenizers import Tokenizer
+        if os.path.exists(LLM_TOKENIZER):
+            return Tokenizer.from_file(LLM_TOKENIZER)
+        if LLM_TOKENIZER.endswith(".json"):
+            logger.info(f"No tokenizer file at '{LLM_TOKENIZER}', estimating ~4 chars/token")
+            return None
+        return Tokenizer.from_pretrained(LLM_TOKENIZER)
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer '{LLM_TOKENIZER}', estimating ~4 chars/token: {e}")
+        return None
+
+
+def tokenizer_info() -> Dict[str, Any]:
+    """Which counting method is in use."""
+    tokenizer = _load_tokenizer()
+    return {"name": LLM_TOKENIZER if tokenizer else "chars/4", "exact": tokenizer is not None}
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in a piece of text."""
+    if not text:
+        return 0
+    tokenizer = _load_tokenizer()
+    if tokenizer is None:
+        return max(1, len(text) // 4)
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def count_request_tokens(
+    messages: List[Dict[str, Any]],
+    system: Optional[str] = None,
+    schema: Optional[Type[BaseModel]] = None,
+) -> int:
+    """Prompt tokens of a call() request, including the structured-output schema."""
+    total = _TOKENS_PER_REPLY
+    if system:
+        total += _TOKENS_PER_MESSAGE + count_tokens(system)
+    for message in messages:
+        content = message.get("content", "")
+        total += _TOKENS_PER_MESSAGE + count_tokens(content if isinstance(content, str) else json.dumps(content))
+    if schema is not None:
+        total += count_tokens(json.dumps(schema.model_json_schema()))
+    return total
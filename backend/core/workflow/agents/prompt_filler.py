@@ -2,13 +2,13 @@
 
 import logging
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
 logger = logging.getLogger("workflow.agents")
 
 from pydantic import BaseModel
 
-from core.llm_provider import call
+from core.llm_provider import call_many
 from core.workflow.schemas.workflow_schema import (
     Workflow,
     ToolStep,
@@ -98,56 +98,60 @@ Be specific and actionable in your prompts."""
         user_intent: str,
         prompt_guides: dict
     ) -> Tuple[float, int, int]:
-        """Process steps in-place and fill null prompts. Returns (cost, input_tokens, output_tokens)."""
-        total_cost = 0.0
-        total_input_tokens = 0
-        total_output_tokens = 0
+        """Process steps in-place and fill null prompts. Returns (cost, input_tokens, output_tokens).
+
+        Prompts for all steps are independent, so they are generated
+        concurrently in one call_many batch.
+        """
+        targets = list(self._steps_needing_prompt(steps))
+        if not targets:
+            return 0.0, 0, 0
+
+        requests = [
+            self._prompt_request(step, user_intent, prompt_guides.get(step.tool, ''))
+            for step in targets
+        ]
+        batch = call_many(requests)
+
+        for step, item in zip(targets, batch.items):
+            if item.error is not None:
+                logger.warning(f"[{self.name}] prompt generation failed for {step.tool}: {item.error}")
+                filled_prompt = self._fallback_prompt(step.tool)
+            elif item.result.parsed:
+                filled_prompt = {
+                    "system_prompt": item.result.parsed.system_prompt,
+                    "user_prompt": item.result.parsed.user_prompt,
+                    "examples": None
+                }
+            else:
+                filled_prompt = None
+
+            if filled_prompt:
+                step.inputs.prompt = PromptInput(**filled_prompt)
 
+        return batch.cost, batch.input_tokens, batch.output_tokens
+
+    def _steps_needing_prompt(self, steps: List[AllSteps]) -> Iterator[ToolStep]:
+        """Yield tool steps (including inside loops and ifs) whose prompt is null."""
         for step in steps:
             if isinstance(step, ToolStep):
                 # Check if inputs has a prompt field that is None
                 if hasattr(step.inputs, 'prompt') and step.inputs.prompt is None:
-                    tool_name = step.tool
-                    guide = prompt_guides.get(tool_name, '')
-                    filled_prompt, cost, input_tokens, output_tokens = self._generate_prompt(
-                        tool_name=tool_name,
-                        step=step,
-                        user_intent=user_intent,
-                        guide=guide
-                    )
-                    total_cost += cost
-                    total_input_tokens += input_tokens
-                    total_output_tokens += output_tokens
-                    if filled_prompt:
-                        step.inputs.prompt = PromptInput(**filled_prompt)
+                    yield step
 
             elif isinstance(step, LoopStep):
-                cost, input_tokens, output_tokens = self._process_steps(step.body, user_intent, prompt_guides)
-                total_cost += cost
-                total_input_tokens += input_tokens
-                total_output_tokens += output_tokens
+                yield from self._steps_needing_prompt(step.body)
 
             elif isinstance(step, IfStep):
                 # Process the 'then' branch (which is a single step)
-                cost, input_tokens, output_tokens = self._process_steps([step.then], user_intent, prompt_guides)
-                total_cost += cost
-                total_input_tokens += input_tokens
-                total_output_tokens += output_tokens
-
-        return total_cost, total_input_tokens, total_output_tokens
+                yield from self._steps_needing_prompt([step.then])
 
-    def _generate_prompt(
-        self,
-        tool_name: str,
-        step: ToolStep,
-        user_intent: str,
-        guide: str
-    ) -> Tuple[dict, float, int, int]:
-        """Generate a prompt for a specific tool step. Returns (prompt_dict, cost, input_tokens, output_tokens)."""
-        try:
-            step_str = step.model_dump_json(indent=2, by_alias=True)
+    def _prompt_request(self, step: ToolStep, user_intent: str, guide: str) -> dict:
+        """Build the call() arguments that generate a prompt for a tool step."""
+        tool_name = step.tool
+        step_str = step.model_dump_json(indent=2, by_alias=True)
 
-            system_prompt = f"""{self._prompt}
+        system_prompt = f"""{self._prompt}
 
 TOOL: {tool_name}
 TOOL GUIDE: {guide if guide else 'No specific guide available.'}
@@ -160,48 +164,22 @@ USER'S OVERALL INTENT:
 
 Generate a prompt that aligns with the user's intent and the tool's purpose."""
 
-            messages = [
-                {"role": "user", "content": f"Generate a prompt for the '{tool_name}' tool step."}
-            ]
-
-            result = call(
-                messages=messages,
-                key_name=self.key_name,
-                system=system_prompt,
-                schema=FilledPrompt,
-                temperature=0.7,
-            )
-
-            if result.parsed:
-                return (
-                    {
-                        "system_prompt": result.parsed.system_prompt,
-                        "user_prompt": result.parsed.user_prompt,
-                        "examples": None
-                    },
-                    result.cost,
-                    result.input_tokens,
-                    result.output_tokens
-                )
-            else:
-                return (
-                    None,
-                    result.cost,
-                    result.input_tokens,
-                    result.output_tokens
-                )
-
-        except Exception as e:
-            logger.warning(f"[{self.name}] prompt generation failed for {tool_name}: {e}")
-
-        # Fallback: generate a basic prompt (no LLM call, so zero cost)
-        return (
-            {
-                "system_prompt": f"You are an assistant helping with {tool_name}.",
-                "user_prompt": "Please process the input.",
-                "examples": None
-            },
-            0.0,
-            0,
-            0
-        )
+        messages = [
+            {"role": "user", "content": f"Generate a prompt for the '{tool_name}' tool step."}
+        ]
+
+        return {
+            "messages": messages,
+            "key_name": self.key_name,
+            "system": system_prompt,
+            "schema": FilledPrompt,
+            "temperature": 0.7,
+        }
+
+    def _fallback_prompt(self, tool_name: str) -> dict:
+        """Basic prompt used when generation fails (no LLM call, so zero cost)."""
+        return {
+            "system_prompt": f"You are an assistant helping with {tool_name}.",
+            "user_prompt": "Please process the input.",
+            "examples": None
+        }
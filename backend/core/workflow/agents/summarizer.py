@@ -2,15 +2,16 @@
 
 import logging
 from pathlib import Path
+from typing import Generator
 
 logger = logging.getLogger("workflow.agents")
 
 from pydantic import BaseModel
 
-from core.llm_provider import call
-
 from .base import BaseAgent
 from ..schemas.agent_schemas import SummarizerInput, SummarizerOutput
+from ..schemas.trace_events import PartialEvent
+from ..utils.streaming import call_with_partial_events
 
 
 class SummaryResponse(BaseModel):
@@ -49,6 +50,15 @@ Guidelines:
 
     def run(self, inputs: SummarizerInput) -> SummarizerOutput:
         """Generate a summary of the workflow."""
+        events = self.stream(inputs, partial_events=False)
+        while True:
+            try:
+                next(events)
+            except StopIteration as stop:
+                return stop.value
+
+    def stream(self, inputs: SummarizerInput, partial_events: bool = True) -> Generator[PartialEvent, None, SummarizerOutput]:
+        """Generate a summary, yielding the summary text as it streams (with partial_events); returns the output."""
         logger.info(f"[{self.name}] called")
         try:
             workflow_str = inputs.workflow.model_dump_json(indent=2, by_alias=True)
@@ -61,7 +71,9 @@ Generate a clear, concise summary of this workflow."""
                 {"role": "user", "content": f"Summarize this workflow:\n\n{workflow_str}"}
             ]
 
-            result = call(
+            result = yield from call_with_partial_events(
+                self.name,
+                partial_events,
                 messages=messages,
                 key_name=self.key_name,
                 system=system_prompt,
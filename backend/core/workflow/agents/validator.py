@@ -2,7 +2,9 @@
 
 import logging
 import re
-from typing import Set, Optional, Tuple
+from typing import Any, Set, Optional, Tuple
+
+from jinja2 import Environment, TemplateSyntaxError, meta
 
 logger = logging.getLogger("workflow.agents")
 
@@ -16,6 +18,74 @@ from core.workflow.schemas.workflow_schema import (
 from .base import BaseAgent
 from ..schemas.agent_schemas import ValidatorInput, ValidatorOutput
 
+# {{ expression }} template reference (captures the whole expression)
+TEMPLATE_REF_PATTERN = re.compile(r'\{\{\s*(.+?)\s*\}\}')
+# Legacy single-brace reference used by older saved workflows, e.g. {note_id}
+LEGACY_REF_PATTERN = re.compile(r'(?<!\{)\{\s*([a-zA-Z_]\w*)[\w.]*\s*\}(?!\})')
+IDENTIFIER_PATTERN = re.compile(r'\b([a-zA-Z_]\w*)\b')
+
+_jinja_env = Environment()
+
+
+def extract_base_var(expr: str) -> Optional[str]:
+    """Extract base variable from expression like 'note_ids' or 'result.items'."""
+    if not expr:
+        return None
+    match = re.match(r'([a-zA-Z_]\w*)', expr)
+    return match.group(1) if match else None
+
+
+def template_expression_references(expr: str) -> Set[str]:
+    """Every variable a template expression reads, e.g. {'a', 'b'} for 'a.items | length + b'."""
+    try:
+        return set(meta.find_undeclared_variables(_jinja_env.parse("{{ " + expr + " }}")))
+    except TemplateSyntaxError:
+        return set(IDENTIFIER_PATTERN.findall(expr))
+
+
+def string_references(value: str) -> Set[str]:
+    """Variables read by the {{ }} and legacy {name} references in a string."""
+    names = set(LEGACY_REF_PATTERN.findall(value))
+    for expr in TEMPLATE_REF_PATTERN.findall(value):
+        names |= template_expression_references(expr)
+    return names
+
+
+def template_references(value: Any) -> Set[str]:
+    """Variables referenced by templates anywhere in a (possibly nested) input value."""
+    if hasattr(value, 'model_dump'):
+        value = value.model_dump()
+    if isinstance(value, str):
+        return string_references(value)
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, list):
+        return set().union(*(template_references(item) for item in value)) if value else set()
+    return set()
+
+
+def expression_references(expr: Any) -> Set[str]:
+    """Identifiers used in an expression (loop iterable, condition side)."""
+    if not isinstance(expr, str):
+        return set()
+    return set(IDENTIFIER_PATTERN.findall(expr))
+
+
+def condition_references(condition: Any) -> Set[str]:
+    """Identifiers used by an if-step condition (model or dict, any condition type)."""
+    if hasattr(condition, 'model_dump'):
+        condition = condition.model_dump()
+    if isinstance(condition, str):
+        return expression_references(condition)
+    if not isinstance(condition, dict):
+        return set()
+    if 'conditions' in condition:
+        nested = condition.get('conditions') or []
+        return set().union(*(condition_references(c) for c in nested)) if nested else set()
+    if 'left' in condition:
+        return expression_references(condition.get('left')) | expression_references(condition.get('right'))
+    return expression_references(condition.get('expression'))
+
 
 class ValidatorAgent(BaseAgent):
     """
@@ -146,9 +216,9 @@ class ValidatorAgent(BaseAgent):
 
         for key, value in inputs_dict.items():
             if isinstance(value, str):
-                # Find {{ variable }} references
-                refs = re.findall(r'\{\{\s*(\w+)', value)
-                for ref in refs:
+                # Find every variable the {{ }} references read
+                refs = set().union(*(template_expression_references(e) for e in TEMPLATE_REF_PATTERN.findall(value)))
+                for ref in sorted(refs):
                     if ref not in defined_vars and ref != loop_var:
                         return f"Reference to undefined variable '{ref}' in {key}"
 
@@ -164,7 +234,7 @@ class ValidatorAgent(BaseAgent):
         if hasattr(condition, 'root'):
             # SimpleCondition - string expression
             expr = condition.root if isinstance(condition.root, str) else str(condition)
-            refs = re.findall(r'\b([a-zA-Z_]\w*)\b', expr)
+            refs = IDENTIFIER_PATTERN.findall(expr)
             # Filter out common keywords/operators
             keywords = {'and', 'or', 'not', 'True', 'False', 'None', 'in', 'is', 'len'}
             for ref in refs:
@@ -175,10 +245,7 @@ class ValidatorAgent(BaseAgent):
 
     def _extract_base_var(self, expr: str) -> Optional[str]:
         """Extract base variable from expression like 'note_ids' or 'result.items'."""
-        if not expr:
-            return None
-        match = re.match(r'([a-zA-Z_]\w*)', expr)
-        return match.group(1) if match else None
+        return extract_base_var(expr)
 
     def _validate_outputs(
         self,
@@ -9,14 +9,13 @@ from typing import Dict, Any, Generator, Optional, Tuple
 
 from pydantic import BaseModel
 
-from core.llm_provider import call
 
 logger = logging.getLogger("workflow.orchestrator")
 from core.workflow.schemas.workflow_schema import Workflow
 
 from .state import WorkflowAgentState
 from .schemas.orchestrator_schemas import OrchestratorDecision
-from .schemas.trace_events import DecisionEvent, AgentResultEvent, FinalEvent, TraceEvent
+from .schemas.trace_events import DecisionEvent, AgentResultEvent, FinalEvent, PartialEvent, TraceEvent
 from .schemas.agent_schemas import (
     GeneratorInput,
     EditorInput,
@@ -37,6 +36,7 @@ from .agents import (
 )
 from .utils.tool_specs import get_tool_specs_for_agents
 from .utils.output_utils import derive_output_definitions
+from .utils.streaming import call_with_partial_events
 from .trace_recorder import TraceRecorder
 
 
@@ -117,7 +117,7 @@ Always provide agent_task with clear instructions for the agent you're calling."
             }
         """
         result = None
-        for event in self.process_message_streaming(user_message, state):
+        for event in self.process_message_streaming(user_message, state, partial_events=False):
             if event.type == "final":
                 result = event.result
         return result
@@ -126,7 +126,8 @@ Always provide agent_task with clear instructions for the agent you're calling."
         self,
         user_message: str,
         state: WorkflowAgentState,
-        trace_recorder: Optional[TraceRecorder] = None
+        trace_recorder: Optional[TraceRecorder] = None,
+        partial_events: bool = True
     ) -> Generator[TraceEvent, None, None]:
         """
         Streaming entry point. Processes user message and yields trace events.
@@ -135,8 +136,11 @@ Always provide agent_task with clear instructions for the agent you're calling."
             user_message: The user's message
             state: The workflow agent state
             trace_recorder: Optional recorder for detailed tracing
+            partial_events: Stream LLM responses as PartialEvents; without a
+                consumer for them, plain calls use the response cache and hedging
 
         Yields:
+            PartialEvent - as the orchestrator decision and summaries stream in
             DecisionEvent - when orchestrator decides next action
             AgentResultEvent - after each agent completes
             FinalEvent - when ready to respond to user
@@ -163,7 +167,7 @@ Always provide agent_task with clear instructions for the agent you're calling."
                 iteration += 1
 
                 # Ask orchestrator LLM what to do next
-                decision, context, system_prompt, decision_cost, decision_input_tokens, decision_output_tokens = self._get_orchestrator_decision(state, user_message)
+                decision, context, system_prompt, decision_cost, decision_input_tokens, decision_output_tokens = yield from self._stream_orchestrator_decision(state, user_message, partial_events)
                 total_cost += decision_cost
                 total_input_tokens += decision_input_tokens
                 total_output_tokens += decision_output_tokens
@@ -208,7 +212,10 @@ Always provide agent_task with clear instructions for the agent you're calling."
 
                 # Call the appropriate agent with timing
                 start_time = time.time()
-                agent_result = self._call_agent_with_input(agent_name, agent_input)
+                if agent_name == "summarizer" and agent_input is not None:
+                    agent_result = yield from self.agents["summarizer"].stream(agent_input, partial_events)
+                else:
+                    agent_result = self._call_agent_with_input(agent_name, agent_input)
                 duration_ms = int((time.time() - start_time) * 1000)
 
                 # Extract agent cost/tokens
@@ -294,7 +301,22 @@ Always provide agent_task with clear instructions for the agent you're calling."
         state: WorkflowAgentState,
         user_message: str
     ) -> Tuple[OrchestratorDecision, str, str, float, int, int]:
-        """Call orchestrator LLM to decide next action.
+        """Call orchestrator LLM to decide next action (see _stream_orchestrator_decision)."""
+        events = self._stream_orchestrator_decision(state, user_message, partial_events=False)
+        while True:
+            try:
+                next(events)
+            except StopIteration as stop:
+                return stop.value
+
+    def _stream_orchestrator_decision(
+        self,
+        state: WorkflowAgentState,
+        user_message: str,
+        partial_events: bool = True
+    ) -> Generator[PartialEvent, None, Tuple[OrchestratorDecision, str, str, float, int, int]]:
+        """Call orchestrator LLM to decide next action, yielding the decision fields as they stream
+        (with partial_events; otherwise a plain call).
 
         Returns:
             (decision, context_string, system_prompt, cost, input_tokens, output_tokens)
@@ -343,7 +365,9 @@ Decide what to do next. If the workflow is ready and summarized, respond to user
 
         messages = [{"role": "user", "content": "What should we do next?"}]
 
-        result = call(
+        result = yield from call_with_partial_events(
+            "orchestrator",
+            partial_events,
             messages=messages,
             key_name=self.key_name,
             system=system_prompt,
@@ -1,7 +1,7 @@
 """Shared input types used across multiple tools and agents."""
 
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
 
 class ExamplePair(BaseModel):
@@ -13,5 +13,11 @@ class PromptInput(BaseModel):
     user_prompt: str
     examples: Optional[List[ExamplePair]] = None
 
+class CascadeInput(BaseModel):
+    cheap_key_name: str
+    escalate_if: Optional[Dict[str, Any]] = None
+    min_confidence: Optional[float] = 0.7
+
 class ModelInput(BaseModel):
     key_name: str
+    cascade: Optional[CascadeInput] = None
@@ -28,6 +28,16 @@ class AgentResultEvent(BaseModel):
     output_tokens: Optional[int] = None
 
 
+class PartialEvent(BaseModel):
+    """Emitted while an LLM response streams: text added to a field, or a completed field."""
+    type: Literal["partial"] = "partial"
+    source: str                     # "orchestrator" or the agent name
+    field: str
+    delta: Optional[str] = None     # Text appended to a string field still being written
+    value: Optional[Any] = None     # Validated value once the field completes
+    timestamp: datetime
+
+
 class FinalEvent(BaseModel):
     """Emitted when the orchestrator is ready to respond to the user."""
     type: Literal["final"] = "final"
@@ -43,4 +53,4 @@ class ErrorEvent(BaseModel):
     timestamp: datetime
 
 
-TraceEvent = Union[DecisionEvent, AgentResultEvent, FinalEvent, ErrorEvent]
+TraceEvent = Union[DecisionEvent, AgentResultEvent, PartialEvent, FinalEvent, ErrorEvent]
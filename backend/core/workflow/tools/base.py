@@ -1,8 +1,29 @@
+import copy
+import functools
+import json
+import logging
+import os
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Type
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple, Type
 
 from pydantic import BaseModel
 
+from core.dataloaders.datasets_loader import (
+    add_invalidation_listener,
+    get_dataset_patients,
+    get_dataset_version,
+)
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of memoized reader results kept in memory (0 disables memoization)
+READER_CACHE_MAX_ENTRIES = int(os.getenv("READER_CACHE_MAX_ENTRIES", "4096"))
+
+# Default per-call deadline (seconds) for tools that make LLM calls (0 disables)
+LLM_TOOL_TIMEOUT_SECONDS = float(os.getenv("LLM_TOOL_TIMEOUT_SECONDS", "180"))
+
 
 class ToolCallMeta(BaseModel):
     """Cost/token metadata returned alongside every tool result."""
@@ -11,6 +32,8 @@ class ToolCallMeta(BaseModel):
     output_tokens: int = 0
     api_key_name: Optional[str] = None
     api_key_id: Optional[str] = None
+    cascade: Optional[Dict[str, Any]] = None  # cascade_call() decision, with per-key calls
+    hedge: Optional[Dict[str, Any]] = None    # Hedged call's requests, per key
 
 
 def meta_from_llm_result(llm_result) -> ToolCallMeta:
@@ -21,9 +44,119 @@ def meta_from_llm_result(llm_result) -> ToolCallMeta:
         output_tokens=getattr(llm_result, 'output_tokens', 0),
         api_key_name=getattr(llm_result, 'api_key_name', None),
         api_key_id=getattr(llm_result, 'api_key_id', None),
+        cascade=getattr(llm_result, 'cascade', None),
+        hedge=getattr(llm_result, 'hedge', None),
     )
 
 
+class ReaderCache:
+    """Thread-safe bounded LRU for deterministic reader tool results.
+
+    Entries are keyed by (tool name, dataset name, dataset content hash,
+    canonicalized Input), so a changed dataset never serves stale reads.
+    """
+
+    def __init__(self, max_entries: int = READER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str, str], Any]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, str, str]) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Tuple[str, str, str, str], value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, dataset_name: Optional[str] = None):
+        """Drop entries for one dataset, or everything if dataset_name is None."""
+        with self._lock:
+            if dataset_name is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[1] == dataset_name]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+_reader_cache = ReaderCache()
+add_invalidation_listener(_reader_cache.invalidate)
+
+
+def _canonical_inputs(inputs: Any) -> str:
+    """Serialize tool inputs to a stable string for cache keys."""
+    if isinstance(inputs, BaseModel):
+        inputs = inputs.model_dump(mode="json")
+    return json.dumps(inputs, sort_keys=True, default=str)
+
+
+def memoize_reader(func):
+    """Opt-in memoization for a reader tool's __call__.
+
+    Only for tools whose output is a pure function of (dataset, inputs).
+    The wrapped tool must expose `dataset_name`; its `dataset` attribute is
+    refreshed when the underlying dataset is reloaded.
+    """
+    @functools.wraps(func)
+    def wrapper(self, inputs):
+        if _reader_cache.max_entries <= 0:
+            return func(self, inputs)
+
+        dataset_name = getattr(self, "dataset_name", None)
+        version = get_dataset_version(dataset_name) if dataset_name else None
+        if version is None:
+            return func(self, inputs)
+
+        # Re-bind the dataset if it was reloaded since this instance last read it
+        if getattr(self, "_dataset_version", None) != version:
+            self.dataset = get_dataset_patients(dataset_name) or []
+            self._dataset_version = version
+
+        key = (self.name, dataset_name, version, _canonical_inputs(inputs))
+        hit, value = _reader_cache.get(key)
+        if not hit:
+            value = func(self, inputs)
+            if isinstance(value, tuple) and len(value) == 2:
+                value = value[0]
+            _reader_cache.put(key, value)
+
+        # Hand out copies so callers can't mutate the cached result
+        return copy.deepcopy(value), ToolCallMeta()
+
+    return wrapper
+
+
+def reader_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters and size of the reader memoization cache."""
+    return _reader_cache.stats()
+
+
+def clear_reader_cache(dataset_name: Optional[str] = None):
+    """Drop memoized reader results (for one dataset, or all)."""
+    _reader_cache.invalidate(dataset_name)
+
+
 class Tool(ABC):
     """Base class for all tools in the supervisor worker network."""
 
@@ -67,6 +200,13 @@ class Tool(ABC):
         """Whether this tool makes LLM calls. Override to True in LLM-based tools."""
         return False
 
+    @property
+    def timeout_seconds(self) -> Optional[float]:
+        """Per-call deadline in seconds, or None for no tool-level limit. Override to customize."""
+        if self.uses_llm and LLM_TOOL_TIMEOUT_SECONDS > 0:
+            return LLM_TOOL_TIMEOUT_SECONDS
+        return None
+
     @property
     def input_help(self) -> Dict[str, str]:
         """Return help text for input fields. Override to provide field-specific guidance."""
@@ -0,0 +1,179 @@
+"""
+Tool Catalog Artifact
+---------------------
+
+Precomputed, static description of every builtin tool: catalog metadata
+(input/output JSON schemas for the frontend), agent tool specs, and the
+tool-name -> class mapping used to import tool modules lazily.
+
+The artifact is keyed by a code version (a hash of the tool and schema
+sources, or TOOL_CATALOG_VERSION when set by the build), written to
+tool_catalog/catalog-<version>.json and reused across worker starts.
+Building it is the only time every tool module is imported.
+
+Build ahead of time with:
+    python -m core.workflow.tools.catalog_artifact
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+from threading import Lock
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TOOL_CATALOG_DIR = "tool_catalog"
+ARTIFACT_FORMAT = 1
+
+_WORKFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sources whose changes can alter tool names, schemas or specs
+_VERSIONED_SOURCES = [
+    os.path.join(_WORKFLOW_DIR, "tools"),
+    os.path.join(_WORKFLOW_DIR, "schemas"),
+    os.path.join(_WORKFLOW_DIR, "utils", "tool_specs.py"),
+]
+
+_artifact: Optional[Dict[str, Any]] = None
+_artifact_lock = Lock()
+
+
+def code_version() -> str:
+    """Version key for the artifact: TOOL_CATALOG_VERSION or a hash of the tool sources."""
+    override = os.getenv("TOOL_CATALOG_VERSION")
+    if override:
+        return override
+
+    files = []
+    for path in _VERSIONED_SOURCES:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if name.endswith(".py")
+            )
+        elif os.path.isfile(path):
+            files.append(path)
+
+    digest = hashlib.sha256(f"format:{ARTIFACT_FORMAT}".encode())
+    for file_path in sorted(files):
+        digest.update(os.path.relpath(file_path, _WORKFLOW_DIR).encode())
+        with open(file_path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def artifact_path(version: str) -> str:
+    return os.path.join(TOOL_CATALOG_DIR, f"catalog-{version}.json")
+
+
+def build_artifact(version: Optional[str] = None) -> Dict[str, Any]:
+    """Import and instantiate every builtin tool and derive the static catalog."""
+    from core.workflow.tools.registry import (
+        _build_input_schema,
+        _build_output_schema,
+        _instantiate_all_tools,
+    )
+    from core.workflow.utils.tool_specs import AGENT_TOOL_CLASSES, build_agent_spec
+
+    tools = _instantiate_all_tools()
+
+    catalog = []
+    classes = {}
+    agent_specs = {}
+    for tool in tools:
+        class_name = type(tool).__name__
+        classes[tool.name] = class_name
+        catalog.append({
+            "name": tool.name,
+            "display_name": getattr(tool, "display_name", tool.name),
+            "category": getattr(tool, "category", None),
+            "description": getattr(tool, "description", None),
+            "user_description": getattr(tool, "user_description", None),
+            "input_schema": _build_input_schema(tool),
+            "output_schema": _build_output_schema(tool),
+            "input_help": getattr(tool, "input_help", {}),
+            "role": getattr(tool, "role", "compute"),
+            "uses_llm": getattr(tool, "uses_llm", False),
+        })
+        if class_name in AGENT_TOOL_CLASSES:
+            agent_specs[tool.name] = build_agent_spec(tool)
+
+    # Keep agent specs in the curated order rather than registry order
+    order = {cls: i for i, cls in enumerate(AGENT_TOOL_CLASSES)}
+    agent_specs = dict(sorted(agent_specs.items(), key=lambda kv: order[classes[kv[0]]]))
+
+    return {
+        "format": ARTIFACT_FORMAT,
+        "version": version or code_version(),
+        "generated_at": datetime.datetime.utcnow().isoformat(),
+        "classes": classes,
+        "catalog": catalog,
+        "agent_specs": agent_specs,
+    }
+
+
+def write_artifact(artifact: Dict[str, Any]) -> str:
+    """Atomically write the artifact for its version and return the path."""
+    os.makedirs(TOOL_CATALOG_DIR, exist_ok=True)
+    path = artifact_path(artifact["version"])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(artifact, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _read_artifact(path: str, version: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("format") == ARTIFACT_FORMAT and data.get("version") == version:
+            return data
+        logger.warning(f"Ignoring stale tool catalog artifact: {path}")
+    except Exception as e:
+        logger.error(f"Error reading tool catalog artifact {path}: {e}")
+    return None
+
+
+def load_artifact(refresh: bool = False) -> Dict[str, Any]:
+    """Return the artifact for the current code version, building it on first use."""
+    global _artifact
+
+    if _artifact is not None and not refresh:
+        return _artifact
+
+    with _artifact_lock:
+        if _artifact is not None and not refresh:
+            return _artifact
+
+        version = code_version()
+        path = artifact_path(version)
+        artifact = None if refresh else _read_artifact(path, version)
+
+        if artifact is None:
+            logger.info(f"Building tool catalog artifact (version {version})...")
+            artifact = build_artifact(version)
+            try:
+                write_artifact(artifact)
+            except Exception as e:
+                # Serving from memory still works; the next start rebuilds
+                logger.error(f"Error writing tool catalog artifact {path}: {e}")
+
+        _artifact = artifact
+        return _artifact
+
+
+def main():
+    artifact = build_artifact()
+    path = write_artifact(artifact)
+    print(f"Wrote {len(artifact['catalog'])} tools to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -87,6 +87,8 @@ class UserDefinedTool(Tool):
         self._manifest = manifest
         self.Input = build_input_model(manifest)
         self.Output = build_output_model(manifest)
+        self._parameters: Optional[Dict[str, Any]] = None
+        self._returns: Optional[Dict[str, Any]] = None
 
     @property
     def name(self) -> str:
@@ -122,6 +124,20 @@ class UserDefinedTool(Tool):
             "prompt": "Configure the system and user prompts. Use Jinja2 template variables like {{field_name}} to reference input fields."
         }
 
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        # Instances are cached per manifest hash by the resolver, so the
+        # generated schema is computed once per manifest version.
+        if self._parameters is None:
+            self._parameters = self.Input.model_json_schema()
+        return self._parameters
+
+    @property
+    def returns(self) -> dict:
+        if self._returns is None:
+            self._returns = self.Output.model_json_schema()
+        return self._returns
+
     @property
     def prompt_defaults(self) -> Dict[str, Any]:
         return self._manifest.prompt_defaults.model_dump()
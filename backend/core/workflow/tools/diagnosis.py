@@ -3,7 +3,7 @@ import sys
 from pydantic import BaseModel, Field
 
 from core.dataloaders.datasets_loader import get_dataset_patients
-from core.workflow.tools.base import Tool, ToolCallMeta
+from core.workflow.tools.base import Tool, ToolCallMeta, memoize_reader
 import json
 from typing import List, Dict, Any, Optional, Union
 
@@ -84,6 +84,7 @@ class GetDiagnosisIds(Tool):
             "description": "List of diagnosis IDs for the specified patient encounter"
         }
 
+    @memoize_reader
     def __call__(self, inputs: GetDiagnosisIdsInput):
         # Find the patient in the dataset
         for patient in self.dataset:
@@ -126,6 +127,7 @@ class ReadDiagnosis(Tool):
     def category(self) -> str:
         return "diagnosis"
 
+    @memoize_reader
     def __call__(self, inputs: ReadDiagnosisInput):
         # Find the patient in the dataset
         for patient in self.dataset:
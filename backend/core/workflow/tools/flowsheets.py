@@ -4,7 +4,7 @@ from pydantic import BaseModel, Field
 
 from core.dataloaders.datasets_loader import get_dataset_patients
 from core.llm_provider import call
-from core.workflow.tools.base import Tool, ToolCallMeta, meta_from_llm_result
+from core.workflow.tools.base import Tool, ToolCallMeta, meta_from_llm_result, memoize_reader
 from core.workflow.schemas.tool_inputs import ModelInput
 import json
 from typing import Dict, Any, Optional
@@ -68,6 +68,7 @@ class ReadFlowsheetsTable(Tool):
             "description": "JSON string containing the flowsheets pivot table for the specified patient encounter."
         }
 
+    @memoize_reader
     def __call__(self, inputs: ReadFlowsheetsTableInput):
         # Find the patient in the dataset
         for patient in self.dataset:
@@ -4,11 +4,10 @@ from pydantic import BaseModel, Field
 
 from core.dataloaders.datasets_loader import get_dataset_patients
 from core.llm_provider import call
-from core.workflow.tools.base import Tool, ToolCallMeta, meta_from_llm_result
+from core.workflow.tools.base import Tool, ToolCallMeta, meta_from_llm_result, memoize_reader
 from core.workflow.schemas.tool_inputs import ModelInput
 from core.workflow.schemas.table_schemas import MEDICATION_TABLE_SCHEMA
 import json
-import pandas as pd
 import logging
 import re
 from typing import List, Dict, Any, Optional, Union
@@ -133,6 +132,7 @@ class GetMedicationsIds(Tool):
             "items": {"type": "integer"}
         }
 
+    @memoize_reader
     def __call__(self, inputs: GetMedicationsIdsInput):
         for patient in self.dataset:
             if patient['mrn'] == inputs.mrn:
@@ -173,6 +173,7 @@ class ReadMedication(Tool):
     def category(self) -> str:
         return "medications"
 
+    @memoize_reader
     def __call__(self, inputs: ReadMedicationInput):
         for patient in self.dataset:
             if patient['mrn'] == inputs.mrn:
@@ -268,6 +269,9 @@ class FilterMedication(Tool):
         }
 
     def __call__(self, inputs: FilterMedicationInput):
+        # pandas is only needed here; importing it lazily keeps worker startup light
+        import pandas as pd
+
         # 1. Fetch Medications for the specific Patient/Encounter
         medications_list = []
         for patient in self.dataset:
@@ -3,8 +3,8 @@ import sys
 from pydantic import BaseModel, Field
 
 from core.dataloaders.datasets_loader import get_dataset_patients
-from core.llm_provider import call
-from core.workflow.tools.base import Tool, ToolCallMeta, meta_from_llm_result
+from core.llm_provider import CascadePolicy, call, cascade_call
+from core.workflow.tools.base import Tool, ToolCallMeta, meta_from_llm_result, memoize_reader
 from core.workflow.schemas.tool_inputs import PromptInput, ExamplePair, ModelInput
 import json
 from typing import List, Dict, Any, Optional, Union
@@ -117,6 +117,7 @@ class GetPatientNotesIds(Tool):
             "items": {"type": "integer"}
         }
 
+    @memoize_reader
     def __call__(self, inputs: GetPatientNotesIdsInput):
         for patient in self.dataset:
             if patient['mrn'] == inputs.mrn:
@@ -157,6 +158,7 @@ class ReadPatientNote(Tool):
     def category(self) -> str:
         return "notes"
 
+    @memoize_reader
     def __call__(self, inputs: ReadPatientNoteInput):
         for patient in self.dataset:
             if patient['mrn'] == inputs.mrn:
@@ -277,7 +279,8 @@ class AnalyzeNoteWithSpanAndReason(Tool):
     def category(self) -> str:
         return "notes"
 
-    def __call__(self, inputs: AnalyzeNoteWithSpanAndReasonInput):
+    def build_request(self, inputs: AnalyzeNoteWithSpanAndReasonInput) -> Dict[str, Any]:
+        """Keyword arguments for the LLM call (also used to queue batch jobs)."""
         # Build template context from inputs
         context = {
             'note': inputs.note,
@@ -301,11 +304,32 @@ class AnalyzeNoteWithSpanAndReason(Tool):
         # Add the main user prompt
         messages.append({"role": "user", "content": user_prompt})
 
+        return {
+            "messages": messages,
+            "key_name": inputs.model.key_name,
+            "system": system_prompt,
+            "schema": self.Output,
+        }
+
+    def cascade_policy(self, inputs: AnalyzeNoteWithSpanAndReasonInput) -> Optional[CascadePolicy]:
+        """Cheap-first policy from the model input; detected flags always escalate by default."""
+        cascade = inputs.model.cascade
+        if cascade is None:
+            return None
+        escalate_if = cascade.escalate_if if cascade.escalate_if is not None else {"flag_state": True}
+        return CascadePolicy(
+            cheap_key=cascade.cheap_key_name,
+            escalate_if=escalate_if,
+            min_confidence=cascade.min_confidence,
+        )
+
+    def __call__(self, inputs: AnalyzeNoteWithSpanAndReasonInput):
         try:
-            result = call(
-                messages=messages, key_name=inputs.model.key_name,
-                system=system_prompt, schema=self.Output,
-            )
+            policy = self.cascade_policy(inputs)
+            if policy is not None:
+                result = cascade_call(policy, **self.build_request(inputs))
+            else:
+                result = call(**self.build_request(inputs))
             return result.parsed, meta_from_llm_result(result)
         except Exception as e:
             # Fallback if structured output fails
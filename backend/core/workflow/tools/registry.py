@@ -8,93 +8,82 @@ for the frontend to generate input forms.
 Each tool class defines its own Input (and optionally Output) Pydantic
 models. The registry reads tool.Input / tool.Output directly — no
 manual mapping dicts needed.
+
+Catalog metadata is served from the precomputed artifact (see
+catalog_artifact.py); tool modules are only imported when a tool is
+actually requested via get_tool().
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
-from datetime import datetime
+import importlib
+from threading import Lock
+from typing import Any, Dict, List, Optional, Type
 
 from pydantic import BaseModel
 
-# Base/tool implementations
 from core.workflow.tools.base import Tool
-from core.workflow.tools.notes import (
-    GetPatientNotesIds,
-    ReadPatientNote,
-    SummarizePatientNote,
-    SemanticKeywordCount,
-    ExactKeywordCount,
-    AnalyzeNoteWithSpanAndReason
-)
-from core.workflow.tools.flowsheets import (
-    ReadFlowsheetsTable,
-    SummarizeFlowsheetsTable,
-    AnalyzeFlowsheetInstance,
-)
-from core.workflow.tools.medications import (
-    GetMedicationsIds,
-    ReadMedication,
-    FilterMedication,
-    HighlightMedication,
-)
-from core.workflow.tools.diagnosis import (
-    GetDiagnosisIds,
-    ReadDiagnosis,
-    HighlightDiagnosis,
-)
-from core.workflow.tools.variable_management import (
-    InitStore,
-    StoreAppend,
-    StoreRead,
-    BuildText,
-)
+from core.workflow.tools.catalog_artifact import load_artifact
+
+
+# Explicit allowlist of builtin tools: class name -> defining module.
+# Modules are imported lazily, the first time one of their tools runs.
+_TOOL_MODULES: Dict[str, str] = {
+    # Notes
+    "GetPatientNotesIds": "core.workflow.tools.notes",
+    "ReadPatientNote": "core.workflow.tools.notes",
+    "SummarizePatientNote": "core.workflow.tools.notes",
+    "SemanticKeywordCount": "core.workflow.tools.notes",
+    "ExactKeywordCount": "core.workflow.tools.notes",
+    "AnalyzeNoteWithSpanAndReason": "core.workflow.tools.notes",
+
+    # Flowsheets
+    "ReadFlowsheetsTable": "core.workflow.tools.flowsheets",
+    "SummarizeFlowsheetsTable": "core.workflow.tools.flowsheets",
+    "AnalyzeFlowsheetInstance": "core.workflow.tools.flowsheets",
+
+    # Medications
+    "GetMedicationsIds": "core.workflow.tools.medications",
+    "ReadMedication": "core.workflow.tools.medications",
+    "FilterMedication": "core.workflow.tools.medications",
+    "HighlightMedication": "core.workflow.tools.medications",
+
+    # Diagnosis
+    "GetDiagnosisIds": "core.workflow.tools.diagnosis",
+    "ReadDiagnosis": "core.workflow.tools.diagnosis",
+    "HighlightDiagnosis": "core.workflow.tools.diagnosis",
+
+    # Variable Management
+    "InitStore": "core.workflow.tools.variable_management",
+    "StoreAppend": "core.workflow.tools.variable_management",
+    "StoreRead": "core.workflow.tools.variable_management",
+    "BuildText": "core.workflow.tools.variable_management",
+}
 
 
 # -----------------------------
 # Internal module state (cache)
 # -----------------------------
-_TOOLS_BY_NAME: Dict[str, Tool] = {}
+_TOOLS_BY_NAME: Dict[str, Tool] = {}            # instantiated on first use
+_CLASS_BY_NAME: Dict[str, str] = {}             # tool name -> class name (from artifact)
 _METADATA_BY_NAME: Dict[str, Dict[str, Any]] = {}
 _LAST_UPDATED: Optional[str] = None
+_tools_lock = Lock()
+
+
+def load_tool_class(class_name: str) -> Type[Tool]:
+    """Import the module defining a builtin tool class and return the class."""
+    module = importlib.import_module(_TOOL_MODULES[class_name])
+    return getattr(module, class_name)
 
 
 def _instantiate_all_tools() -> List[Tool]:
     """Create a single instance of each known Tool implementation.
 
     For PoC stability, we use an explicit allowlist rather than dynamic discovery.
+    This imports every tool module; it is only used to build the catalog artifact.
     """
-    return [
-        # Notes
-        GetPatientNotesIds(),
-        ReadPatientNote(),
-        SummarizePatientNote(),
-        SemanticKeywordCount(),
-        ExactKeywordCount(),
-        AnalyzeNoteWithSpanAndReason(),
-
-        # Flowsheets
-        ReadFlowsheetsTable(),
-        SummarizeFlowsheetsTable(),
-        AnalyzeFlowsheetInstance(),
-
-        # Medications
-        GetMedicationsIds(),
-        ReadMedication(),
-        FilterMedication(),
-        HighlightMedication(),
-
-        # Diagnosis
-        GetDiagnosisIds(),
-        ReadDiagnosis(),
-        HighlightDiagnosis(),
-
-        # Variable Management
-        InitStore(),
-        StoreAppend(),
-        StoreRead(),
-        BuildText(),
-    ]
+    return [load_tool_class(class_name)() for class_name in _TOOL_MODULES]
 
 
 def _build_input_schema(tool: Tool) -> Dict[str, Any]:
@@ -145,46 +134,54 @@ def _build_output_schema(tool: Tool) -> Dict[str, Any]:
 
 
 def discover(refresh: bool = False) -> None:
-    """Discover tools and build the minimal metadata catalog."""
-    global _TOOLS_BY_NAME, _METADATA_BY_NAME, _LAST_UPDATED
+    """Load the tool catalog from the precomputed artifact (building it if needed)."""
+    global _TOOLS_BY_NAME, _CLASS_BY_NAME, _METADATA_BY_NAME, _LAST_UPDATED
 
-    if _TOOLS_BY_NAME and _METADATA_BY_NAME and not refresh:
+    if _METADATA_BY_NAME and not refresh:
         return
 
-    tools = _instantiate_all_tools()
+    artifact = load_artifact(refresh=refresh)
 
-    _TOOLS_BY_NAME = {t.name: t for t in tools}
-    _METADATA_BY_NAME = {}
-
-    for tool in tools:
-        _METADATA_BY_NAME[tool.name] = {
-            "name": tool.name,
-            "display_name": getattr(tool, "display_name", tool.name),
-            "category": getattr(tool, "category", None),
-            "description": getattr(tool, "description", None),
-            "user_description": getattr(tool, "user_description", None),
-            "input_schema": _build_input_schema(tool),
-            "output_schema": _build_output_schema(tool),
-            "input_help": getattr(tool, "input_help", {}),
-            "role": getattr(tool, "role", "compute"),
-            "uses_llm": getattr(tool, "uses_llm", False),
-        }
-
-    _LAST_UPDATED = datetime.utcnow().isoformat()
+    with _tools_lock:
+        if refresh:
+            _TOOLS_BY_NAME = {}
+        _CLASS_BY_NAME = dict(artifact["classes"])
+        _METADATA_BY_NAME = {item["name"]: item for item in artifact["catalog"]}
+        _LAST_UPDATED = artifact["generated_at"]
 
 
 def list_tools() -> List[str]:
     """List registered tool names."""
     discover()
-    return sorted(_TOOLS_BY_NAME.keys())
+    return sorted(_CLASS_BY_NAME.keys())
 
 
 def get_tool(name: str) -> Tool:
-    """Get a tool instance by name."""
+    """Get a tool instance by name, importing its module on first use."""
+    discover()
+    if name not in _CLASS_BY_NAME:
+        raise KeyError(f"Unknown tool: {name}")
+
+    tool = _TOOLS_BY_NAME.get(name)
+    if tool is None:
+        with _tools_lock:
+            tool = _TOOLS_BY_NAME.get(name)
+            if tool is None:
+                tool = load_tool_class(_CLASS_BY_NAME[name])()
+                _TOOLS_BY_NAME[name] = tool
+    return tool
+
+
+def create_tool(name: str, dataset: Optional[str] = None) -> Tool:
+    """Create a new instance of a builtin tool bound to a dataset.
+
+    get_tool() shares one instance per tool on the default dataset; workflow
+    runs that read a project's dataset need their own.
+    """
     discover()
-    if name not in _TOOLS_BY_NAME:
+    if name not in _CLASS_BY_NAME:
         raise KeyError(f"Unknown tool: {name}")
-    return _TOOLS_BY_NAME[name]
+    return load_tool_class(_CLASS_BY_NAME[name])(dataset=dataset)
 
 
 def get_metadata(name: str) -> Dict[str, Any]:
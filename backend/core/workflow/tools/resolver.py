@@ -1,6 +1,11 @@
 """Unified resolver — merges builtin and custom tools into one catalog and run path."""
 
-from typing import Any, Dict, List
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional
 
 from core.dataloaders.custom_tool_loader import find_custom_tool_by_name, list_own_custom_tools
 from core.workflow.schemas.custom_tool_schema import CustomToolManifest
@@ -15,10 +20,66 @@ from core.workflow.tools.registry import (
     list_tools,
 )
 
+# Maximum number of compiled custom tools (models + schemas) kept in memory
+CUSTOM_TOOL_CACHE_MAX_ENTRIES = int(os.getenv("CUSTOM_TOOL_CACHE_MAX_ENTRIES", "1024"))
+
+# manifest hash -> [UserDefinedTool, catalog metadata or None]
+_compiled: "OrderedDict[str, List[Any]]" = OrderedDict()
+_compiled_lock = Lock()
+_compiled_stats = {"hits": 0, "misses": 0}
+
+
+def manifest_hash(manifest_dict: Dict[str, Any]) -> str:
+    """Content hash of a stored manifest; any edit produces a new key."""
+    payload = json.dumps(manifest_dict, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _get_compiled(manifest_dict: Dict[str, Any]) -> List[Any]:
+    """Return the cached [tool, metadata] entry for a manifest, compiling it on a miss."""
+    key = manifest_hash(manifest_dict)
+    with _compiled_lock:
+        entry = _compiled.get(key)
+        if entry is not None:
+            _compiled.move_to_end(key)
+            _compiled_stats["hits"] += 1
+            return entry
+        _compiled_stats["misses"] += 1
+
+    # create_model() is the expensive part; build outside the lock
+    entry = [UserDefinedTool(CustomToolManifest(**manifest_dict)), None]
+
+    with _compiled_lock:
+        entry = _compiled.setdefault(key, entry)
+        while len(_compiled) > CUSTOM_TOOL_CACHE_MAX_ENTRIES:
+            _compiled.popitem(last=False)
+    return entry
+
 
 def _manifest_to_tool(manifest_dict: Dict[str, Any]) -> UserDefinedTool:
-    manifest = CustomToolManifest(**manifest_dict)
-    return UserDefinedTool(manifest)
+    return _get_compiled(manifest_dict)[0]
+
+
+def _manifest_to_metadata(manifest_dict: Dict[str, Any]) -> Dict[str, Any]:
+    entry = _get_compiled(manifest_dict)
+    if entry[1] is None:
+        entry[1] = _build_custom_metadata(entry[0])
+    return entry[1]
+
+
+def custom_tool_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the compiled custom tool cache."""
+    with _compiled_lock:
+        return {**_compiled_stats, "size": len(_compiled), "max_entries": CUSTOM_TOOL_CACHE_MAX_ENTRIES}
+
+
+def clear_custom_tool_cache(manifest_dict: Optional[Dict[str, Any]] = None) -> None:
+    """Drop one compiled manifest, or everything when no manifest is given."""
+    with _compiled_lock:
+        if manifest_dict is None:
+            _compiled.clear()
+        else:
+            _compiled.pop(manifest_hash(manifest_dict), None)
 
 
 def _build_custom_metadata(tool: UserDefinedTool) -> Dict[str, Any]:
@@ -49,8 +110,7 @@ def get_catalog_for_user(username: str) -> Dict[str, Any]:
     custom_tools = list_own_custom_tools(username)
     for ct_dict in custom_tools:
         try:
-            tool = _manifest_to_tool(ct_dict)
-            items.append(_build_custom_metadata(tool))
+            items.append(_manifest_to_metadata(ct_dict))
         except Exception:
             continue
 
@@ -2,14 +2,50 @@ from __future__ import annotations
 
 import json
 import time
-from typing import Any, Dict, Tuple
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
 
 from pydantic import BaseModel, ValidationError
 
+from core.llm_provider.deadline import (
+    CallCancelled,
+    CancellationToken,
+    DeadlineExceeded,
+    deadline_scope,
+)
+from core.llm_provider.metrics import tool_scope
 from core.workflow.tools.base import Tool, ToolCallMeta
 from core.workflow.tools.registry import discover, get_tool
 from core.workflow.tools.resolver import resolve_tool
 
+# Cancellation tokens of in-flight runs, keyed by caller-supplied run_id
+_active_runs: Dict[str, CancellationToken] = {}
+_active_runs_lock = Lock()
+
+
+def cancel_run(run_id: str, reason: str = "Cancelled by user") -> bool:
+    """Cancel an in-flight run_tool call. Returns False if no such run is active."""
+    with _active_runs_lock:
+        token = _active_runs.get(run_id)
+    if token is None:
+        return False
+    token.cancel(reason)
+    return True
+
+
+def effective_timeout(tool: Tool, timeout: Optional[float] = None) -> Optional[float]:
+    """Combine the tool's own deadline with a per-request deadline (earliest wins)."""
+    limits = [t for t in (tool.timeout_seconds, timeout) if t is not None and t > 0]
+    return min(limits) if limits else None
+
+
+def is_timeout_error(exc: BaseException) -> bool:
+    """Recognize deadline/transport timeouts raised by us or by provider SDKs."""
+    if isinstance(exc, TimeoutError):
+        return True
+    # openai.APITimeoutError, anthropic.APITimeoutError, httpx.*Timeout
+    return "Timeout" in type(exc).__name__
+
 
 
 def _normalize_result(value: Any) -> Tuple[Any, Dict[str, Any]]:
@@ -50,8 +86,21 @@ def _normalize_result(value: Any) -> Tuple[Any, Dict[str, Any]]:
     return str(value), meta
 
 
-def run_tool(tool_name: str, inputs: Dict[str, Any], allow_side_effects: bool = False, current_user: str = None) -> Dict[str, Any]:
-    """Validate inputs, execute the tool, and return a normalized envelope."""
+def run_tool(
+    tool_name: str,
+    inputs: Dict[str, Any],
+    allow_side_effects: bool = False,
+    current_user: str = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    run_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Validate inputs, execute the tool, and return a normalized envelope.
+
+    timeout bounds the whole call (combined with the tool's own limit) and is
+    propagated to LLM provider requests. When run_id is given, the run can be
+    cancelled from another request via cancel_run(run_id).
+    """
     discover()  # ensure registry is initialized
 
     # Lookup tool — use resolver if current_user provided (supports custom tools)
@@ -83,9 +132,22 @@ def run_tool(tool_name: str, inputs: Dict[str, Any], allow_side_effects: bool =
         }
 
     # Execute
+    limit = effective_timeout(tool, timeout)
+    token = cancel_token or CancellationToken()
+    if run_id:
+        with _active_runs_lock:
+            _active_runs[run_id] = token
+
     start = time.time()
     try:
-        raw = tool(validated)  # tools return (domain_result, ToolCallMeta)
+        with deadline_scope(limit, token=token), tool_scope(tool_name):
+            raw = tool(validated)  # tools return (domain_result, ToolCallMeta)
+
+        # Tools may swallow provider errors and return a fallback value, so
+        # check the token and deadline after the fact as well.
+        token.raise_if_cancelled()
+        if limit is not None and time.time() - start > limit:
+            raise DeadlineExceeded(f"Tool '{tool_name}' exceeded its {limit:g}s deadline")
 
         # Unpack tuple
         if isinstance(raw, tuple) and len(raw) == 2:
@@ -108,8 +170,22 @@ def run_tool(tool_name: str, inputs: Dict[str, Any], allow_side_effects: bool =
             "result": norm_result,
             "meta": meta,
         }
+    except CallCancelled as e:
+        return {
+            "ok": False,
+            "error": {"code": "cancelled", "message": str(e)},
+        }
     except Exception as e:
+        if is_timeout_error(e):
+            return {
+                "ok": False,
+                "error": {"code": "timeout", "message": str(e) or "Tool execution timed out", "timeout_seconds": limit},
+            }
         return {
             "ok": False,
             "error": {"code": "execution_error", "message": str(e)},
         }
+    finally:
+        if run_id:
+            with _active_runs_lock:
+                _active_runs.pop(run_id, None)
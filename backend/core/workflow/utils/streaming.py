@@ -0,0 +1,44 @@
+"""Turn streamed structured LLM output into PartialEvents."""
+
+from datetime import datetime
+from typing import Generator
+
+from core.llm_provider import LLMResult, StreamChunk, call
+
+from ..schemas.trace_events import PartialEvent
+
+
+def stream_partial_events(
+    source: str,
+    stream: Generator[StreamChunk, None, LLMResult],
+) -> Generator[PartialEvent, None, LLMResult]:
+    """Yield PartialEvents for a call(stream=True, schema=...) stream and return its LLMResult.
+
+    Use with ``result = yield from stream_partial_events(...)``.
+    """
+    while True:
+        try:
+            chunk = next(stream)
+        except StopIteration as stop:
+            return stop.value
+
+        for field, delta in (chunk.field_deltas or {}).items():
+            yield PartialEvent(source=source, field=field, delta=delta, timestamp=datetime.now())
+        for field, value in (chunk.fields or {}).items():
+            yield PartialEvent(source=source, field=field, value=value, timestamp=datetime.now())
+
+
+def call_with_partial_events(
+    source: str,
+    partial_events: bool,
+    **call_kwargs,
+) -> Generator[PartialEvent, None, LLMResult]:
+    """call() for a structured response, yielding PartialEvents only when someone consumes them.
+
+    With partial_events the response is streamed; otherwise it is a plain
+    call, so the response cache and hedging apply (streams skip both).
+    Use with ``result = yield from call_with_partial_events(...)``.
+    """
+    if not partial_events:
+        return call(**call_kwargs)
+    return (yield from stream_partial_events(source, call(**call_kwargs, stream=True)))
@@ -1,65 +1,75 @@
 """Tool specification helpers for workflow agents."""
 
 import copy
+import inspect
 from typing import Dict, Any, List
 
-from core.workflow.tools.notes import (
-    GetPatientNotesIds,
-    ReadPatientNote,
-    SummarizePatientNote,
-    AnalyzeNoteWithSpanAndReason,
-)
-from core.workflow.tools.flowsheets import (
-    ReadFlowsheetsTable,
-    SummarizeFlowsheetsTable,
-)
-from core.workflow.tools.medications import (
-    GetMedicationsIds,
-    ReadMedication,
-    HighlightMedication,
-    FilterMedication,
-)
-from core.workflow.tools.diagnosis import (
-    GetDiagnosisIds,
-    ReadDiagnosis,
-    HighlightDiagnosis,
-)
-from core.workflow.tools.variable_management import (
-    InitStore,
-    StoreAppend,
-    StoreRead,
-    BuildText,
-)
+# Builtin tools exposed to the generator/editor agents, in prompt order.
+AGENT_TOOL_CLASSES = [
+    "GetPatientNotesIds",
+    "ReadPatientNote",
+    "SummarizePatientNote",
+    "AnalyzeNoteWithSpanAndReason",
+    "ReadFlowsheetsTable",
+    "SummarizeFlowsheetsTable",
+    "GetMedicationsIds",
+    "ReadMedication",
+    "HighlightMedication",
+    "FilterMedication",
+    "GetDiagnosisIds",
+    "ReadDiagnosis",
+    "HighlightDiagnosis",
+    # Variable Management
+    "InitStore",
+    "StoreAppend",
+    "StoreRead",
+    "BuildText",
+]
 
 
 def get_tools_list(dataset: str = None) -> List:
-    """Initialize tools with dataset context."""
-    return [
-        GetPatientNotesIds(dataset=dataset),
-        ReadPatientNote(dataset=dataset),
-        SummarizePatientNote(),
-        AnalyzeNoteWithSpanAndReason(),
-        ReadFlowsheetsTable(dataset=dataset),
-        SummarizeFlowsheetsTable(),
-        GetMedicationsIds(dataset=dataset),
-        ReadMedication(dataset=dataset),
-        HighlightMedication(),
-        FilterMedication(dataset=dataset),
-        GetDiagnosisIds(dataset=dataset),
-        ReadDiagnosis(dataset=dataset),
-        HighlightDiagnosis(),
-        # Variable Management
-        InitStore(dataset=dataset),
-        StoreAppend(dataset=dataset),
-        StoreRead(dataset=dataset),
-        BuildText(dataset=dataset),
-    ]
+    """Initialize tools with dataset context (imports the tool modules)."""
+    from core.workflow.tools.registry import load_tool_class
+
+    tools = []
+    for class_name in AGENT_TOOL_CLASSES:
+        tool_cls = load_tool_class(class_name)
+        if "dataset" in inspect.signature(tool_cls.__init__).parameters:
+            tools.append(tool_cls(dataset=dataset))
+        else:
+            tools.append(tool_cls())
+    return tools
+
+
+def build_agent_spec(tool) -> Dict[str, Any]:
+    """Build the agent-facing spec for one tool (model field stripped)."""
+    # Deep-copy parameters and strip model field (user-only, not for agents)
+    params = copy.deepcopy(tool.parameters)
+    params.get("properties", {}).pop("model", None)
+    if "required" in params:
+        params["required"] = [r for r in params["required"] if r != "model"]
+
+    spec = {
+        "description": tool.description,
+        "parameters": params,
+        "returns": tool.returns,
+    }
+
+    # Add category and role if available
+    if hasattr(tool, 'category'):
+        spec["category"] = tool.category
+    spec["role"] = getattr(tool, 'role', 'compute')
+    return spec
 
 
 def get_tool_specs_for_agents(dataset: str = None) -> Dict[str, Any]:
     """
     Build tool specifications dict for generator/editor agents.
 
+    Specs are served from the precomputed tool catalog artifact; they do not
+    depend on the dataset. The nested schemas are shared — treat them as
+    read-only.
+
     Returns a dict mapping tool names to their specs:
     {
         "tool_name": {
@@ -69,45 +79,24 @@ def get_tool_specs_for_agents(dataset: str = None) -> Dict[str, Any]:
         }
     }
     """
-    tools = get_tools_list(dataset)
-    specs = {}
-
-    for tool in tools:
-        # Deep-copy parameters and strip model field (user-only, not for agents)
-        params = copy.deepcopy(tool.parameters)
-        params.get("properties", {}).pop("model", None)
-        if "required" in params:
-            params["required"] = [r for r in params["required"] if r != "model"]
-
-        specs[tool.name] = {
-            "description": tool.description,
-            "parameters": params,
-            "returns": tool.returns,
-        }
-
-        # Add category and role if available
-        if hasattr(tool, 'category'):
-            specs[tool.name]["category"] = tool.category
-        specs[tool.name]["role"] = getattr(tool, 'role', 'compute')
+    from core.workflow.tools.catalog_artifact import load_artifact
 
-    return specs
+    return {name: dict(spec) for name, spec in load_artifact()["agent_specs"].items()}
 
 
 def get_tool_names(dataset: str = None) -> List[str]:
     """Get list of available tool names."""
-    tools = get_tools_list(dataset)
-    return [tool.name for tool in tools]
+    return list(get_tool_specs_for_agents(dataset).keys())
 
 
 def get_tools_by_category(dataset: str = None) -> Dict[str, List[str]]:
     """Group tool names by category."""
-    tools = get_tools_list(dataset)
     by_category: Dict[str, List[str]] = {}
 
-    for tool in tools:
-        category = getattr(tool, 'category', 'other')
+    for name, spec in get_tool_specs_for_agents(dataset).items():
+        category = spec.get('category', 'other')
         if category not in by_category:
             by_category[category] = []
-        by_category[category].append(tool.name)
+        by_category[category].append(name)
 
     return by_category
@@ -0,0 +1,242 @@
+"""
+Fingerprints for output definitions, and experiments derived from earlier ones.
+
+A definition's fingerprint hashes everything that shapes its values:
+
+- the definition (name, fields) and its step's tool and inputs, i.e. the prompt,
+- the model the step runs on (model name and cascade; not which key pays),
+- the tool's version,
+- the rest of the workflow the step sees: every step not bound to an output
+  definition, plus bound steps whose outputs it reads,
+- the dataset.
+
+Patient data is fingerprinted separately, per patient, so adding patients to
+a dataset or editing one only invalidates the patients affected.
+
+An experiment derived from a source experiment copies a patient's values of
+every definition whose fingerprint is unchanged, when the source completed
+that patient without step errors on the same data, and runs a pruned plan
+for the rest. Other patients (new, changed, or failed in the source) run
+the full plan.
+
+Example:
+    >>> fingerprints = definition_fingerprints(raw_workflow["steps"], plan, "gpt-4o", dataset="sdoh")
+    >>> reused = {d: d for d, fp in fingerprints.items() if source_fingerprints.get(d) == fp}
+    >>> pruned = prune_workflow(raw_workflow, plan.definitions, skip=set(reused))
+"""
+
+import copy
+import hashlib
+import inspect
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from core.workflow.agents.validator import condition_references, expression_references, template_references
+from core.workflow_service.step_graph import nested_steps
+
+# Descriptive step keys that don't change what a step does
+_DESCRIPTIVE_KEYS = ("step_summary", "description")
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def tool_version(tool) -> str:
+    """A tool's `version` attribute, else a hash of its class source, schemas and manifest."""
+    explicit = getattr(tool, "version", None)
+    if explicit:
+        return str(explicit)
+
+    parts: Dict[str, Any] = {"tool": tool.name}
+    try:
+        with open(inspect.getsourcefile(type(tool)), "rb") as f:
+            parts["source"] = hashlib.sha256(f.read()).hexdigest()
+    except (TypeError, OSError):
+        pass
+    for attr in ("Input", "Output"):
+        model = getattr(tool, attr, None)
+        if model is not None:
+            parts[attr] = model.model_json_schema()
+    manifest = getattr(tool, "_manifest", None)
+    if manifest is not None:
+        parts["manifest"] = manifest.model_dump() if hasattr(manifest, "model_dump") else manifest
+    return _digest(parts)[:16]
+
+
+def patient_fingerprint(patient: Dict[str, Any]) -> str:
+    """Content hash of one patient's record in a dataset."""
+    return _digest(patient)
+
+
+def _walk(steps: List[dict]) -> List[dict]:
+    found = []
+    for step in steps:
+        if isinstance(step, dict):
+            found.append(step)
+            found += _walk(nested_steps(step))
+    return found
+
+
+def _step_refs(step: dict) -> Set[str]:
+    refs = template_references(step.get("inputs") or {})
+    refs |= condition_references(step.get("condition"))
+    refs |= expression_references(step.get("in") or step.get("in_expr"))
+    return refs
+
+
+def _skeleton(steps: List[dict], bound: Set[str]) -> List[dict]:
+    """Steps with bound steps left out (recursively) and descriptions dropped."""
+    result = []
+    for step in steps:
+        if not isinstance(step, dict) or step.get("id") in bound:
+            continue
+        plain = {k: v for k, v in step.items() if k not in _DESCRIPTIVE_KEYS and k not in ("body", "then")}
+        if step.get("body"):
+            plain["body"] = _skeleton(step["body"], bound)
+        if step.get("then"):
+            plain["then"] = _skeleton(step["then"] if isinstance(step["then"], list) else [step["then"]], bound)
+        result.append(plain)
+    return result
+
+
+def definition_fingerprints(
+    steps: List[dict],
+    plan,
+    model_name: Optional[str],
+    default_cascade: Optional[dict] = None,
+    dataset: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Fingerprint of each of a compiled plan's output definitions, by definition id.
+
+    Args:
+        steps: The workflow's raw steps
+        plan: CompiledWorkflow compiled from them
+        model_name: Model behind the experiment's key (LLM steps)
+        default_cascade: The experiment's cascade for steps without their own
+        dataset: Dataset the plan reads
+    """
+    by_id = {step.get("id"): step for step in _walk(steps)}
+    tools = plan.step_tools()
+    bound = {d["metadata"]["step_id"] for d in plan.definitions}
+    producers = {by_id[step_id]["output"]: step_id for step_id in bound if by_id[step_id].get("output")}
+    context = _digest(_skeleton(steps, bound))
+
+    def content(step_id: str) -> Dict[str, Any]:
+        step = by_id[step_id]
+        tool = tools[step_id]
+        inputs = dict(step.get("inputs") or {})
+        model = inputs.pop("model", None)
+        result = {"tool": step.get("tool"), "inputs": inputs, "tool_version": tool_version(tool)}
+        if "model" in tool.Input.model_fields:
+            cascade = model.get("cascade") if isinstance(model, dict) else None
+            result["model"] = {"model_name": model_name, "cascade": cascade or default_cascade}
+        return result
+
+    fingerprints = {}
+    for definition in plan.definitions:
+        step_id = definition["metadata"]["step_id"]
+        # Bound steps whose outputs feed this one, transitively
+        upstream, pending = set(), [step_id]
+        while pending:
+            for ref in _step_refs(by_id[pending.pop()]):
+                producer = producers.get(ref)
+                if producer and producer != step_id and producer not in upstream:
+                    upstream.add(producer)
+                    pending.append(producer)
+
+        fingerprints[definition["id"]] = _digest({
+            "definition": {k: definition.get(k) for k in ("name", "resource_type", "fields")},
+            "step": content(step_id),
+            "upstream": {producer: content(producer) for producer in sorted(upstream)},
+            "context": context,
+            "dataset": dataset,
+        })
+    return fingerprints
+
+
+def prune_workflow(workflow: Dict[str, Any], definitions: List[dict], skip: Set[str]) -> Dict[str, Any]:
+    """
+    Copy of a workflow without the steps that only produce the skipped definitions.
+
+    definitions are the compiled plan's (they name each definition's step);
+    the remaining output definitions are pinned to their steps by step_id.
+    A skipped definition's step stays (unbound) when a remaining step reads its output.
+    """
+    step_of = {d["id"]: d["metadata"]["step_id"] for d in definitions}
+    drop = {step_of[d] for d in skip if d in step_of}
+    all_steps = _walk(workflow.get("steps") or [])
+
+    # Keep producers that something still running reads
+    while True:
+        kept_refs = set().union(*(_step_refs(s) for s in all_steps if s.get("id") not in drop))
+        needed = {s.get("id") for s in all_steps if s.get("id") in drop and s.get("output") in kept_refs}
+        if not needed:
+            break
+        drop -= needed
+
+    def remove(steps: List[dict]) -> List[dict]:
+        result = []
+        for step in steps:
+            if not isinstance(step, dict) or step.get("id") in drop:
+                continue
+            step = dict(step)
+            if step.get("body"):
+                step["body"] = remove(step["body"])
+            if step.get("then"):
+                then = remove(step["then"] if isinstance(step["then"], list) else [step["then"]])
+                if not then:
+                    continue
+                step["then"] = then[0]
+            result.append(step)
+        return result
+
+    specs = workflow.get("output_definitions") or [
+        {"name": d["name"], "label": d["label"]} for d in definitions
+    ]
+    kept_specs = [
+        {**spec, "id": definition["id"], "step_id": definition["metadata"]["step_id"]}
+        for spec, definition in zip(specs, definitions)
+        if definition["id"] not in skip
+    ]
+    return {**copy.deepcopy(workflow), "steps": remove(workflow.get("steps") or []), "output_definitions": kept_specs}
+
+
+@dataclass
+class Derivation:
+    """How a derived experiment reuses its source experiment's values."""
+    source_experiment: str
+    plan: Any                                   # CompiledWorkflow without the reused definitions' steps (None: nothing left to run)
+    definitions: List[dict]                     # Every definition of the full plan
+    reused: Dict[str, str]                      # Definition id -> source definition id
+    source_patients: Dict[str, str] = field(default_factory=dict)   # MRN -> data fingerprint, complete source runs
+    source_values: Dict[str, List[dict]] = field(default_factory=dict)  # MRN -> source values of reused definitions
+
+    def copied_values(self, mrn: Any, fingerprint: str) -> Optional[List[dict]]:
+        """Values to copy for a patient, or None when the patient runs the full plan."""
+        if not self.reused or self.source_patients.get(str(mrn)) != fingerprint:
+            return None
+        copied = []
+        source_ids = {source_id: definition_id for definition_id, source_id in self.reused.items()}
+        for value in self.source_values.get(str(mrn), []):
+            value = copy.deepcopy(value)
+            source_value_id = value["id"]
+            value["id"] = f"val_{hashlib.sha256(f'{self.source_experiment}:{source_value_id}'.encode()).hexdigest()[:12]}"
+            value["output_definition_id"] = source_ids[value["output_definition_id"]]
+            value.setdefault("metadata", {})["derived_from"] = {
+                "experiment_name": self.source_experiment,
+                "value_id": source_value_id,
+            }
+            copied.append(value)
+        return copied
+
+    def provenance(self) -> Dict[str, Any]:
+        """Record of the derivation for the new experiment's metadata."""
+        return {
+            "experiment_name": self.source_experiment,
+            "reused_definitions": dict(self.reused),
+            "rerun_definitions": [d["id"] for d in self.definitions if d["id"] not in self.reused],
+            "reusable_patients": len(self.source_patients),
+        }
@@ -0,0 +1,181 @@
+"""Dry-run cost and duration forecast for experiments.
+
+Walks the SDOH workflow over the selected patients without calling any
+model: notes are read and every analysis request is built exactly as the
+runner would build it, then counted with the local tokenizer
+(core.llm_provider.tokens). Output tokens and duration come from past runs
+of the same model and mode (core.dataloaders.run_stats_loader), falling
+back to conservative defaults until there is history.
+
+Every quantity is returned as {"estimate", "low", "high"}. With two or
+more past runs the output/duration bounds are mean +/- 1.96 standard
+deviations across runs; otherwise they are fixed multiples of the default.
+When no tokenizer is available (LLM_TOKENIZER not shipped or not loadable)
+prompts are counted at ~4 characters per token and the forecast is marked
+"approximate".
+"""
+
+import logging
+import os
+import statistics
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.dataloaders.api_key_loader import get_key_by_name
+from core.dataloaders.datasets_loader import get_patient_details
+from core.dataloaders.run_stats_loader import get_run_observations
+from core.llm_provider.registry import calculate_cost, get_model
+from core.llm_provider.tokens import count_request_tokens, tokenizer_info
+from core.workflow_service.run_workflow_sdoh import NOTE_FLAG_CRITERIA, prepare_batch_workflow
+
+logger = logging.getLogger(__name__)
+
+# Defaults used until the model has run history
+FORECAST_DEFAULT_OUTPUT_TOKENS = int(os.getenv("FORECAST_DEFAULT_OUTPUT_TOKENS", "150"))
+FORECAST_DEFAULT_SECONDS_PER_CALL = float(os.getenv("FORECAST_DEFAULT_SECONDS_PER_CALL", "2.5"))
+FORECAST_DEFAULT_BATCH_SECONDS = float(os.getenv("FORECAST_DEFAULT_BATCH_SECONDS", "3600"))
+# Provider batch jobs complete within 24 hours
+_BATCH_WINDOW_SECONDS = 24 * 3600
+
+_Z = 1.96
+
+# Relative error of prompt token counts: exact tokenizer on its own model
+# family, exact tokenizer on another family, character heuristic
+_INPUT_ERROR_SAME_FAMILY = 0.05
+_INPUT_ERROR_OTHER_FAMILY = 0.15
+_INPUT_ERROR_HEURISTIC = 0.30
+
+
+def _range(estimate: float, low: float, high: float, digits: int = 0) -> Dict[str, float]:
+    if digits:
+        return {"estimate": round(estimate, digits), "low": round(low, digits), "high": round(high, digits)}
+    return {"estimate": int(round(estimate)), "low": int(round(low)), "high": int(round(high))}
+
+
+def _observed(samples: List[float], default: float, low_factor: float, high_factor: float) -> Tuple[float, float, float]:
+    """(estimate, low, high) from per-run samples, or from the default without history."""
+    if len(samples) >= 2:
+        mean = statistics.mean(samples)
+        spread = _Z * statistics.stdev(samples)
+        return mean, max(0.0, mean - spread), mean + spread
+    if len(samples) == 1:
+        return samples[0], samples[0] * 0.5, samples[0] * 1.5
+    return default, default * low_factor, default * high_factor
+
+
+def _input_error(provider: str) -> float:
+    if not tokenizer_info()["exact"]:
+        return _INPUT_ERROR_HEURISTIC
+    return _INPUT_ERROR_SAME_FAMILY if provider == "openai" else _INPUT_ERROR_OTHER_FAMILY
+
+
+def forecast_experiment(
+    patients: list,
+    prompts: list,
+    key_name: str,
+    dataset_name: str,
+    current_user: str,
+    mode: str = "online",
+    budget_usd: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Forecast tokens, cost and duration of an SDOH experiment.
+
+    Args:
+        patients: Patient summaries selected for the run
+        prompts: List of 9 PromptInput objects for each SDOH flag
+        key_name: Managed API key the run would use
+        dataset_name: Project dataset (for each patient's first encounter)
+        current_user: User requesting the forecast (dataset permission checks)
+        mode: "online" or "batch" (batch prices and turnaround)
+        budget_usd: Reject threshold; within_budget compares it to the cost estimate
+
+    Returns:
+        dict with workload counts, input/output tokens, cost_usd and
+        duration_seconds ranges, the history used, the budget verdict and
+        whether prompt tokens were only approximated (chars/4)
+    """
+    key_record = get_key_by_name(key_name)
+    if not key_record:
+        raise ValueError(f"API key '{key_name}' not found")
+    model_name = key_record["model_name"]
+    config = get_model(model_name)
+    batch = mode == "batch"
+
+    notes = 0
+    llm_calls = 0
+    input_tokens = 0
+    skipped = []
+
+    for patient_summary in patients:
+        mrn = patient_summary.get("mrn")
+        try:
+            patient_details = get_patient_details(str(mrn), dataset_name, current_user)
+            if not patient_details or not patient_details.get("encounters"):
+                skipped.append({"mrn": str(mrn), "reason": "No encounters found"})
+                continue
+
+            csn = patient_details["encounters"][0].get("csn")
+            plan = prepare_batch_workflow(mrn, csn, prompts, key_name)
+        except Exception as e:
+            logger.error(f"Error forecasting patient {mrn}: {e}")
+            skipped.append({"mrn": str(mrn), "reason": str(e)})
+            continue
+
+        notes += len({entry["note_dict"].get("note_id") for entry in plan["pending"]})
+        llm_calls += len(plan["pending"])
+        for entry in plan["pending"]:
+            request = entry["request"]
+            input_tokens += count_request_tokens(request["messages"], request.get("system"), request.get("schema"))
+
+    observations = [o for o in get_run_observations(model_name, mode) if o.get("llm_calls")]
+
+    input_error = _input_error(config.provider)
+    input_range = (input_tokens, input_tokens * (1 - input_error), input_tokens * (1 + input_error))
+
+    per_call_output = _observed(
+        [o["output_tokens"] / o["llm_calls"] for o in observations],
+        FORECAST_DEFAULT_OUTPUT_TOKENS, 1 / 3, 8 / 3,
+    )
+    output_range = tuple(v * llm_calls for v in per_call_output)
+
+    cost_range = tuple(
+        calculate_cost(int(i), int(o), config, batch=batch)
+        for i, o in zip(input_range, output_range)
+    )
+
+    if batch:
+        # Batch turnaround depends on the provider queue more than on the job size
+        duration = _observed(
+            [o["wall_seconds"] for o in observations],
+            FORECAST_DEFAULT_BATCH_SECONDS, 1 / 6, _BATCH_WINDOW_SECONDS / FORECAST_DEFAULT_BATCH_SECONDS,
+        )
+        duration = (duration[0], duration[1], min(duration[2], _BATCH_WINDOW_SECONDS))
+        if not llm_calls:
+            duration = (0.0, 0.0, 0.0)
+    else:
+        per_call_seconds = _observed(
+            [o["wall_seconds"] / o["llm_calls"] for o in observations],
+            FORECAST_DEFAULT_SECONDS_PER_CALL, 0.5, 2.0,
+        )
+        duration = tuple(v * llm_calls for v in per_call_seconds)
+
+    tokenizer = tokenizer_info()
+    return {
+        "model": model_name,
+        "provider": config.provider,
+        "mode": mode,
+        "tokenizer": tokenizer,
+        "approximate": not tokenizer["exact"],
+        "patients": len(patients) - len(skipped),
+        "skipped_patients": skipped,
+        "notes": notes,
+        "criteria": len(NOTE_FLAG_CRITERIA),
+        "llm_calls": llm_calls,
+        "input_tokens": _range(*input_range),
+        "output_tokens": _range(*output_range),
+        "cost_usd": _range(*cost_range, digits=6),
+        "duration_seconds": _range(*duration, digits=1),
+        "history": {"runs": len(observations), "source": "observed" if observations else "default"},
+        "budget_usd": budget_usd,
+        "within_budget": budget_usd is None or cost_range[0] <= budget_usd,
+    }
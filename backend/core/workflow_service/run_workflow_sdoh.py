@@ -9,6 +9,7 @@ from core.workflow.tools.notes import (
     GetPatientNotesIdsInput, ReadPatientNoteInput, AnalyzeNoteWithSpanAndReasonInput
 )
 from core.workflow.schemas.tool_inputs import PromptInput, ModelInput
+from core.workflow.tools.base import meta_from_llm_result
 from core.workflow_service.utils import (
     create_output_definition, create_output_value, call_tool,
     RESOURCE_TYPE_NOTE,
@@ -87,17 +88,20 @@ def analyze_single_note_for_flag(note_text, note_dict, criteria_config, mrn, csn
 
     Returns an output value entry if detected, None otherwise.
     """
-    criteria_name = criteria_config['name']
-    criteria_text = criteria_config['criteria']
     definition = definitions[flag_key]
 
     flag_result = call_tool(AnalyzeNoteWithSpanAndReason(dataset=DATASET),
         AnalyzeNoteWithSpanAndReasonInput(
             note=note_text,
             prompt=criteria_config['prompt'],
-            model=ModelInput(key_name=key_name),
+            model=ModelInput(key_name=key_name, cascade=criteria_config.get('cascade')),
         ), tracker)
 
+    return _flag_output_value(flag_result, note_dict, criteria_config, mrn, csn, definition)
+
+
+def _flag_output_value(flag_result, note_dict, criteria_config, mrn, csn, definition: dict):
+    """Output value entry for a detected flag, None if the flag was not detected."""
     if not flag_result.flag_state:
         return None
 
@@ -114,8 +118,8 @@ def analyze_single_note_for_flag(note_text, note_dict, criteria_config, mrn, csn
             "patient_id": str(mrn),
             "encounter_id": str(csn),
             "resource_details": note_dict,
-            "criteria": criteria_text,
-            "criteria_name": criteria_name
+            "criteria": criteria_config['criteria'],
+            "criteria_name": criteria_config['name']
         }
     )
 
@@ -161,7 +165,14 @@ def analyze_notes(mrn, csn, definitions: Dict[str, dict], key_name: str, tracker
     return output_values
 
 
-def run_workflow(mrn, csn, prompts, key_name: str, tracker=None):
+def _apply_prompts(prompts, cascades=None):
+    """Populate prompts (and optional per-step model cascades) from the workflow plan."""
+    for i, flag_key in enumerate(NOTE_FLAG_CRITERIA.keys()):
+        NOTE_FLAG_CRITERIA[flag_key]['prompt'] = prompts[i]
+        NOTE_FLAG_CRITERIA[flag_key]['cascade'] = cascades[i] if cascades else None
+
+
+def run_workflow(mrn, csn, prompts, key_name: str, tracker=None, cascades=None):
     """
     Run SDOH screening workflow on a patient encounter.
 
@@ -172,6 +183,8 @@ def run_workflow(mrn, csn, prompts, key_name: str, tracker=None):
         csn: Patient CSN
         prompts: List of 9 PromptInput objects for each SDOH flag
         key_name: Managed API key name for LLM calls
+        cascades: Optional list of 9 CascadeInput (or None) routing each flag's
+            analysis through a cheap model first
 
     Returns:
         dict: {
@@ -186,9 +199,7 @@ def run_workflow(mrn, csn, prompts, key_name: str, tracker=None):
     # Use fresh definitions for each run (to get unique IDs)
     definitions = _build_output_definitions()
 
-    # Populate prompts from the workflow plan
-    for i, flag_key in enumerate(NOTE_FLAG_CRITERIA.keys()):
-        NOTE_FLAG_CRITERIA[flag_key]['prompt'] = prompts[i]
+    _apply_prompts(prompts, cascades)
 
     logger.info(f"Starting SDOH screening workflow for MRN {mrn}, CSN {csn}")
 
@@ -208,3 +219,91 @@ def run_workflow(mrn, csn, prompts, key_name: str, tracker=None):
         "output_definitions": list(definitions.values()),
         "output_values": output_values
     }
+
+
+# ── Batch mode ────────────────────────────────────────────────
+# The same workflow split in two halves so that many patients' LLM requests
+# can be sent together as one provider batch job (see core.llm_provider.batch).
+
+
+def prepare_batch_workflow(mrn, csn, prompts, key_name: str, tracker=None) -> dict:
+    """
+    Read a patient's notes and build every flag-analysis request without sending it.
+
+    Returns:
+        dict: {
+            "mrn": mrn,
+            "csn": csn,
+            "definitions": {flag_key: definition},
+            "pending": [{"request": call kwargs, "flag_key": str, "note_dict": dict}],
+            "tool_name": name of the analysis tool, for cost tracking
+        }
+    """
+    _apply_prompts(prompts)
+    definitions = _build_output_definitions()
+    pending = []
+
+    analyzer = AnalyzeNoteWithSpanAndReason(dataset=DATASET)
+    note_ids = call_tool(GetPatientNotesIds(dataset=DATASET), GetPatientNotesIdsInput(mrn=mrn, csn=csn), tracker)
+
+    for note_id in note_ids or []:
+        try:
+            note_result = call_tool(ReadPatientNote(dataset=DATASET),
+                ReadPatientNoteInput(mrn=mrn, csn=csn, note_id=note_id), tracker)
+            note_dict = note_result.model_dump()
+            note_text = note_dict.get('note_text', '')
+
+            if not note_text or note_text.strip() == '':
+                continue
+
+            for flag_key, criteria_config in NOTE_FLAG_CRITERIA.items():
+                request = analyzer.build_request(AnalyzeNoteWithSpanAndReasonInput(
+                    note=note_text,
+                    prompt=criteria_config['prompt'],
+                    model=ModelInput(key_name=key_name),
+                ))
+                pending.append({"request": request, "flag_key": flag_key, "note_dict": note_dict})
+
+        except Exception as e:
+            logger.error(f"Error reading note {note_id}: {e}")
+
+    return {"mrn": mrn, "csn": csn, "definitions": definitions, "pending": pending, "tool_name": analyzer.name}
+
+
+def complete_batch_workflow(plan: dict, items: list, tracker=None) -> dict:
+    """
+    Turn batch results for a prepared patient into the run_workflow() result.
+
+    Args:
+        plan: Output of prepare_batch_workflow()
+        items: BatchItems aligned with plan["pending"]
+        tracker: CostTracker charged with each analysis at batch prices
+    """
+    mrn, csn = plan["mrn"], plan["csn"]
+    definitions = plan["definitions"]
+    output_values = []
+
+    for entry, item in zip(plan["pending"], items):
+        result = item.result
+        if result is not None and tracker is not None:
+            tracker.record(plan["tool_name"], meta_from_llm_result(result), 0)
+        if item.error is not None or result.parsed is None:
+            logger.error(
+                f"Batch analysis failed for MRN {mrn}, note {entry['note_dict'].get('note_id')}, "
+                f"flag {entry['flag_key']}: {item.error or 'unparseable output'}"
+            )
+            continue
+
+        value = _flag_output_value(
+            result.parsed, entry["note_dict"], NOTE_FLAG_CRITERIA[entry["flag_key"]],
+            mrn, csn, definitions[entry["flag_key"]],
+        )
+        if value:
+            output_values.append(value)
+
+    return {
+        "mrn": mrn,
+        "csn": csn,
+        "output_definitions": list(definitions.values()),
+        "output_values": output_values
+    }
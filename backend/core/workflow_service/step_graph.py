@@ -0,0 +1,259 @@
+"""
+Dependency graph over a workflow's top-level steps.
+
+Each step (with everything nested in it: a loop's body, an if-step's then)
+is summarized by the variables it reads and writes, using the validator's
+reference extraction. Reads of names the step itself has already set (its
+loop variable, earlier body outputs) are internal and not counted. Stores
+count as variables: init_store writes one, store_append reads and writes it,
+store_read and build_text read it.
+
+A step depends on every earlier step that
+
+- wrote a variable it reads (read after write),
+- read a variable it writes (write after read), or
+- wrote a variable it writes that a later step reads (write after write),
+
+so a step that starts once its dependencies finish sees exactly the values a
+run in workflow order would. Steps with no path between them (e.g. a
+medication branch and a diagnosis branch, even when both loop over a
+variable called `item`) can run concurrently.
+
+Example:
+    >>> graph = build_step_graph(raw_workflow["steps"])
+    >>> graph.levels()
+    [['get_med_ids', 'get_dx_ids'], ['loop_meds', 'loop_dx'], ['summarize']]
+    >>> graph.critical_path({"loop_meds": 12.0, "loop_dx": 3.5})
+    (['get_med_ids', 'loop_meds', 'summarize'], 14.0)
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from core.workflow.agents.validator import condition_references, expression_references, template_references
+
+_PATIENT_FIELDS = ("mrn", "csn")
+
+
+@dataclass
+class StepInfo:
+    """Variables one top-level step reads and writes, nested steps included."""
+    id: str
+    type: str
+    tool: Optional[str] = None
+    reads: Set[str] = field(default_factory=set)      # Set before the step starts
+    writes: Set[str] = field(default_factory=set)
+    substeps: List[str] = field(default_factory=list)   # Ids of nested steps
+
+
+@dataclass
+class StepGraph:
+    steps: List[StepInfo]                  # In workflow order
+    depends_on: Dict[str, List[str]]       # step id -> earlier step ids it waits for
+
+    def dependents(self) -> Dict[str, List[str]]:
+        result: Dict[str, List[str]] = {step.id: [] for step in self.steps}
+        for step in self.steps:
+            for dep in self.depends_on[step.id]:
+                result[dep].append(step.id)
+        return result
+
+    def levels(self) -> List[List[str]]:
+        """Steps grouped by the earliest wave they can start in."""
+        level: Dict[str, int] = {}
+        for step in self.steps:
+            level[step.id] = 1 + max((level[d] for d in self.depends_on[step.id]), default=-1)
+        waves: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for step in self.steps:
+            waves[level[step.id]].append(step.id)
+        return waves
+
+    def max_parallelism(self) -> int:
+        return max((len(wave) for wave in self.levels()), default=0)
+
+    def critical_path(self, weights: Optional[Dict[str, float]] = None) -> Tuple[List[str], float]:
+        """
+        Longest chain of dependent steps and its total weight.
+
+        Args:
+            weights: Expected duration (any unit) per step id; missing steps weigh 1
+        """
+        weights = weights or {}
+        total: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for step in self.steps:
+            before = max(self.depends_on[step.id], key=lambda d: total[d], default=None)
+            total[step.id] = weights.get(step.id, 1.0) + (total[before] if before else 0.0)
+            previous[step.id] = before
+        if not total:
+            return [], 0.0
+
+        end = max(self.steps, key=lambda s: total[s.id]).id
+        path = []
+        node: Optional[str] = end
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return path[::-1], total[end]
+
+    def to_dict(self, weights: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """JSON form for the API: nodes, edges, waves and the critical path."""
+        path, length = self.critical_path(weights)
+        on_path = set(path)
+        return {
+            "nodes": [
+                {
+                    "id": step.id,
+                    "type": step.type,
+                    "tool": step.tool,
+                    "reads": sorted(step.reads),
+                    "writes": sorted(step.writes),
+                    "substeps": step.substeps,
+                    "depends_on": self.depends_on[step.id],
+                    "weight": (weights or {}).get(step.id, 1.0),
+                    "critical": step.id in on_path,
+                }
+                for step in self.steps
+            ],
+            "edges": [
+                {"from": dep, "to": step.id}
+                for step in self.steps
+                for dep in self.depends_on[step.id]
+            ],
+            "levels": self.levels(),
+            "max_parallelism": self.max_parallelism(),
+            "critical_path": path,
+            "critical_path_weight": length,
+        }
+
+
+def workflow_variables(steps: List[dict]) -> Set[str]:
+    """Every name a workflow can reference: outputs, loop variables, output dicts, stores."""
+    names: Set[str] = set(_PATIENT_FIELDS)
+    for step in steps:
+        if not isinstance(step, dict):
+            continue
+        if step.get("output"):
+            names.add(step["output"])
+        if step.get("tool") == "init_store" and isinstance(step.get("inputs"), dict):
+            name = step["inputs"].get("name")
+            if isinstance(name, str):
+                names.add(name)
+        for key in ("for", "for_var", "output_dict"):
+            if step.get(key):
+                names.add(step[key])
+        names |= workflow_variables(nested_steps(step))
+    return names
+
+
+def nested_steps(step: dict) -> List[dict]:
+    """A loop's body or an if-step's then, as a list."""
+    then = step.get("then")
+    return (step.get("body") or []) + (then if isinstance(then, list) else [then] if then else [])
+
+
+def _collect(step: dict, info: StepInfo, variables: Set[str], stores: Set[str], local: Set[str]) -> None:
+    """Add a step's reads and writes to info; local holds names already set within the top-level step."""
+    def read(names: Set[str]) -> None:
+        info.reads.update((names & variables) - local)
+
+    kind = step.get("type", "tool")
+    inputs = step.get("inputs") if isinstance(step.get("inputs"), dict) else {}
+
+    if kind == "tool":
+        read(template_references(inputs))
+        tool = step.get("tool")
+        if tool == "init_store" and isinstance(inputs.get("name"), str):
+            info.writes.add(inputs["name"])
+            local.add(inputs["name"])
+        elif tool == "store_append" and isinstance(inputs.get("store"), str):
+            read({inputs["store"]})
+            info.writes.add(inputs["store"])
+        elif tool == "store_read" and isinstance(inputs.get("store"), str):
+            read({inputs["store"]})
+        elif tool == "build_text" and inputs.get("source") in stores:
+            read({inputs["source"]})
+        if step.get("output"):
+            info.writes.add(step["output"])
+            local.add(step["output"])
+
+    elif kind == "if":
+        read(condition_references(step.get("condition")))
+        # The branch may not run, so what it sets stays external afterwards
+        for nested in nested_steps(step):
+            if isinstance(nested, dict):
+                info.substeps.append(nested.get("id"))
+                _collect(nested, info, variables, stores, set(local))
+
+    elif kind == "loop":
+        read(expression_references(step.get("in") or step.get("in_expr")))
+        for_var = step.get("for") or step.get("for_var")
+        if for_var:
+            info.writes.add(for_var)
+        body_local = local | ({for_var} if for_var else set())
+        for nested in nested_steps(step):
+            if isinstance(nested, dict):
+                info.substeps.append(nested.get("id"))
+                _collect(nested, info, variables, stores, body_local)
+        if step.get("output_dict"):
+            info.writes.add(step["output_dict"])
+            local.add(step["output_dict"])
+
+
+def describe_steps(steps: List[dict]) -> List[StepInfo]:
+    """Reads/writes of each top-level step."""
+    variables = workflow_variables(steps)
+    stores = {
+        name for name in variables
+        if any(s.get("tool") == "init_store" and (s.get("inputs") or {}).get("name") == name
+               for s in _all_steps(steps))
+    }
+    infos = []
+    for step in steps:
+        info = StepInfo(id=step.get("id"), type=step.get("type", "tool"), tool=step.get("tool"))
+        _collect(step, info, variables, stores, set())
+        infos.append(info)
+    return infos
+
+
+def _all_steps(steps: List[dict]) -> List[dict]:
+    found = []
+    for step in steps:
+        if isinstance(step, dict):
+            found.append(step)
+            found += _all_steps(nested_steps(step))
+    return found
+
+
+def graph_from_infos(infos: List[StepInfo]) -> StepGraph:
+    """Order dependencies between steps from what each reads and writes."""
+    last_writer: Dict[str, str] = {}
+    readers: Dict[str, List[str]] = {}
+    depends_on: Dict[str, List[str]] = {}
+    position = {info.id: index for index, info in enumerate(infos)}
+    last_read = {name: index for index, info in enumerate(infos) for name in info.reads}
+
+    for index, info in enumerate(infos):
+        deps: Set[str] = set()
+        for name in info.reads:
+            if name in last_writer:
+                deps.add(last_writer[name])
+        for name in info.writes:
+            deps.update(readers.get(name, []))
+            # Only a later reader can tell which of two writes landed last
+            if name in last_writer and last_read.get(name, -1) > index:
+                deps.add(last_writer[name])
+        deps.discard(info.id)
+        depends_on[info.id] = sorted(deps, key=position.get)
+
+        for name in info.reads:
+            readers.setdefault(name, []).append(info.id)
+        for name in info.writes:
+            last_writer[name] = info.id
+            readers[name] = []
+    return StepGraph(steps=infos, depends_on=depends_on)
+
+
+def build_step_graph(steps: List[dict]) -> StepGraph:
+    """Dependency graph of a workflow's top-level steps (raw step dicts)."""
+    return graph_from_infos(describe_steps(steps))
@@ -11,6 +11,8 @@ import time
 import uuid
 from typing import Dict, Any, List, Optional
 
+from core.llm_provider.deadline import check_deadline, deadline_scope
+from core.llm_provider.metrics import tool_scope
 from core.workflow.tools.base import ToolCallMeta
 
 
@@ -190,8 +192,10 @@ class CostTracker:
     def __init__(self):
         self.entries = {}  # tool_name -> {calls, input_tokens, output_tokens, cost, duration_ms}
         self.api_key_entries = {}  # api_key_name -> {api_key_id, calls, input_tokens, output_tokens, cost}
+        self.cascade_entries = {}  # tool_name -> {calls, escalations, reasons, cost, baseline_cost}
+        self.step_entries = {}  # step_id -> {tool_name, calls, input_tokens, output_tokens, cost, duration_ms}
 
-    def record(self, tool_name: str, meta: ToolCallMeta, duration_ms: int):
+    def record(self, tool_name: str, meta: ToolCallMeta, duration_ms: int, step_id: Optional[str] = None):
         if tool_name not in self.entries:
             self.entries[tool_name] = {
                 "calls": 0, "input_tokens": 0, "output_tokens": 0,
@@ -204,19 +208,60 @@ class CostTracker:
         e["cost"] += meta.cost
         e["duration_ms"] += duration_ms
 
-        # Track by API key if present
-        key_name = getattr(meta, 'api_key_name', None)
-        if key_name:
-            if key_name not in self.api_key_entries:
-                self.api_key_entries[key_name] = {
-                    "api_key_id": getattr(meta, 'api_key_id', None),
-                    "calls": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0
+        # Track by workflow step if the call came from one
+        if step_id:
+            if step_id not in self.step_entries:
+                self.step_entries[step_id] = {
+                    "tool_name": tool_name, "calls": 0, "input_tokens": 0, "output_tokens": 0,
+                    "cost": 0.0, "duration_ms": 0
                 }
-            k = self.api_key_entries[key_name]
-            k["calls"] += 1
-            k["input_tokens"] += meta.input_tokens
-            k["output_tokens"] += meta.output_tokens
-            k["cost"] += meta.cost
+            s = self.step_entries[step_id]
+            s["calls"] += 1
+            s["input_tokens"] += meta.input_tokens
+            s["output_tokens"] += meta.output_tokens
+            s["cost"] += meta.cost
+            s["duration_ms"] += duration_ms
+
+        # Track by API key if present; a cascade or hedged call bills each key it called
+        cascade = getattr(meta, 'cascade', None)
+        hedge = getattr(meta, 'hedge', None)
+        if cascade:
+            for c in cascade["calls"]:
+                self._record_api_key(c["api_key_name"], c["api_key_id"], c["input_tokens"], c["output_tokens"], c["cost"])
+            self._record_cascade(tool_name, cascade, meta.cost)
+        elif hedge:
+            for c in hedge["calls"]:
+                self._record_api_key(c["api_key_name"], c["api_key_id"], c["input_tokens"], c["output_tokens"], c["cost"])
+        else:
+            self._record_api_key(getattr(meta, 'api_key_name', None), getattr(meta, 'api_key_id', None),
+                                 meta.input_tokens, meta.output_tokens, meta.cost)
+
+    def _record_api_key(self, key_name, key_id, input_tokens: int, output_tokens: int, cost: float):
+        if not key_name:
+            return
+        if key_name not in self.api_key_entries:
+            self.api_key_entries[key_name] = {
+                "api_key_id": key_id,
+                "calls": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0
+            }
+        k = self.api_key_entries[key_name]
+        k["calls"] += 1
+        k["input_tokens"] += input_tokens
+        k["output_tokens"] += output_tokens
+        k["cost"] += cost
+
+    def _record_cascade(self, tool_name: str, cascade: dict, cost: float):
+        if tool_name not in self.cascade_entries:
+            self.cascade_entries[tool_name] = {
+                "calls": 0, "escalations": 0, "reasons": {}, "cost": 0.0, "baseline_cost": 0.0
+            }
+        c = self.cascade_entries[tool_name]
+        c["calls"] += 1
+        if cascade["escalated"]:
+            c["escalations"] += 1
+            c["reasons"][cascade["reason"]] = c["reasons"].get(cascade["reason"], 0) + 1
+        c["cost"] += cost
+        c["baseline_cost"] += cascade["baseline_cost"]
 
     def merge(self, other: "CostTracker"):
         for tool_name, data in other.entries.items():
@@ -240,6 +285,53 @@ class CostTracker:
             for key in ("calls", "input_tokens", "output_tokens", "cost"):
                 k[key] += data[key]
 
+        # Merge step entries
+        for step_id, data in other.step_entries.items():
+            if step_id not in self.step_entries:
+                self.step_entries[step_id] = {
+                    "tool_name": data["tool_name"], "calls": 0, "input_tokens": 0, "output_tokens": 0,
+                    "cost": 0.0, "duration_ms": 0
+                }
+            s = self.step_entries[step_id]
+            for key in ("calls", "input_tokens", "output_tokens", "cost", "duration_ms"):
+                s[key] += data[key]
+
+        # Merge cascade entries
+        for tool_name, data in other.cascade_entries.items():
+            if tool_name not in self.cascade_entries:
+                self.cascade_entries[tool_name] = {
+                    "calls": 0, "escalations": 0, "reasons": {}, "cost": 0.0, "baseline_cost": 0.0
+                }
+            c = self.cascade_entries[tool_name]
+            for key in ("calls", "escalations", "cost", "baseline_cost"):
+                c[key] += data[key]
+            for reason, count in data["reasons"].items():
+                c["reasons"][reason] = c["reasons"].get(reason, 0) + count
+
+    def to_dict(self) -> dict:
+        """Raw entries (JSON-safe), so a tracker can be saved and restored with from_dict."""
+        return json.loads(json.dumps({
+            "entries": self.entries,
+            "api_key_entries": self.api_key_entries,
+            "cascade_entries": self.cascade_entries,
+            "step_entries": self.step_entries,
+        }))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CostTracker":
+        tracker = cls()
+        tracker.merge_dict(data)
+        return tracker
+
+    def merge_dict(self, data: dict):
+        """Merge a tracker saved with to_dict."""
+        saved = CostTracker()
+        saved.entries = data.get("entries", {})
+        saved.api_key_entries = data.get("api_key_entries", {})
+        saved.cascade_entries = data.get("cascade_entries", {})
+        saved.step_entries = data.get("step_entries", {})
+        self.merge(saved)
+
     def summary(self) -> dict:
         result = {
             "tool_costs": dict(self.entries),
@@ -253,21 +345,49 @@ class CostTracker:
         }
         if self.api_key_entries:
             result["api_key_costs"] = dict(self.api_key_entries)
+        if self.step_entries:
+            result["step_costs"] = dict(self.step_entries)
+        if self.cascade_entries:
+            result["cascade"] = {
+                tool_name: {
+                    **c,
+                    "reasons": dict(c["reasons"]),
+                    "escalation_rate": c["escalations"] / c["calls"] if c["calls"] else 0.0,
+                    "savings": c["baseline_cost"] - c["cost"],
+                }
+                for tool_name, c in self.cascade_entries.items()
+            }
         return result
 
 
-def call_tool(tool, inputs, tracker=None):
-    """Call a tool, unpack the (result, ToolCallMeta) tuple, optionally record to tracker."""
+def call_tool(tool, inputs, tracker=None, timeout=None, step_id=None):
+    """Call a tool, unpack the (result, ToolCallMeta) tuple, optionally record to tracker.
+
+    The call runs under the tool's own deadline (and the optional timeout), nested
+    inside whatever deadline_scope / cancellation token the caller has set up.
+    Raises CallCancelled or DeadlineExceeded instead of returning a late result.
+    With a step_id (the workflow step making the call) the tracker also records
+    the spend and timing per step.
+    """
+    limits = [t for t in (getattr(tool, "timeout_seconds", None), timeout) if t is not None and t > 0]
+    limit = min(limits) if limits else None
+
+    check_deadline()
     start = time.time()
-    raw = tool(inputs=inputs)
-    duration_ms = int((time.time() - start) * 1000)
+    with deadline_scope(limit), tool_scope(tool.name):
+        raw = tool(inputs=inputs)
+        duration_ms = int((time.time() - start) * 1000)
+
+        if isinstance(raw, tuple) and len(raw) == 2:
+            result, meta = raw
+        else:
+            result, meta = raw, ToolCallMeta()
 
-    if isinstance(raw, tuple) and len(raw) == 2:
-        result, meta = raw
-    else:
-        result, meta = raw, ToolCallMeta()
+        # Record spend even if the result is discarded below
+        if tracker is not None:
+            tracker.record(tool.name, meta, duration_ms, step_id=step_id)
 
-    if tracker is not None:
-        tracker.record(tool.name, meta, duration_ms)
+        # Tools may swallow provider errors, so re-check after the call
+        check_deadline()
 
     return result
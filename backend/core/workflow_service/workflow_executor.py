@@ -0,0 +1,1110 @@
+"""
+Compiled executor for the workflow DSL (core.workflow.schemas.workflow_schema).
+
+compile_workflow() turns a workflow definition into an execution plan once
+per experiment:
+
+- Tool steps get a resolved tool instance bound to the project's dataset and
+  precompiled inputs. `{{ expr }}` (and the legacy `{name}`) references to
+  workflow variables are compiled to Jinja expressions; a string that is a
+  single reference evaluates to the referenced object itself, references
+  embedded in text are rendered (structured values as JSON). References to
+  names that are not workflow variables, such as `{{note}}` in a prompt the
+  tool renders itself, are left untouched.
+- mrn/csn inputs are bound to the patient and encounter being run, and LLM
+  steps' `model` input to the experiment's key (keeping a step's cascade).
+- If conditions and loop iterables are compiled to callables.
+- Loop bodies are analysed statically: when no iteration can observe another
+  (no body step reads a variable before the body assigns it, and the only
+  shared-state writes are store appends the body never reads back), the
+  iterations run concurrently, up to WORKFLOW_LOOP_MAX_CONCURRENCY at a time.
+  Each iteration gets its own scope and cost tracker; outputs, errors, costs
+  and store appends are merged back in item order, so results are identical
+  to a sequential run.
+- Top-level steps are scheduled from their dependency graph (step_graph.py):
+  independent branches, such as separate medication and diagnosis checks,
+  run concurrently, up to WORKFLOW_STEP_MAX_CONCURRENCY at a time, with
+  results merged back in workflow order.
+- Inside a concurrency_scope, the extra threads concurrent steps and loop
+  iterations use come from a ConcurrencyBudget shared by every run in the
+  scope (an experiment's patients), so nesting doesn't multiply them; a
+  fan-out the budget can't spare threads for runs in the calling thread.
+- init_store / store_append / store_read are executed by the plan against
+  per-run stores (they are declarations only as tools); build_text may read
+  a store by name.
+
+CompiledWorkflow.run() executes the plan for one patient encounter and
+returns {mrn, csn, output_definitions, output_values, step_errors}, recording each step's
+cost and timing in a CostTracker. Output values come from the steps named
+by the workflow's output definitions (every compute step when it has none).
+A failing step abandons the current loop iteration; outside loops it fails
+the run. Deadlines and cancellation always propagate.
+
+Example:
+    >>> plan = compile_workflow(raw_workflow, dataset="sdoh_parsed", key_name="my-key")
+    >>> result = plan.run(mrn=123, csn=456, tracker=CostTracker())
+"""
+
+import contextvars
+import json
+import logging
+import operator
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from jinja2 import TemplateSyntaxError, meta
+from jinja2.sandbox import SandboxedEnvironment
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from core.llm_provider.deadline import CallCancelled, DeadlineExceeded
+from core.workflow.schemas.workflow_schema import Condition, ComparisonCondition, LogicalCondition, SimpleCondition
+from core.workflow.schemas.tool_inputs import ModelInput
+from core.workflow.tools.base import Tool, ToolCallMeta
+from core.workflow.tools.registry import create_tool
+from core.workflow.tools.resolver import resolve_tool
+from core.workflow_service.step_graph import StepGraph, describe_steps, graph_from_infos, workflow_variables
+from core.workflow_service.utils import (
+    FIELD_TYPE_BOOLEAN, FIELD_TYPE_MAP, FIELD_TYPE_NUMERIC, FIELD_TYPE_TEXT,
+    RESOURCE_TYPE_DIAGNOSIS, RESOURCE_TYPE_FLOWSHEET, RESOURCE_TYPE_MEDICATION,
+    RESOURCE_TYPE_NOTE, RESOURCE_TYPE_PATIENT,
+    CostTracker, call_tool, create_output_definition, create_output_value,
+)
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW_LOOP_MAX_CONCURRENCY = int(os.getenv("WORKFLOW_LOOP_MAX_CONCURRENCY", "4"))
+WORKFLOW_STEP_MAX_CONCURRENCY = int(os.getenv("WORKFLOW_STEP_MAX_CONCURRENCY", "4"))
+
+_env = SandboxedEnvironment()
+
+# {{ expression }} or the legacy {name.path}
+_REFERENCE = re.compile(r"\{\{\s*(?P<expr>.+?)\s*\}\}|(?<!\{)\{\s*(?P<name>[A-Za-z_][\w.]*)\s*\}(?!\})")
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+
+_PATIENT_FIELDS = ("mrn", "csn")
+# Pseudo-variable for the patient frame's resource details (set by top-level readers)
+_FRAME = "@resource_details"
+_STORE_TOOLS = {"init_store", "store_append", "store_read"}
+_STORE_TYPES = {"list": list, "text": str, "dict": dict}
+# Fields whose content stands in for a whole reader result bound to a text input
+_TEXT_FIELDS = ("note_text", "text")
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda left, right: left in right,
+    "not in": lambda left, right: left not in right,
+}
+
+_RESOURCE_TYPE_BY_CATEGORY = {
+    "notes": RESOURCE_TYPE_NOTE,
+    "medications": RESOURCE_TYPE_MEDICATION,
+    "diagnosis": RESOURCE_TYPE_DIAGNOSIS,
+    "flowsheets": RESOURCE_TYPE_FLOWSHEET,
+}
+
+_condition_adapter = TypeAdapter(Condition)
+
+
+class WorkflowCompileError(ValueError):
+    """The workflow definition cannot be compiled into an execution plan."""
+
+    def __init__(self, message: str, step_id: Optional[str] = None):
+        super().__init__(f"Step '{step_id}': {message}" if step_id else message)
+        self.step_id = step_id
+
+
+class WorkflowStepError(RuntimeError):
+    """A step failed while running the plan."""
+
+    def __init__(self, step_id: str, error: Exception):
+        super().__init__(f"Step '{step_id}' failed: {type(error).__name__}: {error}")
+        self.step_id = step_id
+        self.error = error
+
+
+# ── Values and expressions ────────────────────────────────────
+
+def _to_text(value: Any) -> str:
+    """Text form of a referenced value embedded in a string."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _text_content(value: Any) -> Any:
+    """The text of a reader result (e.g. a note) bound to a text input; other values unchanged."""
+    data = value.model_dump() if isinstance(value, BaseModel) else value
+    if isinstance(data, dict):
+        for name in _TEXT_FIELDS:
+            if isinstance(data.get(name), str):
+                return data[name]
+    return value
+
+
+def _compile_expression(expr: str, step_id: Optional[str]) -> Callable[[Dict[str, Any]], Any]:
+    try:
+        return _env.compile_expression(expr, undefined_to_none=True)
+    except Exception as e:
+        raise WorkflowCompileError(f"Invalid expression '{expr}': {e}", step_id)
+
+
+def _base_name(expr: str) -> Optional[str]:
+    match = _IDENTIFIER.match(expr.strip())
+    return match.group(0) if match else None
+
+
+def _expression_names(expr: str) -> Set[str]:
+    """Every variable an expression reads ('a.x + b' -> {a, b}), not just the first."""
+    try:
+        return set(meta.find_undeclared_variables(_env.parse("{{ " + expr + " }}")))
+    except TemplateSyntaxError:
+        return set()
+
+
+class _Value:
+    """A compiled input value; evaluate(scope) returns the runtime value."""
+
+    refs: Set[str] = set()
+
+    def evaluate(self, scope: Dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+
+class _Const(_Value):
+    def __init__(self, value: Any):
+        self.value = value
+        self.refs = set()
+
+    def evaluate(self, scope: Dict[str, Any]) -> Any:
+        return self.value
+
+
+class _Expr(_Value):
+    """A string that is a single reference: evaluates to the object itself."""
+
+    def __init__(self, expr: str, step_id: Optional[str]):
+        self.expr = expr
+        self.fn = _compile_expression(expr, step_id)
+        self.refs = _expression_names(expr)
+
+    def evaluate(self, scope: Dict[str, Any]) -> Any:
+        return self.fn(scope)
+
+
+class _Text(_Value):
+    """Text with references rendered into it."""
+
+    def __init__(self, parts: List[Any], refs: Set[str]):
+        self.parts = parts   # str or _Expr
+        self.refs = refs
+
+    def evaluate(self, scope: Dict[str, Any]) -> Any:
+        return "".join(part if isinstance(part, str) else _to_text(part.evaluate(scope)) for part in self.parts)
+
+
+class _Container(_Value):
+    def __init__(self, items: Any, refs: Set[str]):
+        self.items = items   # dict or list of _Value
+        self.refs = refs
+
+    def evaluate(self, scope: Dict[str, Any]) -> Any:
+        if isinstance(self.items, dict):
+            return {key: value.evaluate(scope) for key, value in self.items.items()}
+        return [value.evaluate(scope) for value in self.items]
+
+
+def _compile_value(value: Any, variables: Set[str], step_id: Optional[str]) -> _Value:
+    """Compile an input value, resolving references to known workflow variables only."""
+    if isinstance(value, str):
+        parts: List[Any] = []
+        refs: Set[str] = set()
+        position = 0
+        for match in _REFERENCE.finditer(value):
+            expr = match.group("expr") or match.group("name")
+            if not _expression_names(expr) & variables:
+                continue
+            if match.start() > position:
+                parts.append(value[position:match.start()])
+            parts.append(_Expr(expr, step_id))
+            refs |= parts[-1].refs
+            position = match.end()
+        if not refs:
+            return _Const(value)
+        if position < len(value):
+            parts.append(value[position:])
+        if len(parts) == 1:
+            return parts[0]
+        return _Text(parts, refs)
+
+    if isinstance(value, dict):
+        items = {key: _compile_value(item, variables, step_id) for key, item in value.items()}
+    elif isinstance(value, list):
+        items = [_compile_value(item, variables, step_id) for item in value]
+    else:
+        return _Const(value)
+
+    values = list(items.values()) if isinstance(items, dict) else items
+    refs = set().union(*(v.refs for v in values)) if values else set()
+    if not refs:
+        return _Const(value)
+    return _Container(items, refs)
+
+
+def _strip_reference(expr: str) -> str:
+    """'{{ x }}' / '{x}' -> 'x' for fields that are expressions already."""
+    match = _REFERENCE.fullmatch(expr.strip())
+    return (match.group("expr") or match.group("name")) if match else expr
+
+
+def _compile_condition(condition: Any, variables: Set[str], step_id: str) -> Tuple[Callable[[Dict[str, Any]], bool], Set[str]]:
+    """Compile an if-step condition into a predicate over the run scope."""
+    if isinstance(condition, SimpleCondition):
+        expr = _strip_reference(condition.expression)
+        fn = _compile_expression(expr, step_id)
+        names = {name for name in _IDENTIFIER.findall(expr) if name in variables}
+        return (lambda scope: bool(fn(scope))), names
+
+    if isinstance(condition, ComparisonCondition):
+        left = _compile_expression(_strip_reference(condition.left), step_id)
+        names = {name for name in _IDENTIFIER.findall(condition.left) if name in variables}
+        right_value = condition.right
+        if isinstance(right_value, str) and _base_name(_strip_reference(right_value)) in variables:
+            right_expr = _strip_reference(right_value)
+            right = _compile_expression(right_expr, step_id)
+            names |= {name for name in _IDENTIFIER.findall(right_expr) if name in variables}
+        else:
+            right = lambda scope: right_value
+        compare = _OPERATORS[condition.operator]
+
+        def predicate(scope: Dict[str, Any]) -> bool:
+            try:
+                return bool(compare(left(scope), right(scope)))
+            except TypeError:
+                return False
+        return predicate, names
+
+    if isinstance(condition, LogicalCondition):
+        compiled = [_compile_condition(c, variables, step_id) for c in condition.conditions]
+        predicates = [p for p, _ in compiled]
+        names = set().union(*(n for _, n in compiled)) if compiled else set()
+        if condition.operator == "and":
+            return (lambda scope: all(p(scope) for p in predicates)), names
+        if condition.operator == "or":
+            return (lambda scope: any(p(scope) for p in predicates)), names
+        if len(predicates) != 1:
+            raise WorkflowCompileError("'not' takes exactly one condition", step_id)
+        return (lambda scope: not predicates[0](scope)), names
+
+    raise WorkflowCompileError(f"Unsupported condition: {condition!r}", step_id)
+
+
+# ── Concurrency budget ────────────────────────────────────────
+
+class ConcurrencyBudget:
+    """Threads that runs sharing a concurrency_scope may add for concurrent steps and loop iterations."""
+
+    def __init__(self, slots: int):
+        self.slots = max(0, slots)
+        self._free = self.slots
+        self._lock = Lock()
+
+    def take(self, wanted: int) -> int:
+        """Reserve up to `wanted` threads without waiting; returns how many were reserved."""
+        with self._lock:
+            taken = max(0, min(wanted, self._free))
+            self._free -= taken
+            return taken
+
+    def give(self, slots: int) -> None:
+        with self._lock:
+            self._free += slots
+
+    @property
+    def in_use(self) -> int:
+        with self._lock:
+            return self.slots - self._free
+
+
+_budget: contextvars.ContextVar = contextvars.ContextVar("workflow_concurrency_budget", default=None)
+
+
+@contextmanager
+def concurrency_scope(budget: Optional[ConcurrencyBudget]) -> Iterator[None]:
+    """Draw the enclosed runs' concurrent steps and loop iterations from budget (None: no shared bound)."""
+    reset = _budget.set(budget)
+    try:
+        yield
+    finally:
+        _budget.reset(reset)
+
+
+@contextmanager
+def _workers(wanted: int) -> Iterator[int]:
+    """
+    Threads for a fan-out of up to `wanted`: the calling thread, which waits
+    on them, plus whatever the active budget can spare.
+    """
+    budget = _budget.get()
+    if budget is None or wanted <= 1:
+        yield wanted
+        return
+    extra = budget.take(wanted - 1)
+    try:
+        yield 1 + extra
+    finally:
+        budget.give(extra)
+
+
+# ── Run state ─────────────────────────────────────────────────
+
+@dataclass
+class _Frame:
+    """The resource a loop iteration (or the patient, at top level) is about."""
+    resource_id: str
+    details: Optional[dict] = None    # Latest reader result in the frame
+
+
+@dataclass
+class _Run:
+    mrn: Any
+    csn: Any
+    tracker: Optional[CostTracker]
+    scope: Dict[str, Any]
+    stores: Dict[str, Any] = field(default_factory=dict)
+    frames: List[_Frame] = field(default_factory=list)
+    output_values: List[dict] = field(default_factory=list)
+    errors: List[dict] = field(default_factory=list)
+    deferred: Optional[List[tuple]] = None   # Store appends held back by a concurrent iteration
+
+    def iteration(self) -> "_Run":
+        """State for one concurrent loop iteration, isolated from its siblings."""
+        return _Run(
+            mrn=self.mrn,
+            csn=self.csn,
+            tracker=CostTracker() if self.tracker is not None else None,
+            scope=dict(self.scope),
+            stores=self.stores,
+            frames=list(self.frames),
+            deferred=[],
+        )
+
+    def branch(self) -> "_Run":
+        """State for one concurrently scheduled top-level step.
+
+        The step works on a snapshot of the scope taken when it starts; its
+        writes are published when it finishes. Stores are shared (the step
+        graph orders every step that touches one). Outputs, errors and costs
+        are kept apart and merged back in workflow order.
+        """
+        return _Run(
+            mrn=self.mrn,
+            csn=self.csn,
+            tracker=CostTracker() if self.tracker is not None else None,
+            scope=dict(self.scope),
+            stores=self.stores,
+            frames=list(self.frames),
+        )
+
+    def merge(self, other: "_Run") -> None:
+        self.output_values.extend(other.output_values)
+        self.errors.extend(other.errors)
+        if self.tracker is not None:
+            self.tracker.merge(other.tracker)
+
+
+# ── Plan nodes ────────────────────────────────────────────────
+
+@dataclass
+class _OutputBinding:
+    definition: dict
+
+
+class _Node:
+    id: str
+    outputs: List[str]            # Variables the node assigns
+
+    def execute(self, run: _Run) -> None:
+        raise NotImplementedError
+
+
+class _ToolNode(_Node):
+    def __init__(self, step_id: str, tool: Tool, inputs: Dict[str, _Value], output: Optional[str]):
+        self.id = step_id
+        self.tool = tool
+        self.tool_name = tool.name
+        self.inputs = inputs
+        self.output = output
+        self.outputs = [output] if output else []
+        self.refs = set().union(*(v.refs for v in inputs.values())) if inputs else set()
+        self.bindings: List[_OutputBinding] = []
+        self.is_reader = getattr(tool, "role", "compute") == "reader"
+        self.text_inputs = [
+            name for name, info in tool.Input.model_fields.items()
+            if info.annotation in (str, Optional[str]) and name in inputs and inputs[name].refs
+        ]
+
+    def execute(self, run: _Run) -> None:
+        try:
+            values = {name: value.evaluate(run.scope) for name, value in self.inputs.items()}
+            for name in _PATIENT_FIELDS:
+                if name in values and not self.inputs[name].refs:
+                    values[name] = getattr(run, name)
+
+            if self.tool_name in _STORE_TOOLS:
+                result = self._store_op(run, values)
+                if run.tracker is not None:
+                    run.tracker.record(self.tool_name, ToolCallMeta(), 0, step_id=self.id)
+            else:
+                inputs = self._validate(values, run)
+                result = call_tool(self.tool, inputs, run.tracker, step_id=self.id)
+        except (DeadlineExceeded, CallCancelled, WorkflowStepError):
+            raise
+        except Exception as e:
+            raise WorkflowStepError(self.id, e) from e
+
+        if self.output:
+            run.scope[self.output] = result
+        frame = run.frames[-1]
+        if self.is_reader and isinstance(result, (BaseModel, dict)):
+            frame.details = result.model_dump() if isinstance(result, BaseModel) else result
+        for binding in self.bindings:
+            value = _output_value(binding.definition, result, run, frame, self.id)
+            if value is not None:
+                run.output_values.append(value)
+
+    def _validate(self, values: Dict[str, Any], run: _Run) -> BaseModel:
+        if self.tool_name == "build_text":
+            # source may name a store, or reference a list the Input type can't hold
+            source = values.get("source")
+            if isinstance(source, str) and source in run.stores:
+                source = run.stores[source]
+            inputs = self.tool.Input.model_validate({**values, "source": ""})
+            return inputs.model_copy(update={"source": source})
+        for name in self.text_inputs:
+            if name in values:
+                values[name] = _text_content(values[name])
+        return self.tool.Input.model_validate(values)
+
+    def _store_op(self, run: _Run, values: Dict[str, Any]) -> Any:
+        if self.tool_name == "init_store":
+            name, kind = values["name"], values["type"]
+            if kind not in _STORE_TYPES:
+                raise ValueError(f"Unknown store type '{kind}'")
+            run.stores[name] = _STORE_TYPES[kind]()
+            run.scope[name] = run.stores[name]
+            return {"store_name": name, "type": kind, "initialized": True}
+
+        name = values["store"]
+        if name not in run.stores:
+            raise KeyError(f"Store '{name}' is not initialized")
+        store = run.stores[name]
+
+        if self.tool_name == "store_read":
+            key = values.get("key")
+            if isinstance(store, dict) and key is not None:
+                return store.get(key)
+            return store
+
+        value = values.get("value")
+        if isinstance(value, BaseModel):
+            value = value.model_dump()
+        key = values.get("key")
+        if isinstance(store, dict) and key is None:
+            raise ValueError(f"Dict store '{name}' needs a key")
+        append = (name, value, key, values.get("separator", "\n"))
+        if run.deferred is not None:
+            run.deferred.append(append)
+        else:
+            _append_to_store(run, *append)
+        return {"store_name": name, "success": True}
+
+
+def _append_to_store(run: _Run, name: str, value: Any, key: Any, separator: str) -> None:
+    store = run.stores[name]
+    if isinstance(store, list):
+        store.append(value)
+    elif isinstance(store, dict):
+        store[str(key)] = value
+    else:
+        text = _to_text(value)
+        store = f"{store}{separator}{text}" if store else text
+        run.stores[name] = store
+        run.scope[name] = store
+
+
+class _IfNode(_Node):
+    def __init__(self, step_id: str, predicate: Callable[[Dict[str, Any]], bool], refs: Set[str], then: _Node):
+        self.id = step_id
+        self.predicate = predicate
+        self.refs = refs
+        self.then = then
+        self.outputs = list(then.outputs)
+
+    def execute(self, run: _Run) -> None:
+        try:
+            matched = self.predicate(run.scope)
+        except Exception as e:
+            raise WorkflowStepError(self.id, e) from e
+        if matched:
+            self.then.execute(run)
+
+
+class _LoopNode(_Node):
+    def __init__(self, step_id: str, for_var: str, iterable: Callable[[Dict[str, Any]], Any],
+                 refs: Set[str], body: List[_Node], output_dict: Optional[str], max_concurrency: int = 1):
+        self.id = step_id
+        self.for_var = for_var
+        self.iterable = iterable
+        self.refs = refs
+        self.body = body
+        self.output_dict = output_dict
+        self.body_outputs = [name for node in body for name in node.outputs]
+        self.body_names = _assigned_names(body)
+        self.outputs = [output_dict] if output_dict else []
+
+        self.sequential_reason = _sequential_reason(body, for_var)
+        self.max_concurrency = 1 if self.sequential_reason else max(1, max_concurrency)
+        if self.sequential_reason and max_concurrency > 1:
+            logger.debug(f"Loop '{step_id}' runs sequentially: {self.sequential_reason}")
+
+    def execute(self, run: _Run) -> None:
+        try:
+            items = self.iterable(run.scope)
+        except Exception as e:
+            raise WorkflowStepError(self.id, e) from e
+        if isinstance(items, dict):
+            items = list(items.keys())
+        items = list(items or [])
+        keys = [str(item) if isinstance(item, (str, int, float)) else str(index) for index, item in enumerate(items)]
+
+        # Iterations inside a concurrent iteration run sequentially to keep the thread count bounded
+        wanted = min(self.max_concurrency, len(items)) if run.deferred is None else 1
+        with _workers(wanted) as workers:
+            if workers > 1:
+                collected = self._execute_concurrently(run, items, keys, workers)
+            else:
+                collected = self._execute_in_order(run, items, keys)
+
+        if self.output_dict:
+            run.scope[self.output_dict] = collected
+
+    def _execute_in_order(self, run: _Run, items: List[Any], keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        collected = {}
+        # Independent iterations each start from the scope the loop started with, as
+        # concurrent ones do, so a branch skipped in one item can't see the previous item's values
+        initial = {name: run.scope[name] for name in self.body_names if name in run.scope}
+        for key, item in zip(keys, items):
+            if not self.sequential_reason:
+                for name in self.body_names:
+                    if name in initial:
+                        run.scope[name] = initial[name]
+                    else:
+                        run.scope.pop(name, None)
+            self._iterate(run, key, item)
+            if self.output_dict:
+                collected[key] = {name: run.scope.get(name) for name in self.body_outputs}
+        return collected
+
+    def _iterate(self, run: _Run, key: str, item: Any) -> None:
+        run.scope[self.for_var] = item
+        # A nested loop's items belong to the enclosing item; a top-level loop's items stand alone
+        inherited = run.frames[-1].details if len(run.frames) > 1 else None
+        run.frames.append(_Frame(resource_id=key, details=inherited))
+        try:
+            for node in self.body:
+                node.execute(run)
+        except WorkflowStepError as e:
+            logger.error(f"Loop '{self.id}' item {key} abandoned for MRN {run.mrn}: {e}")
+            run.errors.append({"step_id": e.step_id, "item": key, "error": str(e.error)})
+        finally:
+            run.frames.pop()
+
+    def _execute_concurrently(self, run: _Run, items: List[Any], keys: List[str], workers: int) -> Dict[str, Dict[str, Any]]:
+        iterations = [run.iteration() for _ in items]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"loop-{self.id}") as pool:
+            # copy_context() carries the run's deadline scope into each worker
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._iterate, iteration, key, item)
+                for iteration, key, item in zip(iterations, keys, items)
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+        # Merge in item order, exactly as a sequential run would have produced
+        collected: Dict[str, Dict[str, Any]] = {}
+        for key, iteration in zip(keys, iterations):
+            run.merge(iteration)
+            for append in iteration.deferred:
+                _append_to_store(run, *append)
+            if self.output_dict:
+                collected[key] = {name: iteration.scope.get(name) for name in self.body_outputs}
+
+        # Like a sequential loop, leave the last iteration's variables in scope
+        last = iterations[-1].scope
+        for name in self.body_names | {self.for_var}:
+            if name in last:
+                run.scope[name] = last[name]
+        return collected
+
+
+def _assigned_names(nodes: List[_Node]) -> Set[str]:
+    """Every variable the nodes (or steps nested in them) can assign."""
+    names: Set[str] = set()
+    for node in nodes:
+        names.update(node.outputs)
+        if isinstance(node, _IfNode):
+            names |= _assigned_names([node.then])
+        elif isinstance(node, _LoopNode):
+            names |= _assigned_names(node.body) | {node.for_var}
+    return names
+
+
+def _tool_nodes(nodes: List[_Node]) -> List[_ToolNode]:
+    found = []
+    for node in nodes:
+        if isinstance(node, _ToolNode):
+            found.append(node)
+        elif isinstance(node, _IfNode):
+            found += _tool_nodes([node.then])
+        elif isinstance(node, _LoopNode):
+            found += _tool_nodes(node.body)
+    return found
+
+
+def _sequential_reason(body: List[_Node], for_var: str) -> Optional[str]:
+    """
+    Why a loop's iterations must run in order, or None if they are independent.
+
+    Iterations are independent when the body only ever reads variables it
+    has already assigned in the same iteration (or that were set before the
+    loop), never (re)initializes a store, and only appends to stores it does
+    not itself read. Such appends are order-insensitive for the body and are
+    replayed in item order after the loop.
+    """
+    tool_nodes = _tool_nodes(body)
+    appended: Set[str] = set()
+    for node in tool_nodes:
+        if node.tool_name == "init_store":
+            return f"step '{node.id}' initializes a store"
+        if node.tool_name == "store_append":
+            store = node.inputs.get("store")
+            if not isinstance(store, _Const):
+                return f"step '{node.id}' appends to a store chosen at run time"
+            appended.add(store.value)
+
+    for node in tool_nodes:
+        source = node.inputs.get("source") if node.tool_name == "build_text" else None
+        read = node.inputs.get("store") if node.tool_name == "store_read" else source
+        if isinstance(read, _Const) and read.value in appended:
+            return f"step '{node.id}' reads store '{read.value}' that the loop appends to"
+        if not isinstance(read, (_Const, type(None))) and appended:
+            return f"step '{node.id}' reads a store chosen at run time"
+
+    body_names = _assigned_names(body)
+
+    def check(nodes: List[_Node], assigned: Set[str]) -> Optional[str]:
+        """Walk the body in order; assigned holds names definitely set so far this iteration."""
+        for node in nodes:
+            observed = node.refs & appended
+            if observed:
+                return f"step '{node.id}' reads store '{sorted(observed)[0]}' that the loop appends to"
+            carried = (node.refs & body_names) - assigned
+            if carried:
+                return f"step '{node.id}' reads '{sorted(carried)[0]}' from a previous iteration"
+            if isinstance(node, _IfNode):
+                # The branch may not run, so what it assigns stays unknown afterwards
+                reason = check([node.then], set(assigned))
+            elif isinstance(node, _LoopNode):
+                reason = check(node.body, assigned | {node.for_var})
+            else:
+                reason = None
+            if reason:
+                return reason
+            if not isinstance(node, _IfNode):
+                assigned |= set(node.outputs)
+        return None
+
+    return check(body, {for_var})
+
+
+# ── Outputs ───────────────────────────────────────────────────
+
+def _result_values(result: Any) -> dict:
+    if isinstance(result, BaseModel):
+        return result.model_dump()
+    if isinstance(result, dict):
+        return dict(result)
+    return {"value": result}
+
+
+def _output_value(definition: dict, result: Any, run: _Run, frame: _Frame, step_id: str) -> Optional[dict]:
+    """
+    Output value for one execution of a defined step.
+
+    Flag-style results (a flag_state field) are recorded only when the flag
+    is raised, as {"detected": True, ...}, like the hand-written runners.
+    """
+    values = _result_values(result)
+    if "flag_state" in values:
+        if not values.pop("flag_state"):
+            return None
+        values = {"detected": True, **values}
+
+    return create_output_value(
+        output_definition_id=definition["id"],
+        resource_id=frame.resource_id,
+        values=values,
+        metadata={
+            "patient_id": str(run.mrn),
+            "encounter_id": str(run.csn),
+            "resource_details": frame.details or {},
+            "step_id": step_id,
+        }
+    )
+
+
+def _field_type(annotation: Any) -> int:
+    if annotation is bool:
+        return FIELD_TYPE_BOOLEAN
+    if annotation in (int, float):
+        return FIELD_TYPE_NUMERIC
+    return FIELD_TYPE_TEXT
+
+
+def _definition_fields(spec: dict, tool: Tool) -> List[dict]:
+    """Definition fields as declared, else derived from the tool's Output model."""
+    if spec.get("fields"):
+        return [
+            {"name": f["name"], "type": FIELD_TYPE_MAP.get(f.get("type"), f.get("type", FIELD_TYPE_TEXT))}
+            for f in spec["fields"]
+        ]
+    output_model = getattr(tool, "Output", None)
+    if output_model is None:
+        return [{"name": "value", "type": FIELD_TYPE_TEXT}]
+    fields = []
+    for name, info in output_model.model_fields.items():
+        if name == "flag_state":
+            fields.append({"name": "detected", "type": FIELD_TYPE_BOOLEAN})
+        else:
+            fields.append({"name": name, "type": _field_type(info.annotation)})
+    return fields
+
+
+# ── Compiler ──────────────────────────────────────────────────
+
+def _reads_frame(node: _Node) -> bool:
+    """Records output values attributed to the patient frame's resource details."""
+    if isinstance(node, _ToolNode):
+        return bool(node.bindings)
+    if isinstance(node, _IfNode):
+        return _reads_frame(node.then)
+    return False
+
+
+def _writes_frame(node: _Node) -> bool:
+    if isinstance(node, _ToolNode):
+        return node.is_reader
+    if isinstance(node, _IfNode):
+        return _writes_frame(node.then)
+    return False
+
+
+def _plan_graph(steps: List[dict], nodes: List[_Node]) -> StepGraph:
+    """Dependency graph of the top-level nodes, frame details included when something reads them."""
+    infos = describe_steps(steps)
+    if any(_reads_frame(node) for node in nodes):
+        for info, node in zip(infos, nodes):
+            if _reads_frame(node):
+                info.reads.add(_FRAME)
+            if _writes_frame(node):
+                info.writes.add(_FRAME)
+    return graph_from_infos(infos)
+
+
+class CompiledWorkflow:
+    """An execution plan for a workflow; run() it once per patient encounter."""
+
+    def __init__(self, nodes: List[_Node], definitions: List[dict], cascades: list,
+                 graph: Optional[StepGraph] = None, step_concurrency: int = 1):
+        self.nodes = nodes
+        self.definitions = definitions
+        self.cascades = cascades     # CascadeInput of every LLM step that has one
+        self.graph = graph
+        self.step_concurrency = step_concurrency if graph is not None and graph.max_parallelism() > 1 else 1
+
+    def step_tools(self) -> Dict[str, Tool]:
+        """Tool instance of every tool step, nested ones included, by step id."""
+        return {node.id: node.tool for node in _tool_nodes(self.nodes)}
+
+    def run(self, mrn: Any, csn: Any, tracker: Optional[CostTracker] = None) -> Dict[str, Any]:
+        """
+        Execute the plan for one patient encounter.
+
+        Returns:
+            dict: {mrn, csn, output_definitions, output_values, step_errors}
+
+        Raises:
+            WorkflowStepError: If a step outside any loop fails
+            DeadlineExceeded / CallCancelled: From the enclosing deadline_scope
+        """
+        run = _Run(mrn=mrn, csn=csn, tracker=tracker, scope={"mrn": mrn, "csn": csn})
+        run.frames.append(_Frame(resource_id=str(mrn)))
+        with _workers(self.step_concurrency) as workers:
+            if workers > 1:
+                self._execute_concurrently(run, workers)
+            else:
+                for node in self.nodes:
+                    node.execute(run)
+
+        return {
+            "mrn": mrn,
+            "csn": csn,
+            "output_definitions": [dict(d) for d in self.definitions],
+            "output_values": run.output_values,
+            "step_errors": run.errors,
+        }
+
+    def _execute_concurrently(self, run: _Run, workers: int) -> None:
+        """Start each top-level node once its dependencies finish; merge results in workflow order."""
+        nodes = {node.id: node for node in self.nodes}
+        writes = {step.id: step.writes for step in self.graph.steps}
+        branches: Dict[str, _Run] = {}
+        waiting = {step_id: set(deps) for step_id, deps in self.graph.depends_on.items()}
+        dependents = self.graph.dependents()
+        failed: Dict[str, BaseException] = {}
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="workflow-step") as pool:
+            running = {}
+
+            def start(step_id: str) -> None:
+                branches[step_id] = run.branch()
+                # copy_context() carries the run's deadline scope into each worker
+                future = pool.submit(contextvars.copy_context().run, nodes[step_id].execute, branches[step_id])
+                running[future] = step_id
+
+            for node in self.nodes:
+                if not waiting[node.id]:
+                    start(node.id)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step_id = running.pop(future)
+                    if future.exception() is not None:
+                        failed[step_id] = future.exception()
+                        continue
+                    scope = branches[step_id].scope
+                    run.scope.update({name: scope[name] for name in writes[step_id] if name in scope})
+                    if failed:
+                        continue
+                    for dependent in dependents[step_id]:
+                        waiting[dependent].discard(step_id)
+                        if not waiting[dependent]:
+                            start(dependent)
+
+        for node in self.nodes:
+            if node.id in branches:
+                run.merge(branches[node.id])
+        if failed:
+            # The failure a sequential run would have hit first
+            raise next(failed[node.id] for node in self.nodes if node.id in failed)
+
+
+class _Compiler:
+    def __init__(self, dataset: Optional[str], key_name: Optional[str], current_user: Optional[str],
+                 default_cascade: Optional[dict]):
+        self.dataset = dataset
+        self.key_name = key_name
+        self.current_user = current_user
+        self.default_cascade = default_cascade
+        self.tools: Dict[str, Tool] = {}
+        self.tool_nodes: List[_ToolNode] = []
+        self.step_ids: Set[str] = set()
+        self.cascades: list = []
+        self.loop_concurrency = WORKFLOW_LOOP_MAX_CONCURRENCY
+
+    def tool(self, name: str, step_id: str) -> Tool:
+        if name not in self.tools:
+            try:
+                self.tools[name] = create_tool(name, self.dataset)
+            except KeyError:
+                if not self.current_user:
+                    raise WorkflowCompileError(f"Unknown tool '{name}'", step_id)
+                try:
+                    self.tools[name] = resolve_tool(name, self.current_user)
+                except KeyError:
+                    raise WorkflowCompileError(f"Unknown tool '{name}'", step_id)
+        return self.tools[name]
+
+    def steps(self, steps: List[dict], variables: Set[str]) -> List[_Node]:
+        return [self.step(step, variables) for step in steps]
+
+    def step(self, step: dict, variables: Set[str]) -> _Node:
+        step_id = step.get("id")
+        if not step_id:
+            raise WorkflowCompileError("Every step needs an id")
+        if step_id in self.step_ids:
+            raise WorkflowCompileError("Duplicate step id", step_id)
+        self.step_ids.add(step_id)
+
+        kind = step.get("type", "tool")
+        if kind == "tool":
+            return self.tool_step(step, variables)
+        if kind == "if":
+            try:
+                condition = _condition_adapter.validate_python(step.get("condition"))
+            except ValidationError as e:
+                raise WorkflowCompileError(f"Invalid condition: {e}", step_id)
+            predicate, refs = _compile_condition(condition, variables, step_id)
+            then = step.get("then")
+            if isinstance(then, list):
+                if len(then) != 1:
+                    raise WorkflowCompileError("'then' must be a single step", step_id)
+                then = then[0]
+            if not isinstance(then, dict):
+                raise WorkflowCompileError("Missing 'then' step", step_id)
+            return _IfNode(step_id, predicate, refs, self.step(then, variables))
+        if kind == "loop":
+            for_var = step.get("for") or step.get("for_var")
+            in_expr = step.get("in") or step.get("in_expr")
+            if not for_var or not in_expr:
+                raise WorkflowCompileError("Loops need 'for' and 'in'", step_id)
+            expr = _strip_reference(in_expr)
+            iterable = _compile_expression(expr, step_id)
+            refs = {name for name in _IDENTIFIER.findall(expr) if name in variables}
+            body = self.steps(step.get("body") or [], variables)
+            return _LoopNode(step_id, for_var, iterable, refs, body, step.get("output_dict"), self.loop_concurrency)
+        raise WorkflowCompileError(f"Unknown step type '{kind}'", step_id)
+
+    def tool_step(self, step: dict, variables: Set[str]) -> _ToolNode:
+        step_id = step["id"]
+        tool = self.tool(step.get("tool"), step_id)
+        raw_inputs = dict(step.get("inputs") or {})
+        input_fields = tool.Input.model_fields
+
+        missing = [
+            name for name, info in input_fields.items()
+            if info.is_required() and name not in raw_inputs and name not in _PATIENT_FIELDS
+        ]
+        if missing:
+            raise WorkflowCompileError(f"Missing inputs for '{tool.name}': {', '.join(missing)}", step_id)
+
+        for name in _PATIENT_FIELDS:
+            if name in input_fields and name not in raw_inputs:
+                raw_inputs[name] = None
+
+        if "model" in input_fields and self.key_name:
+            model = raw_inputs.get("model") if isinstance(raw_inputs.get("model"), dict) else {}
+            cascade = model.get("cascade") or self.default_cascade
+            try:
+                model_input = ModelInput(key_name=self.key_name, cascade=cascade)
+            except ValidationError as e:
+                raise WorkflowCompileError(f"Invalid model input: {e}", step_id)
+            if model_input.cascade is not None:
+                self.cascades.append(model_input.cascade)
+            raw_inputs["model"] = model_input.model_dump()
+
+        inputs = {name: _compile_value(value, variables, step_id) for name, value in raw_inputs.items()}
+        node = _ToolNode(step_id, tool, inputs, step.get("output"))
+        self.tool_nodes.append(node)
+        return node
+
+    def bind_outputs(self, specs: List[dict]) -> List[dict]:
+        """Attach output definitions to their steps (by step_id, else in order by tool_name)."""
+        if not specs:
+            specs = [
+                {"name": node.id, "label": node.id, "step_id": node.id, "tool_name": node.tool_name}
+                for node in self.tool_nodes
+                if getattr(node.tool, "role", "compute") == "compute" and node.tool_name not in _STORE_TOOLS
+            ]
+
+        nodes_by_id = {node.id: node for node in self.tool_nodes}
+        bound: Set[str] = set()
+        definitions = []
+        for spec in specs:
+            node = nodes_by_id.get(spec.get("step_id")) if spec.get("step_id") else None
+            if node is None and spec.get("step_id"):
+                raise WorkflowCompileError(f"Output '{spec.get('name')}' references unknown step '{spec['step_id']}'")
+            if node is None:
+                node = next(
+                    (n for n in self.tool_nodes if n.tool_name == spec.get("tool_name") and n.id not in bound),
+                    None,
+                )
+            if node is None:
+                raise WorkflowCompileError(f"Output '{spec.get('name')}' matches no step")
+            bound.add(node.id)
+
+            category = getattr(node.tool, "category", None)
+            definition = create_output_definition(
+                name=spec["name"],
+                label=spec.get("label") or spec["name"],
+                resource_type=_RESOURCE_TYPE_BY_CATEGORY.get(category, RESOURCE_TYPE_PATIENT),
+                fields=_definition_fields(spec, node.tool),
+                metadata={"step_id": node.id, "tool_name": node.tool_name, **(spec.get("metadata") or {})},
+            )
+            if spec.get("id"):
+                definition["id"] = spec["id"]
+            node.bindings.append(_OutputBinding(definition))
+            definitions.append(definition)
+        return definitions
+
+
+def compile_workflow(
+    workflow: Dict[str, Any],
+    dataset: Optional[str] = None,
+    key_name: Optional[str] = None,
+    current_user: Optional[str] = None,
+    default_cascade: Optional[dict] = None,
+    loop_concurrency: Optional[int] = None,
+    step_concurrency: Optional[int] = None,
+) -> CompiledWorkflow:
+    """
+    Compile a workflow definition into an execution plan.
+
+    Args:
+        workflow: Workflow dict ({"steps": [...], "output_definitions": [...]}),
+            e.g. a saved definition's raw_workflow
+        dataset: Dataset the tools read from (tool default when None)
+        key_name: Managed API key for every LLM step
+        current_user: Owner whose custom tools may be used
+        default_cascade: Model cascade for LLM steps that don't configure one
+        loop_concurrency: Iterations of an independent loop run at once
+            (WORKFLOW_LOOP_MAX_CONCURRENCY when None; 1 runs every loop in order)
+        step_concurrency: Independent top-level steps run at once
+            (WORKFLOW_STEP_MAX_CONCURRENCY when None; 1 runs them in order)
+
+    Raises:
+        WorkflowCompileError: On unknown tools or step types, missing inputs,
+            duplicate step ids, invalid expressions or unmatched output definitions
+    """
+    steps = workflow.get("steps") or []
+    if not steps:
+        raise WorkflowCompileError("Workflow has no steps")
+
+    compiler = _Compiler(dataset, key_name, current_user, default_cascade)
+    if loop_concurrency is not None:
+        compiler.loop_concurrency = loop_concurrency
+    nodes = compiler.steps(steps, workflow_variables(steps))
+    definitions = compiler.bind_outputs(workflow.get("output_definitions") or [])
+    graph = _plan_graph(steps, nodes)
+    concurrency = WORKFLOW_STEP_MAX_CONCURRENCY if step_concurrency is None else step_concurrency
+    return CompiledWorkflow(nodes, definitions, compiler.cascades, graph, max(1, concurrency))
@@ -0,0 +1,129 @@
+"""
+Migration script to bring existing experiments to the values-log results layout.
+
+Usage: python -m scripts.migrate_results_log
+
+This script will:
+1. Scan all experiments in the experiments/ directory
+2. Skip experiments a worker is running right now
+3. Fold any values log (values.jsonl, definitions.json) left by an
+   interrupted run into results.json, keeping each patient's latest values
+4. Recount total_patients and total_encounters in metadata.json
+5. Create a backup of the original file as results_backup.json
+
+Experiments with only a results.json already read correctly; running this
+makes their counts consistent and leaves no log behind to replay.
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+
+from core.dataloaders.experiment_results_loader import (
+    DEFINITIONS_FILE, RESULTS_FILE, VALUES_LOG_FILE, compact_results, read_results
+)
+from core.dataloaders.job_queue_loader import ACTIVE_STATES, get_job
+
+# Get the directory where this script is located, then go up to the backend
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)
+EXPERIMENTS_DIR = os.path.join(BACKEND_DIR, "experiments")
+
+
+def migrate_experiment(experiment_name: str) -> bool:
+    """Compact one experiment's results and recount its metadata. Returns True if it was migrated."""
+    experiment_path = os.path.join(EXPERIMENTS_DIR, experiment_name)
+    results_path = os.path.join(experiment_path, RESULTS_FILE)
+    metadata_path = os.path.join(experiment_path, "metadata.json")
+
+    if not (os.path.exists(results_path) and os.path.exists(metadata_path)):
+        print(f"  No results.json or metadata.json found, skipping")
+        return False
+
+    job = get_job(experiment_name)
+    if job and job["state"] in ACTIVE_STATES:
+        print(f"  Experiment is {job['state']}, skipping")
+        return False
+
+    has_log = any(
+        os.path.exists(os.path.join(experiment_path, f)) for f in (VALUES_LOG_FILE, DEFINITIONS_FILE)
+    )
+    if has_log:
+        shutil.copy2(results_path, os.path.join(experiment_path, "results_backup.json"))
+        print(f"  Created backup: results_backup.json")
+        compact_results(experiment_name)
+        print(f"  Folded values log into results.json")
+
+    results = read_results(experiment_name) or {}
+    patients_seen = set()
+    encounters_seen = set()
+    for v in results.get("output_values", []):
+        patient_id = v.get("metadata", {}).get("patient_id", "")
+        encounter_id = v.get("metadata", {}).get("encounter_id", "")
+        if patient_id:
+            patients_seen.add(str(patient_id))
+        if patient_id and encounter_id:
+            encounters_seen.add((str(patient_id), str(encounter_id)))
+
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+
+    counts = {"total_patients": len(patients_seen), "total_encounters": len(encounters_seen)}
+    if not has_log and all(metadata.get(k) == v for k, v in counts.items()):
+        print(f"  Already up to date, skipping")
+        return False
+
+    metadata.update(counts)
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    print(f"  {counts['total_patients']} patients, {counts['total_encounters']} encounters")
+    return True
+
+
+def main():
+    """Migrate all experiments to the values-log results layout."""
+    print(f"Migration script started at {datetime.now().isoformat()}")
+    print(f"Scanning {EXPERIMENTS_DIR}/ directory...\n")
+
+    if not os.path.exists(EXPERIMENTS_DIR):
+        print("No experiments directory found, nothing to migrate")
+        return
+
+    # The loaders resolve experiments/ and job_queue/ relative to the backend directory
+    os.chdir(BACKEND_DIR)
+
+    experiments = [
+        d for d in os.listdir(EXPERIMENTS_DIR)
+        if os.path.isdir(os.path.join(EXPERIMENTS_DIR, d))
+    ]
+
+    print(f"Found {len(experiments)} experiment(s)\n")
+
+    migrated = 0
+    skipped = 0
+    failed = 0
+
+    for exp_name in sorted(experiments):
+        print(f"Processing: {exp_name}")
+
+        try:
+            if migrate_experiment(exp_name):
+                migrated += 1
+            else:
+                skipped += 1
+        except Exception as e:
+            print(f"  Error: {e}")
+            failed += 1
+
+        print()
+
+    print("=" * 50)
+    print(f"Migration complete:")
+    print(f"  - Migrated: {migrated}")
+    print(f"  - Skipped:  {skipped}")
+    print(f"  - Failed:   {failed}")
+    print(f"\nFinished at {datetime.now().isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
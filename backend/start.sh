@@ -14,5 +14,10 @@ else
     echo "Virtual environment already active: ${VIRTUAL_ENV}"
 fi
 
+# Run the experiment worker alongside the API (the API only queues experiments)
+python worker.py &
+WORKER_PID=$!
+trap 'kill $WORKER_PID' EXIT
+
 # Run the application
 uvicorn app:app --host 0.0.0.0 --port 8000 --reload 
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""Benchmark per-call client overhead: fresh SDK client per call vs pooled clients.
+
+Starts a local mock HTTP server that speaks just enough of the OpenAI
+chat-completions and Anthropic messages APIs, then times provider calls
+made with a per-call api_key (the managed-key path). No network access or
+real keys are needed.
+
+Usage:
+    cd backend/tester_codes
+    python bench_client_pool.py --calls 200
+"""
+
+import sys
+sys.path.append('../')
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OPENAI_RESPONSE = {
+    "id": "chatcmpl-mock",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "mock",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "4"},
+        "finish_reason": "stop",
+    }],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+}
+
+ANTHROPIC_RESPONSE = {
+    "id": "msg_mock",
+    "type": "message",
+    "role": "assistant",
+    "model": "mock",
+    "content": [{"type": "text", "text": "4"}],
+    "stop_reason": "end_turn",
+    "stop_sequence": None,
+    "usage": {"input_tokens": 10, "output_tokens": 1},
+}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+    wbufsize = 65536  # send headers + body in one write (flushed per request)
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        MockHandler.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        if self.path.endswith("/chat/completions"):
+            body = json.dumps(OPENAI_RESPONSE).encode()
+        elif self.path.endswith("/messages"):
+            body = json.dumps(ANTHROPIC_RESPONSE).encode()
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def time_calls(fn, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings, connections):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(timings):7.2f} ms   "
+          f"p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms   "
+          f"connections {connections}")
+
+
+def bench_openai(calls):
+    from openai import OpenAI
+    from core.llm_provider.providers.openai_provider import OpenAIProvider
+
+    provider = OpenAIProvider()
+    messages = [{"role": "user", "content": "What is 2+2?"}]
+
+    # Pre-pool behaviour: a new SDK client (and connection pool) per call
+    unpooled = OpenAIProvider()
+    unpooled._get_client = lambda api_key=None, timeout=None: OpenAI(api_key=api_key)
+
+    MockHandler.connections = 0
+    fresh = time_calls(
+        lambda: unpooled.call("mock", messages, temperature=0, max_tokens=16, api_key="sk-bench"),
+        calls,
+    )
+    report("openai fresh client", fresh, MockHandler.connections)
+
+    MockHandler.connections = 0
+    pooled = time_calls(
+        lambda: provider.call("mock", messages, temperature=0, max_tokens=16, api_key="sk-bench"),
+        calls,
+    )
+    report("openai pooled client", pooled, MockHandler.connections)
+
+
+def bench_anthropic(calls):
+    from anthropic import Anthropic
+    from core.llm_provider.providers.anthropic_provider import AnthropicProvider
+
+    provider = AnthropicProvider()
+    messages = [{"role": "user", "content": "What is 2+2?"}]
+
+    unpooled = AnthropicProvider()
+    unpooled._get_client = lambda api_key=None, timeout=None: Anthropic(api_key=api_key)
+
+    MockHandler.connections = 0
+    fresh = time_calls(
+        lambda: unpooled.call("mock", messages, temperature=0, max_tokens=16, api_key="sk-ant-bench"),
+        calls,
+    )
+    report("anthropic fresh client", fresh, MockHandler.connections)
+
+    MockHandler.connections = 0
+    pooled = time_calls(
+        lambda: provider.call("mock", messages, temperature=0, max_tokens=16, api_key="sk-ant-bench"),
+        calls,
+    )
+    report("anthropic pooled client", pooled, MockHandler.connections)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark pooled LLM provider clients')
+    parser.add_argument('--calls', type=int, default=200, help='Calls per scenario')
+    parser.add_argument('--provider', choices=['openai', 'anthropic', 'all'], default='all')
+    args = parser.parse_args()
+
+    server = start_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["OPENAI_BASE_URL"] = f"{base}/v1"
+    os.environ["ANTHROPIC_BASE_URL"] = base
+
+    print(f"Mock server at {base}, {args.calls} calls per scenario\n")
+    if args.provider in ('openai', 'all'):
+        bench_openai(args.calls)
+    if args.provider in ('anthropic', 'all'):
+        bench_anthropic(args.calls)
+
+    from core.llm_provider import client_pool_stats
+    print(f"\nPool stats: {client_pool_stats()}")
+    server.shutdown()
@@ -0,0 +1,57 @@
+"""Tests for the Anthropic provider's prompt caching and cache pricing (no API calls)."""
+
+import os
+import sys
+from types import SimpleNamespace
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.llm_provider.providers.anthropic_provider import AnthropicProvider, _usage_tokens
+from core.llm_provider.registry import calculate_cost, get_model
+
+SONNET = "claude-sonnet-4-20250514"
+LONG_SYSTEM = "Follow the SDOH annotation guideline. " * 200   # ~1900 tokens
+FEW_SHOT = [
+    {"role": "user", "content": "Example note: " + "lives alone. " * 400},
+    {"role": "assistant", "content": "social_isolation"},
+]
+
+
+def _kwargs(model, system, messages):
+    return AnthropicProvider()._build_kwargs(model, messages, system, 1.0, 100, None, None, "auto")
+
+
+def test_long_system_prompt_and_few_shot_prefix_get_breakpoints():
+    messages = FEW_SHOT + [{"role": "user", "content": "The note to label"}]
+
+    kwargs = _kwargs(SONNET, LONG_SYSTEM, messages)
+
+    assert kwargs["system"] == [{"type": "text", "text": LONG_SYSTEM, "cache_control": {"type": "ephemeral"}}]
+    assert kwargs["messages"][1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in str(kwargs["messages"][2])
+    # The caller's messages are left as they were
+    assert messages[1]["content"] == "social_isolation"
+
+
+def test_short_prefixes_are_not_marked():
+    kwargs = _kwargs(SONNET, "Be brief.", [{"role": "user", "content": "hi"}])
+    assert kwargs["system"] == "Be brief."
+
+    # Haiku needs twice as long a prefix
+    kwargs = _kwargs("claude-3-5-haiku-20241022", LONG_SYSTEM[:6000], [{"role": "user", "content": "hi"}])
+    assert isinstance(kwargs["system"], str)
+
+
+def test_cached_prompt_tokens_are_billed_at_cache_prices():
+    usage = SimpleNamespace(input_tokens=100, cache_read_input_tokens=2000, cache_creation_input_tokens=0)
+    tokens = _usage_tokens(usage)
+    assert tokens == {"input_tokens": 2100, "cache_read_tokens": 2000, "cache_write_tokens": 0}
+
+    config = get_model("claude-sonnet")
+    uncached = calculate_cost(2100, 50, config)
+    read = calculate_cost(2100, 50, config, cache_read_tokens=2000)
+    written = calculate_cost(2100, 50, config, cache_write_tokens=2000)
+
+    assert read == round((100 * 3.0 + 2000 * 0.3 + 50 * 15.0) / 1_000_000, 6)
+    assert read < uncached < written
@@ -0,0 +1,76 @@
+"""Tests for the async LLM API (acall / astream) on the mock provider."""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+from pydantic import BaseModel
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.llm_provider.client as llm_client
+from core.llm_provider import acall, astream
+from core.llm_provider.deadline import CallCancelled, CancellationToken, deadline_scope
+
+
+class Finding(BaseModel):
+    present: bool
+    reason: str
+
+
+def _key(monkeypatch, name, settings):
+    monkeypatch.setitem(llm_client._resolved_keys, name, {
+        "model_name": "mock", "api_key": f"mock:{settings}", "key_name": name, "key_id": "k",
+        "rpm_limit": None, "tpm_limit": None, "max_concurrency": None,
+    })
+    return name
+
+
+def _messages(i):
+    return [{"role": "user", "content": f"note {i}"}]
+
+
+def test_many_acalls_share_one_event_loop(monkeypatch):
+    key = _key(monkeypatch, "slow", "latency_ms=300,sigma=0")
+
+    async def run():
+        return await asyncio.gather(*(acall(_messages(i), key_name=key, schema=Finding, cache=False)
+                                      for i in range(20)))
+
+    started = time.monotonic()
+    results = asyncio.run(run())
+
+    # Twenty 300ms calls in flight together, not one after another
+    assert time.monotonic() - started < 3
+    assert all(isinstance(r.parsed, Finding) and r.api_key_name == "slow" for r in results)
+
+
+def test_astream_ends_with_the_complete_result(monkeypatch):
+    key = _key(monkeypatch, "fast", "latency_ms=0,sigma=0")
+
+    async def run():
+        return [chunk async for chunk in astream(_messages(1), key_name=key, schema=Finding)]
+
+    chunks = asyncio.run(run())
+
+    final = chunks[-1]
+    assert final.is_final and not any(c.is_final for c in chunks[:-1])
+    assert "".join(c.content for c in chunks) == final.result.content
+    assert isinstance(final.result.parsed, Finding)
+    assert final.result.output_tokens > 0
+
+
+def test_cancelled_acall_is_never_sent(monkeypatch):
+    key = _key(monkeypatch, "slow", "latency_ms=5000,sigma=0")
+    token = CancellationToken()
+    token.cancel("stop")
+
+    async def run():
+        with deadline_scope(token=token):
+            await acall(_messages(1), key_name=key, cache=False)
+
+    with pytest.raises(CallCancelled, match="stop"):
+        asyncio.run(run())
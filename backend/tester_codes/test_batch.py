@@ -0,0 +1,128 @@
+"""Tests for provider batch jobs, run through the file-based LocalBatchClient and the mock model."""
+
+import os
+import sys
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pydantic import BaseModel
+
+import core.llm_provider.client as llm_client
+import core.llm_provider.retry as retry
+from core.llm_provider.batch import LocalBatchClient, run_batch
+from core.llm_provider.deadline import CancellationToken, CallCancelled, deadline_scope
+from core.llm_provider.providers.mock_provider import MockAPIError
+
+
+class Flag(BaseModel):
+    detected: bool
+    reason: str
+
+
+@pytest.fixture(autouse=True)
+def mock_key(monkeypatch):
+    """A managed key on the mock model, and retries without real backoff."""
+    monkeypatch.setitem(llm_client._resolved_keys, "m", {
+        "model_name": "mock", "api_key": "mock:seed=3", "key_name": "m", "key_id": "k",
+        "rpm_limit": None, "tpm_limit": None, "max_concurrency": None,
+    })
+    monkeypatch.setattr(retry, "LLM_RETRY_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(retry, "LLM_RETRY_MAX_SECONDS", 0.001)
+
+
+def _requests(count, **extra):
+    return [{"key_name": "m", "messages": [{"role": "user", "content": f"note {i}"}], "schema": Flag, **extra}
+            for i in range(count)]
+
+
+class FlakyClient(LocalBatchClient):
+    """LocalBatchClient whose status polls fail with the given errors first."""
+
+    def __init__(self, root, errors=()):
+        super().__init__("mock", root=root)
+        self.errors = list(errors)
+        self.submitted = []
+        self.cancelled = []
+
+    def submit(self, lines, api_key):
+        job_id = super().submit(lines, api_key)
+        self.submitted.append(job_id)
+        return job_id
+
+    def status(self, job_id, api_key):
+        if self.errors:
+            raise self.errors.pop(0)
+        return super().status(job_id, api_key)
+
+    def cancel(self, job_id, api_key):
+        self.cancelled.append(job_id)
+        super().cancel(job_id, api_key)
+
+
+def test_results_map_back_to_their_requests(tmp_path):
+    requests = _requests(5)
+    requests.insert(2, {"key_name": "m", "messages": [], "tools": []})
+
+    batch = run_batch(requests, batch_client=LocalBatchClient("mock", root=str(tmp_path)), poll_interval=0)
+
+    assert [item.index for item in batch.items] == list(range(6))
+    assert "Unsupported batch request fields" in str(batch.items[2].error)
+    for item in batch.items[:2] + batch.items[3:]:
+        assert isinstance(item.result.parsed, Flag)
+        assert item.result.input_tokens > 0
+    assert len({item.result.content for item in batch.items if item.ok}) == 5
+
+
+def test_transient_poll_errors_are_retried(tmp_path):
+    client = FlakyClient(str(tmp_path), errors=[MockAPIError(503, "unavailable"), MockAPIError(502, "bad gateway")])
+
+    batch = run_batch(_requests(3), batch_client=client, poll_interval=0)
+
+    assert not batch.errors
+    assert client.cancelled == []
+
+
+def test_job_that_cannot_be_polled_fails_its_requests_and_is_cancelled(tmp_path):
+    client = FlakyClient(str(tmp_path), errors=[MockAPIError(401, "invalid key")])
+
+    batch = run_batch(_requests(3), batch_client=client, poll_interval=0)
+
+    assert [str(item.error) for item in batch.items] == ["invalid key"] * 3
+    assert client.cancelled == client.submitted
+
+
+def test_jobs_left_running_are_re_attached(tmp_path):
+    client = FlakyClient(str(tmp_path))
+    token = CancellationToken()
+    submitted = []
+
+    def on_submit(jobs):
+        submitted.extend(jobs)
+        token.cancel("Worker shutting down")
+
+    with deadline_scope(None, token=token):
+        first = run_batch(_requests(3), batch_client=client, poll_interval=0,
+                          on_submit=on_submit, leave_running=lambda: True)
+    assert all(isinstance(item.error, CallCancelled) for item in first.items)
+    assert client.cancelled == []
+    assert submitted == [{"id": client.submitted[0], "key_name": "m", "requests": [0, 1, 2]}]
+
+    second = run_batch(_requests(3), batch_client=client, poll_interval=0, attach=submitted)
+
+    assert not second.errors
+    assert len(client.submitted) == 1
+
+
+def test_cancelled_run_cancels_its_jobs(tmp_path):
+    client = FlakyClient(str(tmp_path))
+    token = CancellationToken()
+
+    with deadline_scope(None, token=token):
+        batch = run_batch(_requests(2), batch_client=client, poll_interval=0,
+                          on_submit=lambda jobs: token.cancel("Experiment cancelled"), leave_running=lambda: False)
+
+    assert all(isinstance(item.error, CallCancelled) for item in batch.items)
+    assert client.cancelled == client.submitted
@@ -0,0 +1,72 @@
+"""Tests for call_many's bounded-concurrency fan-out."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.llm_provider.client as llm_client
+from core.llm_provider import call_many
+from core.llm_provider.deadline import DeadlineExceeded, deadline_scope
+
+
+def _requests(n, key="m"):
+    return [{"messages": [{"role": "user", "content": f"note {i}"}], "key_name": key, "cache": False}
+            for i in range(n)]
+
+
+def test_results_keep_input_order_and_failures_stay_isolated(monkeypatch):
+    monkeypatch.setitem(llm_client._resolved_keys, "m", {
+        "model_name": "mock", "api_key": "mock:latency_ms=0,sigma=0", "key_name": "m", "key_id": "k",
+        "rpm_limit": None, "tpm_limit": None, "max_concurrency": None,
+    })
+    requests = _requests(5)
+    requests[2] = dict(requests[2], key_name="missing")
+
+    batch = call_many(requests, max_concurrency=3)
+
+    assert [item.index for item in batch.errors] == [2]
+    assert isinstance(batch.items[2].error, ValueError)
+    assert [r is None for r in batch.results] == [False, False, True, False, False]
+    assert batch.input_tokens == sum(r.input_tokens for r in batch.results if r)
+
+
+def test_no_more_than_max_concurrency_calls_run_at_once():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_call(index):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return index
+
+    batch = call_many([{"index": i} for i in range(12)], max_concurrency=3, call_fn=fake_call)
+
+    assert batch.results == list(range(12))
+    assert peak[0] == 3
+
+
+def test_requests_not_started_by_the_deadline_fail():
+    def slow_call(index):
+        time.sleep(0.3)
+        return index
+
+    with deadline_scope(0.1):
+        batch = call_many([{"index": i} for i in range(4)], max_concurrency=1, call_fn=slow_call)
+
+    assert batch.results[0] == 0
+    assert all(isinstance(item.error, DeadlineExceeded) for item in batch.items[1:])
+
+
+def test_streaming_requests_are_rejected():
+    with pytest.raises(ValueError, match="stream=True"):
+        call_many([dict(_requests(1)[0], stream=True)])
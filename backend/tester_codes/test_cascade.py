@@ -0,0 +1,85 @@
+"""Tests for the cheap-then-strong model cascade on priced mock models."""
+
+import dataclasses
+import os
+import sys
+
+import pytest
+from pydantic import BaseModel
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.llm_provider.client as llm_client
+import core.llm_provider.registry as registry
+from core.llm_provider import CascadePolicy, cascade_call
+from core.workflow.tools.base import meta_from_llm_result
+from core.workflow_service.utils import CostTracker
+
+MESSAGES = [{"role": "user", "content": "Does the note mention housing instability?"}]
+
+
+class Flag(BaseModel):
+    flag_state: bool
+    reason: str
+
+
+@pytest.fixture(autouse=True)
+def keys(monkeypatch):
+    """A cheap and a strong mock key, priced like gpt-4o-mini and gpt-4o."""
+    for name, (input_price, output_price) in {"cheap": (0.15, 0.6), "strong": (2.5, 10.0)}.items():
+        monkeypatch.setitem(registry.MODELS, f"{name}-mock", dataclasses.replace(
+            registry.MODELS["mock"], input_price_per_m=input_price, output_price_per_m=output_price))
+        monkeypatch.setitem(llm_client._resolved_keys, name, {
+            "model_name": f"{name}-mock", "api_key": "mock:latency_ms=0,sigma=0", "key_name": name,
+            "key_id": name, "rpm_limit": None, "tpm_limit": None, "max_concurrency": None,
+        })
+
+
+def _cascade(policy):
+    return cascade_call(policy, MESSAGES, key_name="strong", schema=Flag, cache=False)
+
+
+def test_confident_cheap_answer_is_accepted_and_saves_against_the_strong_model():
+    result = _cascade(CascadePolicy(cheap_key="cheap", min_confidence=0.0))
+
+    cascade = result.cascade
+    assert (cascade["escalated"], cascade["reason"]) == (False, None)
+    assert 0 <= cascade["confidence"] <= 1
+    assert [c["api_key_name"] for c in cascade["calls"]] == ["cheap"]
+    # The confidence field asked of the cheap model is not part of the answer
+    assert type(result.parsed) is Flag
+    assert 0 < result.cost < cascade["baseline_cost"]
+
+
+def test_unsure_cheap_answer_escalates_and_bills_both_calls():
+    result = _cascade(CascadePolicy(cheap_key="cheap", min_confidence=1.01))
+
+    cascade = result.cascade
+    assert (cascade["escalated"], cascade["reason"]) == (True, "low_confidence")
+    cheap, strong = cascade["calls"]
+    assert (cheap["api_key_name"], strong["api_key_name"]) == ("cheap", "strong")
+    assert result.cost == round(cheap["cost"] + strong["cost"], 6)
+    assert cascade["baseline_cost"] == strong["cost"]
+
+
+def test_failed_cheap_call_escalates():
+    result = _cascade(CascadePolicy(cheap_key="missing"))
+
+    assert (result.cascade["escalated"], result.cascade["reason"]) == (True, "error")
+    assert result.api_key_name == "strong"
+
+
+def test_tracker_reports_escalation_rate_and_savings():
+    tracker = CostTracker()
+    accepted = _cascade(CascadePolicy(cheap_key="cheap", min_confidence=0.0))
+    escalated = _cascade(CascadePolicy(cheap_key="cheap", min_confidence=1.01))
+    for result in (accepted, escalated):
+        tracker.record("analyze", meta_from_llm_result(result), 0)
+
+    summary = tracker.summary()["cascade"]["analyze"]
+    assert (summary["calls"], summary["escalations"], summary["escalation_rate"]) == (2, 1, 0.5)
+    assert summary["reasons"] == {"low_confidence": 1}
+    assert summary["savings"] == pytest.approx(
+        accepted.cascade["baseline_cost"] + escalated.cascade["baseline_cost"] - accepted.cost - escalated.cost)
+    assert set(tracker.summary()["api_key_costs"]) == {"cheap", "strong"}
@@ -0,0 +1,62 @@
+"""Tests for the precomputed tool catalog artifact."""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.workflow.tools.catalog_artifact as catalog_artifact
+from core.workflow.tools.registry import _TOOL_MODULES, _build_input_schema, _build_output_schema, load_tool_class
+
+
+@pytest.fixture
+def artifact_dir(tmp_path, monkeypatch):
+    """A scratch artifact directory and no artifact loaded in memory."""
+    monkeypatch.setattr(catalog_artifact, "TOOL_CATALOG_DIR", str(tmp_path))
+    monkeypatch.setattr(catalog_artifact, "_artifact", None)
+    monkeypatch.setenv("TOOL_CATALOG_VERSION", "test-v1")
+    return tmp_path
+
+
+def test_artifact_describes_every_tool_like_the_tool_itself():
+    artifact = catalog_artifact.build_artifact("test")
+
+    assert set(artifact["classes"].values()) == set(_TOOL_MODULES)
+    for item in artifact["catalog"]:
+        tool = load_tool_class(artifact["classes"][item["name"]])()
+        assert item["input_schema"] == _build_input_schema(tool)
+        assert item["output_schema"] == _build_output_schema(tool)
+    # Round-trips through JSON unchanged, as it is served from disk
+    assert json.loads(json.dumps(artifact)) == artifact
+
+
+def test_written_artifact_is_reused_without_importing_tools(artifact_dir, monkeypatch):
+    built = catalog_artifact.load_artifact()
+    assert (artifact_dir / "catalog-test-v1.json").exists()
+
+    def fail(version=None):
+        raise AssertionError("artifact was rebuilt")
+
+    monkeypatch.setattr(catalog_artifact, "_artifact", None)
+    monkeypatch.setattr(catalog_artifact, "build_artifact", fail)
+    assert catalog_artifact.load_artifact() == built
+
+
+def test_artifact_for_another_version_is_rebuilt(artifact_dir, monkeypatch):
+    catalog_artifact.load_artifact()
+    path = catalog_artifact.artifact_path("test-v1")
+    with open(path) as f:
+        stale = json.load(f)
+    stale.update(version="old", catalog=[])
+    with open(path, "w") as f:
+        json.dump(stale, f)
+
+    monkeypatch.setattr(catalog_artifact, "_artifact", None)
+    reloaded = catalog_artifact.load_artifact()
+
+    assert reloaded["version"] == "test-v1"
+    assert len(reloaded["catalog"]) == len(_TOOL_MODULES)
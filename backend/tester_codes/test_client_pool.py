@@ -0,0 +1,72 @@
+"""Tests for the pooled provider SDK clients."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.llm_provider.client_pool as client_pool
+from core.llm_provider.client_pool import clear_client_pool, client_pool_stats, get_pooled_client
+from core.llm_provider.providers.openai_provider import OpenAIProvider
+
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def empty_pool():
+    clear_client_pool()
+    yield
+    clear_client_pool()
+
+
+def test_calls_with_one_key_share_a_client_and_its_connections():
+    provider = OpenAIProvider()
+
+    first = provider._get_client("sk-one")
+    again = provider._get_client("sk-one", timeout=5)
+    other = provider._get_client("sk-two")
+
+    assert again._client is first._client
+    assert other is not first
+    stats = client_pool_stats()
+    assert (stats["hits"], stats["misses"], stats["by_provider"]) == (1, 2, {"openai": 2})
+    assert "sk-one" not in repr(list(client_pool._pool._clients))
+
+
+def test_async_clients_are_pooled_per_event_loop():
+    provider = OpenAIProvider()
+
+    async def get():
+        return provider._get_async_client("sk-one")
+
+    loops = [asyncio.new_event_loop() for _ in range(2)]
+    try:
+        first, same, other = (loops[0].run_until_complete(get()), loops[0].run_until_complete(get()),
+                              loops[1].run_until_complete(get()))
+    finally:
+        for loop in loops:
+            loop.close()
+    assert first is same
+    assert other is not first
+
+
+def test_least_recently_used_client_is_closed_when_the_pool_is_full(monkeypatch):
+    monkeypatch.setattr(client_pool, "LLM_POOL_MAX_CLIENTS", 2)
+    a = get_pooled_client("openai", "a", FakeClient)
+    b = get_pooled_client("openai", "b", FakeClient)
+    assert get_pooled_client("openai", "a", FakeClient) is a
+
+    get_pooled_client("openai", "c", FakeClient)
+
+    assert (a.closed, b.closed) == (False, True)
+    assert get_pooled_client("openai", "b", FakeClient) is not b
@@ -0,0 +1,74 @@
+"""Tests for resolving custom tools and caching their compiled models."""
+
+import os
+import sys
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.dataloaders.custom_tool_loader import find_custom_tool_by_name, invalidate_cache, save_custom_tool
+from core.workflow.tools.resolver import clear_custom_tool_cache, custom_tool_cache_stats, resolve_tool
+
+
+def _manifest(tool_name="severity", output_name="severity"):
+    field = {"label": "", "description": "", "required": True, "is_enum": False,
+             "enum_values": None, "default_value": None}
+    return {
+        "schema_version": 1,
+        "execution_type": "llm_structured",
+        "tool_id": "t1",
+        "tool_name": tool_name,
+        "display_name": tool_name,
+        "description": "Extracts a severity score",
+        "category": "custom",
+        "created_by": "alice",
+        "created_at": "2026-01-01T00:00:00",
+        "updated_at": "2026-01-01T00:00:00",
+        "input_fields": [{**field, "name": "note", "field_type": "string"}],
+        "output_fields": [{**field, "name": output_name, "field_type": "integer"}],
+        "prompt_defaults": {"system_prompt": "Score the note", "user_prompt": "{{note}}", "examples": None},
+    }
+
+
+@pytest.fixture(autouse=True)
+def custom_tools(tmp_path, monkeypatch):
+    """An empty custom tool store in a scratch directory."""
+    monkeypatch.chdir(tmp_path)
+    invalidate_cache()
+    clear_custom_tool_cache()
+    yield
+    invalidate_cache()
+    clear_custom_tool_cache()
+
+
+def test_unchanged_manifest_reuses_the_compiled_tool():
+    save_custom_tool("t1", _manifest())
+
+    first = resolve_tool("severity", "alice")
+    second = resolve_tool("severity", "alice")
+
+    assert first is second
+    assert custom_tool_cache_stats()["misses"] == 1
+    with pytest.raises(KeyError):
+        resolve_tool("severity", "bob")
+
+
+def test_edited_manifest_compiles_a_new_tool():
+    save_custom_tool("t1", _manifest())
+    before = resolve_tool("severity", "alice")
+
+    save_custom_tool("t1", _manifest(output_name="score"))
+    after = resolve_tool("severity", "alice")
+
+    assert after is not before
+    assert set(after.Output.model_fields) == {"score"}
+
+
+def test_renamed_tool_is_reindexed():
+    save_custom_tool("t1", _manifest())
+    save_custom_tool("t1", _manifest(tool_name="acuity"))
+
+    assert find_custom_tool_by_name("severity", "alice") is None
+    assert resolve_tool("acuity", "alice").name == "acuity"
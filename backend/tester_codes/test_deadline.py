@@ -0,0 +1,81 @@
+"""Tests for deadlines and cooperative cancellation of LLM calls and tool runs."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.llm_provider.client as llm_client
+from core.llm_provider import call
+from core.llm_provider.deadline import (
+    CallCancelled, CancellationToken, current_token, deadline_scope, remaining_time
+)
+from core.workflow.tools.runner import run_tool
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+@pytest.fixture
+def slow_key(monkeypatch):
+    """A managed key on the mock provider whose calls take five seconds."""
+    monkeypatch.setitem(llm_client._resolved_keys, "slow", {
+        "model_name": "mock", "api_key": "mock:latency_ms=5000,sigma=0", "key_name": "slow",
+        "key_id": "k", "rpm_limit": None, "tpm_limit": None, "max_concurrency": None,
+    })
+    return "slow"
+
+
+def test_nested_scope_keeps_the_earliest_deadline_and_the_outer_token():
+    token = CancellationToken()
+    with deadline_scope(1.0, token=token):
+        with deadline_scope(60.0):
+            assert remaining_time() <= 1.0
+            assert current_token() is token
+        with deadline_scope(0.1):
+            assert remaining_time() <= 0.1
+    assert remaining_time() is None
+
+
+def test_cancelled_call_is_never_sent(slow_key):
+    token = CancellationToken()
+    token.cancel("stop")
+
+    started = time.monotonic()
+    with pytest.raises(CallCancelled, match="stop"):
+        with deadline_scope(token=token):
+            call(MESSAGES, key_name=slow_key, cache=False)
+    assert time.monotonic() - started < 1
+
+
+def test_cancelling_stops_a_call_in_flight(slow_key):
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+
+    started = time.monotonic()
+    with pytest.raises(CallCancelled):
+        with deadline_scope(token=token):
+            call(MESSAGES, key_name=slow_key, cache=False)
+    assert time.monotonic() - started < 2
+
+
+def test_call_times_out_at_the_deadline(slow_key):
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        with deadline_scope(0.3):
+            call(MESSAGES, key_name=slow_key, cache=False)
+    assert time.monotonic() - started < 2
+
+
+def test_run_tool_reports_cancellation():
+    token = CancellationToken()
+    token.cancel("Cancelled by user")
+
+    result = run_tool("exact_keyword_count", {"text": "cough", "keywords": ["cough"]}, cancel_token=token)
+
+    assert result["ok"] is False
+    assert result["error"] == {"code": "cancelled", "message": "Cancelled by user"}
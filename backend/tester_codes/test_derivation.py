@@ -0,0 +1,116 @@
+"""Tests for definition fingerprints and experiments derived from earlier runs."""
+
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.dataloaders.datasets_loader as datasets_loader
+from core.workflow_service.derivation import (
+    Derivation, definition_fingerprints, patient_fingerprint, prune_workflow
+)
+from core.workflow_service.utils import CostTracker
+from core.workflow_service.workflow_executor import compile_workflow
+
+MRN = 100
+CSN = 500
+PATIENT = {"mrn": MRN, "encounters": [{"csn": CSN, "notes": [
+    {"note_id": 1, "note_text": "cough and fever since Monday", "note_type": "Progress"},
+]}]}
+
+
+@pytest.fixture(autouse=True)
+def dataset(tmp_path, monkeypatch):
+    os.makedirs(tmp_path / "demo")
+    with open(tmp_path / "demo" / "dataset.json", "w") as f:
+        json.dump([PATIENT], f)
+    monkeypatch.setattr(datasets_loader, "DATASETS_DIR", str(tmp_path))
+    datasets_loader.invalidate_dataset_cache()
+    yield
+    datasets_loader.invalidate_dataset_cache()
+
+
+def _workflow(fever_keywords=("fever",)):
+    """Read one note, then count two keyword sets in it."""
+    def count(step_id, keywords):
+        return {"id": step_id, "type": "tool", "tool": "exact_keyword_count",
+                "inputs": {"text": "{{ note.note_text }}", "keywords": list(keywords)}, "output": step_id}
+
+    return {"steps": [
+        {"id": "read", "type": "tool", "tool": "read_patient_note", "inputs": {"note_id": 1}, "output": "note",
+         "description": "Read the note"},
+        count("cough", ["cough"]),
+        count("fever", fever_keywords),
+    ], "output_definitions": [
+        {"id": "def_cough", "name": "cough", "label": "Cough", "tool_name": "exact_keyword_count", "step_id": "cough"},
+        {"id": "def_fever", "name": "fever", "label": "Fever", "tool_name": "exact_keyword_count", "step_id": "fever"},
+    ]}
+
+
+def _fingerprints(workflow, dataset="demo"):
+    plan = compile_workflow(workflow, dataset="demo")
+    return definition_fingerprints(workflow["steps"], plan, "gpt-4o", dataset=dataset)
+
+
+def test_only_the_edited_definition_gets_a_new_fingerprint():
+    before = _fingerprints(_workflow())
+    after = _fingerprints(_workflow(fever_keywords=("fever", "pyrexia")))
+
+    assert after["def_cough"] == before["def_cough"]
+    assert after["def_fever"] != before["def_fever"]
+
+    described = _workflow()
+    described["steps"][0]["description"] = "Load the progress note"
+    assert _fingerprints(described) == before
+
+    # Every definition depends on the shared read step and on the dataset
+    reread = _workflow()
+    reread["steps"][0]["inputs"]["note_id"] = 2
+    assert all(_fingerprints(reread)[d] != before[d] for d in before)
+    assert all(_fingerprints(_workflow(), dataset="other")[d] != before[d] for d in before)
+
+
+def test_derived_run_copies_reused_values_and_reruns_the_rest():
+    source = compile_workflow(_workflow(), dataset="demo").run(MRN, CSN, CostTracker())
+    source_values = [v for v in source["output_values"] if v["output_definition_id"] == "def_cough"]
+
+    edited = _workflow(fever_keywords=("fever", "pyrexia"))
+    full_plan = compile_workflow(edited, dataset="demo")
+    pruned = prune_workflow(edited, full_plan.definitions, skip={"def_cough"})
+    assert [s["id"] for s in pruned["steps"]] == ["read", "fever"]
+
+    derivation = Derivation(
+        source_experiment="baseline",
+        plan=compile_workflow(pruned, dataset="demo"),
+        definitions=full_plan.definitions,
+        reused={"def_cough": "def_cough"},
+        source_patients={str(MRN): patient_fingerprint(PATIENT)},
+        source_values={str(MRN): source_values},
+    )
+
+    copied = derivation.copied_values(MRN, patient_fingerprint(PATIENT))
+    rerun = derivation.plan.run(MRN, CSN, CostTracker())
+
+    assert [v["values"] for v in copied] == [v["values"] for v in source_values]
+    assert copied[0]["metadata"]["derived_from"] == {"experiment_name": "baseline", "value_id": source_values[0]["id"]}
+    assert copied[0]["id"] != source_values[0]["id"]
+    assert [v["output_definition_id"] for v in rerun["output_values"]] == ["def_fever"]
+    assert derivation.provenance()["rerun_definitions"] == ["def_fever"]
+
+
+def test_changed_patient_runs_the_full_plan():
+    changed = copy.deepcopy(PATIENT)
+    changed["encounters"][0]["notes"][0]["note_text"] = "no complaints"
+    derivation = Derivation(
+        source_experiment="baseline", plan=None, definitions=[], reused={"def_cough": "def_cough"},
+        source_patients={str(MRN): patient_fingerprint(PATIENT)}, source_values={str(MRN): []},
+    )
+
+    assert patient_fingerprint(changed) != patient_fingerprint(PATIENT)
+    assert derivation.copied_values(MRN, patient_fingerprint(changed)) is None
+    assert derivation.copied_values(MRN, patient_fingerprint(PATIENT)) == []
@@ -0,0 +1,124 @@
+"""Tests for the experiment values log (append, replay, compaction)."""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.dataloaders.experiment_results_loader as results_loader
+
+DEFINITIONS = [{"id": "def_a", "name": "a"}]
+
+
+def _values(patient_id, encounter_id, count):
+    return [
+        {
+            "id": f"val_{patient_id}_{encounter_id}_{i}",
+            "output_definition_id": "def_a",
+            "metadata": {"patient_id": patient_id, "encounter_id": encounter_id},
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def experiment(tmp_path, monkeypatch):
+    """An empty experiment named 'x' in a scratch experiments/ directory."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("experiments", "x"))
+    results_loader.create_results("x")
+    yield "x"
+    results_loader.forget_results("x")
+
+
+def _patients(experiment_name):
+    results = results_loader.read_results(experiment_name)
+    return sorted({v["metadata"]["patient_id"] for v in results["output_values"]})
+
+
+def test_append_after_torn_line_keeps_next_patient(experiment):
+    """A line torn by a crash is dropped, not glued onto the next patient's line."""
+    results_loader.append_patient_values(experiment, "1", DEFINITIONS, _values("1", "a", 1))
+    with open(os.path.join("experiments", experiment, results_loader.VALUES_LOG_FILE), "a") as f:
+        f.write('{"mrn": "2", "output_val')
+
+    # A fresh process: nothing cached about this experiment
+    results_loader.forget_results(experiment)
+    counts = results_loader.append_patient_values(experiment, "3", DEFINITIONS, _values("3", "a", 2))
+
+    assert counts == (2, 2)
+    assert _patients(experiment) == ["1", "3"]
+    with open(os.path.join("experiments", experiment, results_loader.VALUES_LOG_FILE)) as f:
+        assert [json.loads(line)["mrn"] for line in f] == ["1", "3"]
+
+    results_loader.compact_results(experiment)
+    assert _patients(experiment) == ["1", "3"]
+
+
+def test_append_after_torn_only_line(experiment):
+    """A log holding nothing but a torn line is emptied before the append."""
+    with open(os.path.join("experiments", experiment, results_loader.VALUES_LOG_FILE), "w") as f:
+        f.write('{"mrn": "1", "outp')
+
+    results_loader.append_patient_values(experiment, "2", DEFINITIONS, _values("2", "a", 1))
+
+    assert _patients(experiment) == ["2"]
+
+
+def test_retried_patient_replaces_its_earlier_values(experiment):
+    results_loader.append_patient_values(experiment, "1", DEFINITIONS, _values("1", "a", 2))
+    results_loader.append_patient_values(experiment, "2", DEFINITIONS, _values("2", "a", 1))
+    counts = results_loader.append_patient_values(experiment, "1", DEFINITIONS, _values("1", "b", 1))
+
+    assert counts == (2, 2)
+    ids = [v["id"] for v in results_loader.read_results(experiment)["output_values"]]
+    assert sorted(ids) == ["val_1_b_0", "val_2_a_0"]
+
+
+def test_new_definitions_are_merged_once(experiment):
+    results_loader.append_patient_values(experiment, "1", DEFINITIONS, _values("1", "a", 1))
+    both = DEFINITIONS + [{"id": "def_b", "name": "b"}]
+    results_loader.append_patient_values(experiment, "2", both, _values("2", "a", 1))
+    results_loader.append_patient_values(experiment, "3", both, _values("3", "a", 1))
+
+    definitions = results_loader.read_results(experiment)["output_definitions"]
+    assert [d["id"] for d in definitions] == ["def_a", "def_b"]
+
+
+def test_compaction_folds_the_log_into_results(experiment):
+    results_loader.append_patient_values(experiment, "1", DEFINITIONS, _values("1", "a", 2))
+    results_loader.append_patient_values(experiment, "2", DEFINITIONS, _values("2", "a", 1))
+    before = results_loader.read_results(experiment)
+
+    results_loader.compact_results(experiment, cost_summary={"total_cost": 1.5})
+
+    assert not os.path.exists(os.path.join("experiments", experiment, results_loader.VALUES_LOG_FILE))
+    assert not os.path.exists(os.path.join("experiments", experiment, results_loader.DEFINITIONS_FILE))
+    after = results_loader.read_results(experiment)
+    assert after["output_values"] == before["output_values"]
+    assert after["output_definitions"] == before["output_definitions"]
+    assert after["cost_summary"] == {"total_cost": 1.5}
+
+    # Appends after compaction still replace the compacted patient's values
+    counts = results_loader.append_patient_values(experiment, "2", DEFINITIONS, _values("2", "b", 3))
+    assert counts == (2, 2)
+    assert _patients(experiment) == ["1", "2"]
+    assert len(results_loader.read_results(experiment)["output_values"]) == 5
+
+
+def test_crash_between_compaction_steps_reads_the_same(experiment):
+    """results.json already holds the log's values; replaying the log must not duplicate them."""
+    results_loader.append_patient_values(experiment, "1", DEFINITIONS, _values("1", "a", 2))
+    log_path = os.path.join("experiments", experiment, results_loader.VALUES_LOG_FILE)
+    with open(log_path) as f:
+        log = f.read()
+
+    results_loader.compact_results(experiment)
+    with open(log_path, "w") as f:
+        f.write(log)
+
+    assert len(results_loader.read_results(experiment)["output_values"]) == 2
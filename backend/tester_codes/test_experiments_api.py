@@ -0,0 +1,95 @@
+"""Tests for experiment submission through the workflow API handlers."""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+
+import api.workflows as workflows
+import core.dataloaders.api_key_loader as api_key_loader
+import core.dataloaders.datasets_loader as datasets_loader
+import core.dataloaders.job_queue_loader as job_queue
+import core.dataloaders.user_loader as user_loader
+from core.dataloaders.projects_loader import invalidate_project_cache
+from core.dataloaders.workflow_def_loader import invalidate_workflow_def_cache
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def _invalidate():
+    api_key_loader.invalidate_cache()
+    user_loader.invalidate_user_cache()
+    invalidate_project_cache()
+    invalidate_workflow_def_cache()
+    datasets_loader.invalidate_dataset_cache()
+
+
+@pytest.fixture(autouse=True)
+def api_env(tmp_path, monkeypatch):
+    """Scratch keys, users, project 'p' on dataset 'demo', workflow 'counts' and job queue."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api_key_loader, "KEYS_FILE", tmp_path / "keys.json")
+    monkeypatch.setattr(user_loader, "USERS_FILE", tmp_path / "users.json")
+    monkeypatch.setattr(job_queue, "EXPERIMENT_QUEUE_PATH", str(tmp_path / "experiments.sqlite"))
+    job_queue._queue._conn = None
+
+    _write("keys.json", {"keys": [{"key_id": "k1", "key_name": "m", "model_name": "mock", "api_key": "mock"}],
+                         "assignments": []})
+    _write("users.json", {"users": [{"username": "alice", "is_admin": False, "allowed_datasets": ["demo"]}]})
+    _write("projects/p/metadata.json", {"project_name": "p", "owner": "alice", "summary": "",
+                                        "created_date": "2026-01-01", "dataset": "demo"})
+    _write("datasets/demo/metadata.json", {"name": "demo", "owner": "alice", "created_date": "2026-01-01"})
+    notes = [{"note_id": 1, "note_text": "mentions cough", "note_type": "Progress"}]
+    _write("datasets/demo/dataset.json", [{"mrn": 100, "encounters": [{"csn": 500, "notes": notes}]}])
+    workflow = {
+        "steps": [{"id": "count", "type": "tool", "tool": "exact_keyword_count",
+                   "inputs": {"text": "cough", "keywords": ["cough"]}, "output": "counted"}],
+        "output_definitions": [{"id": "def_count", "name": "count", "label": "Count",
+                                "tool_name": "exact_keyword_count", "step_id": "count"}],
+    }
+    _write("workflow_defs/counts.json", {"workflow_name": "counts", "created_by": "alice",
+                                         "created_date": "2026-01-01", "raw_workflow": workflow})
+    _invalidate()
+    yield
+    if job_queue._queue._conn is not None:
+        job_queue._queue._conn.close()
+    job_queue._queue._conn = None
+    _invalidate()
+
+
+def _submit(**extra):
+    return workflows.create_experiment(
+        {"experiment_name": "x", "project_name": "p", "key_name": "m", "workflow_name": "counts", **extra},
+        current_user="alice",
+    )
+
+
+def test_experiment_without_a_budget_is_queued():
+    response = _submit()
+
+    assert response.status_code == 202
+    assert job_queue.get_job("x")["state"] == "pending"
+
+
+@pytest.mark.parametrize("cap, extra", [(5.0, {}), (0, {"budget_usd": 5})])
+def test_budget_that_cannot_be_forecast_rejects_the_experiment(monkeypatch, cap, extra):
+    """An operator cap or a request budget the forecast can't check fails closed."""
+    monkeypatch.setattr(workflows, "EXPERIMENT_MAX_COST_USD", cap)
+
+    with pytest.raises(HTTPException) as error:
+        _submit(**extra)
+
+    assert error.value.status_code == 400
+    assert "can't be checked" in error.value.detail
+    assert job_queue.get_job("x") is None
+    assert not os.path.exists(os.path.join("experiments", "x"))
@@ -0,0 +1,64 @@
+"""Tests for hedged calls and failover to backup keys on the mock provider."""
+
+import os
+import sys
+import time
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.llm_provider.client as llm_client
+import core.llm_provider.hedge as hedge
+from core.llm_provider import call
+from core.llm_provider.hedge import HedgePolicy, hedge_scope
+
+MESSAGES = [{"role": "user", "content": "Is smoking mentioned?"}]
+
+
+def _key(monkeypatch, name, settings):
+    monkeypatch.setitem(llm_client._resolved_keys, name, {
+        "model_name": "mock", "api_key": f"mock:{settings}", "key_name": name, "key_id": name,
+        "rpm_limit": None, "tpm_limit": None, "max_concurrency": None,
+    })
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    """No latency history, and a short hedge delay until there is some."""
+    hedge._stats.clear()
+    monkeypatch.setattr(hedge, "LLM_HEDGE_DEFAULT_DELAY_SECONDS", 0.2)
+    monkeypatch.setattr(hedge, "LLM_HEDGE_MIN_DELAY_SECONDS", 0.1)
+    yield
+    hedge._stats.clear()
+
+
+def test_slow_primary_is_hedged_to_the_backup(monkeypatch):
+    _key(monkeypatch, "primary", "latency_ms=5000,sigma=0")
+    _key(monkeypatch, "backup", "latency_ms=0,sigma=0")
+
+    started = time.monotonic()
+    with hedge_scope(HedgePolicy(fallback_keys=["backup"])):
+        result = call(MESSAGES, key_name="primary", cache=False)
+
+    assert time.monotonic() - started < 2
+    assert result.api_key_name == "backup"
+    assert (result.hedge["hedges"], result.hedge["failovers"]) == (1, 0)
+    (stats,) = [s for s in hedge.hedge_stats() if s["key_name"] == "primary"]
+    assert (stats["hedges"], stats["wins_by_backup"]) == (1, 1)
+
+
+def test_failing_primary_fails_over_at_once(monkeypatch):
+    _key(monkeypatch, "primary", "latency_ms=0,sigma=0,error_rate=1")
+    _key(monkeypatch, "backup", "latency_ms=0,sigma=0")
+
+    started = time.monotonic()
+    with hedge_scope(HedgePolicy(fallback_keys=["backup"])):
+        result = call(MESSAGES, key_name="primary", cache=False)
+
+    # A single attempt on the primary: no retry backoff before failing over
+    assert time.monotonic() - started < 1
+    assert result.api_key_name == "backup"
+    assert (result.hedge["hedges"], result.hedge["failovers"]) == (0, 1)
+
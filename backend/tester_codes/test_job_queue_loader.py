@@ -0,0 +1,196 @@
+"""Tests for the experiment job queue and its completion ledger."""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.dataloaders.api_key_loader as api_key_loader
+import core.dataloaders.job_queue_loader as job_queue
+import core.dataloaders.user_loader as user_loader
+from api.workflows import RetryPolicy, _interrupted_status, _restore_from_ledger, read_status_file, run_experiment_job
+from core.llm_provider.deadline import CancellationToken
+from core.workflow.tools.base import ToolCallMeta
+from core.workflow_service.utils import CostTracker
+
+
+@pytest.fixture(autouse=True)
+def queue(tmp_path, monkeypatch):
+    """The queue singleton on a scratch database."""
+    monkeypatch.setattr(job_queue, "EXPERIMENT_QUEUE_PATH", str(tmp_path / "experiments.sqlite"))
+    job_queue._queue._conn = None
+    yield job_queue._queue
+    job_queue._queue._conn.close()
+    job_queue._queue._conn = None
+
+
+def _enqueue(name, kind="online"):
+    job_queue.enqueue_job(name, kind, {"experiment_name": name}, "alice", 3)
+
+
+def test_claim_takes_the_oldest_pending_job_once():
+    _enqueue("first")
+    _enqueue("second")
+
+    first = job_queue.claim_job("w1")
+    second = job_queue.claim_job("w2")
+
+    assert (first["experiment_name"], first["worker_id"], first["attempts"]) == ("first", "w1", 1)
+    assert second["experiment_name"] == "second"
+    assert job_queue.claim_job("w3") is None
+    assert job_queue.get_job("first")["state"] == "running"
+
+
+def test_heartbeat_returns_control_requests():
+    _enqueue("x")
+    job_queue.claim_job("w1")
+
+    assert job_queue.heartbeat_job("x", "w1") is None
+    assert job_queue.request_job_action("x", "pause") == "pausing"
+    assert job_queue.heartbeat_job("x", "w1") == "pause"
+    assert job_queue.heartbeat_job("x", "w2") == "lost"
+    assert job_queue.heartbeat_job("missing", "w1") == "lost"
+
+
+def test_stale_job_is_requeued_and_the_old_worker_loses_it():
+    _enqueue("x")
+    job_queue.claim_job("w1")
+    assert job_queue.requeue_stale_jobs(timeout=60) == []
+
+    assert job_queue.requeue_stale_jobs(timeout=-1) == ["x"]
+    assert job_queue.get_job("x")["state"] == "pending"
+    reclaimed = job_queue.claim_job("w2")
+
+    assert (reclaimed["worker_id"], reclaimed["attempts"]) == ("w2", 2)
+    assert job_queue.heartbeat_job("x", "w1") == "lost"
+    assert job_queue.heartbeat_job("x", "w2") is None
+
+
+def test_worker_that_lost_its_job_cannot_overwrite_the_new_owner():
+    _enqueue("x")
+    job_queue.claim_job("w1")
+    job_queue.requeue_stale_jobs(timeout=-1)
+    job_queue.claim_job("w2")
+
+    assert job_queue.update_job_status("x", {"status": "failed", "progress.processed_count": 9}, worker_id="w1")
+    job = job_queue.get_job("x")
+    assert (job["state"], job["worker_id"]) == ("running", "w2")
+    assert job_queue.update_job_status("x", {"progress.processed_count": 1}, worker_id="w2")
+    assert job_queue.get_job("x")["status"]["progress"]["processed_count"] == 1
+
+
+def test_failed_delete_is_rolled_back(queue):
+    _enqueue("x")
+    queue._get_conn().execute("DROP TABLE patient_runs")
+
+    with pytest.raises(Exception):
+        job_queue.delete_job("x")
+    assert job_queue.get_job("x") is not None
+    _enqueue("y")
+    assert job_queue.get_job("y")["state"] == "pending"
+
+
+def test_job_that_keeps_losing_its_worker_fails(monkeypatch):
+    monkeypatch.setattr(job_queue, "EXPERIMENT_JOB_MAX_ATTEMPTS", 2)
+    _enqueue("x")
+    for worker in ("w1", "w2"):
+        job_queue.claim_job(worker)
+        job_queue.requeue_stale_jobs(timeout=-1)
+
+    job = job_queue.get_job("x")
+    assert job["state"] == "failed"
+    assert job["status"]["errors"][-1]["error"] == "Worker stopped 2 times while running this experiment"
+
+
+def test_stale_requests_finish_without_the_worker():
+    _enqueue("paused")
+    _enqueue("cancelled")
+    _enqueue("batch", kind="batch")
+    for _ in range(3):
+        job_queue.claim_job("w1")
+    job_queue.request_job_action("paused", "pause")
+    job_queue.request_job_action("cancelled", "cancel")
+
+    job_queue.requeue_stale_jobs(timeout=-1)
+
+    assert [job_queue.get_job(name)["state"] for name in ("paused", "cancelled", "batch")] == \
+        ["paused", "cancelled", "pending"]
+
+
+def test_batch_job_cannot_be_paused_and_goes_back_to_the_queue_on_shutdown():
+    _enqueue("batch", kind="batch")
+    job_queue.claim_job("w1")
+
+    with pytest.raises(ValueError, match="Only online experiments can be paused"):
+        job_queue.request_job_action("batch", "pause")
+
+    token = CancellationToken()
+    token.cancel(job_queue.REQUEUE_REASON)
+    assert _interrupted_status(token, "batch") == "pending"
+
+
+def _costs(cost):
+    tracker = CostTracker()
+    tracker.record("llm", ToolCallMeta(cost=cost, input_tokens=10, output_tokens=2), 5)
+    return tracker.to_dict()
+
+
+def test_ledger_resume_skips_finished_patients_and_keeps_all_spend():
+    _enqueue("x")
+    job_queue.record_patient_run("x", "1", "completed", _costs(1.0), flags=2)
+    job_queue.record_patient_run("x", "2", "failed", _costs(0.5), error="boom")
+    job_queue.record_patient_run("x", "3", "interrupted", _costs(0.25))
+    job_queue.record_patient_run("x", "4", "failed", _costs(0.5), error="first")
+    job_queue.record_patient_run("x", "4", "completed", _costs(1.0), flags=1)
+
+    state = _restore_from_ledger("x", RetryPolicy(retry_failed=True, max_attempts=2))
+
+    assert state.entries == 5
+    assert state.finished == {"1", "4"}
+    assert state.retrying == {"2"}
+    assert (state.processed_count, state.total_flags, state.error_count) == (2, 3, 0)
+    assert state.tracker.summary()["totals"]["total_cost"] == pytest.approx(3.25)
+    assert state.per_patient_costs["4"]["totals"]["total_cost"] == pytest.approx(1.5)
+
+
+def test_ledger_resume_stops_retrying_after_max_attempts():
+    _enqueue("x")
+    job_queue.record_patient_run("x", "2", "failed", _costs(0.5), error="boom")
+    job_queue.record_patient_run("x", "2", "failed", _costs(0.5), error="again")
+
+    state = _restore_from_ledger("x", RetryPolicy(retry_failed=True, max_attempts=2))
+    assert state.finished == {"2"}
+    assert state.retrying == set()
+    assert state.errors == [{"mrn": "2", "error": "again"}]
+
+    state = _restore_from_ledger("x", RetryPolicy(retry_failed=False))
+    assert state.error_count == 1
+
+
+def test_worker_sees_keys_and_projects_created_after_it_started(tmp_path, monkeypatch):
+    """The worker resolves each job against the records as they are now, not as they were at its first load."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api_key_loader, "KEYS_FILE", tmp_path / "keys.json")
+    monkeypatch.setattr(user_loader, "USERS_FILE", tmp_path / "users.json")
+    request = {"experiment_name": "x", "project_name": "p", "key_name": "late"}
+    job_queue.enqueue_job("x", "online", request, "alice", 1)
+
+    # The worker's first load, before the API creates the key and the project
+    run_experiment_job(job_queue.claim_job("w1"), CancellationToken())
+    assert job_queue.get_job("x")["status"]["errors"][-1]["error"] == "Cannot run: API key 'late' not found"
+
+    # The API process writes both; its cache invalidations stay in its own process
+    with open(tmp_path / "keys.json", "w") as f:
+        json.dump({"keys": [{"key_id": "k1", "key_name": "late", "model_name": "mock", "api_key": "-"}],
+                   "assignments": []}, f)
+    os.makedirs(tmp_path / "projects" / "p")
+    with open(tmp_path / "projects" / "p" / "metadata.json", "w") as f:
+        json.dump({"project_name": "p", "owner": "alice", "summary": "", "created_date": "2026-01-01"}, f)
+
+    job_queue.request_job_action("x", "resume")
+    run_experiment_job(job_queue.claim_job("w1"), CancellationToken())
+    assert read_status_file("x")["errors"][-1]["error"] == "Cannot run: Project 'p' has no dataset assigned"
@@ -0,0 +1,72 @@
+"""Tests for the Prometheus telemetry of LLM calls on the mock provider."""
+
+import os
+import sys
+
+import pytest
+from prometheus_client import REGISTRY
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.llm_provider.client as llm_client
+import core.llm_provider.retry as retry
+from core.llm_provider import call
+from core.llm_provider.metrics import render_metrics, tool_scope
+
+MESSAGES = [{"role": "user", "content": "Summarize the note"}]
+
+
+def _key(monkeypatch, name, settings="latency_ms=20,sigma=0"):
+    monkeypatch.setitem(llm_client._resolved_keys, name, {
+        "model_name": "mock", "api_key": f"mock:{settings}", "key_name": name, "key_id": name,
+        "rpm_limit": None, "tpm_limit": None, "max_concurrency": None,
+    })
+    return name
+
+
+def _sample(name, key, tool, **labels):
+    value = REGISTRY.get_sample_value(name, {"provider": "mock", "model": "mock", "key": key, "tool": tool, **labels})
+    return value or 0.0
+
+
+def test_call_records_latency_and_throughput_per_tool(monkeypatch):
+    key = _key(monkeypatch, "metrics-call")
+
+    with tool_scope("summarize_patient_note"):
+        call(MESSAGES, key_name=key, cache=False)
+        call(MESSAGES, key_name=key, cache=False)
+
+    assert _sample("llm_requests_total", key, "summarize_patient_note") == 2
+    assert _sample("llm_request_duration_seconds_count", key, "summarize_patient_note") == 2
+    assert _sample("llm_request_duration_seconds_sum", key, "summarize_patient_note") >= 0.04
+    assert _sample("llm_output_tokens_per_second_count", key, "summarize_patient_note") == 2
+    assert _sample("llm_requests_in_flight", key, "summarize_patient_note") == 0
+    assert _sample("llm_requests_total", key, "none") == 0
+
+
+def test_stream_records_time_to_first_token(monkeypatch):
+    key = _key(monkeypatch, "metrics-stream")
+
+    chunks = list(call(MESSAGES, key_name=key, stream=True))
+
+    assert chunks[-1].is_final
+    assert _sample("llm_time_to_first_token_seconds_count", key, "none") == 1
+    assert _sample("llm_requests_total", key, "none") == 1
+
+
+def test_failed_call_counts_errors_and_retries(monkeypatch):
+    key = _key(monkeypatch, "metrics-error", "latency_ms=0,sigma=0,error_rate=1")
+    monkeypatch.setattr(retry, "LLM_RETRY_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(retry, "LLM_RETRY_BASE_SECONDS", 0.01)
+
+    with pytest.raises(Exception, match="unavailable"):
+        call(MESSAGES, key_name=key, cache=False)
+
+    assert _sample("llm_request_errors_total", key, "none", error="MockAPIError") == 1
+    assert _sample("llm_retries_total", key, "none") == 1
+    assert _sample("llm_requests_total", key, "none") == 0
+
+    body, content_type = render_metrics()
+    assert b'llm_request_errors_total{error="MockAPIError",key="metrics-error"' in body
+    assert content_type.startswith("text/plain")
@@ -0,0 +1,50 @@
+"""Tests for the offline mock provider's structured outputs."""
+
+import os
+import sys
+from typing import List, Literal, Optional
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pydantic import BaseModel, Field
+
+from core.llm_provider.providers.mock_provider import MockProvider
+
+KEY = "mock:latency_ms=0,sigma=0"
+
+
+class Medication(BaseModel):
+    name: str = Field(min_length=2, max_length=20)
+    dose_mg: float = Field(gt=0)
+    doses_per_day: int = Field(ge=1, le=4)
+
+
+class Assessment(BaseModel):
+    age: int = Field(ge=18)
+    weight_kg: float = Field(gt=5)
+    score: float = Field(gt=0, lt=0.0005)
+    delta: int = Field(lt=-3)
+    temperature: float = Field(le=-40)
+    tier: int = Field(gt=2, lt=4)
+    severity: Literal["low", "medium", "high"]
+    medications: List[Medication] = Field(min_length=1, max_length=3)
+    note: Optional[str] = None
+
+
+def test_structured_output_satisfies_the_schema():
+    provider = MockProvider()
+    for i in range(50):
+        response = provider.call("mock-1", [{"role": "user", "content": f"patient {i}"}],
+                                 schema=Assessment, api_key=KEY)
+        assert response.parsed is not None, response.content
+        assert response.parsed.tier == 3
+        Assessment.model_validate_json(response.content)
+
+
+def test_same_request_gives_the_same_response():
+    first, second = MockProvider(), MockProvider()
+    messages = [{"role": "user", "content": "patient"}]
+
+    assert first.call("mock-1", messages, schema=Assessment, api_key=KEY).content == \
+        second.call("mock-1", messages, schema=Assessment, api_key=KEY).content
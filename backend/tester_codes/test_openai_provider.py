@@ -0,0 +1,31 @@
+"""Tests for the OpenAI provider's request building (no API calls)."""
+
+import os
+import sys
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pydantic import BaseModel
+
+from core.llm_provider.providers.openai_provider import OpenAIProvider
+
+
+class Decision(BaseModel):
+    action: str
+    reason: str
+
+
+def test_streamed_structured_output_uses_the_strict_schema():
+    """Streaming a schema keeps strict schema adherence instead of falling back to JSON mode."""
+    provider = OpenAIProvider()
+    messages = [{"role": "user", "content": "Decide."}]
+
+    streamed = provider._build_kwargs("gpt-4o", messages, 0.0, 100, Decision, None, "auto", stream=True)
+
+    response_format = streamed["response_format"]
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["strict"] is True
+    assert response_format["json_schema"]["schema"]["required"] == ["action", "reason"]
+    assert streamed["messages"] == messages
+    assert streamed["stream"] is True
@@ -0,0 +1,68 @@
+"""Tests for incremental parsing of streamed structured output."""
+
+import json
+import os
+import sys
+from typing import Dict, List
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pydantic import BaseModel
+
+from core.llm_provider.partial_json import IncrementalJSONParser
+
+
+class Finding(BaseModel):
+    summary: str
+    count: int
+    tags: List[str]
+    detail: Dict[str, str]
+
+
+DOCUMENT = json.dumps({
+    "summary": 'Says "hi" \\ café \U0001F600',
+    "count": 3,
+    "tags": ["a", "b]"],
+    "detail": {"k": "v}"},
+})
+
+
+def _feed(parser, chunks):
+    fields, text = {}, {}
+    for chunk in chunks:
+        update = parser.feed(chunk)
+        fields.update(update.fields)
+        for key, delta in update.text_deltas.items():
+            text[key] = text.get(key, "") + delta
+    return fields, text
+
+
+def test_any_chunking_gives_the_same_fields():
+    expected = json.loads(DOCUMENT)
+    for size in (1, 2, 3, 7, len(DOCUMENT)):
+        chunks = [DOCUMENT[i:i + size] for i in range(0, len(DOCUMENT), size)]
+        fields, text = _feed(IncrementalJSONParser(Finding), chunks)
+        assert fields == expected, size
+        assert text == {"summary": expected["summary"]}, size
+
+
+def test_field_is_emitted_once_it_completes():
+    parser = IncrementalJSONParser(Finding)
+    assert parser.feed('{"count": 4').fields == {}
+    update = parser.feed(', "summary": "ab')
+    assert update.fields == {"count": 4}
+    assert update.text_deltas == {"summary": "ab"}
+    update = parser.feed('c"')
+    assert update.fields == {"summary": "abc"}
+    assert update.text_deltas == {"summary": "c"}
+    assert parser.fields == {"count": 4, "summary": "abc"}
+
+
+def test_fence_unknown_and_invalid_fields_are_skipped():
+    parser = IncrementalJSONParser(Finding)
+    fields, text = _feed(parser, ['```json\n{"extra": "x", "count": "many", ', '"tags": ["t"]}\n```'])
+    assert fields == {"tags": ["t"]}
+    # Text streams for declared fields only; validation happens once the value completes
+    assert text == {"count": "many"}
+    assert parser.fields == {"tags": ["t"]}
@@ -0,0 +1,98 @@
+"""Tests for the per-key rate limiter's AIMD concurrency control."""
+
+import os
+import sys
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.llm_provider.rate_limit as rate_limit
+from core.llm_provider.deadline import DeadlineExceeded, deadline_scope
+from core.llm_provider.rate_limit import RateLimiter
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+def _throttle(limiter):
+    with pytest.raises(Throttled):
+        with limiter.slot(10):
+            raise Throttled()
+
+
+def test_throttle_halves_the_limit_once_per_window(monkeypatch):
+    limiter = RateLimiter("k", "mock", max_concurrency=16)
+    _throttle(limiter)
+    _throttle(limiter)   # Same window: calls throttled together decrease once
+    assert limiter.stats()["concurrency_limit"] == 8
+
+    monkeypatch.setattr(rate_limit, "_DECREASE_WINDOW_SECONDS", 0.0)
+    _throttle(limiter)
+    _throttle(limiter)
+    stats = limiter.stats()
+    assert stats["concurrency_limit"] == 2
+    assert stats["throttled"] == 4
+    assert stats["concurrency_decreases"] == 3
+
+
+def test_limit_never_drops_below_the_minimum(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_DECREASE_WINDOW_SECONDS", 0.0)
+    limiter = RateLimiter("k", "mock", max_concurrency=4)
+    for _ in range(5):
+        _throttle(limiter)
+    assert limiter.stats()["concurrency_limit"] == rate_limit.LLM_MIN_CONCURRENCY
+
+
+def test_successes_grow_the_limit_back_additively():
+    limiter = RateLimiter("k", "mock", max_concurrency=8)
+    _throttle(limiter)
+    assert limiter.stats()["concurrency_limit"] == 4
+
+    # About one slot per `limit` successful calls
+    for _ in range(4):
+        with limiter.slot(10):
+            pass
+    assert limiter.stats()["concurrency_limit"] == 4
+    with limiter.slot(10):
+        pass
+    assert limiter.stats()["concurrency_limit"] == 5
+
+    for _ in range(100):
+        with limiter.slot(10):
+            pass
+    assert limiter.stats()["concurrency_limit"] == 8
+
+
+def test_full_limiter_gives_up_at_the_deadline():
+    limiter = RateLimiter("k", "mock", max_concurrency=1)
+    limiter.acquire(10)
+    with pytest.raises(DeadlineExceeded):
+        with deadline_scope(0.01):
+            limiter.acquire(10)
+    limiter.release()
+    limiter.acquire(10)
+    assert limiter.stats()["in_flight"] == 1
+
+
+def test_cooldown_pauses_new_calls():
+    limiter = RateLimiter("k", "mock")
+    limiter.cool_down(30)
+    with pytest.raises(DeadlineExceeded):
+        with deadline_scope(1):
+            limiter.acquire(10)
+    assert limiter.stats()["cooldown_seconds"] > 29
+
+
+def test_processes_split_the_key_limits(monkeypatch):
+    monkeypatch.setattr(rate_limit, "LLM_RATE_LIMIT_PROCESSES", 3)
+    rate_limit.clear_rate_limiters()
+    record = {"key_name": "k", "model_name": "m", "rpm_limit": 600, "tpm_limit": 90000, "max_concurrency": 2}
+
+    limiter = rate_limit.get_rate_limiter(record)
+    rate_limit.clear_rate_limiters()
+
+    assert limiter.config == (200, 30000, 1)
+    assert rate_limit._process_share(0) == 0
@@ -0,0 +1,59 @@
+"""Tests for memoized reader tool results."""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.dataloaders.datasets_loader as datasets_loader
+from core.workflow.tools.base import clear_reader_cache, reader_cache_stats
+from core.workflow.tools.registry import create_tool
+
+
+def _write_dataset(tmp_path, text):
+    notes = [{"note_id": 1, "note_text": text, "note_type": "Progress"}]
+    with open(tmp_path / "demo" / "dataset.json", "w") as f:
+        json.dump([{"mrn": 100, "encounters": [{"csn": 500, "notes": notes}]}], f)
+
+
+@pytest.fixture(autouse=True)
+def dataset(tmp_path, monkeypatch):
+    os.makedirs(tmp_path / "demo")
+    _write_dataset(tmp_path, "first text")
+    monkeypatch.setattr(datasets_loader, "DATASETS_DIR", str(tmp_path))
+    datasets_loader.invalidate_dataset_cache()
+    yield
+    datasets_loader.invalidate_dataset_cache()
+    clear_reader_cache()
+
+
+def _read(tool):
+    result, _ = tool(tool.Input(mrn=100, csn=500, note_id=1))
+    return result
+
+
+def test_repeated_reads_are_served_from_the_cache_as_copies():
+    tool = create_tool("read_patient_note", dataset="demo")
+    before = reader_cache_stats()
+
+    first = _read(tool)
+    first.note_text = "changed by the caller"
+    second = _read(create_tool("read_patient_note", dataset="demo"))
+
+    after = reader_cache_stats()
+    assert second.note_text == "first text"
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (1, 1)
+
+
+def test_reloaded_dataset_is_read_again(tmp_path):
+    tool = create_tool("read_patient_note", dataset="demo")
+    assert _read(tool).note_text == "first text"
+
+    _write_dataset(tmp_path, "second text")
+    datasets_loader.invalidate_dataset_cache("demo")
+
+    assert _read(tool).note_text == "second text"
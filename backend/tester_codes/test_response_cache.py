@@ -0,0 +1,76 @@
+"""Tests for the persistent LLM response cache."""
+
+import dataclasses
+import os
+import sys
+
+import pytest
+from pydantic import BaseModel
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.llm_provider.client as llm_client
+import core.llm_provider.registry as registry
+import core.llm_provider.response_cache as response_cache
+from core.llm_provider import call
+from core.workflow.tools.base import meta_from_llm_result
+from core.workflow_service.utils import CostTracker
+
+MESSAGES = [{"role": "user", "content": "Is smoking mentioned?"}]
+
+
+class Finding(BaseModel):
+    present: bool
+    reason: str
+
+
+@pytest.fixture(autouse=True)
+def priced_key(tmp_path, monkeypatch):
+    """A mock key billed like a real model, and an empty cache on disk."""
+    monkeypatch.setitem(registry.MODELS, "priced-mock", dataclasses.replace(
+        registry.MODELS["mock"], input_price_per_m=1.0, output_price_per_m=4.0))
+    monkeypatch.setitem(llm_client._resolved_keys, "m", {
+        "model_name": "priced-mock", "api_key": "mock:latency_ms=0,sigma=0", "key_name": "m", "key_id": "k",
+        "rpm_limit": None, "tpm_limit": None, "max_concurrency": None,
+    })
+    monkeypatch.setattr(response_cache, "LLM_RESPONSE_CACHE_PATH", str(tmp_path / "responses.sqlite"))
+    cache = response_cache._cache
+    cache._conn, cache._total_bytes = None, 0
+    yield
+    if cache._conn is not None:
+        cache._conn.close()
+    cache._conn, cache._total_bytes = None, 0
+
+
+def test_hit_returns_the_same_answer_billed_at_zero_cost():
+    paid = call(MESSAGES, key_name="m", schema=Finding, cache=True)
+    hit = call(MESSAGES, key_name="m", schema=Finding, cache=True)
+
+    assert paid.cost > 0 and not paid.cached
+    assert hit.cached
+    assert (hit.cost, hit.input_tokens, hit.output_tokens) == (0, 0, 0)
+    assert (hit.content, hit.parsed) == (paid.content, paid.parsed)
+
+    tracker = CostTracker()
+    for result in (paid, hit):
+        tracker.record("analyze", meta_from_llm_result(result), 0)
+    totals = tracker.summary()["totals"]
+    assert (totals["total_calls"], totals["total_cost"]) == (2, paid.cost)
+
+
+def test_changed_request_or_bypass_misses():
+    call(MESSAGES, key_name="m", cache=True)
+
+    assert not call(MESSAGES, key_name="m", temperature=0.2, cache=True).cached
+    assert not call(MESSAGES, key_name="m", system="Be brief", cache=True).cached
+    assert not call(MESSAGES, key_name="m", cache=False).cached
+    assert call(MESSAGES, key_name="m", cache=True).cached
+
+
+def test_entries_survive_a_restart():
+    call(MESSAGES, key_name="m", cache=True)
+    response_cache._cache._conn.close()
+    response_cache._cache._conn = None
+
+    assert call(MESSAGES, key_name="m", cache=True).cached
@@ -0,0 +1,95 @@
+"""Tests for the workflow step dependency graph."""
+
+import os
+import sys
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.workflow.agents.validator import template_references
+from core.workflow_service.step_graph import build_step_graph
+from core.workflow_service.workflow_executor import compile_workflow
+
+
+def _tool(step_id, output, **inputs):
+    return {"id": step_id, "type": "tool", "tool": "exact_keyword_count", "inputs": inputs, "output": output}
+
+
+def test_expression_reads_every_variable():
+    """A step reading 'a' and 'b' in one expression waits for both writers."""
+    steps = [
+        _tool("make_a", "a", text="first", keywords=["x"]),
+        _tool("make_b", "b", text="second", keywords=["x"]),
+        _tool("both", "c", text="{{ a.counts | length + b.counts | length }}", keywords=["x"]),
+    ]
+    graph = build_step_graph(steps)
+
+    assert graph.steps[2].reads == {"a", "b"}
+    assert graph.depends_on["both"] == ["make_a", "make_b"]
+    assert graph.levels() == [["make_a", "make_b"], ["both"]]
+
+
+def test_template_references_in_text_and_filters():
+    assert template_references("{{ a if flag else b.x }} and {{ c|default(d) }}") == {"a", "flag", "b", "c", "d"}
+    assert template_references({"prompt": ["{legacy.field}", "{{ 'literal' ~ e }}"]}) == {"legacy", "e"}
+
+
+def test_compiled_expression_refs_cover_every_variable():
+    """The executor's loop analysis sees the second variable of an expression too."""
+    steps = [
+        _tool("make_a", "a", text="first", keywords=["x"]),
+        {"id": "loop", "type": "loop", "for": "item", "in": "a.counts", "body": [
+            _tool("use", "used", text="{{ item ~ prev }}", keywords=["x"]),
+            _tool("carry", "prev", text="{{ item }}", keywords=["x"]),
+        ]},
+    ]
+    plan = compile_workflow({"steps": steps}, loop_concurrency=4)
+
+    loop = plan.nodes[1]
+    assert loop.body[0].refs >= {"item", "prev"}
+    assert loop.sequential_reason == "step 'use' reads 'prev' from a previous iteration"
+
+
+def _branches():
+    """Medication and diagnosis branches that both loop over 'item', then a summary of both."""
+    return [
+        _tool("get_med_ids", "med_ids", text="meds", keywords=["x"]),
+        _tool("get_dx_ids", "dx_ids", text="dx", keywords=["x"]),
+        {"id": "loop_meds", "type": "loop", "for": "item", "in": "med_ids", "output_dict": "meds", "body": [
+            _tool("med", "med_count", text="{{ item }}", keywords=["x"]),
+        ]},
+        {"id": "loop_dx", "type": "loop", "for": "item", "in": "dx_ids", "output_dict": "dx", "body": [
+            _tool("dx", "dx_count", text="{{ item }}", keywords=["x"]),
+        ]},
+        _tool("summarize", "summary", text="{{ meds }} {{ dx }}", keywords=["x"]),
+    ]
+
+
+def test_independent_branches_share_levels():
+    graph = build_step_graph(_branches())
+
+    assert graph.levels() == [["get_med_ids", "get_dx_ids"], ["loop_meds", "loop_dx"], ["summarize"]]
+    assert graph.max_parallelism() == 2
+    assert graph.depends_on["loop_dx"] == ["get_dx_ids"]
+    assert graph.depends_on["summarize"] == ["loop_meds", "loop_dx"]
+
+
+def test_critical_path_follows_the_heaviest_chain():
+    graph = build_step_graph(_branches())
+
+    assert graph.critical_path() == (["get_med_ids", "loop_meds", "summarize"], 3.0)
+    assert graph.critical_path({"loop_meds": 12.0, "loop_dx": 3.5}) == (["get_med_ids", "loop_meds", "summarize"], 14.0)
+    assert graph.critical_path({"loop_dx": 20.0}) == (["get_dx_ids", "loop_dx", "summarize"], 22.0)
+
+
+def test_write_after_read_is_ordered():
+    """A step overwriting a variable waits for the earlier step that reads it."""
+    steps = [
+        _tool("make", "a", text="first", keywords=["x"]),
+        _tool("read", "b", text="{{ a }}", keywords=["x"]),
+        _tool("overwrite", "a", text="second", keywords=["x"]),
+    ]
+    graph = build_step_graph(steps)
+
+    assert graph.depends_on["overwrite"] == ["read"]
+    assert graph.levels() == [["make"], ["read"], ["overwrite"]]
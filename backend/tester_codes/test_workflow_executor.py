@@ -0,0 +1,147 @@
+"""Tests for the compiled workflow executor's loops."""
+
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.dataloaders.datasets_loader as datasets_loader
+from core.workflow_service.utils import CostTracker
+from core.workflow_service.workflow_executor import ConcurrencyBudget, compile_workflow, concurrency_scope
+
+MRN = 100
+CSN = 500
+
+
+@pytest.fixture(autouse=True)
+def dataset(tmp_path, monkeypatch):
+    """A one-patient dataset 'demo' with four notes."""
+    notes = [{"note_id": n, "note_text": f"note {n} mentions cough", "note_type": "Progress"} for n in range(4)]
+    os.makedirs(tmp_path / "demo")
+    with open(tmp_path / "demo" / "dataset.json", "w") as f:
+        json.dump([{"mrn": MRN, "encounters": [{"csn": CSN, "notes": notes}]}], f)
+    monkeypatch.setattr(datasets_loader, "DATASETS_DIR", str(tmp_path))
+
+
+def _workflow():
+    """Count keywords in every note but note 1, whose iteration skips the if branch."""
+    return {"steps": [
+        {"id": "ids", "type": "tool", "tool": "get_patient_notes_ids", "inputs": {}, "output": "note_ids"},
+        {"id": "loop", "type": "loop", "for": "nid", "in": "note_ids", "output_dict": "per_note", "body": [
+            {"id": "read", "type": "tool", "tool": "read_patient_note", "inputs": {"note_id": "{{ nid }}"},
+             "output": "note"},
+            {"id": "skip", "type": "if",
+             "condition": {"type": "comparison", "left": "nid", "operator": "!=", "right": 1},
+             "then": {"id": "count", "type": "tool", "tool": "exact_keyword_count",
+                      "inputs": {"text": "{{ note.note_text }}", "keywords": ["cough"]}, "output": "counted"}},
+        ]},
+        {"id": "summary", "type": "tool", "tool": "build_text", "inputs": {"source": "{{ per_note }}"}, "output": "text"},
+    ], "output_definitions": [
+        {"id": "def_summary", "name": "summary", "label": "Summary", "tool_name": "build_text", "step_id": "summary"},
+    ]}
+
+
+def _per_note(concurrency):
+    """The loop's output_dict, as the step after the loop saw it."""
+    plan = compile_workflow(_workflow(), dataset="demo", loop_concurrency=concurrency)
+    result = plan.run(MRN, CSN, CostTracker())
+    assert not result["step_errors"]
+    (value,) = result["output_values"]
+    return value["values"]
+
+
+def test_loop_runs_concurrently():
+    plan = compile_workflow(_workflow(), dataset="demo", loop_concurrency=4)
+    loop = plan.nodes[1]
+    assert loop.sequential_reason is None
+    assert loop.max_concurrency == 4
+
+
+def test_sequential_loop_matches_concurrent_loop():
+    """A skipped branch sees no value left by the previous item, in order or concurrently."""
+    sequential = _per_note(1)
+    assert "'1': {'note': " in sequential["text"]
+    assert "note_text='note 1 mentions cough', etl_datetime=None), 'counted': None}" in sequential["text"]
+    assert sequential == _per_note(4)
+
+
+def _store_workflow():
+    """Append every note's text to a store inside the loop, then join the store."""
+    return {"steps": [
+        {"id": "ids", "type": "tool", "tool": "get_patient_notes_ids", "inputs": {}, "output": "note_ids"},
+        {"id": "init", "type": "tool", "tool": "init_store", "inputs": {"name": "texts", "type": "list"}, "output": "s"},
+        {"id": "loop", "type": "loop", "for": "nid", "in": "note_ids", "body": [
+            {"id": "read", "type": "tool", "tool": "read_patient_note", "inputs": {"note_id": "{{ nid }}"},
+             "output": "note"},
+            {"id": "count", "type": "tool", "tool": "exact_keyword_count",
+             "inputs": {"text": "{{ note.note_text }}", "keywords": ["cough"]}, "output": "counted"},
+            {"id": "keep", "type": "tool", "tool": "store_append",
+             "inputs": {"store": "texts", "value": "{{ note.note_text }}"}, "output": "kept"},
+        ]},
+        {"id": "joined", "type": "tool", "tool": "build_text", "inputs": {"source": "texts"}, "output": "text"},
+    ], "output_definitions": [
+        {"id": "def_count", "name": "count", "label": "Count", "tool_name": "exact_keyword_count", "step_id": "count"},
+        {"id": "def_joined", "name": "joined", "label": "Joined", "tool_name": "build_text", "step_id": "joined"},
+    ]}
+
+
+def _outputs(workflow, concurrency):
+    plan = compile_workflow(workflow, dataset="demo", loop_concurrency=concurrency)
+    result = plan.run(MRN, CSN, CostTracker())
+    return [(v["output_definition_id"], v["resource_id"], v["values"]) for v in result["output_values"]]
+
+
+def test_store_appends_and_outputs_keep_item_order():
+    plan = compile_workflow(_store_workflow(), dataset="demo", loop_concurrency=4)
+    assert plan.nodes[2].sequential_reason is None
+
+    sequential = _outputs(_store_workflow(), 1)
+    for _ in range(3):
+        assert _outputs(_store_workflow(), 4) == sequential
+    assert [resource for definition, resource, _ in sequential if definition == "def_count"] == ["0", "1", "2", "3"]
+    (joined,) = [values for definition, _, values in sequential if definition == "def_joined"]
+    texts = [f"note {n} mentions cough" for n in range(4)]
+    assert all(joined["text"].index(a) < joined["text"].index(b) for a, b in zip(texts, texts[1:]))
+
+
+def test_loop_reading_its_own_store_runs_in_order():
+    workflow = _store_workflow()
+    workflow["steps"][2]["body"].append(
+        {"id": "peek", "type": "tool", "tool": "store_read", "inputs": {"store": "texts"}, "output": "seen"})
+    plan = compile_workflow(workflow, dataset="demo", loop_concurrency=4)
+
+    loop = plan.nodes[2]
+    assert loop.sequential_reason == "step 'peek' reads store 'texts' that the loop appends to"
+    assert loop.max_concurrency == 1
+
+
+def test_runs_in_a_scope_share_one_thread_budget(monkeypatch):
+    """Four patients whose loops each want four threads get two extra threads between them."""
+    budget = ConcurrencyBudget(2)
+    peak = []
+    take = budget.take
+
+    def recording_take(wanted):
+        taken = take(wanted)
+        peak.append(budget.in_use)
+        return taken
+
+    monkeypatch.setattr(budget, "take", recording_take)
+    plan = compile_workflow(_store_workflow(), dataset="demo", loop_concurrency=4, step_concurrency=4)
+
+    def run_patient(_):
+        with concurrency_scope(budget):
+            result = plan.run(MRN, CSN, CostTracker())
+        return [(v["output_definition_id"], v["resource_id"], v["values"]) for v in result["output_values"]]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        outputs = list(pool.map(run_patient, range(8)))
+
+    assert all(output == _outputs(_store_workflow(), 1) for output in outputs)
+    assert 0 < max(peak) <= 2
+    assert budget.in_use == 0
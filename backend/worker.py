@@ -0,0 +1,165 @@
+"""
+Experiment worker: runs the experiments queued by POST /api/workflow/experiments.
+
+Usage: python worker.py [--jobs N] [--poll SECONDS] [--metrics-port PORT]
+
+Claims pending jobs from the experiment job queue (EXPERIMENT_QUEUE_PATH),
+heartbeats while they run and applies the cancel and pause requests made
+through the API. Jobs whose worker stopped heartbeating are requeued by the
+next worker that polls, and resume from the patients they had finished.
+On SIGINT/SIGTERM running jobs stop and go back to the queue.
+
+The worker's LLM calls are its own: it serves their Prometheus metrics on
+--metrics-port and publishes its hedging and rate-limiter stats for the
+API's /api/api-keys/hedging and /api/api-keys/rate-limits to include.
+
+Rate limits are enforced per process too. Set LLM_RATE_LIMIT_PROCESSES to
+the number of workers plus the API server, in every one of them, so that
+together they stay within each key's rpm/tpm/max_concurrency.
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import uuid
+from typing import Dict
+
+from api.workflows import run_experiment_job
+from core.dataloaders.job_queue_loader import (
+    LOST_REASON, PAUSE_REASON, REQUEUE_REASON,
+    claim_job, heartbeat_job, requeue_stale_jobs
+)
+from core.llm_provider import publish_process_stats, remove_process_stats
+from core.llm_provider.deadline import CancellationToken
+from prometheus_client import start_http_server
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between polls of an empty queue
+EXPERIMENT_WORKER_POLL_SECONDS = float(os.getenv("EXPERIMENT_WORKER_POLL_SECONDS", "2"))
+# Seconds between heartbeats of a running job (keep well below EXPERIMENT_JOB_STALE_SECONDS)
+EXPERIMENT_JOB_HEARTBEAT_SECONDS = float(os.getenv("EXPERIMENT_JOB_HEARTBEAT_SECONDS", "5"))
+# Port of the worker's Prometheus metrics endpoint (0 disables it)
+EXPERIMENT_WORKER_METRICS_PORT = int(os.getenv("EXPERIMENT_WORKER_METRICS_PORT", "9101"))
+# Seconds between snapshots of the worker's hedging and rate-limiter stats
+LLM_PROCESS_STATS_PUBLISH_SECONDS = float(os.getenv("LLM_PROCESS_STATS_PUBLISH_SECONDS", "5"))
+
+# Token reason for each control request a heartbeat can return
+_CONTROL_REASONS = {
+    "cancel": "Experiment cancelled",
+    "pause": PAUSE_REASON,
+    "lost": LOST_REASON,
+}
+
+
+def _heartbeat(experiment_name: str, worker_id: str, token: CancellationToken, done: threading.Event):
+    """Heartbeat a job until done, cancelling its token when a control request arrives."""
+    while not done.wait(EXPERIMENT_JOB_HEARTBEAT_SECONDS):
+        try:
+            control = heartbeat_job(experiment_name, worker_id)
+        except Exception as e:
+            logger.error(f"Heartbeat failed for experiment {experiment_name}: {e}")
+            continue
+        if control in _CONTROL_REASONS and not token.cancelled:
+            logger.info(f"Experiment {experiment_name}: {control} requested")
+            token.cancel(_CONTROL_REASONS[control])
+
+
+def _publish_stats(worker_id: str, stopping: threading.Event):
+    """Publish the worker's hedging and rate-limiter stats until it stops."""
+    while not stopping.wait(LLM_PROCESS_STATS_PUBLISH_SECONDS):
+        try:
+            publish_process_stats(worker_id)
+        except Exception as e:
+            logger.error(f"Error publishing LLM stats of worker {worker_id}: {e}")
+    remove_process_stats(worker_id)
+
+
+def _run_job(job: dict, worker_id: str, running: Dict[str, CancellationToken], slots: threading.Semaphore):
+    experiment_name = job["experiment_name"]
+    token = running[experiment_name]
+    done = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(experiment_name, worker_id, token, done),
+                            name=f"heartbeat-{experiment_name}", daemon=True)
+    beat.start()
+    try:
+        run_experiment_job(job, token)
+    except Exception as e:
+        logger.error(f"Experiment job {experiment_name} crashed: {e}")
+    finally:
+        done.set()
+        beat.join()
+        running.pop(experiment_name, None)
+        slots.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued experiments")
+    parser.add_argument("--jobs", type=int, default=int(os.getenv("EXPERIMENT_WORKER_JOBS", "1")),
+                        help="Experiments this worker runs at once")
+    parser.add_argument("--poll", type=float, default=EXPERIMENT_WORKER_POLL_SECONDS,
+                        help="Seconds between polls of an empty queue")
+    parser.add_argument("--metrics-port", type=int, default=EXPERIMENT_WORKER_METRICS_PORT,
+                        help="Port of the Prometheus metrics endpoint (0 disables it)")
+    args = parser.parse_args()
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    running: Dict[str, CancellationToken] = {}
+    slots = threading.Semaphore(max(1, args.jobs))
+    stopping = threading.Event()
+    threads = []
+
+    def stop(signum, frame):
+        logger.info(f"Worker {worker_id} stopping; returning {len(running)} running jobs to the queue")
+        stopping.set()
+        for token in list(running.values()):
+            token.cancel(REQUEUE_REASON)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    if args.metrics_port:
+        try:
+            start_http_server(args.metrics_port)
+            logger.info(f"Worker metrics on port {args.metrics_port}")
+        except OSError as e:
+            logger.error(f"Cannot serve worker metrics on port {args.metrics_port}: {e}")
+    publisher = threading.Thread(target=_publish_stats, args=(worker_id, stopping),
+                                 name="publish-stats", daemon=True)
+    publisher.start()
+    logger.info(f"Worker {worker_id} started ({args.jobs} job(s) at a time)")
+
+    while not stopping.is_set():
+        if not slots.acquire(timeout=args.poll):
+            continue
+        try:
+            requeue_stale_jobs()
+            job = None if stopping.is_set() else claim_job(worker_id)
+        except Exception as e:
+            logger.error(f"Error polling the experiment queue: {e}")
+            job = None
+        if job is None:
+            slots.release()
+            stopping.wait(args.poll)
+            continue
+
+        running[job["experiment_name"]] = CancellationToken()
+        thread = threading.Thread(target=_run_job, args=(job, worker_id, running, slots),
+                                  name=f"experiment-{job['experiment_name']}")
+        thread.start()
+        threads = [t for t in threads if t.is_alive()] + [thread]
+
+    for thread in threads:
+        thread.join()
+    publisher.join()
+    logger.info(f"Worker {worker_id} stopped")
+
+
+if __name__ == "__main__":
+    main()